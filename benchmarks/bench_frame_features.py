@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Benchmark: osobne skanowanie chunka (VAD energia + ZCR, poziom audio) vs
+wspólny FrameFeatureExtractor liczony raz na chunk w pętli przetwarzania
+"""
+
+import sys
+import time
+import argparse
+import numpy as np
+from pathlib import Path
+
+# Dodaj src do ścieżki
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from audio_format import to_float32, to_int16
+from frame_features import FrameFeatureExtractor
+from voice_activity_detector import SimpleVAD
+
+
+def make_chunks(count: int, chunk_size: int) -> list:
+    """Chunki (frames x 1) jak z kolejki AudioCapture"""
+    rng = np.random.default_rng(0)
+    audio = rng.normal(0, 0.1, (count, chunk_size, 1)).astype(np.float32)
+    return list(audio)
+
+
+def separate_pass(vad: SimpleVAD, audio_chunk: np.ndarray):
+    """Dotychczasowa ścieżka: każdy etap liczy swoje z własnymi kopiami"""
+    # Pipeline: flatten dla VAD, VAD liczy energię i ZCR
+    frame = audio_chunk.flatten()
+    vad.calculate_energy(frame)
+    vad.calculate_zero_crossing_rate(frame)
+    # Wskaźnik poziomu (AudioCapture.get_audio_level) i szczyt
+    level = to_float32(audio_chunk.flatten())
+    rms = np.sqrt(np.mean(level**2))
+    20 * np.log10(max(rms, 1e-12))
+    np.max(np.abs(level))
+
+
+def shared_pass(extractor: FrameFeatureExtractor, audio_chunk: np.ndarray):
+    """Nowa ścieżka: jeden przebieg, wynik współdzielony przez etapy"""
+    features = extractor.compute(audio_chunk.reshape(-1))
+    min(1.0, features.rms * 10)
+    features.level_db
+
+
+def time_per_chunk(function, state, chunks: list, repeats: int) -> float:
+    """Najlepszy czas CPU na chunk (µs)"""
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.process_time()
+        for audio_chunk in chunks:
+            function(state, audio_chunk)
+        best = min(best, time.process_time() - start)
+    return 1e6 * best / len(chunks)
+
+
+def main():
+    """Główna funkcja benchmarku"""
+    parser = argparse.ArgumentParser(description="Benchmark cech chunka")
+    parser.add_argument(
+        "--chunk-sizes",
+        nargs="+",
+        type=int,
+        default=[480, 1024],
+        help="Rozmiary chunka (default: 480 1024)",
+    )
+    parser.add_argument("--chunks", type=int, default=5000, help="Liczba chunków")
+    parser.add_argument("--repeats", type=int, default=5, help="Powtórzenia")
+    args = parser.parse_args()
+
+    print("🧮 Benchmark: cechy chunka - osobne skanowanie vs wspólny przebieg")
+    print("=" * 50)
+
+    for chunk_size in args.chunk_sizes:
+        chunks = make_chunks(args.chunks, chunk_size)
+        for sample_format in ("float32", "int16"):
+            data = (
+                chunks if sample_format == "float32" else [to_int16(c) for c in chunks]
+            )
+            separate = time_per_chunk(separate_pass, SimpleVAD(), data, args.repeats)
+            shared = time_per_chunk(
+                shared_pass, FrameFeatureExtractor(), data, args.repeats
+            )
+            print(
+                f"📊 chunk={chunk_size:5d} {sample_format:<8} "
+                f"osobno {separate:6.1f} µs, wspólnie {shared:6.1f} µs "
+                f"({separate / max(shared, 1e-9):.2f}x)"
+            )
+
+    return True
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
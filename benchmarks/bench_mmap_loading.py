@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Benchmark: ładowanie wag Whisper standardowo vs przez mmap w wielu procesach
+Raportuje czas ładowania i pamięć (RSS/USS/PSS) na proces - do doboru
+liczby workerów na host
+"""
+
+import sys
+import time
+import argparse
+import multiprocessing as mp
+import numpy as np
+from pathlib import Path
+
+# Dodaj src do ścieżki
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+
+def worker(model: str, mmap_weights: bool, barrier, results):
+    """Załaduj model, dotknij wag transkrypcją i zmierz pamięć razem z innymi"""
+    from stt_engine import WhisperSTTEngine
+    from model_weights import process_memory
+
+    engine = WhisperSTTEngine(
+        model_name=model, device="cpu", mmap_weights=mmap_weights, warmup=True
+    )
+    start = time.time()
+    loaded = engine.load_model()
+    load_time = time.time() - start
+
+    # Pomiar, gdy wszystkie procesy trzymają model (PSS dzieli strony wspólne)
+    barrier.wait()
+    memory = process_memory()
+    results.put({"loaded": loaded, "load_time": load_time, **memory})
+    barrier.wait()
+
+
+def run_mode(model: str, processes: int, mmap_weights: bool) -> list:
+    """Uruchom procesy dla jednego trybu ładowania"""
+    ctx = mp.get_context("spawn")
+    barrier = ctx.Barrier(processes)
+    results = ctx.Queue()
+    workers = [
+        ctx.Process(target=worker, args=(model, mmap_weights, barrier, results))
+        for _ in range(processes)
+    ]
+    for p in workers:
+        p.start()
+    stats = [results.get() for _ in workers]
+    for p in workers:
+        p.join()
+    return stats
+
+
+def main():
+    """Główna funkcja benchmarku"""
+    parser = argparse.ArgumentParser(description="Benchmark wag mmap")
+    parser.add_argument("--model", default="base", help="Model Whisper (default: base)")
+    parser.add_argument("--processes", type=int, default=4, help="Liczba procesów")
+    args = parser.parse_args()
+
+    print("💾 Benchmark: wagi Whisper standardowo vs mmap")
+    print("=" * 50)
+    print(f"🤖 Model: {args.model}, procesy: {args.processes}")
+
+    # Konwersja checkpointu poza pomiarem
+    from stt_engine import WhisperSTTEngine
+
+    engine = WhisperSTTEngine(
+        model_name=args.model, device="cpu", mmap_weights=True, warmup=False
+    )
+    if not engine.load_model():
+        print("❌ Nie można przygotować checkpointu mmap")
+        return False
+    engine.unload_model()
+
+    summary = {}
+    for mmap_weights in (False, True):
+        label = "mmap" if mmap_weights else "standard"
+        print(f"\n🔄 {label}...")
+        stats = run_mode(args.model, args.processes, mmap_weights)
+        if not all(s["loaded"] for s in stats):
+            print("❌ Nie wszystkie procesy załadowały model")
+            return False
+
+        for i, s in enumerate(stats):
+            print(
+                f"   #{i}: ładowanie {s['load_time']:.2f}s, RSS {s['rss_mb']:.0f} MB, "
+                f"prywatna {s.get('uss_mb', 0):.0f} MB, PSS {s.get('pss_mb', 0):.0f} MB"
+            )
+        summary[label] = {
+            "load_time": float(np.mean([s["load_time"] for s in stats])),
+            "uss_mb": float(np.mean([s.get("uss_mb", 0) for s in stats])),
+            "pss_total_mb": float(sum(s.get("pss_mb", 0) for s in stats)),
+        }
+
+    print("\n📋 PODSUMOWANIE")
+    print("=" * 30)
+    for label, s in summary.items():
+        print(
+            f"📊 {label}: ładowanie {s['load_time']:.2f}s, "
+            f"prywatna/proces {s['uss_mb']:.0f} MB, "
+            f"host ({args.processes} proc.) {s['pss_total_mb']:.0f} MB"
+        )
+
+    try:
+        import psutil
+
+        available = psutil.virtual_memory().available / (1024 * 1024)
+        mmap = summary["mmap"]
+        shared = max(mmap["pss_total_mb"] - mmap["uss_mb"] * args.processes, 0)
+        workers = int((available - shared) / max(mmap["uss_mb"], 1))
+        print(f"🧮 Dostępne {available:.0f} MB → ok. {workers} workerów (mmap)")
+    except ImportError:
+        pass
+
+    return True
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
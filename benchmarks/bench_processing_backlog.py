@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Benchmark: nadrabianie zaległości pętli przetwarzania po przestoju
+Kolejka AudioCapture jest zapełniana jak po zablokowaniu wątku (GC,
+swap, wolny dysk), potem opróżniana chunk po chunku (dotychczasowa
+pętla) albo jednym wsadem (get_audio_chunks + _process_audio_batch).
+Mierzy czas odzyskania i zgodność decyzji VAD obu ścieżek
+"""
+
+import sys
+import time
+import argparse
+import numpy as np
+from pathlib import Path
+
+# Dodaj src do ścieżki
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+sys.path.insert(0, str(Path(__file__).parent))
+
+from vad_corpus import SAMPLE_RATE, build_corpus
+
+
+def make_pipeline(vad_type: str, chunk_size: int):
+    """Pipeline bez STT - tylko VAD i segmentacja"""
+    from realtime_pipeline import RealtimeSTTPipeline
+
+    pipeline = RealtimeSTTPipeline(
+        sample_rate=SAMPLE_RATE,
+        chunk_size=chunk_size,
+        use_webrtc_vad=False,
+        enable_stt=False,
+        vad_type=vad_type,
+    )
+    decisions = []
+    pipeline.set_level_callback(lambda features, is_speech: decisions.append(is_speech))
+    return pipeline, decisions
+
+
+def drain(pipeline, chunks: list, batched: bool) -> float:
+    """Zapełnij kolejkę (przestój) i zmierz czas jej opróżnienia"""
+    capture = pipeline.audio_capture
+    for chunk in chunks:
+        capture._audio_callback(chunk, len(chunk), None, None)
+
+    start = time.perf_counter()
+    while not capture.audio_queue.empty():
+        if batched:
+            audio_chunks = capture.get_audio_chunks(timeout=0)
+            if len(audio_chunks) == 1:
+                pipeline._process_audio_chunk(audio_chunks[0])
+            elif audio_chunks:
+                pipeline._process_audio_batch(audio_chunks)
+        else:
+            pipeline._process_audio_chunk(capture.get_audio_chunk(timeout=0))
+    return time.perf_counter() - start
+
+
+def main():
+    """Główna funkcja benchmarku"""
+    parser = argparse.ArgumentParser(description="Benchmark nadrabiania zaległości")
+    parser.add_argument(
+        "--vad",
+        nargs="+",
+        default=["simple", "adaptive", "spectral", "cascade"],
+        help="Typy VAD",
+    )
+    parser.add_argument("--chunk-size", type=int, default=1024, help="Rozmiar chunka")
+    parser.add_argument(
+        "--stall", type=float, default=6.0, help="Długość przestoju (s)"
+    )
+    parser.add_argument("--stalls", type=int, default=20, help="Liczba przestojów")
+    args = parser.parse_args()
+
+    print("🚀 BENCHMARK NADRABIANIA ZALEGŁOŚCI")
+    print("=" * 50)
+
+    audio = np.concatenate([scene.audio for scene in build_corpus(60.0)])
+    stall_chunks = int(args.stall * SAMPLE_RATE) // args.chunk_size
+    # Kolejka AudioCapture mieści 100 chunków - dłuższy przestój gubi audio
+    stall_chunks = min(stall_chunks, 100)
+    chunks = [
+        audio[i : i + args.chunk_size].reshape(-1, 1)
+        for i in range(0, len(audio) - args.chunk_size + 1, args.chunk_size)
+    ]
+    stalls = [
+        chunks[i : i + stall_chunks]
+        for i in range(0, len(chunks) - stall_chunks + 1, stall_chunks)
+    ][: args.stalls]
+    stall_seconds = stall_chunks * args.chunk_size / SAMPLE_RATE
+    print(
+        f"📊 {len(stalls)} przestojów po {stall_seconds:.1f}s "
+        f"({stall_chunks} chunków po {args.chunk_size})"
+    )
+
+    all_ok = True
+    for vad_type in args.vad:
+        times = {}
+        decisions = {}
+        for batched in (False, True):
+            pipeline, states = make_pipeline(vad_type, args.chunk_size)
+            times[batched] = [drain(pipeline, stall, batched) for stall in stalls]
+            decisions[batched] = states
+
+        same = decisions[False] == decisions[True]
+        all_ok &= same
+        single = np.median(times[False]) * 1000
+        batch = np.median(times[True]) * 1000
+        print(
+            f"📊 {vad_type:<9} odzyskanie po {stall_seconds:.1f}s: "
+            f"chunk po chunku {single:6.1f} ms, wsad {batch:6.1f} ms "
+            f"({single / max(batch, 1e-9):.1f}x), "
+            f"decyzje VAD {'✅ identyczne' if same else '❌ różne'}"
+        )
+
+    return all_ok
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
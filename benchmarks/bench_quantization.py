@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Benchmark: Whisper fp32 vs dynamiczna kwantyzacja int8 na CPU
+Porównuje WER proxy (int8 względem fp32), pamięć (RSS) i real-time factor
+"""
+
+import sys
+import time
+import wave
+import argparse
+import numpy as np
+from pathlib import Path
+
+# Dodaj src do ścieżki
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+
+def load_wav(path: str) -> np.ndarray:
+    """Wczytaj plik WAV 16-bit jako float32 mono 16 kHz"""
+    from stt_backend import prepare_audio
+
+    with wave.open(path, "rb") as f:
+        frames = f.readframes(f.getnframes())
+        audio = np.frombuffer(frames, dtype="<i2").astype(np.float32) / 32768.0
+        if f.getnchannels() > 1:
+            audio = audio.reshape(-1, f.getnchannels()).mean(axis=1)
+        return prepare_audio(audio, f.getframerate())
+
+
+def word_error_rate(reference: str, hypothesis: str) -> float:
+    """WER hipotezy względem referencji (odległość edycyjna na słowach)"""
+    ref = reference.lower().split()
+    hyp = hypothesis.lower().split()
+    if not ref:
+        return 0.0 if not hyp else 1.0
+
+    distances = list(range(len(hyp) + 1))
+    for i, ref_word in enumerate(ref, 1):
+        previous, distances[0] = distances[0], i
+        for j, hyp_word in enumerate(hyp, 1):
+            previous, distances[j] = distances[j], min(
+                distances[j] + 1,
+                distances[j - 1] + 1,
+                previous + (ref_word != hyp_word),
+            )
+    return distances[-1] / len(ref)
+
+
+def rss_mb() -> float:
+    """Pamięć RSS procesu w MB"""
+    import psutil
+
+    return psutil.Process().memory_info().rss / (1024 * 1024)
+
+
+def bench_precision(model: str, precision: str, audio: np.ndarray, runs: int) -> dict:
+    """Zmierz ładowanie, pamięć i RTF dla jednej precyzji"""
+    from stt_engine import WhisperSTTEngine
+
+    rss_before = rss_mb()
+    engine = WhisperSTTEngine(model_name=model, device="cpu", cpu_precision=precision)
+
+    start = time.time()
+    if not engine.load_model():
+        raise RuntimeError(f"Nie można załadować modelu {model} ({precision})")
+    load_time = time.time() - start
+    rss_model = rss_mb() - rss_before
+
+    # Rozgrzewka (alokacje, pierwsze wywołania kerneli)
+    engine.transcribe_audio(audio[:16000])
+
+    times = []
+    text = ""
+    for _ in range(runs):
+        engine.clear_context()
+        result = engine.transcribe_audio(audio)
+        if result is None:
+            engine.unload_model()
+            raise RuntimeError(f"Transkrypcja nie powiodła się ({precision})")
+        times.append(result.processing_time)
+        text = result.text
+
+    engine.unload_model()
+    duration = len(audio) / 16000
+    return {
+        "precision": precision,
+        "load_time": load_time,
+        "rss_mb": rss_model,
+        "rtf": float(np.median(times)) / duration,
+        "text": text,
+    }
+
+
+def main():
+    """Główna funkcja benchmarku"""
+    parser = argparse.ArgumentParser(description="Benchmark kwantyzacji int8")
+    parser.add_argument("--model", default="base", help="Model Whisper (default: base)")
+    parser.add_argument("--audio", help="Plik WAV z mową (default: sygnał syntetyczny)")
+    parser.add_argument("--runs", type=int, default=3, help="Liczba powtórzeń")
+    args = parser.parse_args()
+
+    print("⚡ Benchmark: Whisper fp32 vs int8 (CPU)")
+    print("=" * 50)
+
+    if args.audio:
+        audio = load_wav(args.audio)
+    else:
+        from stt_client import generate_test_signal
+
+        print("⚠️ Brak --audio: sygnał syntetyczny (WER proxy bez znaczenia)")
+        audio = generate_test_signal(20.0, seed=0)
+
+    print(f"🎵 Audio: {len(audio) / 16000:.1f}s, model: {args.model}")
+
+    results = []
+    for precision in ("fp32", "int8"):
+        print(f"\n🔄 {precision}...")
+        try:
+            result = bench_precision(args.model, precision, audio, args.runs)
+        except RuntimeError as e:
+            print(f"❌ {e}")
+            return False
+        results.append(result)
+        print(f"   ⏱️ Ładowanie: {result['load_time']:.2f}s")
+        print(f"   💾 RSS modelu: {result['rss_mb']:.0f} MB")
+        print(f"   🚀 RTF: {result['rtf']:.3f}")
+        print(f"   📝 '{result['text'][:80]}'")
+
+    fp32, int8 = results
+    print("\n📋 PODSUMOWANIE")
+    print("=" * 30)
+    print(f"🎯 WER proxy (int8 vs fp32): {word_error_rate(fp32['text'], int8['text']):.1%}")
+    print(f"🚀 Przyspieszenie: {fp32['rtf'] / max(int8['rtf'], 1e-9):.2f}x")
+    print(f"💾 Pamięć int8/fp32: {int8['rss_mb'] / max(fp32['rss_mb'], 1e-9):.2f}")
+    return True
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+Benchmark: resampling liniowy (np.interp) vs strumieniowy filtr polifazowy
+Porównuje przepustowość (próbki wejściowe/s, chunkami jak z mikrofonu),
+tłumienie aliasów i zniekształcenie tonu w paśmie
+"""
+
+import sys
+import time
+import argparse
+import numpy as np
+from pathlib import Path
+
+# Dodaj src do ścieżki
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from resampler import StreamingResampler, resample_polyphase
+from stt_backend import resample_linear
+
+TARGET_SR = 16000
+
+
+def tone(freq: float, sample_rate: int, seconds: float) -> np.ndarray:
+    """Sinus o amplitudzie 0.5"""
+    t = np.arange(int(sample_rate * seconds)) / sample_rate
+    return (0.5 * np.sin(2 * np.pi * freq * t)).astype(np.float32)
+
+
+def rms_db(audio: np.ndarray, reference: float) -> float:
+    """Poziom RMS względem referencji (dB), bez brzegów sygnału"""
+    trimmed = audio[200:-200]
+    rms = np.sqrt(np.mean(trimmed.astype(np.float64) ** 2))
+    return 20 * np.log10(max(rms, 1e-12) / reference)
+
+
+def methods():
+    """Metody do porównania: nazwa -> funkcja (audio, orig_sr) -> audio 16 kHz"""
+    table = {
+        "linear": lambda audio, sr: resample_linear(audio, sr, TARGET_SR),
+        "polyphase": lambda audio, sr: resample_polyphase(audio, sr, TARGET_SR),
+    }
+    try:
+        from math import gcd
+
+        from scipy.signal import resample_poly
+
+        def scipy_poly(audio, sr):
+            divisor = gcd(sr, TARGET_SR)
+            return resample_poly(audio, TARGET_SR // divisor, sr // divisor)
+
+        table["scipy"] = scipy_poly
+    except ImportError:
+        pass
+    return table
+
+
+def bench_quality(method, orig_sr: int) -> dict:
+    """Tłumienie aliasu (ton powyżej 8 kHz) i błąd tonu 1 kHz"""
+    reference = 0.5 / np.sqrt(2)
+    alias_freqs = [f for f in (9000, 11000, 15000, 20000) if f < orig_sr / 2]
+    alias = max(
+        rms_db(method(tone(f, orig_sr, 1.0), orig_sr), reference) for f in alias_freqs
+    )
+
+    output = method(tone(1000, orig_sr, 1.0), orig_sr)
+    expected = tone(1000, TARGET_SR, 1.0)[: len(output)]
+    error = output[: len(expected)] - expected
+    distortion = rms_db(error, reference)
+    return {"alias_db": alias, "passband_error_db": distortion}
+
+
+def bench_streaming(orig_sr: int, seconds: float, chunk_ms: float) -> float:
+    """Przepustowość StreamingResampler chunkami jak z callbacku mikrofonu"""
+    audio = np.random.default_rng(0).normal(0, 0.1, int(orig_sr * seconds))
+    audio = audio.astype(np.float32)
+    chunk = int(orig_sr * chunk_ms / 1000)
+
+    resampler = StreamingResampler(orig_sr, TARGET_SR)
+    start = time.perf_counter()
+    for offset in range(0, len(audio), chunk):
+        resampler.process(audio[offset : offset + chunk])
+    return len(audio) / (time.perf_counter() - start)
+
+
+def bench_throughput(method, orig_sr: int, seconds: float, repeats: int) -> float:
+    """Przepustowość na całym segmencie (jak prepare_audio)"""
+    audio = np.random.default_rng(0).normal(0, 0.1, int(orig_sr * seconds))
+    audio = audio.astype(np.float32)
+    method(audio[:orig_sr], orig_sr)  # rozgrzewka + projekt filtra
+
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        method(audio, orig_sr)
+        best = min(best, time.perf_counter() - start)
+    return len(audio) / best
+
+
+def main():
+    """Główna funkcja benchmarku"""
+    parser = argparse.ArgumentParser(description="Benchmark resamplingu")
+    parser.add_argument(
+        "--rates",
+        nargs="+",
+        type=int,
+        default=[48000, 44100],
+        help="Częstotliwości wejściowe (default: 48000 44100)",
+    )
+    parser.add_argument("--seconds", type=float, default=30.0, help="Długość audio (s)")
+    parser.add_argument(
+        "--chunk-ms", type=float, default=64.0, help="Chunk strumienia (ms)"
+    )
+    parser.add_argument("--repeats", type=int, default=5, help="Powtórzenia")
+    args = parser.parse_args()
+
+    print(f"🔁 Benchmark: resampling -> {TARGET_SR}Hz")
+    print("=" * 50)
+
+    table = methods()
+    for orig_sr in args.rates:
+        print(f"\n🎚️ {orig_sr}Hz -> {TARGET_SR}Hz ({args.seconds:.0f}s audio)")
+        for name, method in table.items():
+            quality = bench_quality(method, orig_sr)
+            throughput = bench_throughput(method, orig_sr, args.seconds, args.repeats)
+            print(
+                f"   📊 {name:<10} {throughput / 1e6:7.1f} M próbek/s "
+                f"({throughput / orig_sr:7.0f}x real-time), "
+                f"alias {quality['alias_db']:7.1f} dB, "
+                f"błąd 1kHz {quality['passband_error_db']:7.1f} dB"
+            )
+
+        streaming = bench_streaming(orig_sr, args.seconds, args.chunk_ms)
+        print(
+            f"   📡 streaming  {streaming / 1e6:7.1f} M próbek/s "
+            f"({streaming / orig_sr:7.0f}x real-time, chunk {args.chunk_ms:.0f}ms)"
+        )
+
+    return True
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+Benchmark: ścieżka float32 vs natywne int16 (mikrofon -> kolejka -> VAD -> segmenty)
+Mierzy CPU na strumień (ms CPU na sekundę audio), pamięć segmentów i koszt
+jedynej konwersji do float32 na granicy STT (prepare_audio)
+"""
+
+import sys
+import time
+import argparse
+import numpy as np
+from pathlib import Path
+
+# Dodaj src do ścieżki
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from audio_format import to_int16
+
+SAMPLE_RATE = 16000
+
+
+def synthetic_stream(seconds: float) -> np.ndarray:
+    """Naprzemiennie 2 s 'mowy' (ton + harmoniczne) i 1.5 s cichego szumu"""
+    rng = np.random.default_rng(0)
+    t = np.arange(int(seconds * SAMPLE_RATE)) / SAMPLE_RATE
+    voiced = sum(0.2 / k * np.sin(2 * np.pi * 180 * k * t) for k in range(1, 6))
+    speaking = (t % 3.5) < 2.0
+    audio = np.where(speaking, voiced, 0.0) + rng.normal(0, 0.003, len(t))
+    return audio.astype(np.float32)
+
+
+def run_stream(sample_format: str, audio: np.ndarray, chunk_size: int, vad: str):
+    """Przepuść strumień przez pipeline (bez STT) i zmierz CPU"""
+    from realtime_pipeline import RealtimeSTTPipeline
+
+    pipeline = RealtimeSTTPipeline(
+        chunk_size=chunk_size,
+        enable_stt=False,
+        use_webrtc_vad=vad == "webrtc",
+        min_segment_duration=0.5,
+        silence_timeout=0.5,
+        sample_format=sample_format,
+    )
+    segments = []
+    pipeline.set_speech_callback(segments.append)
+    capture = pipeline.audio_capture
+
+    # Urządzenie oddaje próbki w natywnym formacie strumienia
+    source = to_int16(audio) if sample_format == "int16" else audio
+    chunks = [
+        source[i : i + chunk_size, None]
+        for i in range(0, len(source) - chunk_size + 1, chunk_size)
+    ]
+
+    cpu_start = time.process_time()
+    for chunk in chunks:
+        capture._audio_callback(chunk, len(chunk), None, None)
+        pipeline._process_audio_chunk(capture.get_audio_chunk(timeout=0.1))
+    pipeline._finalize_current_segment()
+    capture_cpu = time.process_time() - cpu_start
+
+    from stt_backend import prepare_audio
+
+    cpu_start = time.process_time()
+    for segment in segments:
+        prepare_audio(segment.audio_data, segment.sample_rate)
+    boundary_cpu = time.process_time() - cpu_start
+
+    return {
+        "capture_cpu": capture_cpu,
+        "boundary_cpu": boundary_cpu,
+        "segments": len(segments),
+        "segment_samples": sum(s.num_samples for s in segments),
+        "segment_bytes": sum(s.audio_data.nbytes for s in segments),
+        "chunk_bytes": chunks[0].nbytes,
+    }
+
+
+def main():
+    """Główna funkcja benchmarku"""
+    parser = argparse.ArgumentParser(description="Benchmark formatu próbek")
+    parser.add_argument(
+        "--seconds", type=float, default=300.0, help="Długość audio (s)"
+    )
+    parser.add_argument("--chunk-size", type=int, default=480, help="Chunk (próbki)")
+    parser.add_argument(
+        "--vad",
+        choices=["webrtc", "simple"],
+        default="webrtc",
+        help="VAD (webrtc bez biblioteki = SimpleVAD)",
+    )
+    parser.add_argument("--repeats", type=int, default=5, help="Powtórzenia")
+    args = parser.parse_args()
+
+    print("🎚️ Benchmark: float32 vs int16 od mikrofonu do segmentów")
+    print("=" * 50)
+    print(f"📊 {args.seconds:.0f}s audio, chunk={args.chunk_size}, VAD={args.vad}")
+
+    audio = synthetic_stream(args.seconds)
+    # Formaty na przemian w każdym powtórzeniu (mniejszy wpływ szumu CPU)
+    runs = {"float32": [], "int16": []}
+    for _ in range(args.repeats):
+        for sample_format, format_runs in runs.items():
+            format_runs.append(
+                run_stream(sample_format, audio, args.chunk_size, args.vad)
+            )
+
+    results = {}
+    for sample_format, format_runs in runs.items():
+        best = min(format_runs, key=lambda r: r["capture_cpu"])
+        results[sample_format] = best
+        per_second = 1000 * best["capture_cpu"] / args.seconds
+        print(f"\n🔄 {sample_format}")
+        print(f"   ⏱️ CPU na strumień: {per_second:.3f} ms/s audio")
+        print(f"   🔁 Konwersja przy STT: {1000 * best['boundary_cpu']:.1f} ms łącznie")
+        print(
+            f"   💾 Segmenty: {best['segments']}, "
+            f"{best['segment_bytes'] / 1024 / 1024:.1f} MB "
+            f"(chunk {best['chunk_bytes']} B)"
+        )
+
+    # Segmenter liczy czas zegarem, więc przy podawaniu szybciej niż w czasie
+    # rzeczywistym porównujemy liczbę zebranych próbek, nie granice segmentów
+    if results["float32"]["segment_samples"] != results["int16"]["segment_samples"]:
+        print("\n❌ Różne decyzje VAD dla float32 i int16")
+        return False
+
+    ratio = results["int16"]["capture_cpu"] / max(
+        results["float32"]["capture_cpu"], 1e-9
+    )
+    memory = results["int16"]["segment_bytes"] / max(
+        results["float32"]["segment_bytes"], 1
+    )
+    print("\n📋 PODSUMOWANIE")
+    print("=" * 30)
+    print(f"📊 CPU int16 / float32: {ratio:.2f}x")
+    print(f"💾 Pamięć segmentów int16 / float32: {memory:.2f}x")
+    return True
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
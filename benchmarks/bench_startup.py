@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""
+Benchmark: czas zimnego startu do pierwszego przetworzonego chunka audio
+Każdy tryb main.py / GUI uruchamiany jest w świeżym procesie (importy,
+inicjalizacja, ładowanie modelu) - ważne dla workerów uruchamianych na żądanie
+"""
+
+import sys
+import json
+import time
+import argparse
+import subprocess
+import numpy as np
+from pathlib import Path
+
+# Dodaj src do ścieżki
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+MODES = ("audio-test", "no-stt", "demo", "gui", "server")
+HEAVY_MODULES = ("torch", "whisper", "faster_whisper", "onnxruntime")
+
+
+def make_chunk(chunk_size: int = 1024) -> np.ndarray:
+    """Chunk audio jak z callbacku sounddevice (frames x channels)"""
+    rng = np.random.default_rng(0)
+    return rng.normal(0, 0.01, (chunk_size, 1)).astype(np.float32)
+
+
+def feed_first_chunk(capture, process):
+    """Przepuść chunk przez kolejkę AudioCapture (bez otwierania urządzenia)"""
+    chunk = make_chunk(capture.chunk_size)
+    capture._audio_callback(chunk, len(chunk), None, None)
+    process(capture.get_audio_chunk(timeout=1.0))
+
+
+def run_child(mode: str, model: str, backend: str) -> dict:
+    """Zmierz fazy startu jednego trybu (w procesie potomnym)"""
+    phases = {}
+    start = time.time()
+
+    def mark(name: str):
+        phases[name] = time.time() - start
+
+    if mode == "audio-test":
+        from audio_capture import AudioCapture
+
+        mark("import")
+        capture = AudioCapture()
+        mark("init")
+        feed_first_chunk(capture, capture.get_audio_level)
+
+    elif mode == "server":
+        from stt_server import STTServer
+
+        mark("import")
+        server = STTServer(port=0, stt_model=model, stt_backend=backend, num_workers=1)
+        mark("init")
+        if not server.start():
+            raise RuntimeError("Serwer nie wystartował")
+        mark("model")
+        session = server._create_session("bench", 0, {}, lambda event: None)
+        session.feed_audio(make_chunk().flatten())
+        server.stop()
+
+    else:
+        if mode == "gui":
+            import gui_application  # noqa: F401 (koszt importu GUI)
+        from realtime_pipeline import RealtimeSTTPipeline
+
+        mark("import")
+        pipeline = RealtimeSTTPipeline(
+            enable_stt=mode != "no-stt", stt_model=model, stt_backend=backend
+        )
+        mark("init")
+        if pipeline.enable_stt and not pipeline.load_stt_model():
+            raise RuntimeError("Nie można załadować modelu STT")
+        mark("model")
+        feed_first_chunk(pipeline.audio_capture, pipeline._process_audio_chunk)
+
+    mark("first_chunk")
+    return {
+        "phases": phases,
+        "first_chunk_at": time.time(),
+        "heavy_modules": [m for m in HEAVY_MODULES if m in sys.modules],
+    }
+
+
+def measure(mode: str, model: str, backend: str) -> dict:
+    """Uruchom tryb w świeżym interpreterze i zmierz czas od startu procesu"""
+    spawned_at = time.time()
+    proc = subprocess.run(
+        [
+            sys.executable,
+            __file__,
+            "--child",
+            mode,
+            "--model",
+            model,
+            "--backend",
+            backend,
+        ],
+        capture_output=True,
+        text=True,
+    )
+    lines = proc.stdout.strip().splitlines()
+    if proc.returncode != 0 or not lines:
+        error = (proc.stderr.strip().splitlines() or ["?"])[-1]
+        return {"error": error}
+
+    result = json.loads(lines[-1])
+    result["total"] = result["first_chunk_at"] - spawned_at
+    return result
+
+
+def main():
+    """Główna funkcja benchmarku"""
+    parser = argparse.ArgumentParser(description="Benchmark czasu startu")
+    parser.add_argument(
+        "--modes",
+        nargs="+",
+        choices=MODES,
+        default=list(MODES),
+        help="Tryby do zmierzenia (default: wszystkie)",
+    )
+    parser.add_argument("--model", default="base", help="Model Whisper (default: base)")
+    parser.add_argument("--backend", default="whisper", help="Backend STT")
+    parser.add_argument("--repeats", type=int, default=3, help="Powtórzenia na tryb")
+    parser.add_argument("--child", default=None, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(run_child(args.child, args.model, args.backend)))
+        return True
+
+    print("⏱️ Benchmark: zimny start do pierwszego chunka audio")
+    print("=" * 50)
+    print(f"🤖 Model: {args.model} ({args.backend}), powtórzenia: {args.repeats}")
+
+    summary = {}
+    for mode in args.modes:
+        print(f"\n🔄 {mode}...")
+        runs = [measure(mode, args.model, args.backend) for _ in range(args.repeats)]
+        errors = [r["error"] for r in runs if "error" in r]
+        if errors:
+            print(f"   ❌ {errors[0]}")
+            continue
+
+        best = min(runs, key=lambda r: r["total"])
+        phases = ", ".join(f"{k}={v:.2f}s" for k, v in best["phases"].items())
+        print(f"   📊 {phases}")
+        print(f"   📦 Ciężkie moduły: {', '.join(best['heavy_modules']) or 'brak'}")
+        summary[mode] = float(np.median([r["total"] for r in runs]))
+
+    print("\n📋 PODSUMOWANIE (mediana od startu procesu)")
+    print("=" * 30)
+    for mode, total in summary.items():
+        print(f"📊 {mode}: {total:.2f}s do pierwszego chunka")
+
+    return len(summary) == len(args.modes)
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""
+Benchmark: SimpleVAD vs SpectralVAD vs CascadedVAD na syntetycznym korpusie
+Mierzy ramki/s (20 ms), CPU na godzinę audio i odsetek fałszywych
+segmentów - każdy fałszywy segment to niepotrzebne uruchomienie Whispera.
+Dla kaskady: odsetek ramek eskalowanych do klasyfikatora i zgodność
+stanu per ramka z pełnym klasyfikatorem (--reference). --gain-db skaluje
+korpus - cichy lub głośny mikrofon dla progów bezwzględnych i względnych
+"""
+
+import sys
+import time
+import argparse
+import numpy as np
+from pathlib import Path
+
+# Dodaj src do ścieżki
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+sys.path.insert(0, str(Path(__file__).parent))
+
+from vad_corpus import SAMPLE_RATE, build_corpus, evaluate_segments
+
+FRAME_SECONDS = 0.02
+
+
+def run_scene(vad_type: str, scene, chunk_size: int) -> dict:
+    """
+    Przepuść scenę przez VAD + segmenter (czas strumienia, jak serwer)
+
+    Stan VAD per ramka (frame_states) lub per chunk trafia do wyniku -
+    porównanie z VAD referencyjnym
+    """
+    from frame_features import FrameFeatureExtractor
+    from speech_segmenter import SpeechSegmenter
+    from voice_activity_detector import create_vad
+
+    vad = create_vad(vad_type, SAMPLE_RATE)
+    extractor = FrameFeatureExtractor(SAMPLE_RATE)
+    segmenter = SpeechSegmenter(
+        sample_rate=SAMPLE_RATE, min_segment_duration=0.3, silence_timeout=0.5
+    )
+
+    segments = []
+    states = []
+    vad_cpu = 0.0
+    for start in range(0, len(scene.audio) - chunk_size + 1, chunk_size):
+        chunk = scene.audio[start : start + chunk_size]
+        stream_time = (start + chunk_size) / SAMPLE_RATE
+
+        features = extractor.compute(chunk)
+        cpu_start = time.process_time()
+        is_speech, analysis = vad.process_chunk(chunk, features)
+        vad_cpu += time.process_time() - cpu_start
+        states.extend(analysis.get("frame_states", [is_speech]))
+
+        segment = segmenter.process(chunk, is_speech, stream_time, features)
+        if segment is not None:
+            segments.append(segment)
+    segment = segmenter.flush()
+    if segment is not None:
+        segments.append(segment)
+
+    # Segment zaczyna się chunkiem, w którym VAD przełączył stan
+    spans = [(s.start_time - chunk_size / SAMPLE_RATE, s.end_time) for s in segments]
+    result = evaluate_segments(spans, scene.speech)
+    result["vad_cpu"] = vad_cpu
+    result["states"] = states
+    result["escalation_ratio"] = vad.get_statistics().get("escalation_ratio")
+    return result
+
+
+def main():
+    """Główna funkcja benchmarku"""
+    parser = argparse.ArgumentParser(description="Benchmark VAD")
+    parser.add_argument(
+        "--vads",
+        nargs="+",
+        default=["simple", "spectral", "cascade"],
+        help="VAD do porównania (default: simple spectral cascade)",
+    )
+    parser.add_argument(
+        "--reference",
+        default="spectral",
+        help="VAD referencyjny dla zgodności per ramka (default: spectral)",
+    )
+    parser.add_argument("--seconds", type=float, default=30.0, help="Długość sceny (s)")
+    parser.add_argument("--snr", type=float, default=10.0, help="SNR mowy (dB)")
+    parser.add_argument(
+        "--gain-db",
+        type=float,
+        default=0.0,
+        help="Wzmocnienie korpusu (dB) - cichy (<0) lub głośny (>0) mikrofon",
+    )
+    parser.add_argument("--chunk-size", type=int, default=1024, help="Chunk (próbki)")
+    parser.add_argument("--verbose", action="store_true", help="Wyniki per scena")
+    args = parser.parse_args()
+
+    print("🎙️ Benchmark VAD: syntetyczny korpus biurowy")
+    print("=" * 50)
+    corpus = build_corpus(args.seconds, args.snr)
+    gain = np.float32(10 ** (args.gain_db / 20))
+    for scene in corpus:
+        scene.audio = np.clip(scene.audio * gain, -1.0, 1.0)
+    audio_seconds = sum(scene.duration for scene in corpus)
+    print(
+        f"📊 {len(corpus)} scen, {audio_seconds:.0f}s audio, SNR mowy {args.snr:.0f} dB, "
+        f"wzmocnienie {args.gain_db:+.0f} dB"
+    )
+
+    reference = [run_scene(args.reference, scene, args.chunk_size) for scene in corpus]
+
+    summary = {}
+    for vad_type in args.vads:
+        totals = {"segments": 0, "false_segments": 0, "noise_seconds": 0.0}
+        totals.update({"utterances": 0, "missed": 0, "vad_cpu": 0.0})
+        totals.update({"escalated": 0.0, "agree": 0, "compared": 0})
+        totals.update({"quiet_cpu": 0.0, "quiet_seconds": 0.0})
+        for scene, expected in zip(corpus, reference):
+            result = run_scene(vad_type, scene, args.chunk_size)
+            for key in ("segments", "false_segments", "noise_seconds"):
+                totals[key] += result[key]
+            for key in ("utterances", "missed", "vad_cpu"):
+                totals[key] += result[key]
+            if not scene.speech:
+                totals["quiet_cpu"] += result["vad_cpu"]
+                totals["quiet_seconds"] += scene.duration
+            if result["escalation_ratio"] is not None:
+                totals["escalated"] += result["escalation_ratio"] * scene.duration
+            if len(result["states"]) == len(expected["states"]):
+                totals["agree"] += sum(
+                    a == b for a, b in zip(result["states"], expected["states"])
+                )
+                totals["compared"] += len(result["states"])
+            if args.verbose:
+                print(
+                    f"   {vad_type:<9} {scene.name:<16} segmenty {result['segments']:3d}, "
+                    f"fałszywe {result['false_segments']:3d}, "
+                    f"pominięte {result['missed']}/{result['utterances']}"
+                )
+        summary[vad_type] = totals
+
+    print("\n📋 PODSUMOWANIE")
+    print("=" * 30)
+    frames = audio_seconds / FRAME_SECONDS
+    for vad_type, totals in summary.items():
+        false_rate = totals["false_segments"] / max(totals["segments"], 1)
+        cpu_per_hour = totals["vad_cpu"] * 3600 / audio_seconds
+        print(
+            f"📊 {vad_type:<9} {frames / max(totals['vad_cpu'], 1e-9):9.0f} ramek/s, "
+            f"CPU {cpu_per_hour:5.1f} s/h audio, "
+            f"fałszywe segmenty {totals['false_segments']}/{totals['segments']} "
+            f"({false_rate:.0%}), audio bez mowy do STT {totals['noise_seconds']:.0f}s, "
+            f"pominięte wypowiedzi {totals['missed']}/{totals['utterances']}"
+        )
+        details = [
+            f"CPU bez mowy "
+            f"{totals['quiet_cpu'] * 3600 / max(totals['quiet_seconds'], 1e-9):.1f} s/h"
+        ]
+        if totals["escalated"]:
+            details.append(
+                f"eskalowane ramki {totals['escalated'] / audio_seconds:.1%}"
+            )
+        if totals["compared"]:
+            details.append(
+                f"zgodność stanu z {args.reference} "
+                f"{totals['agree'] / totals['compared']:.2%}"
+            )
+        print(f"   {', '.join(details)}")
+
+    return True
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
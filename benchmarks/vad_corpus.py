@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+"""
+Syntetyczny korpus do benchmarków VAD: sceny biurowe z zaznaczoną mową
+Mowa to dźwięczne harmoniczne z formantami i modulacją sylabową plus
+szumy frykatywne; tło to szum wentylacji, buczenie sieci, klawiatura,
+trzaśnięcia drzwi i szum wentylatora. Wszystko deterministyczne (seed).
+"""
+
+import sys
+import argparse
+import numpy as np
+from dataclasses import dataclass
+from pathlib import Path
+from typing import List, Tuple
+
+# Dodaj src do ścieżki
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+SAMPLE_RATE = 16000
+
+
+@dataclass
+class Scene:
+    """Scena korpusu: audio i przedziały mowy (s)"""
+
+    name: str
+    audio: np.ndarray
+    speech: List[Tuple[float, float]]
+
+    @property
+    def duration(self) -> float:
+        return len(self.audio) / SAMPLE_RATE
+
+
+def bandpass_noise(rng, n: int, low: float, high: float) -> np.ndarray:
+    """Szum w paśmie (filtr w dziedzinie częstotliwości)"""
+    spectrum = np.fft.rfft(rng.normal(0, 1, n))
+    freqs = np.fft.rfftfreq(n, 1.0 / SAMPLE_RATE)
+    spectrum[(freqs < low) | (freqs > high)] = 0
+    noise = np.fft.irfft(spectrum, n)
+    return noise / (np.std(noise) + 1e-12)
+
+
+def pink_noise(rng, n: int) -> np.ndarray:
+    """Szum różowy (1/f) - tło wentylacji"""
+    spectrum = np.fft.rfft(rng.normal(0, 1, n))
+    freqs = np.fft.rfftfreq(n, 1.0 / SAMPLE_RATE)
+    spectrum /= np.sqrt(np.maximum(freqs, 20.0))
+    noise = np.fft.irfft(spectrum, n)
+    return noise / (np.std(noise) + 1e-12)
+
+
+def utterance(rng, seconds: float) -> np.ndarray:
+    """Wypowiedź: harmoniczne F0 z formantami, sylaby ~4 Hz, frykatywy"""
+    n = int(seconds * SAMPLE_RATE)
+    t = np.arange(n) / SAMPLE_RATE
+    f0 = rng.uniform(100, 220) * (1 + 0.08 * np.sin(2 * np.pi * 0.7 * t))
+    phase = 2 * np.pi * np.cumsum(f0) / SAMPLE_RATE
+    formants = (rng.uniform(500, 800), rng.uniform(1100, 1800), 2600.0)
+
+    voiced = np.zeros(n)
+    for k in range(1, 25):
+        freq = k * f0.mean()
+        if freq > 4000:
+            break
+        gain = sum(np.exp(-(((freq - f) / 200.0) ** 2)) for f in formants)
+        voiced += (0.2 + gain) / k * np.sin(k * phase)
+
+    syllable_rate = rng.uniform(3.5, 5.5)
+    envelope = np.clip(np.sin(2 * np.pi * syllable_rate * t), 0, None) ** 0.7
+    fricative = bandpass_noise(rng, n, 3000, 7000) * 0.3
+    fricative *= np.clip(-np.sin(2 * np.pi * syllable_rate * t), 0, None) ** 4
+
+    ramp = np.minimum(1.0, np.minimum(t, t[-1] - t) / 0.05)
+    audio = (voiced * envelope + fricative) * ramp
+    return audio / (np.sqrt(np.mean(audio**2)) + 1e-12)
+
+
+def keyboard(rng, n: int, rate: float = 6.0) -> np.ndarray:
+    """Kliknięcia klawiatury: krótkie, szerokopasmowe, zanikające"""
+    audio = np.zeros(n)
+    click = int(0.008 * SAMPLE_RATE)
+    decay = np.exp(-np.arange(click) / (0.0015 * SAMPLE_RATE))
+    for start in np.cumsum(
+        rng.exponential(SAMPLE_RATE / rate, int(n / SAMPLE_RATE * rate * 2))
+    ):
+        start = int(start)
+        if start + click >= n:
+            break
+        audio[start : start + click] += (
+            rng.normal(0, 1, click) * decay * rng.uniform(0.5, 1.5)
+        )
+    return audio
+
+
+def door(rng, n: int, count: int = 2) -> np.ndarray:
+    """Trzaśnięcia drzwi: głośny impuls niskoczęstotliwościowy ~150 ms"""
+    audio = np.zeros(n)
+    length = int(0.15 * SAMPLE_RATE)
+    t = np.arange(length) / SAMPLE_RATE
+    thump = np.sin(2 * np.pi * 70 * t) * np.exp(-t / 0.04)
+    thump += bandpass_noise(rng, length, 50, 600) * np.exp(-t / 0.02) * 0.5
+    for start in rng.integers(0, n - length, count):
+        audio[start : start + length] += thump
+    return audio
+
+
+def hum(n: int, mains: float = 50.0) -> np.ndarray:
+    """Buczenie sieci z harmonicznymi"""
+    t = np.arange(n) / SAMPLE_RATE
+    return sum(np.sin(2 * np.pi * mains * k * t) / k for k in (1, 2, 3))
+
+
+BACKGROUNDS = {
+    "quiet": lambda rng, n: rng.normal(0, 1, n) * 0.003,
+    "hvac": lambda rng, n: pink_noise(rng, n) * 0.02 + hum(n) * 0.01,
+    "keyboard": lambda rng, n: pink_noise(rng, n) * 0.005 + keyboard(rng, n) * 0.3,
+    "door": lambda rng, n: pink_noise(rng, n) * 0.005 + door(rng, n, 3) * 0.5,
+    "fan": lambda rng, n: bandpass_noise(rng, n, 150, 900) * 0.03
+    + pink_noise(rng, n) * 0.01,
+}
+
+
+def make_scene(
+    name: str,
+    background: str,
+    seconds: float,
+    with_speech: bool,
+    snr_db: float,
+    seed: int,
+) -> Scene:
+    """Scena: tło + (opcjonalnie) wypowiedzi o zadanym SNR względem tła"""
+    rng = np.random.default_rng(seed)
+    n = int(seconds * SAMPLE_RATE)
+    noise = BACKGROUNDS[background](rng, n)
+    audio = noise.copy()
+    speech = []
+
+    if with_speech:
+        # Poziom odniesienia: tło stacjonarne (min. RMS w oknach 0.5 s)
+        window = SAMPLE_RATE // 2
+        rms = [
+            np.sqrt(np.mean(noise[i : i + window] ** 2))
+            for i in range(0, n - window, window)
+        ]
+        level = max(np.median(rms), 0.003) * 10 ** (snr_db / 20)
+        position = 1.5
+        while position + 1.0 < seconds - 1.0:
+            length = min(rng.uniform(1.0, 3.0), seconds - 1.0 - position)
+            start = int(position * SAMPLE_RATE)
+            voice = utterance(rng, length) * level
+            audio[start : start + len(voice)] += voice
+            speech.append((position, position + length))
+            position += length + rng.uniform(1.5, 3.5)
+
+    return Scene(name, (audio * 0.5).astype(np.float32), speech)
+
+
+def build_corpus(seconds: float = 30.0, snr_db: float = 10.0) -> List[Scene]:
+    """Pełny korpus: każde tło z mową i bez mowy"""
+    scenes = []
+    for i, background in enumerate(BACKGROUNDS):
+        scenes.append(
+            make_scene(
+                f"{background}+speech", background, seconds, True, snr_db, 100 + i
+            )
+        )
+        scenes.append(
+            make_scene(f"{background}", background, seconds, False, snr_db, 200 + i)
+        )
+    return scenes
+
+
+def evaluate_segments(
+    segments: List[Tuple[float, float]], speech: List[Tuple[float, float]]
+) -> dict:
+    """
+    Segmenty fałszywe (bez mowy), wypowiedzi pominięte i sekundy audio
+    bez mowy wysłane do STT (także wewnątrz segmentów z mową)
+    """
+
+    def overlap(a, b):
+        return max(0.0, min(a[1], b[1]) - max(a[0], b[0]))
+
+    false_segments = [s for s in segments if not any(overlap(s, u) for u in speech)]
+    missed = [u for u in speech if not any(overlap(s, u) for s in segments)]
+    noise_seconds = sum(
+        (end - start) - sum(overlap((start, end), u) for u in speech)
+        for start, end in segments
+    )
+    return {
+        "segments": len(segments),
+        "false_segments": len(false_segments),
+        "noise_seconds": noise_seconds,
+        "utterances": len(speech),
+        "missed": len(missed),
+    }
+
+
+def main():
+    """Zapisz korpus jako WAV (do odsłuchu)"""
+    import wave
+
+    parser = argparse.ArgumentParser(description="Syntetyczny korpus VAD")
+    parser.add_argument("output_dir", help="Katalog na pliki WAV")
+    parser.add_argument("--seconds", type=float, default=30.0, help="Długość sceny (s)")
+    args = parser.parse_args()
+
+    output = Path(args.output_dir)
+    output.mkdir(parents=True, exist_ok=True)
+    for scene in build_corpus(args.seconds):
+        pcm = (np.clip(scene.audio, -1, 1) * 32767).astype("<i2")
+        with wave.open(str(output / f"{scene.name}.wav"), "wb") as f:
+            f.setnchannels(1)
+            f.setsampwidth(2)
+            f.setframerate(SAMPLE_RATE)
+            f.writeframes(pcm.tobytes())
+        print(f"💾 {scene.name}.wav: {len(scene.speech)} wypowiedzi")
+    return True
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
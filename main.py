@@ -13,6 +13,7 @@ Wersja: 1.0.0
 import sys
 import os
 import argparse
+import importlib.util
 import logging
 import signal
 from pathlib import Path
@@ -33,8 +34,8 @@ def signal_handler(signum, frame):
     print("\n👋 Przerwanie przez użytkownika")
     sys.exit(0)
 
-def check_dependencies():
-    """Sprawdź dostępność dependencies"""
+def check_dependencies(backend: str = "whisper"):
+    """Sprawdź dostępność dependencies (backend=None: bez STT)"""
     missing = []
     
     try:
@@ -49,12 +50,26 @@ def check_dependencies():
     except ImportError:
         missing.append("sounddevice")
     
-    try:
-        import whisper
-        logger.info("✅ OpenAI Whisper: OK")
-    except ImportError:
-        logger.warning("⚠️ OpenAI Whisper nie zainstalowany")
-        missing.append("openai-whisper")
+    # Backendy STT sprawdzane przez find_spec - import torch/whisper
+    # trwa kilka sekund, a model i tak ładowany jest później
+    if backend == "faster-whisper":
+        if importlib.util.find_spec("faster_whisper") is not None:
+            logger.info("✅ faster-whisper: OK")
+        else:
+            logger.warning("⚠️ faster-whisper nie zainstalowany")
+            missing.append("faster-whisper")
+    elif backend == "onnx":
+        if all(importlib.util.find_spec(m) is not None for m in ("onnxruntime", "whisper")):
+            logger.info("✅ ONNX Runtime: OK")
+        else:
+            logger.warning("⚠️ onnxruntime lub openai-whisper nie zainstalowany")
+            missing.append("onnxruntime onnx openai-whisper")
+    elif backend is not None:
+        if importlib.util.find_spec("whisper") is not None:
+            logger.info("✅ OpenAI Whisper: OK")
+        else:
+            logger.warning("⚠️ OpenAI Whisper nie zainstalowany")
+            missing.append("openai-whisper")
     
     if missing:
         print("❌ Brakujące dependencies:")
@@ -66,7 +81,16 @@ def check_dependencies():
     
     return True
 
-def run_demo_mode():
+def run_demo_mode(spill_dir: str = None, backend: str = "whisper",
+                  model_dir: str = None, precision: str = None,
+                  compile_mode: str = None, mmap_weights: bool = False,
+                  refine_model: str = None, escalate_model: str = None,
+                  escalate_beam: int = None, escalation_budget: float = 15.0,
+                  routing_table: str = None, speech_gate: bool = False,
+                  gate_audit_dir: str = None, enable_stt: bool = True,
+                  device_sample_rate=None, sample_format: str = "float32",
+                  vad_type: str = None, vad_calibration: float = 0.0,
+                  admission: str = "off"):
     """Uruchom tryb demo"""
     print("🎤 Real-time STT - Tryb Demo")
     print("=" * 40)
@@ -74,16 +98,54 @@ def run_demo_mode():
     try:
         from realtime_pipeline import RealtimeSTTPipeline
         
+        controller = None
+        monitor = None
+        if admission != "off":
+            from admission_controller import AdmissionController, AdmissionPolicy
+            from performance_optimizer import performance_optimizer
+            
+            controller = AdmissionController(policy=AdmissionPolicy(admission))
+            monitor = performance_optimizer
+        
         # Stwórz pipeline
         pipeline = RealtimeSTTPipeline(
             sample_rate=16000,
-            enable_stt=True,
+            enable_stt=enable_stt,
             stt_model="base",  # Średni model dla demo
             use_polish_optimization=True,
+            stt_backend=backend,
+            model_dir=model_dir,
+            stt_precision=precision,
+            stt_compile=compile_mode,
+            stt_mmap_weights=mmap_weights,
             min_segment_duration=1.0,
-            silence_timeout=2.0
+            silence_timeout=2.0,
+            spill_dir=spill_dir,
+            refine_model=refine_model,
+            escalation_model=escalate_model,
+            escalation_beam_size=escalate_beam,
+            escalation_budget=escalation_budget,
+            routing_table=routing_table,
+            speech_gate=speech_gate,
+            gate_audit_dir=gate_audit_dir,
+            device_sample_rate=device_sample_rate,
+            sample_format=sample_format,
+            vad_type=vad_type,
+            vad_calibration=vad_calibration,
+            admission_controller=controller
         )
         
+        if monitor is not None:
+            # Zaległość pipeline (audio czekające na STT x RTF) steruje
+            # zrzucaniem poprawek i próby bramki przy przeciążeniu
+            monitor.register_queue_source("stt_backlog", lambda: len(pipeline.backlog))
+            monitor.register_timing_source(
+                "stt_queue_delay",
+                lambda: pipeline.backlog.pending_audio_seconds * controller.rtf
+            )
+            monitor.add_performance_callback(controller.on_metrics)
+            monitor.start_monitoring()
+        
         # Callback dla segmentów mowy
         def on_speech_detected(segment):
             print(f"\n🎤 Wykryto mowę ({segment.duration:.1f}s)")
@@ -94,10 +156,15 @@ def run_demo_mode():
             else:
                 print("⚠️ Brak transkrypcji")
         
+        # Callback dla tekstu poprawionego przez większy model
+        def on_segment_revised(segment):
+            print(f"\n🔁 Rewizja {segment.revision}: '{segment.text}'")
+        
         pipeline.set_speech_callback(on_speech_detected)
+        pipeline.set_revision_callback(on_segment_revised)
         
         print("\n🚀 Uruchamiam pipeline...")
-        if not pipeline.load_stt_model():
+        if enable_stt and not pipeline.load_stt_model():
             print("❌ Nie można załadować modelu STT")
             return False
         
@@ -118,9 +185,35 @@ def run_demo_mode():
                         print(f"\n📊 Statystyki: "
                               f"{stats['pipeline']['total_segments']} segmentów, "
                               f"{stats['pipeline']['runtime_seconds']:.0f}s")
+                        if stats['escalation']:
+                            esc = stats['escalation']
+                            print(f"   ⬆️ Eskalacje: {esc['escalations']} "
+                                  f"({esc['escalation_rate']:.0%}), "
+                                  f"koszt={esc['cost_per_audio_minute']:.1f}s CPU/min audio, "
+                                  f"zmiana tekstu={esc['change_rate']:.0%}")
+                        for name, route in (stats['routing'] or {}).items():
+                            print(f"   🔀 {name} ({route['model']}): "
+                                  f"{route['segments']} segmentów, "
+                                  f"{route['cpu_seconds_per_audio_minute']:.1f}s CPU/min audio")
+                        if stats['speech_gate']:
+                            gate = stats['speech_gate']
+                            print(f"   🚫 Odrzucone bez mowy: {gate['rejected']}/{gate['checked']} "
+                                  f"{gate['reasons']}, oszczędność "
+                                  f"~{gate['estimated_saved_seconds']:.1f}s CPU")
+                        if controller is not None:
+                            adm = controller.get_statistics()
+                            print(f"   🚦 Obciążenie: {adm['load_level']}, "
+                                  f"RTF={adm['rtf']:.2f}, "
+                                  f"zaległość={adm['queue_delay']:.1f}s")
                         
             except KeyboardInterrupt:
                 print("\n👋 Zatrzymywanie...")
+            finally:
+                if monitor is not None:
+                    monitor.stop_monitoring()
+                    monitor.unregister_source("stt_backlog")
+                    monitor.unregister_source("stt_queue_delay")
+                    monitor.remove_performance_callback(controller.on_metrics)
         
         print("✅ Pipeline zatrzymany")
         return True
@@ -190,6 +283,124 @@ def run_audio_test():
         print(f"❌ Błąd testu audio: {e}")
         return False
 
+def run_server_mode(model: str, host: str, port: int, workers: int, max_batch: int,
+                    admission: str = "off", backend: str = "whisper",
+                    model_dir: str = None, precision: str = None,
+                    compile_mode: str = None, mmap_weights: bool = False,
+                    worker_mode: str = "thread"):
+    """Uruchom serwer strumieniowy dla wielu sesji"""
+    print("🌐 Real-time STT - Tryb serwera")
+    print("=" * 40)
+    
+    try:
+        import time
+        from stt_server import STTServer
+        
+        controller = None
+        monitor = None
+        if admission != "off":
+            from admission_controller import AdmissionController, AdmissionPolicy
+            from performance_optimizer import performance_optimizer
+            
+            controller = AdmissionController(
+                parallelism=workers,
+                policy=AdmissionPolicy(admission)
+            )
+            monitor = performance_optimizer
+            monitor.start_monitoring()
+        
+        server = STTServer(
+            host=host,
+            port=port,
+            stt_model=model,
+            stt_backend=backend,
+            model_dir=model_dir,
+            stt_precision=precision,
+            stt_compile=compile_mode,
+            stt_mmap_weights=mmap_weights,
+            num_workers=workers,
+            worker_mode=worker_mode,
+            max_batch_size=max_batch,
+            admission_controller=controller,
+            performance_monitor=monitor
+        )
+        
+        print(f"📥 Ładowanie modelu '{model}' dla {workers} workerów...")
+        if not server.start():
+            print("❌ Nie można uruchomić serwera")
+            return False
+        
+        print(f"✅ Serwer nasłuchuje na {host}:{server.port} (Ctrl+C aby zakończyć)")
+        
+        try:
+            while True:
+                time.sleep(10)
+                stats = server.get_statistics()
+                print(f"\n📊 Sesje: {stats['server']['active_sessions']} aktywne, "
+                      f"{stats['server']['total_sessions']} łącznie, "
+                      f"{stats['pool']['total_jobs']} segmentów, "
+                      f"{stats['server']['audio_seconds_per_second']:.2f}s audio/s")
+                batching = stats['pool']['batching']
+                print(f"   📦 Batch: avg={batching['avg_batch_size']:.1f}, "
+                      f"histogram={batching['batch_size_histogram']}, "
+                      f"queue p95={batching['p95_queue_delay'] * 1000:.0f}ms")
+                fork_server = stats['pool'].get('fork_server')
+                if fork_server:
+                    shared = sum(w.get('shared_mb', 0) for w in fork_server['workers'])
+                    private = sum(w.get('uss_mb', 0) for w in fork_server['workers'])
+                    print(f"   🍴 Procesy: restarty={fork_server['restarts']}, "
+                          f"respawn={fork_server['avg_spawn_ms']:.1f}ms, "
+                          f"pamięć wspólna={shared:.0f}MB, prywatna={private:.0f}MB")
+                if stats['admission']:
+                    adm = stats['admission']
+                    print(f"   🚦 Obciążenie: {adm['load_level']}, "
+                          f"pojemność={adm['estimated_capacity']}, "
+                          f"RTF={adm['rtf']:.2f}, "
+                          f"odrzucone={adm['rejected']}, "
+                          f"pominięte={adm['shed_segments']}")
+                for session in stats['sessions']:
+                    print(f"   {session['session_id']}: "
+                          f"avg={session['avg_latency']:.2f}s, "
+                          f"p95={session['p95_latency']:.2f}s")
+        except KeyboardInterrupt:
+            print("\n👋 Zatrzymywanie...")
+        finally:
+            server.stop()
+            if monitor is not None:
+                monitor.stop_monitoring()
+        
+        return True
+        
+    except Exception as e:
+        print(f"❌ Błąd serwera: {e}")
+        return False
+
+def run_load_test(host: str, port: int, sessions: int, duration: float):
+    """Uruchom lokalny generator obciążenia przeciwko serwerowi"""
+    print(f"🚦 Generator obciążenia: {sessions} sesji x {duration:.0f}s")
+    print("=" * 40)
+    
+    try:
+        from stt_client import run_load_generator
+        
+        summary = run_load_generator(
+            host=host,
+            port=port,
+            num_sessions=sessions,
+            duration=duration
+        )
+        
+        print(f"📊 Segmenty: {summary['total_segments']}, "
+              f"czas: {summary['wall_time']:.1f}s")
+        print(f"🚀 Przepustowość: {summary['audio_seconds_per_second']:.2f}s audio/s")
+        print(f"⌛ Opóźnienie: avg={summary['avg_latency']:.2f}s, "
+              f"p95={summary['p95_latency']:.2f}s")
+        return summary['total_segments'] > 0
+        
+    except Exception as e:
+        print(f"❌ Błąd generatora obciążenia: {e}")
+        return False
+
 def main():
     """Główna funkcja aplikacji"""
     # Obsługa sygnału przerwania
@@ -200,7 +411,7 @@ def main():
     )
     parser.add_argument(
         "--mode", 
-        choices=["demo", "test", "audio-test"],
+        choices=["demo", "test", "audio-test", "server", "load-test"],
         default="demo",
         help="Tryb uruchomienia (default: demo)"
     )
@@ -210,6 +421,111 @@ def main():
         default="base",
         help="Model Whisper do użycia (default: base)"
     )
+    parser.add_argument(
+        "--backend",
+        choices=["whisper", "faster-whisper", "onnx"],
+        default="whisper",
+        help="Backend STT: whisper (PyTorch), faster-whisper "
+             "(CTranslate2 int8) lub onnx (ONNX Runtime) (default: whisper)"
+    )
+    parser.add_argument(
+        "--model-dir",
+        default=None,
+        help="Lokalny katalog modeli - ładowanie bez dostępu do sieci"
+    )
+    parser.add_argument(
+        "--precision",
+        choices=["fp32", "int8"],
+        default=None,
+        help="Precyzja STT na CPU: fp32 lub int8 (kwantyzacja dynamiczna, "
+             "cache na dysku) (default: domyślna backendu)"
+    )
+    parser.add_argument(
+        "--compile",
+        choices=["off", "torchscript", "compile"],
+        default="off",
+        help="Kompilacja modelu Whisper: torchscript (enkoder) lub compile "
+             "(torch.compile), artefakty w cache na dysku (default: off)"
+    )
+    parser.add_argument(
+        "--mmap-weights",
+        action="store_true",
+        help="Ładuj wagi Whisper przez mmap (checkpoint fp32 w cache, strony "
+             "wag współdzielone między procesami; nie łączy się z --precision int8)"
+    )
+    parser.add_argument(
+        "--escalate-model",
+        default=None,
+        help="Większy model dla segmentów o niskiej pewności w trybie demo "
+             "(default: brak)"
+    )
+    parser.add_argument(
+        "--escalate-beam",
+        type=int,
+        default=None,
+        help="Szerszy beam dla segmentów o niskiej pewności (np. 10)"
+    )
+    parser.add_argument(
+        "--escalation-budget",
+        type=float,
+        default=15.0,
+        help="Budżet eskalacji: sekundy CPU na minutę audio (default: 15)"
+    )
+    parser.add_argument(
+        "--routing-table",
+        default=None,
+        help="Routing segmentów do modeli wg długości i udziału mowy w trybie "
+             "demo: plik JSON lub 'default' (default: brak)"
+    )
+    parser.add_argument(
+        "--speech-gate",
+        action="store_true",
+        help="Odrzucaj segmenty bez mowy (kliknięcia, kaszel, szum) przed "
+             "transkrypcją w trybie demo"
+    )
+    parser.add_argument(
+        "--gate-audit-dir",
+        default=None,
+        help="Katalog zapisu audio odrzuconego przez bramkę mowy (WAV + "
+             "rejected.jsonl) do audytu"
+    )
+    parser.add_argument(
+        "--device-sample-rate",
+        default=None,
+        help="Częstotliwość mikrofonu w trybie demo: liczba (np. 48000) lub "
+             "'native' - resampling do 16kHz przed VAD i STT (default: 16000)"
+    )
+    parser.add_argument(
+        "--sample-format",
+        choices=["float32", "int16"],
+        default="float32",
+        help="Format próbek od mikrofonu do segmentów w trybie demo - int16 "
+             "to połowa pamięci, konwersja do float32 dopiero przy STT"
+    )
+    parser.add_argument(
+        "--vad",
+        choices=["webrtc", "simple", "adaptive", "spectral", "cascade"],
+        default=None,
+        help="Typ VAD w trybie demo - adaptive: próg względem śledzonego "
+             "poziomu tła, profil szumu zapisywany per mikrofon; "
+             "spectral: energie pasm względem "
+             "adaptacyjnego widma szumu, mniej fałszywych segmentów w "
+             "hałasie biurowym; cascade: bramka energii + spectral tylko "
+             "dla ramek niepewnych (default: webrtc)"
+    )
+    parser.add_argument(
+        "--vad-calibration",
+        type=float,
+        default=0.0,
+        help="Kalibracja tła na starcie w sekundach dla --vad adaptive "
+             "(pomijana, gdy mikrofon ma zapisany profil szumu; default: 0)"
+    )
+    parser.add_argument(
+        "--refine-model",
+        default=None,
+        help="Większy model (np. medium, large) poprawiający w tle tekst "
+             "tymczasowy w trybie demo (default: brak)"
+    )
     parser.add_argument(
         "--verbose", "-v",
         action="store_true",
@@ -221,6 +537,62 @@ def main():
         help="Wyłącz STT (tylko audio + VAD)"
     )
     
+    parser.add_argument(
+        "--host",
+        default="127.0.0.1",
+        help="Adres serwera dla trybów server/load-test (default: 127.0.0.1)"
+    )
+    parser.add_argument(
+        "--port",
+        type=int,
+        default=8765,
+        help="Port serwera dla trybów server/load-test (default: 8765)"
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=2,
+        help="Liczba workerów STT w trybie server (default: 2)"
+    )
+    parser.add_argument(
+        "--worker-mode",
+        choices=["thread", "fork"],
+        default="thread",
+        help="Workery STT w trybie server: wątki lub procesy forkowane z "
+             "fork-servera z załadowanym modelem (default: thread)"
+    )
+    parser.add_argument(
+        "--max-batch",
+        type=int,
+        default=8,
+        help="Max. liczba segmentów w batchu STT w trybie server (default: 8)"
+    )
+    parser.add_argument(
+        "--admission",
+        choices=["off", "reject", "queue"],
+        default="off",
+        help="Kontrola obciążenia w trybie server (przyjmowanie sesji) i demo "
+             "(pomijanie poprawek przy przeciążeniu) (default: off)"
+    )
+    parser.add_argument(
+        "--spill-dir",
+        default=None,
+        help="Katalog zapisu segmentów czekających na STT w trybie demo "
+             "(wznawiany po restarcie)"
+    )
+    parser.add_argument(
+        "--sessions",
+        type=int,
+        default=4,
+        help="Liczba równoległych sesji w trybie load-test (default: 4)"
+    )
+    parser.add_argument(
+        "--duration",
+        type=float,
+        default=20.0,
+        help="Długość audio na sesję w trybie load-test (default: 20s)"
+    )
+    
     args = parser.parse_args()
     
     if args.verbose:
@@ -231,20 +603,41 @@ def main():
     print("=" * 50)
     print(f"📅 Wersja: 1.0.0")
     print(f"🔧 Tryb: {args.mode}")
-    print(f"🤖 Model: {args.model}")
+    print(f"🤖 Model: {args.model} ({args.backend})")
     
-    # Sprawdź dependencies (poza trybem audio-test)
-    if args.mode != "audio-test":
-        if not check_dependencies():
+    # Sprawdź dependencies (poza trybami audio-test i load-test)
+    if args.mode not in ("audio-test", "load-test"):
+        if not check_dependencies(None if args.no_stt else args.backend):
             return False
     
+    compile_mode = None if args.compile == "off" else args.compile
+    
+    device_sample_rate = args.device_sample_rate
+    if device_sample_rate not in (None, "native"):
+        device_sample_rate = int(device_sample_rate)
+    
     # Uruchom odpowiedni tryb
     if args.mode == "demo":
-        success = run_demo_mode()
+        success = run_demo_mode(
+            args.spill_dir, args.backend, args.model_dir, args.precision,
+            compile_mode, args.mmap_weights, args.refine_model,
+            args.escalate_model, args.escalate_beam, args.escalation_budget,
+            args.routing_table, args.speech_gate, args.gate_audit_dir,
+            not args.no_stt, device_sample_rate, args.sample_format, args.vad,
+            args.vad_calibration, args.admission
+        )
     elif args.mode == "test":
         success = run_test_mode()
     elif args.mode == "audio-test":
         success = run_audio_test()
+    elif args.mode == "server":
+        success = run_server_mode(
+            args.model, args.host, args.port, args.workers, args.max_batch,
+            args.admission, args.backend, args.model_dir, args.precision,
+            compile_mode, args.mmap_weights, args.worker_mode
+        )
+    elif args.mode == "load-test":
+        success = run_load_test(args.host, args.port, args.sessions, args.duration)
     else:
         print(f"❌ Nieznany tryb: {args.mode}")
         return False
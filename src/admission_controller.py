@@ -0,0 +1,357 @@
+"""
+Admission Controller - Kontrola przyjmowania sesji i zrzucanie obciążenia
+Admission control and load shedding for concurrent STT sessions
+
+Autor: AI Assistant
+Data: 2025-01-18
+"""
+
+import math
+import threading
+import time
+import logging
+from enum import Enum
+from typing import Any, Callable, Dict, Hashable, Optional
+
+# Konfiguracja loggingu
+logger = logging.getLogger(__name__)
+
+
+class LoadLevel(Enum):
+    """Poziomy zrzucania obciążenia (kolejność eskalacji)"""
+
+    NORMAL = 0  # Pełna obsługa
+    SHED_PARTIALS = 1  # Bez wyników częściowych / tymczasowych
+    SHED_LOW_PRIORITY = 2  # Dodatkowo bez STT dla sesji o niższym priorytecie
+
+
+class AdmissionPolicy(Enum):
+    """Zachowanie przy braku wolnej pojemności"""
+
+    REJECT = "reject"
+    QUEUE = "queue"
+
+
+class AdmissionController:
+    """
+    Kontroler przyjmowania sesji oparty na zmierzonym real-time factor
+
+    Pojemność (liczba równoległych strumieni) szacowana jest jako
+    parallelism * (1 - headroom) / (speech_ratio * rtf), gdzie rtf to
+    średnia krocząca czasu przetwarzania / długości audio. Przy trwałym
+    przeciążeniu poziom zrzucania rośnie o jeden stopień co sustain_seconds,
+    a po recovery_seconds bez przeciążenia spada o jeden stopień.
+    """
+
+    def __init__(
+        self,
+        parallelism: int = 1,
+        headroom: float = 0.2,
+        speech_ratio: float = 0.5,
+        initial_rtf: float = 0.5,
+        policy: AdmissionPolicy = AdmissionPolicy.REJECT,
+        max_queue_wait: float = 10.0,
+        max_queue_delay: float = 2.0,
+        cpu_threshold: float = 90.0,
+        sustain_seconds: float = 5.0,
+        recovery_seconds: float = 10.0,
+        rtf_smoothing: float = 0.2,
+    ):
+        """
+        Inicjalizacja kontrolera
+
+        Args:
+            parallelism: Liczba równoległych dekoderów STT (workerów)
+            headroom: Zapas pojemności (0.2 = planuj na 80%)
+            speech_ratio: Oczekiwany udział mowy w strumieniu
+            initial_rtf: Real-time factor przed pierwszym pomiarem
+            policy: Odrzucaj lub kolejkuj sesje ponad pojemność
+            max_queue_wait: Max. czas oczekiwania w kolejce (s)
+            max_queue_delay: Opóźnienie kolejki STT uznawane za przeciążenie (s)
+            cpu_threshold: Użycie CPU uznawane za przeciążenie (%)
+            sustain_seconds: Czas przeciążenia przed eskalacją poziomu (s)
+            recovery_seconds: Czas bez przeciążenia przed deeskalacją (s)
+            rtf_smoothing: Współczynnik średniej kroczącej RTF
+        """
+        self.parallelism = max(1, parallelism)
+        self.headroom = headroom
+        self.speech_ratio = speech_ratio
+        self.policy = policy
+        self.max_queue_wait = max_queue_wait
+        self.max_queue_delay = max_queue_delay
+        self.cpu_threshold = cpu_threshold
+        self.sustain_seconds = sustain_seconds
+        self.recovery_seconds = recovery_seconds
+        self.rtf_smoothing = rtf_smoothing
+
+        self._cond = threading.Condition()
+        self.active_sessions: Dict[Hashable, int] = {}
+
+        # Pomiary
+        self.rtf = initial_rtf
+        self.rtf_samples = 0
+        self.backlog = 0
+        self.queue_delay = 0.0
+        self.cpu_percent = 0.0
+
+        # Stan zrzucania obciążenia
+        self.load_level = LoadLevel.NORMAL
+        self._overloaded_since: Optional[float] = None
+        self._healthy_since: Optional[float] = None
+        self._level_changed_at: Optional[float] = None
+
+        # Statystyki
+        self.admitted = 0
+        self.rejected = 0
+        self.queued = 0
+        self.shed_segments = 0
+
+        logger.info(
+            f"🚦 AdmissionController: parallelism={self.parallelism}, "
+            f"headroom={headroom:.0%}, policy={policy.value}"
+        )
+
+    # ---- Pomiary -------------------------------------------------------
+
+    def record_transcription(self, audio_seconds: float, processing_seconds: float):
+        """
+        Zarejestruj wynik transkrypcji (aktualizuje RTF)
+
+        Args:
+            audio_seconds: Długość przetworzonego audio
+            processing_seconds: Czas przetwarzania
+        """
+        if audio_seconds <= 0:
+            return
+
+        sample = processing_seconds / audio_seconds
+        with self._cond:
+            if self.rtf_samples == 0:
+                self.rtf = sample
+            else:
+                self.rtf += self.rtf_smoothing * (sample - self.rtf)
+            self.rtf_samples += 1
+            self._evaluate_locked(time.time())
+            # Pojemność mogła wzrosnąć - obudź sesje w kolejce
+            self._cond.notify_all()
+
+    def update_backlog(self, pending: int, queue_delay: float):
+        """
+        Zaktualizuj stan kolejki STT
+
+        Args:
+            pending: Liczba oczekujących segmentów
+            queue_delay: Średnie opóźnienie w kolejce (s)
+        """
+        with self._cond:
+            self.backlog = pending
+            self.queue_delay = queue_delay
+            self._evaluate_locked(time.time())
+
+    def on_metrics(self, metrics: Any):
+        """
+        Callback dla PerformanceOptimizer.add_performance_callback
+
+        Args:
+            metrics: PerformanceMetrics (cpu_percent, queue_sizes, processing_times)
+        """
+        with self._cond:
+            self.cpu_percent = metrics.cpu_percent
+            if "stt_backlog" in metrics.queue_sizes:
+                self.backlog = metrics.queue_sizes["stt_backlog"]
+            if "stt_queue_delay" in metrics.processing_times:
+                self.queue_delay = metrics.processing_times["stt_queue_delay"]
+            self._evaluate_locked(time.time())
+
+    # ---- Pojemność i przyjmowanie sesji ----------------------------------
+
+    def estimated_capacity(self) -> int:
+        """Szacowana liczba równoległych sesji obsługiwanych w czasie rzeczywistym"""
+        with self._cond:
+            return self._capacity_locked()
+
+    def _capacity_locked(self) -> int:
+        """Pojemność (wywoływane pod lockiem)"""
+        load_per_session = max(self.speech_ratio * self.rtf, 1e-6)
+        return max(
+            1, math.floor(self.parallelism * (1 - self.headroom) / load_per_session)
+        )
+
+    def utilization(self) -> float:
+        """Szacowane wykorzystanie pojemności STT (1.0 = pełne)"""
+        with self._cond:
+            return self._utilization_locked()
+
+    def _utilization_locked(self) -> float:
+        """Wykorzystanie (wywoływane pod lockiem)"""
+        demand = len(self.active_sessions) * self.speech_ratio * self.rtf
+        return demand / self.parallelism
+
+    def try_admit(
+        self,
+        session_id: Hashable,
+        priority: int = 0,
+        on_queued: Optional[Callable[[], None]] = None,
+    ) -> bool:
+        """
+        Spróbuj przyjąć nową sesję
+
+        Args:
+            session_id: Identyfikator sesji
+            priority: Priorytet sesji (wyższy = ważniejszy)
+            on_queued: Wywoływane gdy sesja czeka w kolejce
+
+        Returns:
+            True jeśli sesja przyjęta
+        """
+        with self._cond:
+            if self._has_room_locked():
+                return self._admit_locked(session_id, priority)
+
+            if self.policy == AdmissionPolicy.REJECT:
+                self.rejected += 1
+                logger.warning(
+                    f"🚫 Sesja {session_id} odrzucona "
+                    f"(pojemność {self._capacity_locked()})"
+                )
+                return False
+
+            self.queued += 1
+            logger.info(f"⏳ Sesja {session_id} w kolejce")
+            if on_queued is not None:
+                on_queued()
+
+            if self._cond.wait_for(self._has_room_locked, self.max_queue_wait):
+                return self._admit_locked(session_id, priority)
+
+            self.rejected += 1
+            logger.warning(f"🚫 Sesja {session_id} odrzucona po czasie w kolejce")
+            return False
+
+    def _has_room_locked(self) -> bool:
+        """Czy jest miejsce na kolejną sesję (wywoływane pod lockiem)"""
+        return (
+            len(self.active_sessions) < self._capacity_locked()
+            and self.load_level == LoadLevel.NORMAL
+        )
+
+    def _admit_locked(self, session_id: Hashable, priority: int) -> bool:
+        """Zarejestruj przyjętą sesję (wywoływane pod lockiem)"""
+        self.active_sessions[session_id] = priority
+        self.admitted += 1
+        logger.info(f"✅ Sesja {session_id} przyjęta (priorytet {priority})")
+        return True
+
+    def release(self, session_id: Hashable):
+        """Zwolnij miejsce po zakończonej sesji"""
+        with self._cond:
+            if self.active_sessions.pop(session_id, None) is not None:
+                self._cond.notify_all()
+
+    # ---- Zrzucanie obciążenia ----------------------------------------------
+
+    def evaluate(self, now: Optional[float] = None) -> LoadLevel:
+        """
+        Przelicz poziom zrzucania obciążenia
+
+        Args:
+            now: Bieżący czas (domyślnie time.time())
+
+        Returns:
+            Aktualny LoadLevel
+        """
+        with self._cond:
+            return self._evaluate_locked(now if now is not None else time.time())
+
+    def is_overloaded(self) -> bool:
+        """Czy bieżące pomiary wskazują przeciążenie"""
+        with self._cond:
+            return self._is_overloaded_locked()
+
+    def _is_overloaded_locked(self) -> bool:
+        """Przeciążenie (wywoływane pod lockiem)"""
+        return (
+            self._utilization_locked() > 1.0
+            or self.queue_delay > self.max_queue_delay
+            or self.cpu_percent > self.cpu_threshold
+        )
+
+    def _evaluate_locked(self, now: float) -> LoadLevel:
+        """Eskalacja / deeskalacja poziomu (wywoływane pod lockiem)"""
+        if self._is_overloaded_locked():
+            self._healthy_since = None
+            if self._overloaded_since is None:
+                self._overloaded_since = now
+
+            since = max(self._overloaded_since, self._level_changed_at or 0.0)
+            if (
+                now - since >= self.sustain_seconds
+                and self.load_level != LoadLevel.SHED_LOW_PRIORITY
+            ):
+                self._set_level(LoadLevel(self.load_level.value + 1), now)
+        else:
+            self._overloaded_since = None
+            if self._healthy_since is None:
+                self._healthy_since = now
+
+            since = max(self._healthy_since, self._level_changed_at or 0.0)
+            if (
+                now - since >= self.recovery_seconds
+                and self.load_level != LoadLevel.NORMAL
+            ):
+                self._set_level(LoadLevel(self.load_level.value - 1), now)
+
+        return self.load_level
+
+    def _set_level(self, level: LoadLevel, now: float):
+        """Zmień poziom zrzucania obciążenia"""
+        logger.warning(f"⚖️ Poziom obciążenia: {self.load_level.name} -> {level.name}")
+        self.load_level = level
+        self._level_changed_at = now
+        self._cond.notify_all()
+
+    def allow_partials(self) -> bool:
+        """Czy wysyłać wyniki częściowe / tymczasowe"""
+        return self.load_level == LoadLevel.NORMAL
+
+    def should_shed(self, priority: int) -> bool:
+        """
+        Czy pominąć STT dla segmentu sesji o danym priorytecie
+
+        Przy SHED_LOW_PRIORITY zrzucane są sesje o priorytecie niższym niż
+        najwyższy priorytet aktywnych sesji.
+
+        Args:
+            priority: Priorytet sesji
+
+        Returns:
+            True jeśli segment należy pominąć
+        """
+        with self._cond:
+            if self.load_level != LoadLevel.SHED_LOW_PRIORITY:
+                return False
+            top_priority = max(self.active_sessions.values(), default=priority)
+            if priority < top_priority:
+                self.shed_segments += 1
+                return True
+            return False
+
+    def get_statistics(self) -> Dict[str, Any]:
+        """Pobierz statystyki kontrolera"""
+        with self._cond:
+            return {
+                "load_level": self.load_level.name,
+                "policy": self.policy.value,
+                "active_sessions": len(self.active_sessions),
+                "estimated_capacity": self._capacity_locked(),
+                "utilization": self._utilization_locked(),
+                "rtf": self.rtf,
+                "rtf_samples": self.rtf_samples,
+                "backlog": self.backlog,
+                "queue_delay": self.queue_delay,
+                "cpu_percent": self.cpu_percent,
+                "admitted": self.admitted,
+                "rejected": self.rejected,
+                "queued": self.queued,
+                "shed_segments": self.shed_segments,
+            }
@@ -11,10 +11,14 @@ import numpy as np
 import queue
 import threading
 import time
-from typing import Optional, Callable, List
+from typing import Optional, Callable, List, Union
 import logging
 from pathlib import Path
 
+from audio_format import sample_dtype
+from frame_features import FrameFeatureExtractor
+from resampler import StreamingResampler
+
 # Konfiguracja loggingu
 logging.basicConfig(
     level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
@@ -32,6 +36,8 @@ class AudioCapture:
         chunk_size: int = 1024,
         device: Optional[int] = None,
         buffer_size: int = 100,
+        device_sample_rate: Optional[Union[int, str]] = None,
+        sample_format: str = "float32",
     ):
         """
         Inicjalizacja AudioCapture
@@ -42,12 +48,25 @@ class AudioCapture:
             chunk_size: Rozmiar bufora w sampleach
             device: ID urządzenia audio (None = domyślne)
             buffer_size: Maksymalny rozmiar kolejki audio
+            device_sample_rate: Częstotliwość strumienia urządzenia (None = sample_rate,
+                "native" = domyślna częstotliwość urządzenia, np. 48000) - audio
+                jest resamplowane do sample_rate przed oddaniem z get_audio_chunk
+            sample_format: Format próbek strumienia i chunków ("float32" lub
+                "int16" - PCM 16-bit bez konwersji, połowa pamięci)
         """
         self.sample_rate = sample_rate
         self.channels = channels
         self.chunk_size = chunk_size
         self.device = device
         self.buffer_size = buffer_size
+        self.device_sample_rate = device_sample_rate
+        self.sample_format = sample_format
+        self.dtype = sample_dtype(sample_format)
+
+        # Resampling urządzenie -> sample_rate (jeden resampler na kanał)
+        self.stream_sample_rate = sample_rate
+        self.resamplers: List[StreamingResampler] = []
+        self.feature_extractor = FrameFeatureExtractor(sample_rate)
 
         # Kolejka audio z ograniczeniem rozmiaru
         self.audio_queue = queue.Queue(maxsize=buffer_size)
@@ -60,7 +79,8 @@ class AudioCapture:
         self.start_time = None
 
         logger.info(
-            f"🎤 AudioCapture zainicjalizowany: {sample_rate}Hz, {channels}ch, buffer={buffer_size}"
+            f"🎤 AudioCapture zainicjalizowany: {sample_rate}Hz, {channels}ch, "
+            f"{sample_format}, buffer={buffer_size}"
         )
 
         # Sprawdź dostępność urządzeń
@@ -71,6 +91,14 @@ class AudioCapture:
         print("📱 Dostępne urządzenia audio:")
         print(sd.query_devices())
 
+    def get_device_name(self) -> str:
+        """Nazwa urządzenia wejściowego (klucz profilu szumu)"""
+        try:
+            return str(sd.query_devices(self.device, "input")["name"])
+        except Exception as e:
+            logger.warning(f"⚠️ Nie można odczytać nazwy urządzenia: {e}")
+            return "default" if self.device is None else f"device-{self.device}"
+
     def start_recording(self):
         """Rozpocznij nagrywanie"""
         if self.is_recording:
@@ -82,14 +110,15 @@ class AudioCapture:
             self.total_frames = 0
             self.dropped_frames = 0
             self.start_time = time.time()
+            blocksize = self._setup_resampling()
 
             self.stream = sd.InputStream(
-                samplerate=self.sample_rate,
+                samplerate=self.stream_sample_rate,
                 channels=self.channels,
                 callback=self._audio_callback,
-                blocksize=self.chunk_size,
+                blocksize=blocksize,
                 device=self.device,
-                dtype=np.float32,
+                dtype=self.dtype,
             )
 
             self.stream.start()
@@ -100,6 +129,49 @@ class AudioCapture:
             logger.error(f"❌ Błąd podczas rozpoczynania nagrywania: {e}")
             raise
 
+    def _resolve_device_sample_rate(self) -> int:
+        """Częstotliwość, z jaką otwierany jest strumień urządzenia"""
+        if self.device_sample_rate is None:
+            return self.sample_rate
+        if self.device_sample_rate == "native":
+            device_info = sd.query_devices(self.device, "input")
+            return int(device_info["default_samplerate"])
+        return int(self.device_sample_rate)
+
+    def _setup_resampling(self) -> int:
+        """
+        Przygotuj resampling dla nowego strumienia
+
+        Returns:
+            Blocksize strumienia urządzenia (ten sam czas trwania co chunk_size)
+        """
+        self.stream_sample_rate = self._resolve_device_sample_rate()
+        if self.stream_sample_rate == self.sample_rate:
+            self.resamplers = []
+            return self.chunk_size
+
+        # Projekt filtra jest cache'owany - tu tylko świeży stan strumienia
+        self.resamplers = [
+            StreamingResampler(self.stream_sample_rate, self.sample_rate)
+            for _ in range(self.channels)
+        ]
+        logger.info(
+            f"🔁 Resampling {self.stream_sample_rate}Hz -> {self.sample_rate}Hz"
+        )
+        return int(round(self.chunk_size * self.stream_sample_rate / self.sample_rate))
+
+    def _resample_chunk(self, audio_chunk: np.ndarray) -> np.ndarray:
+        """Resampling chunka (frames x channels) do sample_rate"""
+        columns = [
+            resampler.process(audio_chunk[:, channel])
+            for channel, resampler in enumerate(self.resamplers)
+        ]
+        resampled = np.stack(columns, axis=1)
+        if self.dtype == np.int16:
+            # Filtr jest liniowy - wynik w skali int16, tylko zaokrąglenie
+            return np.clip(np.rint(resampled), -32768, 32767).astype(np.int16)
+        return resampled
+
     def stop_recording(self):
         """Zatrzymaj nagrywanie"""
         if not self.is_recording:
@@ -143,13 +215,49 @@ class AudioCapture:
             timeout: Timeout w sekundach
 
         Returns:
-            Chunk audio lub None jeśli timeout
+            Chunk audio (w sample_rate) lub None jeśli timeout
         """
         try:
-            return self.audio_queue.get(timeout=timeout)
+            audio_chunk = self.audio_queue.get(timeout=timeout)
         except queue.Empty:
             return None
 
+        # Resampling poza callbackiem audio - callback tylko kopiuje dane
+        if self.resamplers:
+            audio_chunk = self._resample_chunk(audio_chunk)
+        return audio_chunk
+
+    def get_audio_chunks(
+        self, timeout: float = 1.0, max_chunks: Optional[int] = None
+    ) -> List[np.ndarray]:
+        """
+        Pobierz wszystkie chunki czekające w kolejce (zaległości po przestoju)
+
+        Czeka jak get_audio_chunk na pierwszy chunk, potem bez blokowania
+        zabiera resztę kolejki. Chunki zachowują swoje granice i kolejność.
+
+        Args:
+            timeout: Timeout w sekundach (na pierwszy chunk)
+            max_chunks: Maksymalna liczba chunków (None = cała kolejka)
+
+        Returns:
+            Lista chunków audio (w sample_rate), pusta jeśli timeout
+        """
+        audio_chunk = self.get_audio_chunk(timeout=timeout)
+        if audio_chunk is None:
+            return []
+
+        chunks = [audio_chunk]
+        while max_chunks is None or len(chunks) < max_chunks:
+            try:
+                audio_chunk = self.audio_queue.get_nowait()
+            except queue.Empty:
+                break
+            if self.resamplers:
+                audio_chunk = self._resample_chunk(audio_chunk)
+            chunks.append(audio_chunk)
+        return chunks
+
     def __enter__(self):
         """Context manager entry"""
         self.start_recording()
@@ -183,7 +291,7 @@ class AudioCapture:
         Oblicz poziom audio (RMS)
 
         Args:
-            audio_data: Dane audio
+            audio_data: Dane audio (float32 lub int16)
 
         Returns:
             Poziom audio w dB
@@ -191,11 +299,8 @@ class AudioCapture:
         if len(audio_data) == 0:
             return -np.inf
 
-        rms = np.sqrt(np.mean(audio_data**2))
-        if rms > 0:
-            return 20 * np.log10(rms)
-        else:
-            return -np.inf
+        # Pipeline ma już ten poziom w FrameFeatures (set_level_callback)
+        return self.feature_extractor.compute(audio_data).level_db
 
     def get_statistics(self) -> dict:
         """
@@ -215,6 +320,8 @@ class AudioCapture:
             "dropped_frames": self.dropped_frames,
             "drop_rate": self.dropped_frames / max(self.total_frames, 1),
             "sample_rate": self.sample_rate,
+            "device_sample_rate": self.stream_sample_rate,
+            "sample_format": self.sample_format,
             "is_recording": self.is_recording,
             "queue_size": self.audio_queue.qsize(),
         }
@@ -226,4 +333,6 @@ class AudioCapture:
                 self.audio_queue.get_nowait()
             except queue.Empty:
                 break
+        for resampler in self.resamplers:
+            resampler.reset()
         logger.info("🧹 Bufor audio wyczyszczony")
@@ -0,0 +1,59 @@
+"""
+Audio Format - Formaty próbek audio (float32 / int16)
+Sample format helpers shared by capture, VAD, segment storage and STT
+
+Autor: AI Assistant
+Data: 2025-01-18
+"""
+
+import numpy as np
+
+# Formaty próbek obsługiwane przez AudioCapture i pipeline
+SAMPLE_FORMATS = {"float32": np.float32, "int16": np.int16}
+
+# Skala PCM 16-bit (int16 -> float32 dzieli przez 32768, odwrotnie mnoży przez 32767)
+INT16_SCALE = 32768.0
+
+
+def sample_dtype(sample_format: str) -> type:
+    """
+    Typ numpy dla formatu próbek
+
+    Args:
+        sample_format: "float32" lub "int16"
+
+    Returns:
+        np.float32 lub np.int16
+    """
+    if sample_format not in SAMPLE_FORMATS:
+        raise ValueError(
+            f"Nieznany format próbek: {sample_format} "
+            f"(dostępne: {', '.join(SAMPLE_FORMATS)})"
+        )
+    return SAMPLE_FORMATS[sample_format]
+
+
+def to_float32(audio: np.ndarray) -> np.ndarray:
+    """
+    Audio jako float32 w zakresie [-1, 1] (kopia tylko gdy potrzebna)
+
+    Args:
+        audio: Audio int16 lub float
+    """
+    audio = np.asarray(audio)
+    if audio.dtype == np.int16:
+        return audio.astype(np.float32) * np.float32(1.0 / INT16_SCALE)
+    return audio.astype(np.float32, copy=False)
+
+
+def to_int16(audio: np.ndarray) -> np.ndarray:
+    """
+    Audio jako PCM int16 (float przycinany do [-1, 1])
+
+    Args:
+        audio: Audio float w zakresie [-1, 1] lub int16
+    """
+    audio = np.asarray(audio)
+    if audio.dtype == np.int16:
+        return audio
+    return (np.clip(audio, -1.0, 1.0) * 32767).astype(np.int16)
@@ -0,0 +1,182 @@
+"""
+Micro-Batch Scheduler - Grupowanie segmentów z wielu sesji
+Cross-session micro-batching scheduler for the shared STT pool
+
+Autor: AI Assistant
+Data: 2025-01-18
+"""
+
+import threading
+import time
+import logging
+import numpy as np
+from collections import Counter, OrderedDict, deque
+from typing import Any, Deque, Dict, Hashable, List, Optional, Tuple
+
+# Konfiguracja loggingu
+logger = logging.getLogger(__name__)
+
+
+class MicroBatchScheduler:
+    """
+    Scheduler zbierający gotowe segmenty ze wszystkich sesji w batche
+
+    Batch jest zamykany gdy osiągnie max_batch_size albo gdy najstarszy
+    oczekujący segment czeka max_wait sekund. Segmenty wybierane są
+    round-robin po sesjach (max_per_session z jednej sesji na rundę),
+    więc jedna głośna sesja nie zagłodzi pozostałych.
+    """
+
+    def __init__(
+        self,
+        max_batch_size: int = 8,
+        max_wait: float = 0.05,
+        max_per_session: int = 1,
+        max_pending: int = 256,
+        delay_history_size: int = 1000,
+    ):
+        """
+        Inicjalizacja schedulera
+
+        Args:
+            max_batch_size: Max. liczba segmentów w batchu
+            max_wait: Max. czas oczekiwania najstarszego segmentu (s)
+            max_per_session: Max. segmentów z jednej sesji na rundę round-robin
+            max_pending: Max. liczba oczekujących segmentów (backpressure)
+            delay_history_size: Liczba ostatnich opóźnień do statystyk
+        """
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max_wait
+        self.max_per_session = max(1, max_per_session)
+        self.max_pending = max_pending
+
+        # Kolejki FIFO per sesja, w kolejności round-robin
+        self._queues: "OrderedDict[Hashable, Deque[Tuple[float, Any]]]" = OrderedDict()
+        self._pending = 0
+        self._cond = threading.Condition()
+
+        # Statystyki
+        self.batch_size_histogram: Counter = Counter()
+        self.batches_dispatched = 0
+        self.items_dispatched = 0
+        self.queue_delays: Deque[float] = deque(maxlen=delay_history_size)
+
+        logger.info(
+            f"📦 MicroBatchScheduler: batch={self.max_batch_size}, "
+            f"wait={max_wait * 1000:.0f}ms"
+        )
+
+    @property
+    def pending_count(self) -> int:
+        """Liczba oczekujących segmentów"""
+        with self._cond:
+            return self._pending
+
+    def submit(
+        self, session_key: Hashable, item: Any, timeout: Optional[float] = None
+    ) -> bool:
+        """
+        Dodaj segment sesji do kolejki
+
+        Args:
+            session_key: Klucz sesji (do fairness)
+            item: Element do przetworzenia
+            timeout: Max. czas czekania na miejsce (None = bez limitu)
+
+        Returns:
+            True jeśli element przyjęty
+        """
+        with self._cond:
+            if not self._cond.wait_for(
+                lambda: self._pending < self.max_pending, timeout
+            ):
+                return False
+
+            self._queues.setdefault(session_key, deque()).append((time.time(), item))
+            self._pending += 1
+            self._cond.notify_all()
+            return True
+
+    def next_batch(self, timeout: Optional[float] = None) -> List[Any]:
+        """
+        Pobierz kolejny batch (blokuje do zamknięcia batcha lub timeoutu)
+
+        Args:
+            timeout: Max. czas czekania (None = bez limitu)
+
+        Returns:
+            Lista elementów (pusta po timeoucie)
+        """
+        deadline = time.time() + timeout if timeout is not None else None
+
+        with self._cond:
+            while True:
+                now = time.time()
+                wait_left = None
+
+                if self._pending:
+                    wait_left = self._oldest_submit_time() + self.max_wait - now
+                    if self._pending >= self.max_batch_size or wait_left <= 0:
+                        return self._take_batch(now)
+
+                remaining = deadline - now if deadline is not None else None
+                if remaining is not None and remaining <= 0:
+                    return []
+
+                waits = [w for w in (wait_left, remaining) if w is not None]
+                self._cond.wait(min(waits) if waits else None)
+
+    def _oldest_submit_time(self) -> float:
+        """Czas dodania najstarszego oczekującego elementu"""
+        return min(q[0][0] for q in self._queues.values() if q)
+
+    def _take_batch(self, now: float) -> List[Any]:
+        """Zbierz batch round-robin po sesjach (wywoływane pod lockiem)"""
+        batch = []
+        while len(batch) < self.max_batch_size and self._pending:
+            for key in list(self._queues.keys()):
+                session_queue = self._queues[key]
+                taken = 0
+                while (
+                    session_queue
+                    and taken < self.max_per_session
+                    and len(batch) < self.max_batch_size
+                ):
+                    submitted_at, item = session_queue.popleft()
+                    self.queue_delays.append(now - submitted_at)
+                    batch.append(item)
+                    taken += 1
+                    self._pending -= 1
+
+                # Obsłużona sesja trafia na koniec kolejki round-robin
+                self._queues.move_to_end(key)
+                if not session_queue:
+                    del self._queues[key]
+
+                if len(batch) >= self.max_batch_size:
+                    break
+
+        self.batch_size_histogram[len(batch)] += 1
+        self.batches_dispatched += 1
+        self.items_dispatched += len(batch)
+        self._cond.notify_all()
+        return batch
+
+    def get_statistics(self) -> Dict[str, Any]:
+        """Pobierz statystyki batchowania"""
+        with self._cond:
+            delays = list(self.queue_delays)
+            return {
+                "pending": self._pending,
+                "active_sessions": len(self._queues),
+                "batches_dispatched": self.batches_dispatched,
+                "avg_batch_size": (
+                    self.items_dispatched / self.batches_dispatched
+                    if self.batches_dispatched
+                    else 0.0
+                ),
+                "batch_size_histogram": dict(sorted(self.batch_size_histogram.items())),
+                "avg_queue_delay": float(np.mean(delays)) if delays else 0.0,
+                "p95_queue_delay": float(np.percentile(delays, 95)) if delays else 0.0,
+                "max_queue_delay": max(delays) if delays else 0.0,
+            }
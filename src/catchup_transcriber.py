@@ -0,0 +1,266 @@
+"""
+Catch-up Transcriber - Nadrabianie zaległości STT długimi oknami
+Catch-up mode: coalesce backlogged segments into long-form batch windows
+
+Autor: AI Assistant
+Data: 2025-01-18
+"""
+
+import time
+import logging
+import numpy as np
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+from audio_format import to_float32
+from speech_segmenter import SpeechSegment
+from stt_backend import TranscriptionResult
+
+# Konfiguracja loggingu
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class CatchupWindow:
+    """Okno audio sklejone z kolejnych segmentów backlogu"""
+
+    audio: np.ndarray
+    sample_rate: int
+    segments: List[SpeechSegment] = field(default_factory=list)
+    # Położenie (start, end) każdego segmentu w oknie, w sekundach
+    offsets: List[Tuple[float, float]] = field(default_factory=list)
+
+    @property
+    def duration(self) -> float:
+        """Długość okna w sekundach"""
+        return len(self.audio) / self.sample_rate
+
+
+def build_windows(
+    segments: List[SpeechSegment],
+    window_seconds: float = 30.0,
+    gap_seconds: float = 0.3,
+) -> List[CatchupWindow]:
+    """
+    Sklej kolejne segmenty w okna do window_seconds
+
+    Między segmentami wstawiana jest cisza gap_seconds, żeby dekoder
+    postawił granicę zdania. Segment dłuższy niż okno dostaje własne okno.
+
+    Args:
+        segments: Segmenty w kolejności backlogu
+        window_seconds: Max. długość okna (s)
+        gap_seconds: Cisza między segmentami (s)
+
+    Returns:
+        Lista okien w kolejności segmentów
+    """
+    windows: List[CatchupWindow] = []
+    parts: List[np.ndarray] = []
+    current: Optional[CatchupWindow] = None
+    position = 0.0
+
+    def close_window():
+        if current is not None:
+            current.audio = np.concatenate(parts)
+            windows.append(current)
+
+    for segment in segments:
+        # Okno idzie prosto do STT - segmenty int16 i float32 w jednym formacie
+        audio = to_float32(segment.audio_data.flatten())
+        duration = len(audio) / segment.sample_rate
+        gap = int(gap_seconds * segment.sample_rate)
+
+        fits = (
+            current is not None
+            and current.sample_rate == segment.sample_rate
+            and position + gap_seconds + duration <= window_seconds
+        )
+        if not fits:
+            close_window()
+            current = CatchupWindow(audio=audio, sample_rate=segment.sample_rate)
+            parts = []
+            position = 0.0
+        else:
+            parts.append(np.zeros(gap, dtype=np.float32))
+            position += gap / segment.sample_rate
+
+        parts.append(audio)
+        current.segments.append(segment)
+        current.offsets.append((position, position + duration))
+        position += duration
+
+    close_window()
+    return windows
+
+
+def assign_transcription(
+    window: CatchupWindow, result: TranscriptionResult
+) -> List[Optional[TranscriptionResult]]:
+    """
+    Rozdziel wynik okna na segmenty źródłowe wg znaczników czasu
+
+    Każdy segment dekodera trafia do segmentu źródłowego, w którym leży
+    jego środek (lub do najbliższego, jeśli środek wypada w ciszy między
+    segmentami).
+
+    Args:
+        window: Okno catch-up
+        result: Wynik transkrypcji okna z segmentami start/end
+
+    Returns:
+        Wyniki per segment źródłowy (w kolejności window.segments)
+    """
+    assigned: List[List[Dict[str, Any]]] = [[] for _ in window.segments]
+    for part in result.segments:
+        if not part.get("text", "").strip():
+            continue
+        middle = (part["start"] + part["end"]) / 2
+        distances = [
+            (
+                0.0
+                if start <= middle <= end
+                else min(abs(middle - start), abs(middle - end))
+            )
+            for start, end in window.offsets
+        ]
+        assigned[int(np.argmin(distances))].append(part)
+
+    results: List[Optional[TranscriptionResult]] = []
+    for (start, end), parts in zip(window.offsets, assigned):
+        share = (end - start) / window.duration if window.duration > 0 else 0.0
+        results.append(
+            TranscriptionResult(
+                text=" ".join(p["text"].strip() for p in parts),
+                language=result.language,
+                confidence=result.confidence if parts else 0.0,
+                processing_time=result.processing_time * share,
+                segments=[
+                    {**p, "start": p["start"] - start, "end": p["end"] - start}
+                    for p in parts
+                ],
+                model_used=result.model_used,
+            )
+        )
+    return results
+
+
+class CatchupTranscriber:
+    """
+    Transkrypcja zaległych segmentów długimi oknami w jednym batchu
+
+    Segmenty sklejane są w okna do 30 s, okna dekodowane razem przez
+    engine.transcribe_batch(with_timestamps=True), a tekst przypisywany
+    z powrotem do segmentów po znacznikach czasu.
+    """
+
+    def __init__(
+        self,
+        engine,
+        window_seconds: float = 30.0,
+        gap_seconds: float = 0.3,
+        windows_per_batch: int = 4,
+    ):
+        """
+        Inicjalizacja
+
+        Args:
+            engine: Silnik STT z transcribe_batch(..., with_timestamps)
+            window_seconds: Max. długość okna (s)
+            gap_seconds: Cisza między segmentami w oknie (s)
+            windows_per_batch: Liczba okien dekodowanych razem
+        """
+        self.engine = engine
+        self.window_seconds = window_seconds
+        self.gap_seconds = gap_seconds
+        self.windows_per_batch = max(1, windows_per_batch)
+
+        # Statystyki
+        self.total_windows = 0
+        self.total_segments = 0
+
+    @property
+    def batch_audio_seconds(self) -> float:
+        """Ilość audio pobierana z backlogu na jeden batch (s)"""
+        return self.window_seconds * self.windows_per_batch
+
+    @staticmethod
+    def supports(engine) -> bool:
+        """Czy silnik obsługuje batch z tokenami czasu"""
+        return engine is not None and hasattr(engine, "transcribe_batch")
+
+    def transcribe(self, segments: List[SpeechSegment]):
+        """
+        Transkrybuj segmenty oknami i ustaw segment.transcription
+
+        Okna, dla których batch zawiódł, transkrybowane są segment po
+        segmencie przez transcribe_audio.
+
+        Args:
+            segments: Segmenty w kolejności backlogu
+        """
+        windows = build_windows(segments, self.window_seconds, self.gap_seconds)
+
+        for sample_rate in sorted({w.sample_rate for w in windows}):
+            group = [w for w in windows if w.sample_rate == sample_rate]
+            results = self.engine.transcribe_batch(
+                [w.audio for w in group], sample_rate, with_timestamps=True
+            )
+
+            for window, result in zip(group, results):
+                if result is None:
+                    for segment in window.segments:
+                        segment.transcription = self.engine.transcribe_audio(
+                            segment.audio_data, segment.sample_rate
+                        )
+                    continue
+
+                for segment, transcription in zip(
+                    window.segments, assign_transcription(window, result)
+                ):
+                    segment.transcription = transcription
+
+        self.total_windows += len(windows)
+        self.total_segments += len(segments)
+        logger.info(f"⏩ Catch-up: {len(segments)} segmentów w {len(windows)} oknach")
+
+
+class DrainStatistics:
+    """Tempo opróżniania backlogu STT w poszczególnych trybach"""
+
+    MODES = ("realtime", "catchup")
+
+    def __init__(self):
+        self.modes: Dict[str, Dict[str, float]] = {
+            mode: {"segments": 0, "audio_seconds": 0.0, "processing_seconds": 0.0}
+            for mode in self.MODES
+        }
+        self.catchup_activations = 0
+
+    def record(self, mode: str, segments: List[SpeechSegment], started_at: float):
+        """
+        Zarejestruj przetworzenie segmentów
+
+        Args:
+            mode: "realtime" lub "catchup"
+            segments: Przetworzone segmenty
+            started_at: Czas rozpoczęcia przetwarzania (time.time())
+        """
+        stats = self.modes[mode]
+        stats["segments"] += len(segments)
+        stats["audio_seconds"] += sum(s.duration for s in segments)
+        stats["processing_seconds"] += time.time() - started_at
+
+    def get_statistics(self) -> Dict[str, Any]:
+        """Pobierz statystyki (audio_seconds_per_second = tempo nadrabiania)"""
+        result: Dict[str, Any] = {"catchup_activations": self.catchup_activations}
+        for mode, stats in self.modes.items():
+            busy = stats["processing_seconds"]
+            result[mode] = {
+                **stats,
+                "segments_per_second": stats["segments"] / busy if busy > 0 else 0.0,
+                "audio_seconds_per_second": (
+                    stats["audio_seconds"] / busy if busy > 0 else 0.0
+                ),
+            }
+        return result
@@ -0,0 +1,291 @@
+"""
+Escalation - Ponowne dekodowanie niepewnych segmentów większym modelem
+Confidence-triggered escalation to a larger model within a compute budget
+
+Autor: AI Assistant
+Data: 2025-01-18
+"""
+
+import time
+import logging
+import threading
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from stt_backend import TranscriptionResult, create_stt_backend
+
+# Konfiguracja loggingu
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class EscalationPolicy:
+    """Kiedy i za ile eskalować segment do większego modelu"""
+
+    # Próg pewności (confidence z avg_logprob) poniżej którego eskalujemy
+    min_confidence: float = 0.55
+    # Współczynnik kompresji tekstu powyżej którego podejrzewamy powtórzenia
+    max_compression_ratio: float = 2.4
+    # Prawdopodobieństwo braku mowy, przy którym tekst podejrzewamy o halucynację
+    max_no_speech_prob: float = 0.6
+    # Budżet: sekundy CPU eskalacji na minutę audio
+    budget_per_minute: float = 15.0
+
+
+def escalation_reason(
+    result: Optional[TranscriptionResult], policy: EscalationPolicy
+) -> Optional[str]:
+    """
+    Powód eskalacji wyniku (None = wynik wystarczająco pewny)
+
+    Args:
+        result: Wynik pierwszego dekodowania
+        policy: Polityka eskalacji
+
+    Returns:
+        "failed", "low_confidence", "compression_ratio", "no_speech" lub None
+    """
+    if result is None:
+        return "failed"
+    if not result.text.strip():
+        return None
+    if result.confidence < policy.min_confidence:
+        return "low_confidence"
+
+    segments = result.segments or []
+    if any(
+        s.get("compression_ratio", 0.0) > policy.max_compression_ratio for s in segments
+    ):
+        return "compression_ratio"
+    if any(s.get("no_speech_prob", 0.0) > policy.max_no_speech_prob for s in segments):
+        return "no_speech"
+    return None
+
+
+class EscalatingSTTEngine:
+    """
+    Silnik STT z selektywną eskalacją niepewnych segmentów
+
+    Każdy segment dekoduje silnik podstawowy. Wyniki z niską pewnością,
+    podejrzanym współczynnikiem kompresji lub wysokim no_speech_prob są
+    dekodowane ponownie silnikiem eskalacji (większy model lub szerszy
+    beam). Eskalacja zużywa kredyt CPU przyrastający z długością audio
+    (budget_per_minute) - ponad budżet zostaje wynik podstawowy.
+    Pozostałe atrybuty delegowane są do silnika podstawowego.
+    """
+
+    def __init__(
+        self,
+        primary,
+        escalation,
+        policy: Optional[EscalationPolicy] = None,
+    ):
+        """
+        Inicjalizacja silnika
+
+        Args:
+            primary: Silnik podstawowy
+            escalation: Silnik eskalacji (większy model / szerszy beam)
+            policy: Polityka eskalacji
+        """
+        self.primary = primary
+        self.escalation = escalation
+        self.policy = policy or EscalationPolicy()
+
+        # Kredyt CPU: max. budżet jednej minuty audio
+        self._lock = threading.Lock()
+        self._credit = self.policy.budget_per_minute
+
+        # Statystyki
+        self.segments = 0
+        self.audio_seconds = 0.0
+        self.escalations = 0
+        self.reasons: Dict[str, int] = {}
+        self.skipped_budget = 0
+        self.escalation_seconds = 0.0
+        self.escalated_audio_seconds = 0.0
+        self.text_changed = 0
+
+    def __getattr__(self, name: str) -> Any:
+        # Wywoływane tylko dla atrybutów spoza instancji
+        if name == "primary":
+            raise AttributeError(name)
+        return getattr(self.primary, name)
+
+    @property
+    def previous_text(self) -> str:
+        return self.primary.previous_text
+
+    @previous_text.setter
+    def previous_text(self, value: str):
+        self.primary.previous_text = value
+
+    def replace_primary(self, engine) -> Any:
+        """
+        Podmień silnik podstawowy (silnik eskalacji zostaje)
+
+        Returns:
+            Poprzedni silnik podstawowy
+        """
+        old_engine, self.primary = self.primary, engine
+        return old_engine
+
+    def load_model(self) -> bool:
+        """Załaduj oba modele (bez modelu eskalacji działa sam podstawowy)"""
+        if not self.primary.load_model():
+            return False
+        if self.escalation is not None and not self.escalation.load_model():
+            logger.warning("⚠️ Model eskalacji niedostępny - eskalacja wyłączona")
+            self.escalation = None
+        return True
+
+    def unload_model(self):
+        """Zwolnij oba modele"""
+        self.primary.unload_model()
+        if self.escalation is not None:
+            self.escalation.unload_model()
+
+    def transcribe_audio(
+        self, audio_data: np.ndarray, sample_rate: int = 16000
+    ) -> Optional[TranscriptionResult]:
+        """Transkrybuj segment, eskalując niepewny wynik"""
+        result = self.primary.transcribe_audio(audio_data, sample_rate)
+        return self._maybe_escalate(audio_data, sample_rate, result)
+
+    def transcribe_batch(
+        self,
+        audio_batch: List[np.ndarray],
+        sample_rate: int = 16000,
+        with_timestamps: bool = False,
+    ) -> List[Optional[TranscriptionResult]]:
+        """Transkrybuj batch, eskalując niepewne wyniki pojedynczo"""
+        results = self.primary.transcribe_batch(
+            audio_batch, sample_rate, with_timestamps=with_timestamps
+        )
+        return [
+            self._maybe_escalate(audio, sample_rate, result)
+            for audio, result in zip(audio_batch, results)
+        ]
+
+    def _maybe_escalate(
+        self,
+        audio_data: np.ndarray,
+        sample_rate: int,
+        result: Optional[TranscriptionResult],
+    ) -> Optional[TranscriptionResult]:
+        """Eskaluj wynik jeśli polityka i budżet na to pozwalają"""
+        duration = len(audio_data) / max(sample_rate, 1)
+        reason = escalation_reason(result, self.policy)
+
+        with self._lock:
+            self.segments += 1
+            self.audio_seconds += duration
+            self._credit = min(
+                self._credit + duration / 60.0 * self.policy.budget_per_minute,
+                self.policy.budget_per_minute,
+            )
+            if reason is None or self.escalation is None:
+                return result
+
+            # Koszt szacowany z dotychczasowego RTF eskalacji
+            rtf = (
+                self.escalation_seconds / self.escalated_audio_seconds
+                if self.escalated_audio_seconds > 0
+                else 0.0
+            )
+            if self._credit <= 0 or self._credit < duration * rtf:
+                self.skipped_budget += 1
+                return result
+
+        self.escalation.previous_text = getattr(self.primary, "previous_text", "")
+        started_at = time.time()
+        escalated = self.escalation.transcribe_audio(audio_data, sample_rate)
+        cost = time.time() - started_at
+
+        with self._lock:
+            self._credit -= cost
+            self.escalations += 1
+            self.reasons[reason] = self.reasons.get(reason, 0) + 1
+            self.escalation_seconds += cost
+            self.escalated_audio_seconds += duration
+            if escalated is None:
+                return result
+            if result is None or escalated.text != result.text:
+                self.text_changed += 1
+
+        logger.debug(
+            f"⬆️ Eskalacja ({reason}): "
+            f"'{result.text if result else ''}' -> '{escalated.text}' ({cost:.2f}s)"
+        )
+        if escalated.text:
+            self.primary.previous_text = escalated.text
+        return escalated
+
+    def get_escalation_statistics(self) -> Dict[str, Any]:
+        """Statystyki eskalacji"""
+        with self._lock:
+            audio_minutes = self.audio_seconds / 60.0
+            return {
+                "segments": self.segments,
+                "escalations": self.escalations,
+                "escalation_rate": self.escalations / max(self.segments, 1),
+                "reasons": dict(self.reasons),
+                "skipped_budget": self.skipped_budget,
+                "escalation_seconds": self.escalation_seconds,
+                "cost_per_audio_minute": (
+                    self.escalation_seconds / audio_minutes
+                    if audio_minutes > 0
+                    else 0.0
+                ),
+                "budget_per_minute": self.policy.budget_per_minute,
+                "text_changed": self.text_changed,
+                "change_rate": self.text_changed / max(self.escalations, 1),
+            }
+
+    def get_model_info(self) -> Dict[str, Any]:
+        """Informacje o modelu podstawowym + eskalacja"""
+        info = dict(self.primary.get_model_info())
+        info["escalation"] = {
+            "model_name": (
+                self.escalation.model_name if self.escalation is not None else None
+            ),
+            **self.get_escalation_statistics(),
+        }
+        return info
+
+
+def create_escalating_backend(
+    primary,
+    backend: str = "whisper",
+    model_name: Optional[str] = None,
+    beam_size: Optional[int] = None,
+    policy: Optional[EscalationPolicy] = None,
+    **kwargs,
+) -> EscalatingSTTEngine:
+    """
+    Opakuj silnik eskalacją do większego modelu lub szerszego beamu
+
+    Args:
+        primary: Silnik podstawowy
+        backend: Backend silnika eskalacji
+        model_name: Model eskalacji (domyślnie model podstawowy)
+        beam_size: Beam eskalacji (None = domyślny backendu)
+        policy: Polityka eskalacji
+        **kwargs: Parametry create_stt_backend (model_dir, precision...)
+
+    Returns:
+        EscalatingSTTEngine
+    """
+    if beam_size is not None:
+        kwargs.setdefault("beam_size", beam_size)
+        kwargs.setdefault("best_of", beam_size)
+    escalation = create_stt_backend(
+        backend, model_name=model_name or primary.model_name, **kwargs
+    )
+    logger.info(
+        f"⬆️ Eskalacja: {primary.model_name} -> {escalation.model_name}"
+        + (f" (beam={beam_size})" if beam_size else "")
+    )
+    return EscalatingSTTEngine(primary, escalation, policy)
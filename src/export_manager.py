@@ -191,6 +191,7 @@ class ExportManager:
                         "processing_time": segment.transcription.processing_time,
                         "language": segment.transcription.language,
                         "model_used": segment.transcription.model_used,
+                        "revision": getattr(segment, "revision", 0),
                     }
                 )
 
@@ -0,0 +1,336 @@
+"""
+Faster-Whisper Backend - Silnik STT na CTranslate2 (int8 na CPU)
+CTranslate2 / faster-whisper implementation of the STTBackend protocol
+
+Autor: AI Assistant
+Data: 2025-01-18
+"""
+
+import os
+import time
+import logging
+import threading
+import numpy as np
+from typing import Any, Callable, Dict, List, Optional
+
+from model_cache import model_cache
+from stt_backend import TranscriptionResult, confidence_from_segments, prepare_audio
+
+# Konfiguracja loggingu
+logger = logging.getLogger(__name__)
+
+
+class FasterWhisperBackend:
+    """
+    Silnik STT oparty na faster-whisper (CTranslate2)
+
+    Domyślnie compute_type="int8" - kwantyzowane wagi na CPU są
+    kilkukrotnie szybsze od PyTorch fp32 przy tej samej liczbie rdzeni.
+    Zwraca ten sam TranscriptionResult co WhisperSTTEngine.
+    """
+
+    backend_name = "faster-whisper"
+
+    def __init__(
+        self,
+        model_name: str = "base",
+        device: str = "cpu",
+        compute_type: str = "int8",
+        language: str = "pl",
+        beam_size: int = 5,
+        best_of: int = 5,
+        temperature: float = 0.0,
+        patience: float = 1.0,
+        length_penalty: float = 1.0,
+        initial_prompt: Optional[str] = None,
+        condition_on_previous_text: bool = True,
+        compression_ratio_threshold: float = 2.4,
+        logprob_threshold: float = -1.0,
+        no_speech_threshold: float = 0.6,
+        cpu_threads: int = 0,
+        num_workers: int = 1,
+        model_dir: Optional[str] = None,
+        post_processor: Optional[Callable[[str], str]] = None,
+    ):
+        """
+        Inicjalizacja backendu
+
+        Args:
+            model_name: Nazwa modelu (tiny, base, small, medium, large-v3...)
+            device: 'cpu', 'cuda' lub 'auto'
+            compute_type: Typ obliczeń CTranslate2 (int8, int8_float16, float32...)
+            language: Kod języka
+            beam_size: Rozmiar beam search
+            best_of: Liczba kandydatów przy samplingu
+            temperature: Temperature dla sampling (0.0 = deterministyczny)
+            patience: Patience factor dla beam search
+            length_penalty: Penalty dla długości sekwencji
+            initial_prompt: Początkowy prompt dla kontekstu
+            condition_on_previous_text: Czy używać poprzedniego tekstu jako kontekst
+            compression_ratio_threshold: Próg dla wykrywania powtórzeń
+            logprob_threshold: Próg prawdopodobieństwa
+            no_speech_threshold: Próg dla wykrywania braku mowy
+            cpu_threads: Wątki CPU na jedno wywołanie (0 = domyślnie)
+            num_workers: Liczba równoległych wywołań transcribe (wątki)
+            model_dir: Lokalny katalog modelu (model.bin) lub katalog cache
+                modeli - ładowanie bez dostępu do sieci
+            post_processor: Funkcja post-processingu tekstu (np. dla PL)
+        """
+        self.model_name = model_name
+        self.device = device
+        self.compute_type = compute_type
+        self.language = language
+        self.cpu_threads = cpu_threads
+        self.num_workers = max(1, num_workers)
+        self.model_dir = model_dir
+        self.post_processor = post_processor
+
+        # Parametry dekodowania
+        self.decode_options = {
+            "language": language,
+            "beam_size": beam_size,
+            "best_of": best_of,
+            "temperature": temperature,
+            "patience": patience,
+            "length_penalty": length_penalty,
+            "initial_prompt": initial_prompt,
+            "condition_on_previous_text": condition_on_previous_text,
+            "compression_ratio_threshold": compression_ratio_threshold,
+            "log_prob_threshold": logprob_threshold,
+            "no_speech_threshold": no_speech_threshold,
+        }
+
+        # Model i stan
+        self.model = None
+        self.is_loaded = False
+        self.previous_text = ""
+        self._inference_lock = threading.RLock()
+
+        # Statystyki
+        self.total_transcriptions = 0
+        self.total_processing_time = 0
+        self.model_load_time = 0
+
+        logger.info(
+            f"🤖 FasterWhisperBackend inicjalizowany: model={model_name}, "
+            f"device={device}, compute_type={compute_type}"
+        )
+
+    def _cache_key(self) -> tuple:
+        """Klucz modelu w współdzielonym cache"""
+        return (
+            "faster-whisper",
+            self.model_name,
+            self.model_dir,
+            self.device,
+            self.compute_type,
+        )
+
+    def _model_source(self) -> Dict[str, Any]:
+        """
+        Parametry WhisperModel wskazujące źródło modelu
+
+        Katalog z plikiem model.bin ładowany jest bezpośrednio; inny
+        katalog traktowany jest jako cache modeli Hugging Face i używany
+        z local_files_only=True (bez pobierania).
+        """
+        if self.model_dir is None:
+            return {"model_size_or_path": self.model_name}
+
+        if os.path.isfile(os.path.join(self.model_dir, "model.bin")):
+            return {"model_size_or_path": self.model_dir}
+
+        named_dir = os.path.join(self.model_dir, self.model_name)
+        if os.path.isfile(os.path.join(named_dir, "model.bin")):
+            return {"model_size_or_path": named_dir}
+
+        return {
+            "model_size_or_path": self.model_name,
+            "download_root": self.model_dir,
+            "local_files_only": True,
+        }
+
+    def load_model(self) -> bool:
+        """
+        Załaduj model CTranslate2
+
+        Returns:
+            True jeśli załadowanie się powiodło
+        """
+        if self.is_loaded:
+            logger.info("✅ Model już załadowany")
+            return True
+
+        try:
+            from faster_whisper import WhisperModel
+
+            start_time = time.time()
+            logger.info(f"📥 Ładowanie modelu faster-whisper: {self.model_name}")
+
+            self.model = model_cache.acquire(
+                self._cache_key(),
+                lambda: WhisperModel(
+                    device=self.device,
+                    compute_type=self.compute_type,
+                    cpu_threads=self.cpu_threads,
+                    num_workers=self.num_workers,
+                    **self._model_source(),
+                ),
+            )
+            # CTranslate2 obsługuje num_workers równoległych wywołań
+            if self.num_workers == 1:
+                self._inference_lock = model_cache.get_lock(self._cache_key())
+
+            self.model_load_time = time.time() - start_time
+            self.is_loaded = True
+
+            logger.info(f"✅ Model załadowany w {self.model_load_time:.2f}s")
+            return True
+
+        except Exception as e:
+            logger.error(f"❌ Błąd ładowania modelu faster-whisper: {e}")
+            self.is_loaded = False
+            return False
+
+    def transcribe_audio(
+        self, audio_data: np.ndarray, sample_rate: int = 16000
+    ) -> Optional[TranscriptionResult]:
+        """
+        Transkrybuj audio na tekst
+
+        Args:
+            audio_data: Dane audio jako numpy array
+            sample_rate: Częstotliwość próbkowania
+
+        Returns:
+            TranscriptionResult lub None w przypadku błędu
+        """
+        if not self.is_loaded:
+            if not self.load_model():
+                return None
+
+        try:
+            start_time = time.time()
+            audio = prepare_audio(audio_data, sample_rate)
+
+            options = self.decode_options.copy()
+            if self.previous_text and options["condition_on_previous_text"]:
+                options["initial_prompt"] = self.previous_text[-200:]
+
+            with self._inference_lock:
+                segments_iter, info = self.model.transcribe(audio, **options)
+                # Generator - dekodowanie odbywa się przy iteracji
+                segments = [self._segment_to_dict(s) for s in segments_iter]
+
+            processing_time = time.time() - start_time
+            text = "".join(s["text"] for s in segments).strip()
+            if self.post_processor is not None:
+                text = self.post_processor(text)
+
+            result = TranscriptionResult(
+                text=text,
+                language=info.language,
+                confidence=confidence_from_segments(segments),
+                processing_time=processing_time,
+                segments=segments,
+                model_used=self.model_name,
+            )
+
+            self.total_transcriptions += 1
+            self.total_processing_time += processing_time
+            if result.text:
+                self.previous_text = result.text
+
+            logger.debug(
+                f"🎤 Transkrypcja: '{result.text}' "
+                f"({processing_time:.2f}s, conf={result.confidence:.2f})"
+            )
+            return result
+
+        except Exception as e:
+            logger.error(f"❌ Błąd transkrypcji faster-whisper: {e}")
+            return None
+
+    def transcribe_batch(
+        self,
+        audio_batch: List[np.ndarray],
+        sample_rate: int = 16000,
+        with_timestamps: bool = False,
+    ) -> List[Optional[TranscriptionResult]]:
+        """
+        Transkrybuj wiele segmentów
+
+        CTranslate2 nie dekoduje listy niezależnych segmentów jednym
+        wywołaniem, więc segmenty idą kolejno (równoległość daje
+        num_workers przy wywołaniach z wielu wątków). Segmenty zawsze mają
+        znaczniki czasu; batch nie używa kontekstu poprzedniego tekstu.
+
+        Args:
+            audio_batch: Lista segmentów audio
+            sample_rate: Częstotliwość próbkowania
+            with_timestamps: Dla zgodności z STTBackend
+
+        Returns:
+            Lista wyników w kolejności wejścia
+        """
+        previous_text = self.previous_text
+        results = []
+        for audio in audio_batch:
+            self.previous_text = ""
+            results.append(self.transcribe_audio(audio, sample_rate))
+        self.previous_text = previous_text
+        return results
+
+    @staticmethod
+    def _segment_to_dict(segment: Any) -> Dict[str, Any]:
+        """Segment faster-whisper -> słownik w formacie Whisper"""
+        return {
+            "id": segment.id,
+            "start": segment.start,
+            "end": segment.end,
+            "text": segment.text,
+            "tokens": list(segment.tokens),
+            "temperature": segment.temperature,
+            "avg_logprob": segment.avg_logprob,
+            "compression_ratio": segment.compression_ratio,
+            "no_speech_prob": segment.no_speech_prob,
+        }
+
+    def get_model_info(self) -> Dict[str, Any]:
+        """Pobierz informacje o modelu"""
+        return {
+            "backend": self.backend_name,
+            "model_name": self.model_name,
+            "device": self.device,
+            "compute_type": self.compute_type,
+            "language": self.language,
+            "is_loaded": self.is_loaded,
+            "load_time": self.model_load_time,
+            "total_transcriptions": self.total_transcriptions,
+            "avg_processing_time": (
+                self.total_processing_time / max(self.total_transcriptions, 1)
+            ),
+            "decode_options": self.decode_options,
+        }
+
+    def clear_context(self):
+        """Wyczyść kontekst poprzedniego tekstu"""
+        self.previous_text = ""
+        logger.info("🧹 Kontekst tekstowy wyczyszczony")
+
+    def unload_model(self):
+        """Zwolnij model"""
+        if self.model is not None:
+            self.model = None
+            self.is_loaded = False
+            model_cache.release(self._cache_key())
+            logger.info("🗑️ Model faster-whisper zwolniony")
+
+    def __enter__(self):
+        """Context manager entry"""
+        self.load_model()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        """Context manager exit"""
+        self.unload_model()
@@ -0,0 +1,424 @@
+"""
+Fork Server - Procesy workerów STT forkowane z rozgrzanego procesu z modelem
+Fork-server STT worker processes sharing a preloaded model copy-on-write
+
+Autor: AI Assistant
+Data: 2025-01-18
+"""
+
+import gc
+import os
+import json
+import time
+import select
+import signal
+import socket
+import logging
+import threading
+from multiprocessing.connection import Connection
+from typing import Any, Callable, Dict, List, Optional
+
+from stt_server import STTWorkerPool
+
+# Konfiguracja loggingu
+logger = logging.getLogger(__name__)
+
+# Max. rozmiar komunikatu kanału sterującego
+_CONTROL_BUFSIZE = 4096
+
+
+def _send_control(sock: socket.socket, message: Dict[str, Any], fds: List[int] = ()):
+    """Wyślij komunikat JSON (opcjonalnie z deskryptorami) kanałem sterującym"""
+    socket.send_fds(sock, [json.dumps(message).encode("utf-8")], list(fds))
+
+
+def _recv_control(sock: socket.socket):
+    """Odbierz komunikat JSON i deskryptory (None gdy kanał zamknięty)"""
+    data, fds, _, _ = socket.recv_fds(sock, _CONTROL_BUFSIZE, 1)
+    if not data:
+        return None, fds
+    return json.loads(data.decode("utf-8")), fds
+
+
+def _worker_main(engine, fd: int):
+    """
+    Pętla procesu workera: zadania z kanału -> wyniki z powrotem
+
+    Proces kończy się os._exit - bez handlerów atexit rodzica.
+    """
+    conn = Connection(fd)
+    while True:
+        try:
+            kind, payload = conn.recv()
+        except (EOFError, OSError):
+            os._exit(0)
+
+        try:
+            if kind == "audio":
+                audio, sample_rate, previous_text = payload
+                if hasattr(engine, "previous_text"):
+                    engine.previous_text = previous_text
+                result = engine.transcribe_audio(audio, sample_rate)
+            elif kind == "batch":
+                audio_batch, sample_rate, with_timestamps = payload
+                result = engine.transcribe_batch(
+                    audio_batch, sample_rate, with_timestamps=with_timestamps
+                )
+            else:
+                result = None
+        except Exception as e:
+            logger.error(f"❌ Błąd transkrypcji w procesie workera: {e}")
+            result = None
+
+        try:
+            conn.send(result)
+        except (EOFError, OSError):
+            os._exit(0)
+
+
+def _fork_server_main(engine_factory: Callable[[], Any], control: socket.socket):
+    """
+    Proces fork-servera: ładuje model raz, zamraża GC i forkuje workery
+
+    gc.freeze() przenosi obiekty (w tym moduły i tensory modelu) do
+    generacji permanentnej - GC w workerach nie dotyka ich nagłówków,
+    więc strony pozostają współdzielone copy-on-write.
+    """
+    try:
+        engine = engine_factory()
+        loaded = not hasattr(engine, "load_model") or engine.load_model()
+    except Exception as e:
+        logger.error(f"❌ Fork-server nie załadował modelu: {e}")
+        loaded = False
+
+    gc.collect()
+    gc.freeze()
+    _send_control(control, {"ready": bool(loaded), "pid": os.getpid()})
+    if not loaded:
+        os._exit(1)
+
+    while True:
+        readable, _, _ = select.select([control], [], [], 0.5)
+
+        # Zbierz zakończone workery (zombie)
+        while True:
+            try:
+                pid, _ = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                break
+            if pid == 0:
+                break
+
+        if not readable:
+            continue
+
+        try:
+            message, fds = _recv_control(control)
+        except OSError:
+            message, fds = None, []
+        if message is None or message.get("command") == "stop":
+            os._exit(0)
+
+        if message.get("command") == "spawn" and fds:
+            pid = os.fork()
+            if pid == 0:
+                control.close()
+                signal.signal(signal.SIGTERM, signal.SIG_DFL)
+                _worker_main(engine, fds[0])
+            os.close(fds[0])
+            _send_control(control, {"pid": pid})
+
+
+class RemoteEngine:
+    """
+    Pośrednik silnika STT w procesie workera (interfejs jak silnik)
+
+    Wywołania serializowane są przez własną blokadę - jeden proces
+    obsługuje jedno zadanie naraz. Po śmierci procesu wywołania zwracają
+    None (jak błąd transkrypcji), a flaga died sygnalizuje puli, że
+    proces trzeba zastąpić nowym z fork-servera.
+    """
+
+    def __init__(self, slot: int, pid: int, conn: Connection):
+        self.slot = slot
+        self.pid = pid
+        self.conn = conn
+        self.previous_text = ""
+        self.lock = threading.Lock()
+        self.is_loaded = True
+        self.died = False
+
+    def _call(self, kind: str, payload: Any) -> Any:
+        if self.died:
+            return None
+        try:
+            self.conn.send((kind, payload))
+            return self.conn.recv()
+        except (EOFError, OSError):
+            logger.error(f"❌ Worker {self.pid} zakończył działanie w trakcie zadania")
+            self.died = True
+            return None
+
+    def transcribe_audio(self, audio_data, sample_rate: int = 16000):
+        """Transkrybuj segment w procesie workera"""
+        return self._call("audio", (audio_data, sample_rate, self.previous_text))
+
+    def transcribe_batch(
+        self, audio_batch, sample_rate: int = 16000, with_timestamps: bool = False
+    ):
+        """Transkrybuj batch w procesie workera"""
+        results = self._call("batch", (list(audio_batch), sample_rate, with_timestamps))
+        return results if results is not None else [None] * len(audio_batch)
+
+    def is_alive(self) -> bool:
+        """Czy proces workera żyje (bez zadania w toku)"""
+        if self.died:
+            return False
+        try:
+            # Czytelny kanał przy braku zadania oznacza EOF
+            return not self.conn.poll()
+        except (EOFError, OSError):
+            return False
+
+    def close(self):
+        """Zamknij kanał (worker kończy się po EOF)"""
+        try:
+            self.conn.close()
+        except OSError:
+            pass
+
+
+class ForkServerPool(STTWorkerPool):
+    """
+    Pula workerów STT w osobnych procesach forkowanych z fork-servera
+
+    Fork-server (proces potomny serwera) ładuje i rozgrzewa model raz,
+    wywołuje gc.freeze() i na żądanie forkuje workery dziedziczące wagi
+    copy-on-write. Wątki dyspozytorów w procesie serwera pobierają batche
+    z MicroBatchScheduler jak w STTWorkerPool i przekazują je procesom.
+    Nadzorca odtwarza martwe workery - respawn to sam fork (milisekundy).
+    Tylko systemy z os.fork (Linux, macOS).
+    """
+
+    def __init__(
+        self,
+        engine_factory: Callable[[], Any],
+        num_workers: int = 2,
+        max_queue_size: int = 256,
+        max_batch_size: int = 8,
+        max_batch_wait: float = 0.05,
+        supervise_interval: float = 0.2,
+    ):
+        """
+        Inicjalizacja puli
+
+        Args:
+            engine_factory: Funkcja tworząca silnik STT (wywoływana w fork-serverze)
+            num_workers: Liczba procesów workerów
+            max_queue_size: Max. liczba oczekujących segmentów
+            max_batch_size: Max. liczba segmentów w batchu
+            max_batch_wait: Max. czas zbierania batcha (s)
+            supervise_interval: Okres sprawdzania żywotności workerów (s)
+        """
+        super().__init__(
+            engine_factory,
+            num_workers=num_workers,
+            max_queue_size=max_queue_size,
+            max_batch_size=max_batch_size,
+            max_batch_wait=max_batch_wait,
+        )
+        self.supervise_interval = supervise_interval
+
+        self.fork_server_pid: Optional[int] = None
+        self._control: Optional[socket.socket] = None
+        self._control_lock = threading.Lock()
+        self._supervisor: Optional[threading.Thread] = None
+
+        # Statystyki respawnu
+        self.restarts = 0
+        self.spawn_times: List[float] = []
+
+    def start(self) -> bool:
+        """Uruchom fork-server, sforkuj workery i wątki dyspozytorów"""
+        if self.is_running:
+            return True
+        if not hasattr(os, "fork"):
+            logger.error("❌ Fork-server wymaga os.fork (Linux/macOS)")
+            return False
+
+        parent_sock, child_sock = socket.socketpair(
+            socket.AF_UNIX, socket.SOCK_SEQPACKET
+        )
+        pid = os.fork()
+        if pid == 0:
+            parent_sock.close()
+            try:
+                _fork_server_main(self.engine_factory, child_sock)
+            finally:
+                os._exit(1)
+
+        child_sock.close()
+        self._control = parent_sock
+        self.fork_server_pid = pid
+
+        message, _ = _recv_control(parent_sock)
+        if not message or not message.get("ready"):
+            logger.error("❌ Fork-server nie załadował modelu")
+            self._stop_fork_server()
+            return False
+
+        for slot in range(self.num_workers):
+            self.engines.append(self._spawn(slot))
+
+        self.is_running = True
+        for i, engine in enumerate(self.engines):
+            worker = threading.Thread(
+                target=self._worker_loop,
+                args=(i,),
+                daemon=True,
+                name=f"STTDispatcher-{i}",
+            )
+            worker.start()
+            self.workers.append(worker)
+
+        self._supervisor = threading.Thread(
+            target=self._supervise_loop, daemon=True, name="ForkServerSupervisor"
+        )
+        self._supervisor.start()
+
+        logger.info(
+            f"🍴 ForkServerPool uruchomiony: {self.num_workers} procesów "
+            f"(fork-server PID {pid})"
+        )
+        return True
+
+    def _spawn(self, slot: int) -> RemoteEngine:
+        """Sforkuj nowy proces workera z fork-servera"""
+        start_time = time.time()
+        ours, theirs = socket.socketpair(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            with self._control_lock:
+                _send_control(self._control, {"command": "spawn"}, [theirs.fileno()])
+                message, _ = _recv_control(self._control)
+        finally:
+            theirs.close()
+
+        if not message or "pid" not in message:
+            ours.close()
+            raise RuntimeError("Fork-server nie utworzył workera")
+
+        elapsed = time.time() - start_time
+        with self._stats_lock:
+            self.spawn_times.append(elapsed)
+        logger.info(f"🍴 Worker {slot}: PID {message['pid']} ({elapsed * 1000:.1f} ms)")
+        return RemoteEngine(slot, message["pid"], Connection(ours.detach()))
+
+    def _respawn(self, engine: RemoteEngine) -> RemoteEngine:
+        """Zastąp martwy worker nowym (wywoływane z blokadą workera)"""
+        engine.close()
+        replacement = self._spawn(engine.slot)
+        replacement.previous_text = engine.previous_text
+        self.engines[engine.slot] = replacement
+        with self._stats_lock:
+            self.restarts += 1
+        logger.warning(f"♻️ Worker {engine.slot} (PID {engine.pid}) odtworzony")
+        return replacement
+
+    def _worker_loop(self, slot: int):
+        """Pętla dyspozytora: batch ze schedulera -> proces workera"""
+        while self.is_running:
+            batch = self.scheduler.next_batch(timeout=0.1)
+            if not batch:
+                continue
+
+            while True:
+                engine = self.engines[slot]
+                with engine.lock:
+                    # Nadzorca mógł w międzyczasie podmienić proces
+                    if engine is not self.engines[slot]:
+                        continue
+                    self._run_batch(engine, batch)
+                    if engine.died and self.is_running:
+                        try:
+                            self._respawn(engine)
+                        except Exception as e:
+                            logger.error(f"❌ Błąd odtwarzania workera: {e}")
+                break
+
+    def _supervise_loop(self):
+        """Nadzorca: odtwarza workery, które zakończyły się bez zadania"""
+        while self.is_running:
+            time.sleep(self.supervise_interval)
+            for engine in list(self.engines):
+                if not engine.lock.acquire(blocking=False):
+                    continue  # zadanie w toku - błąd obsłuży dyspozytor
+                try:
+                    if self.is_running and not engine.is_alive():
+                        self._respawn(engine)
+                except Exception as e:
+                    logger.error(f"❌ Błąd odtwarzania workera: {e}")
+                finally:
+                    engine.lock.release()
+
+    def stop(self):
+        """Zatrzymaj dyspozytorów, workery i fork-server"""
+        if not self.is_running:
+            return
+
+        self.is_running = False
+        for worker in self.workers:
+            worker.join(timeout=5.0)
+        self.workers.clear()
+        if self._supervisor is not None:
+            self._supervisor.join(timeout=5.0)
+
+        for engine in self.engines:
+            engine.close()
+        self.engines.clear()
+        self._stop_fork_server()
+
+        logger.info("🍴 ForkServerPool zatrzymany")
+
+    def _stop_fork_server(self):
+        """Zakończ proces fork-servera"""
+        if self._control is not None:
+            try:
+                with self._control_lock:
+                    _send_control(self._control, {"command": "stop"})
+            except OSError:
+                pass
+            self._control.close()
+            self._control = None
+
+        if self.fork_server_pid:
+            try:
+                os.waitpid(self.fork_server_pid, 0)
+            except ChildProcessError:
+                pass
+            self.fork_server_pid = None
+
+    def worker_memory(self) -> List[Dict[str, Any]]:
+        """Pamięć współdzielona i prywatna każdego procesu workera (MB)"""
+        from model_weights import process_memory
+
+        return [
+            {"slot": engine.slot, "pid": engine.pid, **process_memory(engine.pid)}
+            for engine in list(self.engines)
+        ]
+
+    def get_statistics(self) -> Dict[str, Any]:
+        """Statystyki puli + respawny i pamięć workerów"""
+        stats = super().get_statistics()
+        with self._stats_lock:
+            spawn_times = list(self.spawn_times)
+            restarts = self.restarts
+        stats["fork_server"] = {
+            "pid": self.fork_server_pid,
+            "restarts": restarts,
+            "last_spawn_ms": spawn_times[-1] * 1000 if spawn_times else 0.0,
+            "avg_spawn_ms": (
+                sum(spawn_times) / len(spawn_times) * 1000 if spawn_times else 0.0
+            ),
+            "workers": self.worker_memory(),
+        }
+        return stats
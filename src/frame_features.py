@@ -0,0 +1,203 @@
+"""
+Frame Features - Cechy chunka audio liczone raz dla VAD, poziomu i segmentera
+Per-chunk features (energy, ZCR, peak, band energies) shared across stages
+
+Autor: AI Assistant
+Data: 2025-01-18
+"""
+
+import logging
+import numpy as np
+from dataclasses import dataclass
+from typing import List, Optional, Sequence, Tuple
+
+from audio_format import INT16_SCALE
+
+# Konfiguracja loggingu
+logger = logging.getLogger(__name__)
+
+# Poziom ciszy absolutnej (dB) - zamiast -inf dla zerowego chunka
+SILENCE_DB = -120.0
+
+
+@dataclass
+class FrameFeatures:
+    """Cechy jednego chunka audio (amplitudy w skali [-1, 1])"""
+
+    rms: float
+    zcr: float
+    peak: float
+    num_samples: int
+    # Energia w pasmach (średnia moc widma), None gdy pasma nie są liczone
+    band_energies: Optional[np.ndarray] = None
+
+    @property
+    def level_db(self) -> float:
+        """Poziom RMS w dB (jak AudioCapture.get_audio_level)"""
+        if self.rms <= 0:
+            return -np.inf
+        return float(20 * np.log10(self.rms))
+
+    @property
+    def peak_db(self) -> float:
+        """Poziom szczytowy w dB"""
+        return float(20 * np.log10(max(self.peak, 10 ** (SILENCE_DB / 20))))
+
+
+class FrameFeatureExtractor:
+    """
+    Liczenie cech chunka w jednym przebiegu na współdzielonych buforach
+
+    Bufory robocze są alokowane raz (rosną tylko dla większego chunka),
+    więc kolejne chunki nie tworzą tymczasowych tablic. Ekstraktor nie
+    jest bezpieczny wątkowo - jeden na wątek przetwarzania.
+    """
+
+    def __init__(
+        self,
+        sample_rate: int = 16000,
+        bands: Optional[Sequence[Tuple[float, float]]] = None,
+    ):
+        """
+        Inicjalizacja ekstraktora
+
+        Args:
+            sample_rate: Częstotliwość próbkowania
+            bands: Pasma (Hz) dla energii pasmowych, np. [(100, 1000), (1000, 4000)]
+                (None = bez FFT)
+        """
+        self.sample_rate = sample_rate
+        self.bands = list(bands) if bands else []
+
+        self._capacity = 0
+        self._work = np.empty(0, dtype=np.float32)
+        self._signs = np.empty(0, dtype=np.float32)
+        self._diffs = np.empty(0, dtype=np.float32)
+        self._band_cache = {}
+
+    def _ensure_capacity(self, n: int):
+        """Powiększ bufory robocze dla chunka n próbek"""
+        if n <= self._capacity:
+            return
+        self._capacity = n
+        self._work = np.empty(n, dtype=np.float32)
+        self._signs = np.empty(n, dtype=np.float32)
+        self._diffs = np.empty(n, dtype=np.float32)
+
+    def _band_layout(self, n: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Okno Hanna i maski binów rFFT dla pasm (cache per długość chunka)"""
+        if n not in self._band_cache:
+            freqs = np.fft.rfftfreq(n, 1.0 / self.sample_rate)
+            masks = np.array(
+                [(freqs >= low) & (freqs < high) for low, high in self.bands],
+                dtype=np.float32,
+            )
+            counts = np.maximum(masks.sum(axis=1, keepdims=True), 1)
+            self._band_cache[n] = (
+                np.hanning(n).astype(np.float32),
+                masks / counts,
+            )
+        return self._band_cache[n]
+
+    def compute(self, audio_chunk: np.ndarray) -> FrameFeatures:
+        """
+        Policz cechy chunka
+
+        Args:
+            audio_chunk: Chunk audio (float32 lub int16, mono lub frames x 1)
+
+        Returns:
+            FrameFeatures
+        """
+        audio = np.asarray(audio_chunk).reshape(-1)
+        n = len(audio)
+        if n == 0:
+            return FrameFeatures(rms=0.0, zcr=0.0, peak=0.0, num_samples=0)
+
+        self._ensure_capacity(n)
+        if audio.dtype == np.float32:
+            x = audio
+        else:
+            # Jedna konwersja do bufora roboczego (int16 -> [-1, 1])
+            x = self._work[:n]
+            scale = 1.0 / INT16_SCALE if audio.dtype == np.int16 else 1.0
+            np.multiply(audio, scale, out=x, casting="unsafe")
+
+        # Energia: suma kwadratów bez tablicy pośredniej
+        rms = float(np.sqrt(np.dot(x, x) / n))
+        peak = float(max(x.max(), -x.min()))
+
+        # ZCR jak SimpleVAD: sum(|diff(sign(x))|) / (2n)
+        signs = self._signs[:n]
+        np.sign(x, out=signs)
+        if n > 1:
+            diffs = self._diffs[: n - 1]
+            np.subtract(signs[1:], signs[:-1], out=diffs)
+            np.abs(diffs, out=diffs)
+            zcr = float(diffs.sum()) / (2 * n)
+        else:
+            zcr = 0.0
+
+        band_energies = None
+        if self.bands:
+            window, weights = self._band_layout(n)
+            np.multiply(x, window, out=self._work[:n])
+            spectrum = np.fft.rfft(self._work[:n])
+            power = spectrum.real**2 + spectrum.imag**2
+            band_energies = weights @ power.astype(np.float32) / n
+
+        return FrameFeatures(
+            rms=rms,
+            zcr=zcr,
+            peak=peak,
+            num_samples=n,
+            band_energies=band_energies,
+        )
+
+    def compute_batch(self, audio_chunks: np.ndarray) -> List[FrameFeatures]:
+        """
+        Policz cechy wielu chunków tej samej długości naraz
+
+        Wynik jak compute() dla każdego wiersza (z dokładnością do
+        zaokrągleń float32), ale jednym przebiegiem numpy po całej
+        macierzy - bez narzutu wywołań na chunk.
+
+        Args:
+            audio_chunks: Chunki (n_chunks x chunk_size), float32 lub int16
+
+        Returns:
+            Lista FrameFeatures w kolejności chunków
+        """
+        audio = np.asarray(audio_chunks)
+        n_chunks, n = audio.shape
+        if n == 0:
+            return [self.compute(audio[i]) for i in range(n_chunks)]
+
+        if audio.dtype == np.float32:
+            x = audio
+        else:
+            scale = 1.0 / INT16_SCALE if audio.dtype == np.int16 else 1.0
+            x = audio.astype(np.float32) * np.float32(scale)
+
+        rms = np.sqrt(np.einsum("ij,ij->i", x, x) / n)
+        peak = np.maximum(x.max(axis=1), -x.min(axis=1))
+        signs = np.sign(x)
+        zcr = np.abs(np.diff(signs, axis=1)).sum(axis=1) / (2 * n)
+
+        band_energies = [None] * n_chunks
+        if self.bands:
+            window, weights = self._band_layout(n)
+            spectrum = np.fft.rfft(x * window, axis=1)
+            power = (spectrum.real**2 + spectrum.imag**2).astype(np.float32)
+            band_energies = list(power @ weights.T / n)
+
+        return [
+            FrameFeatures(
+                rms=float(rms[i]),
+                zcr=float(zcr[i]),
+                peak=float(peak[i]),
+                num_samples=n,
+                band_energies=band_energies[i],
+            )
+            for i in range(n_chunks)
+        ]
@@ -15,7 +15,7 @@ import json
 import os
 import sys
 from pathlib import Path
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Callable
 import logging
 
 # Import naszych modułów
@@ -25,6 +25,8 @@ if str(current_dir) not in sys.path:
     sys.path.insert(0, str(current_dir))
 
 from realtime_pipeline import RealtimeSTTPipeline, SpeechSegment
+from stt_backend import BACKEND_REQUIREMENTS, create_stt_backend
+from model_preloader import ModelPreloader
 from voice_activity_detector import VADMode
 
 # Konfiguracja loggingu
@@ -52,6 +54,9 @@ class STTGuiApplication:
         # Konfiguracja
         self.config = {
             "model": "base",
+            "refine_model": "",
+            "backend": "whisper",
+            "model_dir": "",
             "language": "pl",
             "vad_mode": "normal",
             "min_segment_duration": 1.0,
@@ -64,11 +69,20 @@ class STTGuiApplication:
         # Ładuj konfigurację
         self.load_config()
 
+        # Model ładowany w tle - GUI i nagrywanie nie czekają na Whisper
+        self.preloader = ModelPreloader(
+            self.create_engine,
+            on_done=lambda key, ok, load_time: self.stats_queue.put(
+                ("model", (key, ok, load_time))
+            ),
+        )
+
         # Stwórz interface
         self.create_interface()
 
         # Uruchom aktualizację statystyk
         self.update_stats()
+        self.root.after(100, self.preload_model)
 
         logger.info("🎨 GUI Application initialized")
 
@@ -175,6 +189,19 @@ class STTGuiApplication:
         )
         vad_combo.grid(row=1, column=1, padx=5, sticky=tk.W + tk.E)
 
+        # Backend STT
+        ttk.Label(settings_frame, text="Backend:").grid(row=2, column=0, sticky=tk.W)
+        self.backend_var = tk.StringVar(value=self.config["backend"])
+        backend_combo = ttk.Combobox(
+            settings_frame,
+            textvariable=self.backend_var,
+            values=list(BACKEND_REQUIREMENTS),
+            state="readonly",
+            width=12,
+        )
+        backend_combo.grid(row=2, column=1, padx=5, sticky=tk.W + tk.E)
+        backend_combo.bind("<<ComboboxSelected>>", self.on_model_changed)
+
         # Audio level indicator
         self.create_audio_level_indicator(control_frame)
 
@@ -287,26 +314,32 @@ class STTGuiApplication:
                 sample_rate=16000,
                 enable_stt=True,
                 stt_model=self.model_var.get(),
+                stt_backend=self.backend_var.get(),
+                model_dir=self.config["model_dir"] or None,
                 vad_mode=vad_mode_map[self.vad_var.get()],
                 use_polish_optimization=True,
                 min_segment_duration=self.config["min_segment_duration"],
                 silence_timeout=self.config["silence_timeout"],
+                refine_model=self.config["refine_model"] or None,
             )
 
             # Ustaw callback
             self.pipeline.set_speech_callback(self.on_speech_detected)
+            self.pipeline.set_revision_callback(self.on_segment_revised)
+            self.pipeline.set_level_callback(self.on_audio_level)
 
-            # Rozpocznij nagrywanie
-            self.update_status("Ładowanie modelu STT...")
-            if not self.pipeline.load_stt_model():
-                raise Exception("Nie można załadować modelu STT")
-
+            # Rozpocznij nagrywanie od razu - jeśli model wciąż się ładuje,
+            # wątek STT pipeline czeka na niego, a segmenty są buforowane
+            self.preload_model()
             self.pipeline.start()
 
             # Aktualizuj UI
             self.is_recording = True
             self.record_button.config(text="⏹️ Zatrzymaj\nnagrywanie")
-            self.update_status("Nagrywanie... Mów do mikrofonu")
+            if self.preloader.is_loading:
+                self.update_model_status()
+            else:
+                self.update_status("Nagrywanie... Mów do mikrofonu")
 
             logger.info("🎤 Recording started")
 
@@ -314,48 +347,82 @@ class STTGuiApplication:
             messagebox.showerror("Błąd", f"Nie można rozpocząć nagrywania:\n{e}")
             logger.error(f"Recording start failed: {e}")
 
-    def stop_recording(self):
-        """Zatrzymaj nagrywanie"""
-        if self.pipeline:
-            self.pipeline.stop()
-            self.pipeline = None
+    def stop_recording(self, on_stopped: Optional[Callable[[], None]] = None):
+        """
+        Zatrzymaj nagrywanie
+
+        pipeline.stop() dokańcza backlog STT i drugi poziom (do
+        drain_timeout), więc działa w wątku tła - okno nie zamarza.
+        Zakończenie wraca do wątku Tk przez root.after.
 
+        Args:
+            on_stopped: Wywoływane w wątku Tk po zatrzymaniu pipeline
+        """
+        pipeline, self.pipeline = self.pipeline, None
         self.is_recording = False
-        self.record_button.config(text="🎤 Rozpocznij\nnagrywanie")
-        self.update_status("Nagrywanie zatrzymane")
+        self.record_button.config(state=tk.DISABLED)
+        self.update_status("Kończenie transkrypcji...")
         self.vad_indicator.config(text="🔇 Cisza", background="lightgray")
         self.audio_level_var.set(0)
 
+        def stop_pipeline():
+            if pipeline:
+                try:
+                    pipeline.stop()
+                    # Model zostaje w cache dzięki referencji preloadera
+                    pipeline.unload_stt_model()
+                except Exception as e:
+                    logger.error(f"Recording stop failed: {e}")
+            self.root.after(0, self.on_recording_stopped, on_stopped)
+
+        threading.Thread(target=stop_pipeline, daemon=True).start()
+
+    def on_recording_stopped(self, on_stopped: Optional[Callable[[], None]] = None):
+        """Pipeline zatrzymany (wątek Tk)"""
+        self.record_button.config(text="🎤 Rozpocznij\nnagrywanie", state=tk.NORMAL)
+        self.update_status("Nagrywanie zatrzymane")
         logger.info("⏹️ Recording stopped")
 
-    def on_speech_detected(self, segment: SpeechSegment):
-        """Callback dla wykrytych segmentów mowy"""
-        try:
-            # Dodaj do kolejki (thread-safe)
-            self.stats_queue.put(("speech", segment))
+        if on_stopped is not None:
+            on_stopped()
 
-            # Formatuj tekst
-            text_parts = []
+    def format_segment(self, segment: SpeechSegment) -> str:
+        """Sformatuj segment do wyświetlenia"""
+        text_parts = []
 
-            if self.show_timing_var.get():
-                timestamp = time.strftime(
-                    "%H:%M:%S", time.localtime(segment.start_time)
-                )
-                text_parts.append(f"[{timestamp}]")
+        if self.show_timing_var.get():
+            timestamp = time.strftime("%H:%M:%S", time.localtime(segment.start_time))
+            text_parts.append(f"[{timestamp}]")
 
-            if segment.transcription and segment.text:
-                text_parts.append(segment.text)
+        if segment.transcription and segment.text:
+            text_parts.append(segment.text)
 
-                if self.show_confidence_var.get():
-                    confidence = segment.transcription.confidence
-                    text_parts.append(f"({confidence:.2f})")
-            else:
-                text_parts.append("[brak transkrypcji]")
+            if self.show_confidence_var.get():
+                confidence = segment.transcription.confidence
+                text_parts.append(f"({confidence:.2f})")
+        else:
+            text_parts.append("[brak transkrypcji]")
+
+        return " ".join(text_parts) + "\n\n"
 
-            formatted_text = " ".join(text_parts) + "\n\n"
+    def on_audio_level(self, features, is_speech: bool):
+        """Callback poziomu audio - cechy chunka policzone raz w pipeline"""
+        self.stats_queue.put(("audio_level", features.level_db))
+        self.stats_queue.put(("vad", is_speech))
+
+    def on_speech_detected(self, segment: SpeechSegment):
+        """Callback dla wykrytych segmentów mowy"""
+        try:
+            # Dodaj do kolejki (thread-safe)
+            self.stats_queue.put(("speech", segment))
 
             # Dodaj do UI (thread-safe)
-            self.root.after(0, self.add_transcription_text, formatted_text)
+            self.root.after(
+                0,
+                self.add_transcription_text,
+                self.format_segment(segment),
+                f"segment-{id(segment)}",
+            )
 
             # Zapisz w historii
             self.transcriptions.append(segment)
@@ -363,15 +430,39 @@ class STTGuiApplication:
         except Exception as e:
             logger.error(f"Speech callback error: {e}")
 
-    def add_transcription_text(self, text: str):
+    def on_segment_revised(self, segment: SpeechSegment):
+        """Callback dla segmentów poprawionych przez drugi poziom STT"""
+        try:
+            self.root.after(
+                0,
+                self.replace_transcription_text,
+                self.format_segment(segment),
+                f"segment-{id(segment)}",
+            )
+        except Exception as e:
+            logger.error(f"Revision callback error: {e}")
+
+    def add_transcription_text(self, text: str, tag: Optional[str] = None):
         """Dodaj tekst do obszaru transkrypcji"""
-        self.transcription_text.insert(tk.END, text)
+        self.transcription_text.insert(tk.END, text, tag or ())
         self.transcription_text.see(tk.END)
 
         # Auto-save jeśli włączony
         if self.config["auto_save"]:
             self.auto_save_session()
 
+    def replace_transcription_text(self, text: str, tag: str):
+        """Podmień tekst segmentu (nowa rewizja) w obszarze transkrypcji"""
+        ranges = self.transcription_text.tag_ranges(tag)
+        if not ranges:
+            return
+        start, end = ranges[0], ranges[-1]
+        self.transcription_text.delete(start, end)
+        self.transcription_text.insert(start, text, tag)
+
+        if self.config["auto_save"]:
+            self.auto_save_session()
+
     def update_stats(self):
         """Aktualizuj statystyki"""
         try:
@@ -386,10 +477,18 @@ class STTGuiApplication:
                         self.update_audio_level(data)
                     elif item_type == "vad":
                         self.update_vad_indicator(data)
+                    elif item_type == "model":
+                        self.on_model_loaded(*data)
+                    elif item_type == "swap":
+                        self.on_engine_swapped(data)
 
                 except queue.Empty:
                     break
 
+            # Postęp ładowania modelu w status barze
+            if self.preloader.is_loading:
+                self.update_model_status()
+
             # Aktualizuj czas sesji
             if self.is_recording and self.pipeline:
                 stats = self.pipeline.get_statistics()
@@ -441,22 +540,95 @@ class STTGuiApplication:
         """Aktualizuj status bar"""
         self.status_bar.config(text=message)
 
-    def on_model_changed(self, event=None):
-        """Obsługa zmiany modelu"""
+    def create_engine(self, key: tuple):
+        """Silnik STT dla klucza (backend, model, model_dir) - jak w pipeline"""
+        backend, model, model_dir = key
+        return create_stt_backend(
+            backend,
+            model_name=model,
+            use_polish_optimization=True,
+            model_dir=model_dir,
+        )
+
+    def model_key(self) -> tuple:
+        """Klucz wybranego modelu"""
+        return (
+            self.backend_var.get(),
+            self.model_var.get(),
+            self.config["model_dir"] or None,
+        )
+
+    def preload_model(self):
+        """Załaduj wybrany model w tle (bez blokowania GUI)"""
+        self.preloader.preload(self.model_key())
+        if self.preloader.is_loading:
+            self.update_model_status()
+
+    def update_model_status(self):
+        """Postęp ładowania modelu w status barze"""
+        backend, model, _ = self.preloader.key
+        elapsed = self.preloader.elapsed()
         if self.is_recording:
-            result = messagebox.askyesno(
-                "Zmiana modelu",
-                "Zmiana modelu wymaga restartu nagrywania. Kontynuować?",
+            self.update_status(
+                f"⏳ Nagrywanie - ładowanie modelu {model} ({elapsed:.0f}s), "
+                "audio buforowane do transkrypcji"
+            )
+        else:
+            self.update_status(
+                f"⏳ Ładowanie modelu {model} ({backend})... {elapsed:.0f}s"
+            )
+
+    def on_model_loaded(self, key: tuple, ok: bool, load_time: float):
+        """Model załadowany w tle (wywoływane w wątku GUI)"""
+        if key != self.preloader.key:
+            return
+        model = key[1]
+        if not ok:
+            self.update_status(f"❌ Nie można załadować modelu {model}")
+        elif self.is_recording:
+            self.update_status(
+                f"✅ Model {model} gotowy ({load_time:.1f}s) - Nagrywanie... "
+                "Mów do mikrofonu"
+            )
+        else:
+            self.update_status(
+                f"✅ Model {model} gotowy ({load_time:.1f}s) - Gotowy do nagrywania"
+            )
+
+    def on_engine_swapped(self, ok: bool):
+        """Podmiana silnika w trakcie nagrywania zakończona (wątek GUI)"""
+        if not self.is_recording:
+            return
+        if ok:
+            self.update_status(
+                f"🔁 Model {self.model_var.get()} aktywny - Nagrywanie... "
+                "Mów do mikrofonu"
+            )
+        else:
+            self.update_status(
+                "❌ Podmiana modelu nieudana - nagrywanie z poprzednim modelem"
+            )
+
+    def on_model_changed(self, event=None):
+        """Obsługa zmiany modelu (w trakcie nagrywania - podmiana w locie)"""
+        self.config["model"] = self.model_var.get()
+        self.config["backend"] = self.backend_var.get()
+        self.save_config()
+        self.preload_model()
+
+        if self.is_recording and self.pipeline:
+            # Nagrywanie trwa; nowy silnik dzieli model z preloaderem
+            self.pipeline.swap_stt_engine(
+                self.create_engine(self.model_key()),
+                callback=lambda ok: self.stats_queue.put(("swap", ok)),
             )
-            if result:
-                self.stop_recording()
-                self.config["model"] = self.model_var.get()
-                self.save_config()
 
     def new_session(self):
         """Nowa sesja"""
         if self.is_recording:
-            self.stop_recording()
+            # Dokończone segmenty należą jeszcze do starej sesji
+            self.stop_recording(on_stopped=self.new_session)
+            return
 
         self.transcriptions.clear()
         self.clear_transcription()
@@ -548,6 +720,7 @@ class STTGuiApplication:
                     if segment.transcription
                     else None
                 ),
+                "revision": segment.revision,
             }
             data["transcriptions"].append(segment_data)
 
@@ -610,9 +783,11 @@ class STTGuiApplication:
 
         # Aktualizuj UI
         self.model_var.set(self.config["model"])
+        self.backend_var.set(self.config["backend"])
         self.vad_var.set(self.config["vad_mode"])
 
         self.update_status("Ustawienia zaktualizowane")
+        self.preload_model()
 
     def show_about(self):
         """Pokaż okno o programie"""
@@ -683,8 +858,15 @@ Esc - Wyjście
             if not result:
                 return
 
-            self.stop_recording()
+            # Zamknij okno dopiero po dokończeniu backlogu STT
+            self.stop_recording(on_stopped=self.close_application)
+            return
+
+        self.close_application()
 
+    def close_application(self):
+        """Zwolnij model, zapisz konfigurację i zamknij okno"""
+        self.preloader.release()
         self.save_config()
         self.root.destroy()
 
@@ -729,6 +911,22 @@ class SettingsWindow:
         )
         model_combo.pack(fill=tk.X, pady=5)
 
+        ttk.Label(model_frame, text="Backend STT:").pack(anchor=tk.W)
+        self.backend_var = tk.StringVar(value=self.config["backend"])
+        backend_combo = ttk.Combobox(
+            model_frame,
+            textvariable=self.backend_var,
+            values=list(BACKEND_REQUIREMENTS),
+            state="readonly",
+        )
+        backend_combo.pack(fill=tk.X, pady=5)
+
+        ttk.Label(model_frame, text="Lokalny katalog modeli (offline):").pack(
+            anchor=tk.W
+        )
+        self.model_dir_var = tk.StringVar(value=self.config["model_dir"])
+        ttk.Entry(model_frame, textvariable=self.model_dir_var).pack(fill=tk.X, pady=5)
+
         # VAD settings
         vad_frame = ttk.LabelFrame(
             main_frame, text="Voice Activity Detection", padding="10"
@@ -813,6 +1011,8 @@ class SettingsWindow:
         self.config.update(
             {
                 "model": self.model_var.get(),
+                "backend": self.backend_var.get(),
+                "model_dir": self.model_dir_var.get().strip(),
                 "vad_mode": self.vad_var.get(),
                 "min_segment_duration": self.min_duration_var.get(),
                 "silence_timeout": self.silence_timeout_var.get(),
@@ -828,6 +1028,8 @@ class SettingsWindow:
     def reset_to_defaults(self):
         """Reset do ustawień domyślnych"""
         self.model_var.set("base")
+        self.backend_var.set("whisper")
+        self.model_dir_var.set("")
         self.vad_var.set("normal")
         self.min_duration_var.set(1.0)
         self.silence_timeout_var.set(2.0)
@@ -0,0 +1,146 @@
+"""
+Model Cache - Współdzielone modele STT w obrębie procesu
+Process-wide, reference-counted cache of loaded STT models
+
+Autor: AI Assistant
+Data: 2025-01-18
+"""
+
+import threading
+import logging
+from typing import Any, Callable, Dict, Hashable
+
+# Konfiguracja loggingu
+logger = logging.getLogger(__name__)
+
+
+class ModelCache:
+    """
+    Cache załadowanych modeli z licznikiem referencji
+
+    Wiele silników STT (np. workery serwera) z tym samym kluczem
+    dostaje jedną instancję modelu. Model jest zwalniany dopiero gdy
+    ostatni użytkownik wywoła release().
+
+    Model jest ładowany poza globalnym lockiem - acquire/release innych
+    kluczy nie czekają na (wielominutowe) ładowanie, a równoległe
+    acquire tego samego klucza czekają na zdarzenie wpisu.
+
+    Każdy wpis ma własny lock inferencji - Whisper instaluje hooki
+    KV-cache na modułach modelu na czas dekodowania, więc równoległe
+    dekodowanie na jednej instancji modelu nie jest bezpieczne.
+    """
+
+    def __init__(self):
+        """Inicjalizacja cache"""
+        self._lock = threading.Lock()
+        self._entries: Dict[Hashable, Dict[str, Any]] = {}
+
+    def acquire(self, key: Hashable, loader: Callable[[], Any]) -> Any:
+        """
+        Pobierz model z cache lub załaduj go
+
+        Args:
+            key: Klucz modelu (np. (model_name, device))
+            loader: Funkcja ładująca model przy pierwszym użyciu
+
+        Returns:
+            Współdzielona instancja modelu
+        """
+        while True:
+            with self._lock:
+                entry = self._entries.get(key)
+                if entry is None:
+                    # Wpis tworzony od razu - równoległe acquire tego klucza
+                    # czekają na jego załadowanie zamiast ładować drugi raz
+                    entry = {
+                        "model": None,
+                        "refcount": 1,
+                        "lock": threading.RLock(),
+                        "ready": threading.Event(),
+                        "failed": False,
+                    }
+                    self._entries[key] = entry
+                    break
+                entry["refcount"] += 1
+
+            # Model ładuje inny wątek - czekaj na wpis, nie na globalny lock
+            entry["ready"].wait()
+            if not entry["failed"]:
+                logger.debug(f"♻️ Model z cache: {key} (ref={entry['refcount']})")
+                return entry["model"]
+            # Ładowanie innego wątku nieudane - spróbuj samodzielnie
+
+        # Ładowanie bez globalnego locka - inne klucze nie czekają
+        try:
+            entry["model"] = loader()
+        except BaseException:
+            with self._lock:
+                entry["failed"] = True
+                if self._entries.get(key) is entry:
+                    del self._entries[key]
+            entry["ready"].set()
+            raise
+
+        entry["ready"].set()
+        logger.info(f"💾 Model dodany do cache: {key}")
+        return entry["model"]
+
+    def release(self, key: Hashable) -> bool:
+        """
+        Zwolnij referencję do modelu
+
+        Args:
+            key: Klucz modelu
+
+        Returns:
+            True jeśli model został usunięty z cache
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return False
+
+            entry["refcount"] -= 1
+            if entry["refcount"] > 0:
+                return False
+
+            del self._entries[key]
+            logger.info(f"🗑️ Model usunięty z cache: {key}")
+            return True
+
+    def get_lock(self, key: Hashable) -> threading.RLock:
+        """
+        Pobierz lock inferencji dla modelu
+
+        Args:
+            key: Klucz modelu
+
+        Returns:
+            Lock współdzielony przez wszystkich użytkowników modelu
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            return entry["lock"] if entry else threading.RLock()
+
+    def refcount(self, key: Hashable) -> int:
+        """Liczba aktywnych referencji do modelu"""
+        with self._lock:
+            entry = self._entries.get(key)
+            return entry["refcount"] if entry else 0
+
+    def keys(self):
+        """Klucze załadowanych modeli"""
+        with self._lock:
+            return [
+                key for key, entry in self._entries.items() if entry["ready"].is_set()
+            ]
+
+    def clear(self):
+        """Usuń wszystkie modele z cache"""
+        with self._lock:
+            self._entries.clear()
+
+
+# Singleton instance
+model_cache = ModelCache()
@@ -0,0 +1,240 @@
+"""
+Model Compilation - TorchScript / torch.compile modeli Whisper z cache na dysku
+Compiled Whisper encoder/decoder artifacts cached per model, torch version and device
+
+Autor: AI Assistant
+Data: 2025-01-18
+"""
+
+import os
+import time
+import logging
+import platform
+from pathlib import Path
+from typing import Optional, Union
+
+import torch
+
+# Konfiguracja loggingu
+logger = logging.getLogger(__name__)
+
+# Obsługiwane tryby kompilacji
+COMPILE_MODES = ("torchscript", "compile")
+
+# Domyślny katalog artefaktów kompilacji
+DEFAULT_COMPILED_CACHE_DIR = Path.home() / ".cache" / "realtime-stt-polish" / "compiled"
+
+# Plik przenośnych artefaktów torch.compile (torch.compiler.save_cache_artifacts)
+COMPILE_ARTIFACTS_FILE = "compile_artifacts.bin"
+
+# Liczba ramek spektrogramu okna 30 s (whisper.audio.N_FRAMES)
+N_FRAMES = 3000
+
+
+def cpu_features() -> str:
+    """
+    Identyfikator CPU istotny dla skompilowanych kerneli
+
+    Returns:
+        Np. "x86_64-avx512" (architektura + zestaw instrukcji używany przez torch)
+    """
+    try:
+        capability = torch.backends.cpu.get_cpu_capability()
+    except AttributeError:
+        capability = "default"
+    return f"{platform.machine() or 'unknown'}-{capability}".lower()
+
+
+def device_features(device: Union[str, torch.device] = "cpu") -> str:
+    """
+    Identyfikator urządzenia istotny dla skompilowanych artefaktów
+
+    Args:
+        device: Urządzenie modelu ("cpu", "cuda", "cuda:1", ...)
+
+    Returns:
+        cpu_features() dla CPU, np. "cuda-sm86" dla GPU
+    """
+    device = torch.device(device)
+    if device.type == "cpu":
+        return cpu_features()
+    if device.type == "cuda":
+        try:
+            major, minor = torch.cuda.get_device_capability(device)
+            return f"cuda-sm{major}{minor}"
+        except (AssertionError, RuntimeError):
+            return "cuda"
+    return device.type
+
+
+def compiled_cache_path(
+    model_key: str,
+    mode: str,
+    cache_dir: Optional[Union[str, Path]] = None,
+    device: Union[str, torch.device] = "cpu",
+) -> Path:
+    """
+    Katalog artefaktów kompilacji modelu
+
+    Klucz zawiera model, tryb, wersję torch i urządzenie (cechy CPU lub
+    architekturę GPU) - artefakty nie są przenośne między wersjami torch,
+    zestawami instrukcji ani urządzeniami.
+
+    Args:
+        model_key: Nazwa modelu z precyzją (np. "base-fp32"; dla model_dir
+            ze skrótem ścieżki z model_weights.artifact_name)
+        mode: "torchscript" lub "compile"
+        cache_dir: Katalog cache (domyślnie DEFAULT_COMPILED_CACHE_DIR)
+        device: Urządzenie modelu
+
+    Returns:
+        Ścieżka katalogu artefaktów
+    """
+    directory = Path(cache_dir) if cache_dir else DEFAULT_COMPILED_CACHE_DIR
+    safe_key = Path(model_key).stem if os.sep in model_key else model_key
+    torch_version = torch.__version__.split("+")[0]
+    return (
+        directory / f"{safe_key}-{mode}-torch{torch_version}-{device_features(device)}"
+    )
+
+
+def compile_whisper(
+    model: torch.nn.Module,
+    model_key: str,
+    mode: str,
+    cache_dir: Optional[Union[str, Path]] = None,
+    dtype: Optional[torch.dtype] = None,
+) -> torch.nn.Module:
+    """
+    Skompiluj enkoder i dekoder modelu Whisper
+
+    - "torchscript": enkoder śledzony torch.jit.trace i zapisywany na
+      dysku; dekoder zostaje w Pythonie (KV-cache Whisper działa przez
+      hooki modułów, których TorchScript nie wywołuje)
+    - "compile": torch.compile enkodera i dekodera (dynamiczne kształty);
+      cache inductora i przenośne artefakty trzymane w katalogu cache
+
+    Args:
+        model: Model Whisper
+        model_key: Nazwa modelu z precyzją (klucz cache)
+        mode: Tryb kompilacji (COMPILE_MODES)
+        cache_dir: Katalog cache
+        dtype: Typ spektrogramu podawanego enkoderowi (torch.float16 przy
+            dekodowaniu fp16 na GPU; None = float32)
+
+    Returns:
+        Ten sam model ze skompilowanymi modułami
+
+    Raises:
+        ValueError: Nieznany tryb kompilacji
+    """
+    if mode not in COMPILE_MODES:
+        raise ValueError(
+            f"Nieznany tryb kompilacji: {mode} (dostępne: {', '.join(COMPILE_MODES)})"
+        )
+
+    # Artefakty per urządzenie modelu - enkoder CPU nie zasili dekodera CUDA
+    device = next(model.parameters()).device
+    path = compiled_cache_path(model_key, mode, cache_dir, device)
+    path.mkdir(parents=True, exist_ok=True)
+    start_time = time.time()
+
+    if mode == "torchscript":
+        model.encoder = _load_or_trace_encoder(
+            model, path / "encoder.pt", device, dtype or torch.float32
+        )
+    else:
+        _compile_modules(model, path)
+
+    logger.info(f"⚙️ Kompilacja ({mode}): {time.time() - start_time:.2f}s")
+    return model
+
+
+def _load_or_trace_encoder(
+    model: torch.nn.Module, path: Path, device: torch.device, dtype: torch.dtype
+) -> torch.nn.Module:
+    """Wczytaj enkoder TorchScript z cache lub prześledź i zapisz"""
+    # Typ wejścia jest zapisany w śladzie (rzutowania wag na typ mel)
+    if dtype != torch.float32:
+        path = path.with_name(f"{path.stem}-{str(dtype).split('.')[-1]}{path.suffix}")
+    if path.exists():
+        try:
+            encoder = torch.jit.load(str(path), map_location=device)
+            logger.info(f"⚡ Enkoder TorchScript z cache: {path.parent.name}")
+            return encoder
+        except Exception as e:
+            logger.warning(f"⚠️ Nieudany odczyt enkodera TorchScript ({e})")
+
+    mel = torch.zeros(1, model.dims.n_mels, N_FRAMES, device=device, dtype=dtype)
+    with torch.no_grad():
+        # Kształt poza batchem jest stały (okno 30 s), batch pozostaje dynamiczny
+        encoder = torch.jit.trace(model.encoder, mel, check_trace=False)
+
+    try:
+        tmp_path = path.with_suffix(".tmp")
+        torch.jit.save(encoder, str(tmp_path))
+        os.replace(tmp_path, path)
+        logger.info(f"💾 Zapisano enkoder TorchScript: {path}")
+    except OSError as e:
+        logger.warning(f"⚠️ Nie można zapisać enkodera TorchScript: {e}")
+
+    return encoder
+
+
+def _compile_modules(model: torch.nn.Module, path: Path):
+    """torch.compile enkodera i dekodera z cache inductora na dysku"""
+    # Cache inductora jest adresowany treścią - wspólny dla wszystkich modeli
+    torch_version = torch.__version__.split("+")[0]
+    device = next(model.parameters()).device
+    os.environ.setdefault(
+        "TORCHINDUCTOR_CACHE_DIR",
+        str(path.parent / f"inductor-torch{torch_version}-{device_features(device)}"),
+    )
+
+    artifacts = path / COMPILE_ARTIFACTS_FILE
+    if artifacts.exists() and hasattr(torch.compiler, "load_cache_artifacts"):
+        try:
+            torch.compiler.load_cache_artifacts(artifacts.read_bytes())
+            logger.info(f"⚡ Artefakty torch.compile z cache: {path.name}")
+        except Exception as e:
+            logger.warning(f"⚠️ Nieudany odczyt artefaktów torch.compile ({e})")
+
+    model.encoder = torch.compile(model.encoder)
+    # forward zamiast modułu - hooki KV-cache zostają na oryginalnych modułach
+    model.decoder.forward = torch.compile(model.decoder.forward, dynamic=True)
+
+
+def save_compile_artifacts(
+    model_key: str,
+    cache_dir: Optional[Union[str, Path]] = None,
+    device: Union[str, torch.device] = "cpu",
+) -> bool:
+    """
+    Zapisz przenośne artefakty torch.compile (po rozgrzewce modelu)
+
+    Args:
+        model_key: Nazwa modelu z precyzją (klucz cache)
+        cache_dir: Katalog cache
+        device: Urządzenie modelu
+
+    Returns:
+        True jeśli artefakty zapisano
+    """
+    if not hasattr(torch.compiler, "save_cache_artifacts"):
+        return False
+
+    try:
+        saved = torch.compiler.save_cache_artifacts()
+        if saved is None:
+            return False
+        path = compiled_cache_path(model_key, "compile", cache_dir, device)
+        path.mkdir(parents=True, exist_ok=True)
+        target = path / COMPILE_ARTIFACTS_FILE
+        tmp_path = target.with_suffix(".tmp")
+        tmp_path.write_bytes(saved[0])
+        os.replace(tmp_path, target)
+        logger.info(f"💾 Zapisano artefakty torch.compile: {target}")
+        return True
+    except Exception as e:
+        logger.warning(f"⚠️ Nie można zapisać artefaktów torch.compile: {e}")
+        return False
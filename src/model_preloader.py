@@ -0,0 +1,131 @@
+"""
+Model Preloader - Ładowanie modelu STT w tle
+Background preloading of the selected STT model (non-blocking for the GUI)
+
+Autor: AI Assistant
+Data: 2025-01-18
+"""
+
+import time
+import logging
+import threading
+from typing import Any, Callable, Dict, Hashable, Optional
+
+# Konfiguracja loggingu
+logger = logging.getLogger(__name__)
+
+
+class ModelPreloader:
+    """
+    Ładowanie wybranego modelu STT w wątku w tle
+
+    Załadowany silnik trzyma referencję w model_cache - silnik pipeline
+    z tymi samymi ustawieniami dostaje ten sam model bez ponownego
+    ładowania, a jeśli ładowanie wciąż trwa, jego acquire czeka na
+    wynik zamiast ładować model drugi raz. Zmiana klucza (model,
+    backend) w trakcie ładowania porzuca poprzedni wynik.
+    """
+
+    def __init__(
+        self,
+        engine_factory: Callable[[Hashable], Any],
+        on_done: Optional[Callable[[Hashable, bool, float], None]] = None,
+    ):
+        """
+        Inicjalizacja preloadera
+
+        Args:
+            engine_factory: Funkcja tworząca silnik STT dla klucza modelu
+            on_done: Callback (klucz, sukces, czas ładowania) - wywoływany
+                z wątku ładowania
+        """
+        self.engine_factory = engine_factory
+        self.on_done = on_done
+
+        self._lock = threading.Lock()
+        self.key: Optional[Hashable] = None
+        self.engine = None
+        self.state = "idle"  # idle, loading, ready, failed
+        self.started_at = 0.0
+        self.load_time = 0.0
+
+    @property
+    def is_loading(self) -> bool:
+        return self.state == "loading"
+
+    @property
+    def is_ready(self) -> bool:
+        return self.state == "ready"
+
+    def preload(self, key: Hashable):
+        """
+        Załaduj model dla klucza w tle (bez efektu, jeśli już ładowany)
+
+        Args:
+            key: Klucz modelu przekazywany do engine_factory
+        """
+        with self._lock:
+            if key == self.key and self.state in ("loading", "ready"):
+                return
+            previous = self.engine
+            self.key = key
+            self.engine = None
+            self.state = "loading"
+            self.started_at = time.time()
+
+        if previous is not None:
+            previous.unload_model()
+
+        logger.info(f"⏳ Ładowanie modelu w tle: {key}")
+        threading.Thread(
+            target=self._load, args=(key,), daemon=True, name="ModelPreloader"
+        ).start()
+
+    def _load(self, key: Hashable):
+        """Utwórz silnik i załaduj model (wątek w tle)"""
+        start_time = time.time()
+        try:
+            engine = self.engine_factory(key)
+            loaded = engine.load_model()
+        except Exception as e:
+            logger.error(f"❌ Błąd ładowania modelu w tle: {e}")
+            engine, loaded = None, False
+        load_time = time.time() - start_time
+
+        with self._lock:
+            # Inny wątek mógł już załadować ten sam klucz (A -> B -> A)
+            current = key == self.key and self.engine is None
+            if current:
+                self.engine = engine if loaded else None
+                self.state = "ready" if loaded else "failed"
+                self.load_time = load_time
+
+        if not current:
+            # Wybrano inny model w trakcie ładowania
+            if engine is not None and loaded:
+                engine.unload_model()
+            return
+
+        if loaded:
+            logger.info(f"✅ Model {key} załadowany w tle ({load_time:.1f}s)")
+        if self.on_done is not None:
+            self.on_done(key, loaded, load_time)
+
+    def elapsed(self) -> float:
+        """Czas od rozpoczęcia bieżącego ładowania (s)"""
+        if self.is_loading:
+            return time.time() - self.started_at
+        return self.load_time
+
+    def release(self):
+        """Zwolnij referencję do modelu"""
+        with self._lock:
+            engine, self.engine = self.engine, None
+            self.key = None
+            self.state = "idle"
+        if engine is not None:
+            engine.unload_model()
+
+    def get_status(self) -> Dict[str, Any]:
+        """Stan ładowania"""
+        return {"key": self.key, "state": self.state, "elapsed": self.elapsed()}
@@ -0,0 +1,127 @@
+"""
+Model Quantization - Dynamiczna kwantyzacja int8 modeli Whisper na CPU
+Dynamic int8 quantization of Whisper linear layers with an on-disk cache
+
+Autor: AI Assistant
+Data: 2025-01-18
+"""
+
+import os
+import time
+import logging
+from pathlib import Path
+from typing import Callable, Optional, Union
+
+import torch
+
+from model_weights import artifact_name
+
+# Konfiguracja loggingu
+logger = logging.getLogger(__name__)
+
+# Domyślny katalog skwantyzowanych modeli
+DEFAULT_QUANTIZED_CACHE_DIR = (
+    Path.home() / ".cache" / "realtime-stt-polish" / "quantized"
+)
+
+
+def quantize_whisper_int8(model: torch.nn.Module) -> torch.nn.Module:
+    """
+    Skwantyzuj warstwy Linear enkodera i dekodera do int8 (dynamicznie)
+
+    whisper.model.Linear to podklasa nn.Linear nadpisująca tylko
+    rzutowanie dtype w forward, a quantize_dynamic rozpoznaje moduły po
+    dokładnym typie - dlatego przed konwersją warstwy dostają klasę
+    nn.Linear (na CPU w fp32 forward jest identyczny).
+
+    Args:
+        model: Model Whisper (fp32, CPU)
+
+    Returns:
+        Model z warstwami torch.ao.nn.quantized.dynamic.Linear
+    """
+    for module in model.modules():
+        if isinstance(module, torch.nn.Linear) and type(module) is not torch.nn.Linear:
+            module.__class__ = torch.nn.Linear
+
+    quantized = torch.ao.quantization.quantize_dynamic(
+        model, {torch.nn.Linear}, dtype=torch.qint8
+    )
+    quantized.eval()
+    return quantized
+
+
+def quantized_cache_path(
+    model_name: str,
+    cache_dir: Optional[Union[str, Path]] = None,
+    model_dir: Optional[Union[str, Path]] = None,
+) -> Path:
+    """
+    Ścieżka pliku skwantyzowanego modelu
+
+    Nazwa zawiera wersję torch - format modułów kwantyzowanych nie jest
+    stabilny między wersjami.
+
+    Args:
+        model_name: Nazwa modelu Whisper
+        cache_dir: Katalog cache (domyślnie DEFAULT_QUANTIZED_CACHE_DIR)
+        model_dir: Katalog źródłowego modelu (część klucza)
+
+    Returns:
+        Ścieżka pliku .pt
+    """
+    directory = Path(cache_dir) if cache_dir else DEFAULT_QUANTIZED_CACHE_DIR
+    safe_name = artifact_name(model_name, model_dir)
+    torch_version = torch.__version__.split("+")[0]
+    return directory / f"{safe_name}-int8-torch{torch_version}.pt"
+
+
+def load_quantized_whisper(
+    model_name: str,
+    loader: Callable[[], torch.nn.Module],
+    cache_dir: Optional[Union[str, Path]] = None,
+    model_dir: Optional[Union[str, Path]] = None,
+) -> torch.nn.Module:
+    """
+    Załaduj skwantyzowany model z cache lub skwantyzuj i zapisz
+
+    Plik cache to zserializowany moduł (torch.save całego modelu), więc
+    wczytywany jest z weights_only=False - katalog cache musi być zaufany.
+
+    Args:
+        model_name: Nazwa modelu Whisper
+        loader: Funkcja ładująca model fp32 (używana przy braku cache)
+        cache_dir: Katalog cache
+        model_dir: Katalog źródłowego modelu (część klucza)
+
+    Returns:
+        Skwantyzowany model int8
+    """
+    path = quantized_cache_path(model_name, cache_dir, model_dir)
+
+    if path.exists():
+        try:
+            start_time = time.time()
+            model = torch.load(path, map_location="cpu", weights_only=False)
+            model.eval()
+            logger.info(
+                f"⚡ Model int8 z cache: {path.name} ({time.time() - start_time:.2f}s)"
+            )
+            return model
+        except Exception as e:
+            logger.warning(f"⚠️ Nieudany odczyt cache int8 ({e}) - kwantyzuję ponownie")
+
+    start_time = time.time()
+    model = quantize_whisper_int8(loader())
+    logger.info(f"⚡ Kwantyzacja int8: {time.time() - start_time:.2f}s")
+
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(".tmp")
+        torch.save(model, tmp_path)
+        os.replace(tmp_path, path)
+        logger.info(f"💾 Zapisano model int8: {path}")
+    except OSError as e:
+        logger.warning(f"⚠️ Nie można zapisać cache int8: {e}")
+
+    return model
@@ -0,0 +1,262 @@
+"""
+Model Weights - Wagi Whisper mapowane w pamięci (mmap) współdzielone między procesami
+Memory-mapped Whisper checkpoints shared through the page cache across workers
+
+Autor: AI Assistant
+Data: 2025-01-18
+"""
+
+import os
+import time
+import hashlib
+import logging
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Callable, Dict, Optional, Union
+
+import numpy as np
+
+# torch i whisper importowane przy ładowaniu modelu - process_memory
+# i ścieżki checkpointów nie płacą kosztu importu torch
+if TYPE_CHECKING:
+    import torch
+    from whisper.model import ModelDimensions, Whisper
+
+# Konfiguracja loggingu
+logger = logging.getLogger(__name__)
+
+# Domyślny katalog przekonwertowanych checkpointów
+DEFAULT_MMAP_DIR = Path.home() / ".cache" / "realtime-stt-polish" / "mmap"
+
+
+def artifact_name(model_name: str, model_dir: Optional[Union[str, Path]] = None) -> str:
+    """
+    Nazwa modelu w kluczach artefaktów (checkpoint mmap, cache int8, kompilacja)
+
+    Model z model_dir lub podany ścieżką checkpointu dostaje skrót ścieżki
+    źródła - "base" z innego katalogu nie trafi na artefakt cudzych wag.
+
+    Args:
+        model_name: Nazwa modelu Whisper lub ścieżka checkpointu
+        model_dir: Katalog modeli (None = domyślny katalog whisper)
+
+    Returns:
+        Nazwa bez separatorów ścieżki
+    """
+    is_path = os.sep in model_name
+    name = Path(model_name).stem if is_path else model_name
+    source = model_name if is_path else model_dir
+    if not source:
+        return name
+    resolved = str(Path(source).expanduser().resolve())
+    return f"{name}-{hashlib.sha256(resolved.encode()).hexdigest()[:8]}"
+
+
+def mmap_checkpoint_path(
+    model_name: str,
+    cache_dir: Optional[Union[str, Path]] = None,
+    model_dir: Optional[Union[str, Path]] = None,
+) -> Path:
+    """
+    Ścieżka checkpointu fp32 do ładowania przez mmap
+
+    Args:
+        model_name: Nazwa modelu Whisper
+        cache_dir: Katalog checkpointów (domyślnie DEFAULT_MMAP_DIR)
+        model_dir: Katalog źródłowego modelu (część klucza)
+
+    Returns:
+        Ścieżka pliku .pt
+    """
+    directory = Path(cache_dir) if cache_dir else DEFAULT_MMAP_DIR
+    return directory / f"{artifact_name(model_name, model_dir)}-fp32.pt"
+
+
+def convert_whisper_checkpoint(
+    model: "torch.nn.Module", path: Union[str, Path]
+) -> Path:
+    """
+    Zapisz model jako checkpoint fp32 gotowy do mmap
+
+    Oryginalne checkpointy Whisper mają wagi fp16 - load_state_dict
+    kopiuje je do prywatnych tensorów fp32 każdego procesu. Checkpoint
+    fp32 można podpiąć bez konwersji (assign=True), więc strony wag
+    pozostają stronami pliku w page cache, wspólnymi dla procesów.
+
+    Args:
+        model: Model Whisper
+        path: Plik docelowy
+
+    Returns:
+        Ścieżka zapisanego pliku
+    """
+    import torch
+
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    checkpoint = {
+        "dims": dict(vars(model.dims)),
+        "model_state_dict": {
+            name: tensor.detach().float().cpu().contiguous()
+            for name, tensor in model.state_dict().items()
+        },
+        # Bufor spoza state_dict (ustawiany przez whisper.load_model)
+        "alignment_heads": model.alignment_heads.to_dense().cpu(),
+    }
+    tmp_path = path.with_suffix(".tmp")
+    torch.save(checkpoint, tmp_path)
+    os.replace(tmp_path, path)
+    logger.info(f"💾 Zapisano checkpoint mmap: {path}")
+    return path
+
+
+def load_whisper_mmap(path: Union[str, Path]) -> "torch.nn.Module":
+    """
+    Załaduj model z checkpointu fp32 z wagami mapowanymi w pamięci
+
+    Enkoder i dekoder budowane są na urządzeniu meta (bez alokacji
+    i inicjalizacji wag), a parametry podpinane bezpośrednio pod tensory
+    z mmap - czas ładowania nie zależy praktycznie od rozmiaru modelu.
+
+    Args:
+        path: Checkpoint z convert_whisper_checkpoint
+
+    Returns:
+        Model Whisper na CPU (eval)
+    """
+    import torch
+    from whisper.model import ModelDimensions
+
+    checkpoint = torch.load(path, map_location="cpu", mmap=True, weights_only=True)
+    dims = ModelDimensions(**checkpoint["dims"])
+
+    model = _build_empty_whisper(dims)
+    model.load_state_dict(checkpoint["model_state_dict"], assign=True)
+    _materialize_buffers(model, dims, checkpoint["alignment_heads"])
+
+    leftover = [
+        name
+        for name, tensor in list(model.named_parameters()) + list(model.named_buffers())
+        if tensor.is_meta
+    ]
+    if leftover:
+        raise RuntimeError(f"Niezaładowane tensory modelu: {', '.join(leftover)}")
+
+    return model.eval()
+
+
+def _build_empty_whisper(dims: "ModelDimensions") -> "Whisper":
+    """
+    Whisper z parametrami na urządzeniu meta
+
+    Whisper.__init__ tworzy rzadki bufor alignment_heads, którego nie da
+    się utworzyć na meta - model składany jest z modułów jak w __init__.
+    """
+    import torch
+    from whisper.model import AudioEncoder, TextDecoder, Whisper
+
+    model = Whisper.__new__(Whisper)
+    torch.nn.Module.__init__(model)
+    model.dims = dims
+    with torch.device("meta"):
+        model.encoder = AudioEncoder(
+            dims.n_mels,
+            dims.n_audio_ctx,
+            dims.n_audio_state,
+            dims.n_audio_head,
+            dims.n_audio_layer,
+        )
+        model.decoder = TextDecoder(
+            dims.n_vocab,
+            dims.n_text_ctx,
+            dims.n_text_state,
+            dims.n_text_head,
+            dims.n_text_layer,
+        )
+    return model
+
+
+def _materialize_buffers(
+    model: "torch.nn.Module",
+    dims: "ModelDimensions",
+    alignment_heads: "torch.Tensor",
+):
+    """Odtwórz bufory spoza state_dict (persistent=False) jak w Whisper.__init__"""
+    import torch
+
+    mask = torch.empty(dims.n_text_ctx, dims.n_text_ctx).fill_(-np.inf).triu_(1)
+    model.decoder.register_buffer("mask", mask, persistent=False)
+    model.register_buffer(
+        "alignment_heads", alignment_heads.to_sparse(), persistent=False
+    )
+
+
+def load_mmap_whisper(
+    model_name: str,
+    loader: Callable[[], "torch.nn.Module"],
+    cache_dir: Optional[Union[str, Path]] = None,
+    model_dir: Optional[Union[str, Path]] = None,
+) -> "torch.nn.Module":
+    """
+    Załaduj model przez mmap, konwertując checkpoint przy pierwszym użyciu
+
+    Args:
+        model_name: Nazwa modelu Whisper
+        loader: Funkcja ładująca model (używana przy braku checkpointu)
+        cache_dir: Katalog checkpointów
+        model_dir: Katalog źródłowego modelu (część klucza)
+
+    Returns:
+        Model Whisper z wagami mapowanymi w pamięci
+    """
+    path = mmap_checkpoint_path(model_name, cache_dir, model_dir)
+
+    if not path.exists():
+        start_time = time.time()
+        model = loader()
+        convert_whisper_checkpoint(model, path)
+        del model
+        logger.info(f"🔄 Konwersja checkpointu: {time.time() - start_time:.2f}s")
+
+    start_time = time.time()
+    model = load_whisper_mmap(path)
+    logger.info(f"⚡ Model z mmap: {path.name} ({time.time() - start_time:.2f}s)")
+    return model
+
+
+def process_memory(pid: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Pamięć procesu w MB
+
+    rss - rezydentna (z wagami z page cache), uss - prywatna procesu,
+    pss - proporcjonalna (strony wspólne dzielone przez liczbę procesów),
+    shared - rss - uss. Suma pss wszystkich workerów ≈ zużycie hosta.
+
+    Args:
+        pid: PID procesu (domyślnie bieżący)
+
+    Returns:
+        Słownik z rss_mb (zawsze) i uss_mb/pss_mb/shared_mb (jeśli dostępne);
+        pusty, gdy psutil niedostępny lub proces nie istnieje
+    """
+    try:
+        import psutil
+    except ImportError:
+        return {}
+
+    mb = 1024 * 1024
+    try:
+        process = psutil.Process(pid)
+        try:
+            info = process.memory_full_info()
+        except (psutil.AccessDenied, AttributeError):
+            return {"rss_mb": process.memory_info().rss / mb}
+    except psutil.Error:
+        return {}
+
+    result = {"rss_mb": info.rss / mb}
+    if hasattr(info, "uss"):
+        result["uss_mb"] = info.uss / mb
+        result["shared_mb"] = (info.rss - info.uss) / mb
+    if hasattr(info, "pss"):
+        result["pss_mb"] = info.pss / mb
+    return result
@@ -0,0 +1,220 @@
+"""
+Noise Floor - Śledzenie poziomu tła i profile szumu mikrofonów
+Online noise-floor tracking and per-device noise profiles for VAD thresholds
+
+Autor: AI Assistant
+Data: 2025-01-18
+"""
+
+import re
+import json
+import time
+import logging
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import List, Optional, Union
+
+# Konfiguracja loggingu
+logger = logging.getLogger(__name__)
+
+# Domyślny katalog profili szumu (jeden plik JSON na urządzenie)
+DEFAULT_PROFILE_DIR = Path.home() / ".cache" / "realtime-stt-polish" / "noise_profiles"
+
+
+@dataclass
+class NoiseProfile:
+    """Wyuczony poziom tła mikrofonu"""
+
+    device: str
+    floor_db: float
+    sample_rate: int = 16000
+    frames: int = 0
+    updated: float = 0.0
+
+
+class NoiseFloorTracker:
+    """
+    Poziom tła jako niski percentyl poziomów ostatnich ramek
+
+    Poziomy (dB) ramek trafiają do pierścienia i histogramu o stałej
+    liczbie przedziałów. Wskaźnik percentyla przesuwa się przy każdej
+    ramce tylko o tyle przedziałów, o ile zmienił się rozkład - koszt
+    aktualizacji nie zależy od długości okna (O(1) na ramkę). Mowa
+    podnosi wysokie percentyle, a pauzy między słowami utrzymują niski
+    percentyl przy tle.
+    """
+
+    def __init__(
+        self,
+        window_frames: int = 256,
+        percentile: float = 10.0,
+        min_db: float = -100.0,
+        max_db: float = 0.0,
+        bin_db: float = 0.5,
+        min_frames: int = 16,
+    ):
+        """
+        Inicjalizacja trackera
+
+        Args:
+            window_frames: Liczba ostatnich ramek w pierścieniu
+            percentile: Percentyl poziomu ramek uznawany za tło
+            min_db: Dolna granica histogramu (dB)
+            max_db: Górna granica histogramu (dB)
+            bin_db: Szerokość przedziału histogramu (dB)
+            min_frames: Ramki potrzebne do własnej estymacji (wcześniej
+                poziom z profilu, jeśli wczytany)
+        """
+        self.window_frames = window_frames
+        self.percentile = percentile
+        self.min_db = min_db
+        self.max_db = max_db
+        self.bin_db = bin_db
+        self.n_bins = int((max_db - min_db) / bin_db) + 1
+        self.min_frames = min_frames
+
+        self._ring: List[int] = [0] * window_frames
+        self._histogram: List[int] = [0] * self.n_bins
+        self._position = 0
+        self._count = 0
+        # Przedział percentyla i liczba ramek w przedziałach poniżej
+        self._bin = 0
+        self._below = 0
+
+        self.frames_seen = 0
+        self.prior: Optional[NoiseProfile] = None
+
+    def _to_bin(self, level_db: float) -> int:
+        # Cisza cyfrowa ma poziom -inf - trafia do najniższego przedziału
+        level_db = min(max(level_db, self.min_db), self.max_db)
+        return min(int((level_db - self.min_db) / self.bin_db), self.n_bins - 1)
+
+    def update(self, level_db: float) -> Optional[float]:
+        """
+        Dodaj poziom ramki i zwróć aktualny poziom tła
+
+        Args:
+            level_db: Poziom ramki (dB, FrameFeatures.level_db)
+
+        Returns:
+            Poziom tła (dB) lub None przed pierwszą estymacją
+        """
+        histogram = self._histogram
+        if self._count == self.window_frames:
+            old = self._ring[self._position]
+            histogram[old] -= 1
+            if old < self._bin:
+                self._below -= 1
+            self._count -= 1
+
+        new = self._to_bin(level_db)
+        self._ring[self._position] = new
+        self._position = (self._position + 1) % self.window_frames
+        histogram[new] += 1
+        if new < self._bin:
+            self._below += 1
+        self._count += 1
+        self.frames_seen += 1
+
+        # Przesuń wskaźnik do przedziału zawierającego rangę percentyla
+        rank = int(self.percentile / 100.0 * (self._count - 1))
+        while rank < self._below:
+            self._bin -= 1
+            self._below -= histogram[self._bin]
+        while rank >= self._below + histogram[self._bin]:
+            self._below += histogram[self._bin]
+            self._bin += 1
+
+        return self.floor_db
+
+    @property
+    def floor_db(self) -> Optional[float]:
+        """Poziom tła (dB): z pierścienia lub z profilu przed min_frames"""
+        if self._count >= self.min_frames or (self._count and self.prior is None):
+            return self.min_db + (self._bin + 0.5) * self.bin_db
+        if self.prior is not None:
+            return self.prior.floor_db
+        return None
+
+    def apply_profile(self, profile: NoiseProfile):
+        """Użyj zapisanego profilu do czasu własnej estymacji"""
+        self.prior = profile
+
+    def to_profile(
+        self, device: str, sample_rate: int = 16000
+    ) -> Optional[NoiseProfile]:
+        """Profil do zapisu (None jeśli poziom tła jeszcze nieznany)"""
+        floor_db = self.floor_db
+        if floor_db is None:
+            return None
+        frames = self.frames_seen + (self.prior.frames if self.prior else 0)
+        return NoiseProfile(
+            device=device,
+            floor_db=floor_db,
+            sample_rate=sample_rate,
+            frames=frames,
+            updated=time.time(),
+        )
+
+
+def noise_profile_path(
+    device: str, profile_dir: Optional[Union[str, Path]] = None
+) -> Path:
+    """
+    Ścieżka profilu szumu urządzenia
+
+    Args:
+        device: Nazwa urządzenia audio
+        profile_dir: Katalog profili (domyślnie DEFAULT_PROFILE_DIR)
+
+    Returns:
+        Ścieżka pliku .json
+    """
+    directory = Path(profile_dir) if profile_dir else DEFAULT_PROFILE_DIR
+    safe_name = re.sub(r"[^A-Za-z0-9._-]+", "_", device).strip("_") or "default"
+    return directory / f"{safe_name}.json"
+
+
+def save_noise_profile(
+    profile: NoiseProfile, profile_dir: Optional[Union[str, Path]] = None
+) -> Path:
+    """Zapisz profil szumu urządzenia"""
+    path = noise_profile_path(profile.device, profile_dir)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(".tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(asdict(profile), f, indent=2)
+    tmp_path.replace(path)
+    logger.info(f"💾 Profil szumu '{profile.device}': {profile.floor_db:.1f} dB")
+    return path
+
+
+def load_noise_profile(
+    device: str,
+    profile_dir: Optional[Union[str, Path]] = None,
+    sample_rate: Optional[int] = None,
+) -> Optional[NoiseProfile]:
+    """
+    Wczytaj profil szumu urządzenia
+
+    Args:
+        device: Nazwa urządzenia audio
+        profile_dir: Katalog profili
+        sample_rate: Wymagana częstotliwość (inna = profil pominięty)
+
+    Returns:
+        NoiseProfile lub None (brak / uszkodzony / inna częstotliwość)
+    """
+    path = noise_profile_path(device, profile_dir)
+    if not path.exists():
+        return None
+    try:
+        with open(path, encoding="utf-8") as f:
+            profile = NoiseProfile(**json.load(f))
+    except (OSError, ValueError, TypeError) as e:
+        logger.warning(f"⚠️ Nieczytelny profil szumu {path}: {e}")
+        return None
+    if sample_rate is not None and profile.sample_rate != sample_rate:
+        return None
+    logger.info(f"📂 Profil szumu '{device}': {profile.floor_db:.1f} dB")
+    return profile
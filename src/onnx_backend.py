@@ -0,0 +1,645 @@
+"""
+ONNX Backend - Silnik STT na ONNX Runtime (grafy Whisper z onnx_export)
+ONNX Runtime implementation of the STTBackend protocol with greedy/beam decoding
+
+Autor: AI Assistant
+Data: 2025-01-18
+"""
+
+import time
+import logging
+import numpy as np
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import torch
+import whisper
+from whisper.decoding import (
+    ApplyTimestampRules,
+    BeamSearchDecoder,
+    GreedyDecoder,
+    Inference,
+    MaximumLikelihoodRanker,
+    SuppressBlank,
+    SuppressTokens,
+)
+from whisper.utils import compression_ratio
+
+from model_cache import model_cache
+from model_compilation import cpu_features
+from onnx_export import (
+    DECODER_FILE,
+    ENCODER_FILE,
+    ensure_onnx_export,
+    load_onnx_config,
+)
+from stt_backend import (
+    TranscriptionResult,
+    confidence_from_segments,
+    prepare_audio,
+    split_timestamped,
+)
+
+# Konfiguracja loggingu
+logger = logging.getLogger(__name__)
+
+
+def optimized_graph_path(base: Path, ort_version: str) -> Path:
+    """
+    Ścieżka grafu zoptymalizowanego przez ORT (ORT_ENABLE_ALL)
+
+    Zoptymalizowany graf zawiera kernele i układy danych zależne od
+    wersji onnxruntime i zestawu instrukcji CPU - klucz pliku zawiera
+    oba, więc po aktualizacji ORT lub na innym CPU graf jest
+    optymalizowany ponownie z grafu bazowego.
+
+    Args:
+        base: Graf bazowy z eksportu (np. encoder.onnx)
+        ort_version: onnxruntime.__version__
+
+    Returns:
+        Np. encoder.opt-ort1.17.1-x86_64-avx2.onnx obok grafu bazowego
+    """
+    return base.with_name(f"{base.stem}.opt-ort{ort_version}-{cpu_features()}.onnx")
+
+
+class OnnxWhisperSessions:
+    """
+    Sesje ONNX Runtime enkodera i dekodera jednego eksportu
+
+    Przy pierwszym załadowaniu grafy są optymalizowane przez ORT
+    i zapisywane obok eksportu (optimized_graph_path); kolejne starty
+    z tą samą wersją ORT i tym samym CPU ładują gotowe grafy bez
+    ponownej optymalizacji.
+    """
+
+    def __init__(
+        self, export_dir: Path, intra_op_threads: int = 0, inter_op_threads: int = 1
+    ):
+        self.export_dir = Path(export_dir)
+        self.config = load_onnx_config(self.export_dir)
+        self.dims = whisper.model.ModelDimensions(**self.config["dims"])
+        self.encoder = self._create_session(
+            ENCODER_FILE, intra_op_threads, inter_op_threads
+        )
+        self.decoder = self._create_session(
+            DECODER_FILE, intra_op_threads, inter_op_threads
+        )
+
+    def _create_session(
+        self, filename: str, intra_op_threads: int, inter_op_threads: int
+    ):
+        import onnxruntime as ort
+
+        options = ort.SessionOptions()
+        options.intra_op_num_threads = intra_op_threads
+        options.inter_op_num_threads = inter_op_threads
+        options.execution_mode = ort.ExecutionMode.ORT_SEQUENTIAL
+
+        base = self.export_dir / filename
+        optimized = optimized_graph_path(base, ort.__version__)
+        if optimized.is_file():
+            options.graph_optimization_level = (
+                ort.GraphOptimizationLevel.ORT_DISABLE_ALL
+            )
+            try:
+                return ort.InferenceSession(
+                    str(optimized), options, providers=["CPUExecutionProvider"]
+                )
+            except Exception as e:
+                logger.warning(
+                    f"⚠️ Nieudany odczyt grafu {optimized.name} ({e}) - "
+                    "ponowna optymalizacja"
+                )
+
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        options.optimized_model_filepath = str(optimized)
+        return ort.InferenceSession(
+            str(base), options, providers=["CPUExecutionProvider"]
+        )
+
+    def tokenizer(self, language: str):
+        """Tokenizer Whisper zgodny z eksportowanym modelem"""
+        return whisper.tokenizer.get_tokenizer(
+            self.config["is_multilingual"],
+            num_languages=self.config["num_languages"],
+            language=language,
+            task="transcribe",
+        )
+
+
+class OrtInference(Inference):
+    """
+    Inference dla dekoderów whisper.decoding na sesjach ORT
+
+    KV-cache self-attention trzymany jest jako tablice numpy
+    (n_layer, batch, n_past, n_state) i przestawiany przy beam search.
+    """
+
+    def __init__(
+        self, sessions: OnnxWhisperSessions, cross_k: np.ndarray, cross_v: np.ndarray
+    ):
+        self.decoder = sessions.decoder
+        self.cross_k = cross_k
+        self.cross_v = cross_v
+        dims = sessions.dims
+        self.empty_cache = np.zeros(
+            (dims.n_text_layer, cross_k.shape[1], 0, dims.n_text_state),
+            dtype=np.float32,
+        )
+        self.cleanup_caching()
+
+    def logits(self, tokens: torch.Tensor, audio_features=None) -> torch.Tensor:
+        # Po pierwszym kroku dekoder dostaje tylko ostatni token
+        if self.self_k.shape[2] > 0:
+            tokens = tokens[:, -1:]
+        logits, self.self_k, self.self_v = self.decoder.run(
+            None,
+            {
+                "tokens": tokens.numpy().astype(np.int64),
+                "self_k": self.self_k,
+                "self_v": self.self_v,
+                "cross_k": self.cross_k,
+                "cross_v": self.cross_v,
+            },
+        )
+        return torch.from_numpy(logits)
+
+    def rearrange_kv_cache(self, source_indices) -> None:
+        if source_indices != list(range(len(source_indices))):
+            self.self_k = self.self_k[:, source_indices]
+            self.self_v = self.self_v[:, source_indices]
+
+    def cleanup_caching(self) -> None:
+        self.self_k = self.empty_cache
+        self.self_v = self.empty_cache
+
+
+class OnnxWhisperBackend:
+    """
+    Silnik STT uruchamiający Whisper przez ONNX Runtime
+
+    Grafy eksportowane są z modelu PyTorch raz na model (onnx_export)
+    i trzymane w cache na dysku. Dekodowanie: zachłanne (beam_size <= 1)
+    albo beam search, z tymi samymi filtrami logitów co whisper.decode.
+    Zwraca ten sam TranscriptionResult co WhisperSTTEngine.
+    """
+
+    backend_name = "onnx"
+
+    def __init__(
+        self,
+        model_name: str = "base",
+        language: str = "pl",
+        beam_size: int = 5,
+        best_of: int = 5,
+        temperature: float = 0.0,
+        patience: float = 1.0,
+        length_penalty: Optional[float] = None,
+        initial_prompt: Optional[str] = None,
+        condition_on_previous_text: bool = True,
+        logprob_threshold: float = -1.0,
+        no_speech_threshold: float = 0.6,
+        intra_op_threads: int = 0,
+        inter_op_threads: int = 1,
+        model_dir: Optional[str] = None,
+        onnx_cache_dir: Optional[str] = None,
+        post_processor: Optional[Callable[[str], str]] = None,
+    ):
+        """
+        Inicjalizacja backendu
+
+        Args:
+            model_name: Nazwa modelu Whisper (tiny, base, small, medium, large)
+            language: Kod języka
+            beam_size: Rozmiar beam search (<= 1 = dekodowanie zachłanne)
+            best_of: Dla zgodności z STTBackend (brak samplingu)
+            temperature: Dla zgodności z STTBackend (zawsze 0.0)
+            patience: Patience factor dla beam search
+            length_penalty: Penalty dla długości sekwencji (None = średnia)
+            initial_prompt: Początkowy prompt dla kontekstu
+            condition_on_previous_text: Czy używać poprzedniego tekstu jako kontekst
+            logprob_threshold: Próg prawdopodobieństwa
+            no_speech_threshold: Próg dla wykrywania braku mowy
+            intra_op_threads: Wątki ORT w obrębie operatora (0 = domyślnie)
+            inter_op_threads: Wątki ORT między operatorami
+            model_dir: Lokalny katalog plików <model>.pt (do pierwszego eksportu)
+            onnx_cache_dir: Katalog cache grafów ONNX
+            post_processor: Funkcja post-processingu tekstu (np. dla PL)
+        """
+        self.model_name = model_name
+        self.language = language
+        self.intra_op_threads = intra_op_threads
+        self.inter_op_threads = inter_op_threads
+        self.model_dir = model_dir
+        self.onnx_cache_dir = onnx_cache_dir
+        self.post_processor = post_processor
+
+        if temperature > 0:
+            logger.warning("⚠️ Backend ONNX dekoduje tylko z temperature=0.0")
+
+        # Parametry dekodowania
+        self.decode_options = {
+            "language": language,
+            "beam_size": beam_size,
+            "patience": patience,
+            "length_penalty": length_penalty,
+            "initial_prompt": initial_prompt,
+            "condition_on_previous_text": condition_on_previous_text,
+            "logprob_threshold": logprob_threshold,
+            "no_speech_threshold": no_speech_threshold,
+        }
+
+        # Model i stan
+        self.sessions: Optional[OnnxWhisperSessions] = None
+        self.is_loaded = False
+        self.previous_text = ""
+
+        # Statystyki
+        self.total_transcriptions = 0
+        self.total_processing_time = 0
+        self.model_load_time = 0
+
+        logger.info(
+            f"🤖 OnnxWhisperBackend inicjalizowany: model={model_name}, "
+            f"beam_size={beam_size}"
+        )
+
+    def _cache_key(self) -> tuple:
+        """Klucz sesji w współdzielonym cache"""
+        return (
+            "onnx",
+            self.model_name,
+            self.onnx_cache_dir,
+            self.intra_op_threads,
+            self.inter_op_threads,
+        )
+
+    def _load_sessions(self) -> OnnxWhisperSessions:
+        """Załaduj sesje ORT (eksport przy pierwszym użyciu modelu)"""
+        export_dir = ensure_onnx_export(
+            self.model_name,
+            lambda: whisper.load_model(
+                self.model_name, device="cpu", download_root=self.model_dir
+            ),
+            self.onnx_cache_dir,
+        )
+        return OnnxWhisperSessions(
+            export_dir, self.intra_op_threads, self.inter_op_threads
+        )
+
+    def load_model(self) -> bool:
+        """
+        Załaduj grafy ONNX
+
+        Returns:
+            True jeśli załadowanie się powiodło
+        """
+        if self.is_loaded:
+            logger.info("✅ Model już załadowany")
+            return True
+
+        try:
+            start_time = time.time()
+            logger.info(f"📥 Ładowanie modelu ONNX: {self.model_name}")
+
+            # Sesje ORT są bezstanowe i bezpieczne wątkowo - bez blokady
+            self.sessions = model_cache.acquire(self._cache_key(), self._load_sessions)
+
+            self.model_load_time = time.time() - start_time
+            self.is_loaded = True
+
+            logger.info(f"✅ Model załadowany w {self.model_load_time:.2f}s")
+            return True
+
+        except Exception as e:
+            logger.error(f"❌ Błąd ładowania modelu ONNX: {e}")
+            self.is_loaded = False
+            return False
+
+    def decode(
+        self,
+        mel: np.ndarray,
+        with_timestamps: bool = False,
+        prompt: Optional[str] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        Zdekoduj batch spektrogramów (odpowiednik whisper.decode)
+
+        Args:
+            mel: Spektrogramy (batch, n_mels, 3000)
+            with_timestamps: Czy dekodować tokeny czasu
+            prompt: Tekst kontekstu (sot_prev)
+
+        Returns:
+            Słowniki z tokens, text, avg_logprob, no_speech_prob,
+            compression_ratio (w kolejności batcha)
+        """
+        sessions = self.sessions
+        dims = sessions.dims
+        tokenizer = sessions.tokenizer(self.decode_options["language"])
+        n_ctx = dims.n_text_ctx
+        n_audio = mel.shape[0]
+
+        initial = list(
+            tokenizer.sot_sequence
+            if with_timestamps
+            else tokenizer.sot_sequence_including_notimestamps
+        )
+        if prompt:
+            prompt_tokens = tokenizer.encode(" " + prompt.strip())
+            initial = (
+                [tokenizer.sot_prev] + prompt_tokens[-(n_ctx // 2 - 1) :] + initial
+            )
+        sample_begin = len(initial)
+        sot_index = initial.index(tokenizer.sot)
+
+        beam_size = self.decode_options["beam_size"] or 1
+        n_group = beam_size if beam_size > 1 else 1
+
+        cross_k, cross_v = sessions.encoder.run(None, {"mel": mel.astype(np.float32)})
+        cross_k = np.repeat(cross_k, n_group, axis=1)
+        cross_v = np.repeat(cross_v, n_group, axis=1)
+        inference = OrtInference(sessions, cross_k, cross_v)
+
+        if n_group > 1:
+            decoder = BeamSearchDecoder(
+                beam_size, tokenizer.eot, inference, self.decode_options["patience"]
+            )
+        else:
+            decoder = GreedyDecoder(0.0, tokenizer.eot)
+
+        logit_filters = [
+            SuppressBlank(tokenizer, sample_begin),
+            SuppressTokens(self._suppress_tokens(tokenizer)),
+        ]
+        if with_timestamps:
+            precision = whisper.audio.CHUNK_LENGTH / dims.n_audio_ctx
+            logit_filters.append(
+                ApplyTimestampRules(tokenizer, sample_begin, round(1.0 / precision))
+            )
+
+        tokens = torch.tensor([initial] * (n_audio * n_group))
+        sum_logprobs = torch.zeros(n_audio * n_group)
+        no_speech_probs = [np.nan] * n_audio
+
+        for i in range(n_ctx // 2):
+            logits = inference.logits(tokens)
+            if i == 0 and tokenizer.no_speech is not None:
+                probs_at_sot = logits[::n_group, sot_index].float().softmax(dim=-1)
+                no_speech_probs = probs_at_sot[:, tokenizer.no_speech].tolist()
+
+            logits = logits[:, -1]
+            for logit_filter in logit_filters:
+                logit_filter.apply(logits, tokens)
+
+            tokens, completed = decoder.update(tokens, logits, sum_logprobs)
+            if completed or tokens.shape[-1] > n_ctx:
+                break
+
+        tokens = tokens.reshape(n_audio, n_group, -1)
+        sum_logprobs = sum_logprobs.reshape(n_audio, n_group)
+        tokens, sum_logprobs = decoder.finalize(tokens, sum_logprobs)
+
+        candidates = [
+            [t[sample_begin : (t == tokenizer.eot).nonzero()[0, 0]] for t in group]
+            for group in tokens
+        ]
+        ranker = MaximumLikelihoodRanker(self.decode_options["length_penalty"])
+        selected = ranker.rank(candidates, sum_logprobs)
+
+        results = []
+        for group, logprobs, index, no_speech_prob in zip(
+            candidates, sum_logprobs, selected, no_speech_probs
+        ):
+            best = group[index].tolist()
+            text = tokenizer.decode([t for t in best if t < tokenizer.eot]).strip()
+            results.append(
+                {
+                    "tokens": best,
+                    "text": text,
+                    "avg_logprob": float(logprobs[index]) / (len(best) + 1),
+                    "no_speech_prob": no_speech_prob,
+                    "compression_ratio": compression_ratio(text) if text else 0.0,
+                }
+            )
+        return results
+
+    @staticmethod
+    def _suppress_tokens(tokenizer) -> List[int]:
+        """Tokeny tłumione jak w whisper.decode (suppress_tokens="-1")"""
+        suppress = list(tokenizer.non_speech_tokens) + [
+            tokenizer.transcribe,
+            tokenizer.translate,
+            tokenizer.sot,
+            tokenizer.sot_prev,
+            tokenizer.sot_lm,
+        ]
+        if tokenizer.no_speech is not None:
+            suppress.append(tokenizer.no_speech)
+        return sorted(set(suppress))
+
+    def _mel_batch(self, chunks: List[np.ndarray]) -> np.ndarray:
+        """Spektrogramy log-mel dla fragmentów do 30 s"""
+        n_mels = self.sessions.dims.n_mels
+        return np.stack(
+            [
+                whisper.log_mel_spectrogram(whisper.pad_or_trim(chunk), n_mels).numpy()
+                for chunk in chunks
+            ]
+        )
+
+    def _to_segment(
+        self, decoded: Dict[str, Any], start: float, end: float
+    ) -> Dict[str, Any]:
+        """Wynik dekodowania -> segment w formacie Whisper"""
+        text = decoded["text"]
+        # Ta sama reguła ciszy co w model.transcribe
+        if (
+            decoded["no_speech_prob"] > self.decode_options["no_speech_threshold"]
+            and decoded["avg_logprob"] < self.decode_options["logprob_threshold"]
+        ):
+            text = ""
+        return {**decoded, "start": start, "end": end, "text": text, "temperature": 0.0}
+
+    def _result(
+        self, segments: List[Dict[str, Any]], processing_time: float
+    ) -> TranscriptionResult:
+        """Złóż TranscriptionResult z segmentów"""
+        text = " ".join(s["text"] for s in segments if s["text"]).strip()
+        if self.post_processor is not None:
+            text = self.post_processor(text)
+        return TranscriptionResult(
+            text=text,
+            language=self.decode_options["language"],
+            confidence=confidence_from_segments(segments),
+            processing_time=processing_time,
+            segments=segments,
+            model_used=self.model_name,
+        )
+
+    def transcribe_audio(
+        self, audio_data: np.ndarray, sample_rate: int = 16000
+    ) -> Optional[TranscriptionResult]:
+        """
+        Transkrybuj audio na tekst
+
+        Audio dłuższe niż 30 s dzielone jest na kolejne okna 30 s
+        dekodowane jednym batchem.
+
+        Args:
+            audio_data: Dane audio jako numpy array
+            sample_rate: Częstotliwość próbkowania
+
+        Returns:
+            TranscriptionResult lub None w przypadku błędu
+        """
+        if not self.is_loaded:
+            if not self.load_model():
+                return None
+
+        try:
+            start_time = time.time()
+            audio = prepare_audio(audio_data, sample_rate)
+
+            prompt = self.decode_options["initial_prompt"]
+            if self.previous_text and self.decode_options["condition_on_previous_text"]:
+                prompt = self.previous_text[-200:]
+
+            window = whisper.audio.N_SAMPLES
+            bounds: List[Tuple[int, int]] = [
+                (offset, min(offset + window, len(audio)))
+                for offset in range(0, len(audio), window)
+            ]
+            decoded = self.decode(
+                self._mel_batch([audio[a:b] for a, b in bounds]), prompt=prompt
+            )
+            segments = [
+                self._to_segment(item, a / 16000, b / 16000)
+                for item, (a, b) in zip(decoded, bounds)
+            ]
+
+            processing_time = time.time() - start_time
+            result = self._result(segments, processing_time)
+
+            self.total_transcriptions += 1
+            self.total_processing_time += processing_time
+            if result.text:
+                self.previous_text = result.text
+
+            logger.debug(
+                f"🎤 Transkrypcja ONNX: '{result.text}' "
+                f"({processing_time:.2f}s, conf={result.confidence:.2f})"
+            )
+            return result
+
+        except Exception as e:
+            logger.error(f"❌ Błąd transkrypcji ONNX: {e}")
+            return None
+
+    def transcribe_batch(
+        self,
+        audio_batch: List[np.ndarray],
+        sample_rate: int = 16000,
+        with_timestamps: bool = False,
+    ) -> List[Optional[TranscriptionResult]]:
+        """
+        Transkrybuj wiele segmentów jednym przebiegiem enkodera/dekodera
+
+        Segmenty do 30 s dekodowane są razem (także beam search).
+        Dłuższe segmenty idą ścieżką transcribe_audio. Batch nie używa
+        kontekstu poprzedniego tekstu - tylko stałego initial_prompt.
+
+        Args:
+            audio_batch: Lista segmentów audio
+            sample_rate: Częstotliwość próbkowania
+            with_timestamps: Czy dekodować tokeny czasu (segments z start/end)
+
+        Returns:
+            Lista wyników (None dla segmentów z błędem) w kolejności wejścia
+        """
+        if not self.is_loaded:
+            if not self.load_model():
+                return [None] * len(audio_batch)
+
+        results: List[Optional[TranscriptionResult]] = [None] * len(audio_batch)
+        prepared = [prepare_audio(audio, sample_rate) for audio in audio_batch]
+
+        short = []
+        for i, audio in enumerate(prepared):
+            if len(audio) <= whisper.audio.N_SAMPLES:
+                short.append(i)
+            else:
+                previous_text = self.previous_text
+                self.previous_text = ""
+                results[i] = self.transcribe_audio(audio_batch[i], sample_rate)
+                self.previous_text = previous_text
+
+        if not short:
+            return results
+
+        try:
+            start_time = time.time()
+            decoded = self.decode(
+                self._mel_batch([prepared[i] for i in short]),
+                with_timestamps=with_timestamps,
+                prompt=self.decode_options["initial_prompt"],
+            )
+            processing_time = (time.time() - start_time) / len(short)
+
+            tokenizer = self.sessions.tokenizer(self.decode_options["language"])
+            for i, item in zip(short, decoded):
+                segment = self._to_segment(item, 0.0, len(prepared[i]) / 16000)
+                segments = (
+                    split_timestamped(segment, tokenizer)
+                    if with_timestamps and segment["text"]
+                    else [segment]
+                )
+                results[i] = self._result(segments, processing_time)
+
+            self.total_transcriptions += len(short)
+            self.total_processing_time += processing_time * len(short)
+
+        except Exception as e:
+            logger.error(f"❌ Błąd transkrypcji batch ONNX: {e}")
+
+        return results
+
+    def get_model_info(self) -> Dict[str, Any]:
+        """Pobierz informacje o modelu"""
+        return {
+            "backend": self.backend_name,
+            "model_name": self.model_name,
+            "device": "cpu",
+            "export_dir": str(self.sessions.export_dir) if self.sessions else None,
+            "language": self.language,
+            "is_loaded": self.is_loaded,
+            "load_time": self.model_load_time,
+            "total_transcriptions": self.total_transcriptions,
+            "avg_processing_time": (
+                self.total_processing_time / max(self.total_transcriptions, 1)
+            ),
+            "decode_options": self.decode_options,
+        }
+
+    def clear_context(self):
+        """Wyczyść kontekst poprzedniego tekstu"""
+        self.previous_text = ""
+        logger.info("🧹 Kontekst tekstowy wyczyszczony")
+
+    def unload_model(self):
+        """Zwolnij sesje ORT"""
+        if self.sessions is not None:
+            self.sessions = None
+            self.is_loaded = False
+            model_cache.release(self._cache_key())
+            logger.info("🗑️ Model ONNX zwolniony")
+
+    def __enter__(self):
+        """Context manager entry"""
+        self.load_model()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        """Context manager exit"""
+        self.unload_model()
@@ -0,0 +1,347 @@
+"""
+ONNX Export - Eksport enkodera i dekodera Whisper do grafów ONNX
+Export Whisper encoder/decoder (with explicit KV-cache) to ONNX, cached per model
+
+Autor: AI Assistant
+Data: 2025-01-18
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import logging
+import argparse
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional, Union
+
+import torch
+
+# Konfiguracja loggingu
+logger = logging.getLogger(__name__)
+
+# Domyślny katalog wyeksportowanych modeli
+DEFAULT_ONNX_CACHE_DIR = Path.home() / ".cache" / "realtime-stt-polish" / "onnx"
+
+# Pliki eksportu
+ENCODER_FILE = "encoder.onnx"
+DECODER_FILE = "decoder.onnx"
+CONFIG_FILE = "config.json"
+
+# Wersja opsetu ONNX
+DEFAULT_OPSET = 17
+
+
+def _attention(
+    q: torch.Tensor,
+    k: torch.Tensor,
+    v: torch.Tensor,
+    n_head: int,
+    mask: Optional[torch.Tensor] = None,
+) -> torch.Tensor:
+    """Multi-head attention jak MultiHeadAttention.qkv_attention (bez SDPA)"""
+    n_batch, n_ctx, n_state = q.shape
+    scale = (n_state // n_head) ** -0.25
+    q = q.view(n_batch, n_ctx, n_head, -1).permute(0, 2, 1, 3) * scale
+    k = k.view(n_batch, k.shape[1], n_head, -1).permute(0, 2, 3, 1) * scale
+    v = v.view(n_batch, v.shape[1], n_head, -1).permute(0, 2, 1, 3)
+
+    qk = q @ k
+    if mask is not None:
+        qk = qk + mask
+    w = torch.softmax(qk.float(), dim=-1).to(q.dtype)
+    return (w @ v).permute(0, 2, 1, 3).flatten(start_dim=2)
+
+
+class WhisperEncoderExport(torch.nn.Module):
+    """
+    Enkoder z wyliczeniem K/V cross-attention wszystkich warstw dekodera
+
+    Wejście: mel (batch, n_mels, 3000)
+    Wyjście: cross_k, cross_v (n_layer, batch, n_audio_ctx, n_state)
+    """
+
+    def __init__(self, model: torch.nn.Module):
+        super().__init__()
+        self.encoder = model.encoder
+        self.blocks = model.decoder.blocks
+
+    def forward(self, mel: torch.Tensor):
+        audio_features = self.encoder(mel)
+        cross_k = torch.stack(
+            [block.cross_attn.key(audio_features) for block in self.blocks]
+        )
+        cross_v = torch.stack(
+            [block.cross_attn.value(audio_features) for block in self.blocks]
+        )
+        return cross_k, cross_v
+
+
+class WhisperDecoderExport(torch.nn.Module):
+    """
+    Krok dekodera z jawnym KV-cache self-attention
+
+    Wejście: tokens (batch, n_tokens), self_k/self_v (n_layer, batch,
+    n_past, n_state), cross_k/cross_v z enkodera.
+    Wyjście: logits (batch, n_tokens, n_vocab) i self_k/self_v
+    rozszerzone o n_tokens pozycji. Pozycja pierwszego tokenu = n_past.
+    """
+
+    def __init__(self, model: torch.nn.Module):
+        super().__init__()
+        self.decoder = model.decoder
+
+    def forward(
+        self,
+        tokens: torch.Tensor,
+        self_k: torch.Tensor,
+        self_v: torch.Tensor,
+        cross_k: torch.Tensor,
+        cross_v: torch.Tensor,
+    ):
+        decoder = self.decoder
+        offset = self_k.shape[2]
+        n_tokens = tokens.shape[1]
+
+        x = (
+            decoder.token_embedding(tokens)
+            + decoder.positional_embedding[offset : offset + n_tokens]
+        )
+        # Maska przyczynowa dla pozycji offset..offset+n_tokens-1
+        mask = decoder.mask[offset : offset + n_tokens, : offset + n_tokens]
+
+        new_k = []
+        new_v = []
+        for i, block in enumerate(decoder.blocks):
+            attn = block.attn
+            h = block.attn_ln(x)
+            k = torch.cat([self_k[i], attn.key(h)], dim=1)
+            v = torch.cat([self_v[i], attn.value(h)], dim=1)
+            new_k.append(k)
+            new_v.append(v)
+            x = x + attn.out(_attention(attn.query(h), k, v, attn.n_head, mask))
+
+            cross = block.cross_attn
+            h = block.cross_attn_ln(x)
+            x = x + cross.out(
+                _attention(cross.query(h), cross_k[i], cross_v[i], cross.n_head)
+            )
+
+            x = x + block.mlp(block.mlp_ln(x))
+
+        x = decoder.ln(x)
+        logits = (x @ torch.transpose(decoder.token_embedding.weight, 0, 1)).float()
+        return logits, torch.stack(new_k), torch.stack(new_v)
+
+
+def onnx_export_dir(
+    model_name: str, cache_dir: Optional[Union[str, Path]] = None
+) -> Path:
+    """
+    Katalog eksportu ONNX dla modelu
+
+    Args:
+        model_name: Nazwa modelu Whisper (lub ścieżka pliku .pt)
+        cache_dir: Katalog cache (domyślnie DEFAULT_ONNX_CACHE_DIR)
+
+    Returns:
+        Ścieżka katalogu z encoder.onnx, decoder.onnx i config.json
+    """
+    directory = Path(cache_dir) if cache_dir else DEFAULT_ONNX_CACHE_DIR
+    safe_name = Path(model_name).stem if os.sep in model_name else model_name
+    return directory / safe_name
+
+
+def export_whisper_onnx(
+    model: torch.nn.Module,
+    output_dir: Union[str, Path],
+    model_name: str = "",
+    opset: int = DEFAULT_OPSET,
+) -> Path:
+    """
+    Wyeksportuj model Whisper (fp32) do grafów ONNX
+
+    Eksport odbywa się do katalogu tymczasowego, podmienianego na
+    docelowy dopiero po zapisaniu wszystkich plików - przerwany eksport
+    nie zostawia niekompletnego cache.
+
+    Args:
+        model: Model Whisper (fp32)
+        output_dir: Katalog docelowy
+        model_name: Nazwa modelu zapisywana w config.json
+        opset: Wersja opsetu ONNX
+
+    Returns:
+        Ścieżka katalogu eksportu
+    """
+    output_dir = Path(output_dir)
+    tmp_dir = output_dir.with_name(output_dir.name + ".tmp")
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    tmp_dir.mkdir(parents=True)
+
+    start_time = time.time()
+    model = model.float().cpu().eval()
+    dims = model.dims
+    n_layer = dims.n_text_layer
+    n_state = dims.n_text_state
+
+    mel = torch.zeros(1, dims.n_mels, dims.n_audio_ctx * 2)
+    tokens = torch.zeros(1, 3, dtype=torch.long)
+    self_kv = torch.zeros(n_layer, 1, 2, n_state)
+    cross_kv = torch.zeros(n_layer, 1, dims.n_audio_ctx, n_state)
+
+    # Stary eksporter (TorchScript) obsługuje dynamic_axes bez onnxscript
+    export_kwargs: Dict[str, Any] = {
+        "opset_version": opset,
+        "do_constant_folding": True,
+    }
+    if "dynamo" in torch.onnx.export.__code__.co_varnames:
+        export_kwargs["dynamo"] = False
+
+    with torch.no_grad():
+        torch.onnx.export(
+            WhisperEncoderExport(model),
+            (mel,),
+            str(tmp_dir / ENCODER_FILE),
+            input_names=["mel"],
+            output_names=["cross_k", "cross_v"],
+            dynamic_axes={
+                "mel": {0: "batch"},
+                "cross_k": {1: "batch"},
+                "cross_v": {1: "batch"},
+            },
+            **export_kwargs,
+        )
+        torch.onnx.export(
+            WhisperDecoderExport(model),
+            (tokens, self_kv, self_kv, cross_kv, cross_kv),
+            str(tmp_dir / DECODER_FILE),
+            input_names=["tokens", "self_k", "self_v", "cross_k", "cross_v"],
+            output_names=["logits", "new_self_k", "new_self_v"],
+            dynamic_axes={
+                "tokens": {0: "batch", 1: "n_tokens"},
+                "self_k": {1: "batch", 2: "n_past"},
+                "self_v": {1: "batch", 2: "n_past"},
+                "cross_k": {1: "batch"},
+                "cross_v": {1: "batch"},
+                "logits": {0: "batch", 1: "n_tokens"},
+                "new_self_k": {1: "batch", 2: "n_total"},
+                "new_self_v": {1: "batch", 2: "n_total"},
+            },
+            **export_kwargs,
+        )
+
+    config = {
+        "model_name": model_name,
+        "dims": dict(vars(dims)),
+        "is_multilingual": model.is_multilingual,
+        "num_languages": model.num_languages,
+        "opset": opset,
+        "torch_version": torch.__version__,
+    }
+    with open(tmp_dir / CONFIG_FILE, "w", encoding="utf-8") as f:
+        json.dump(config, f, indent=2)
+
+    shutil.rmtree(output_dir, ignore_errors=True)
+    os.replace(tmp_dir, output_dir)
+
+    logger.info(f"📦 Eksport ONNX: {output_dir} ({time.time() - start_time:.2f}s)")
+    return output_dir
+
+
+def load_onnx_config(export_dir: Union[str, Path]) -> Dict[str, Any]:
+    """Wczytaj config.json eksportu"""
+    with open(Path(export_dir) / CONFIG_FILE, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def is_exported(export_dir: Union[str, Path]) -> bool:
+    """Czy katalog zawiera kompletny eksport"""
+    export_dir = Path(export_dir)
+    return all(
+        (export_dir / name).is_file()
+        for name in (ENCODER_FILE, DECODER_FILE, CONFIG_FILE)
+    )
+
+
+def ensure_onnx_export(
+    model_name: str,
+    loader: Callable[[], torch.nn.Module],
+    cache_dir: Optional[Union[str, Path]] = None,
+) -> Path:
+    """
+    Zwróć katalog eksportu, eksportując model przy pierwszym użyciu
+
+    Przy kolejnych uruchomieniach model PyTorch nie jest ładowany -
+    wystarczą zapisane grafy.
+
+    Args:
+        model_name: Nazwa modelu Whisper
+        loader: Funkcja ładująca model PyTorch (używana przy braku cache)
+        cache_dir: Katalog cache
+
+    Returns:
+        Ścieżka katalogu eksportu
+    """
+    export_dir = onnx_export_dir(model_name, cache_dir)
+    if is_exported(export_dir):
+        logger.info(f"⚡ Grafy ONNX z cache: {export_dir}")
+        return export_dir
+
+    return export_whisper_onnx(loader(), export_dir, model_name)
+
+
+def export_engine_model(engine, output_dir: Optional[Union[str, Path]] = None) -> Path:
+    """
+    Wyeksportuj model załadowany przez WhisperSTTEngine
+
+    Args:
+        engine: WhisperSTTEngine (model ładowany w razie potrzeby, fp32)
+        output_dir: Katalog docelowy (domyślnie katalog cache modelu)
+
+    Returns:
+        Ścieżka katalogu eksportu
+    """
+    if not engine.is_loaded and not engine.load_model():
+        raise RuntimeError(f"Nie można załadować modelu {engine.model_name}")
+    if getattr(engine, "cpu_precision", "fp32") != "fp32":
+        raise ValueError("Eksport ONNX wymaga modelu fp32")
+
+    output_dir = output_dir or onnx_export_dir(engine.model_name)
+    with engine._inference_lock:
+        return export_whisper_onnx(engine.model, output_dir, engine.model_name)
+
+
+def main():
+    """Eksport z linii poleceń"""
+    parser = argparse.ArgumentParser(description="Eksport Whisper do ONNX")
+    parser.add_argument("--model", default="base", help="Model Whisper")
+    parser.add_argument("--model-dir", default=None, help="Lokalny katalog modeli")
+    parser.add_argument(
+        "--output", default=None, help="Katalog docelowy (domyślnie cache)"
+    )
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+
+    from stt_engine import WhisperSTTEngine
+
+    engine = WhisperSTTEngine(
+        model_name=args.model, device="cpu", model_dir=args.model_dir
+    )
+    try:
+        export_dir = export_engine_model(engine, args.output)
+    except Exception as e:
+        print(f"❌ Eksport nieudany: {e}")
+        return False
+    finally:
+        engine.unload_model()
+
+    print(f"✅ Wyeksportowano: {export_dir}")
+    return True
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
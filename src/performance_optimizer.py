@@ -11,7 +11,7 @@ import threading
 import time
 import psutil
 import logging
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, Optional, List, Callable
 from dataclasses import dataclass
 from concurrent.futures import ThreadPoolExecutor
 
@@ -88,6 +88,10 @@ class PerformanceOptimizer:
         # Callbacks
         self.performance_callbacks = []
 
+        # Źródła metryk komponentów (kolejki, czasy przetwarzania)
+        self.queue_sources: Dict[str, Callable[[], int]] = {}
+        self.timing_sources: Dict[str, Callable[[], float]] = {}
+
         logger.info(f"🚀 PerformanceOptimizer zainicjalizowany")
 
     def start_monitoring(self):
@@ -207,15 +211,50 @@ class PerformanceOptimizer:
                 processing_times={},
             )
 
+    def register_queue_source(self, name: str, source: Callable[[], int]):
+        """
+        Zarejestruj źródło rozmiaru kolejki
+
+        Args:
+            name: Nazwa metryki w PerformanceMetrics.queue_sizes
+            source: Funkcja zwracająca bieżący rozmiar kolejki
+        """
+        self.queue_sources[name] = source
+
+    def register_timing_source(self, name: str, source: Callable[[], float]):
+        """
+        Zarejestruj źródło czasu przetwarzania
+
+        Args:
+            name: Nazwa metryki w PerformanceMetrics.processing_times
+            source: Funkcja zwracająca bieżący czas (s)
+        """
+        self.timing_sources[name] = source
+
+    def unregister_source(self, name: str):
+        """Usuń źródło metryki"""
+        self.queue_sources.pop(name, None)
+        self.timing_sources.pop(name, None)
+
     def _get_queue_sizes(self) -> Dict[str, int]:
-        """Pobierz rozmiary kolejek (implementacja specyficzna dla pipeline)"""
-        # TODO: Integracja z RealtimePipeline
-        return {}
+        """Pobierz rozmiary kolejek z zarejestrowanych źródeł"""
+        sizes = {}
+        for name, source in list(self.queue_sources.items()):
+            try:
+                sizes[name] = int(source())
+            except Exception as e:
+                logger.debug(f"Queue source {name} error: {e}")
+        return sizes
 
     def _get_processing_times(self) -> Dict[str, float]:
-        """Pobierz czasy przetwarzania"""
-        # TODO: Integracja z komponentami
-        return {}
+        """Pobierz czasy przetwarzania z zarejestrowanych źródeł"""
+        times = {}
+        for name, source in list(self.timing_sources.items()):
+            try:
+                times[name] = float(source())
+            except Exception as e:
+                logger.debug(f"Timing source {name} error: {e}")
+        return times
 
     def _check_optimization_triggers(self, metrics: PerformanceMetrics):
         """Sprawdź czy potrzeba optymalizacji"""
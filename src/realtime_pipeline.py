@@ -11,13 +11,25 @@ import queue
 import time
 import numpy as np
 import logging
-from typing import Optional, Callable, Dict, Any
-from dataclasses import dataclass
+from typing import Optional, Callable, Dict, Any, List, Union
 from enum import Enum
 
 from audio_capture import AudioCapture
-from voice_activity_detector import SimpleVAD, WebRTCVAD, VADMode
-from stt_engine import WhisperSTTEngine, PolishOptimizedSTT, TranscriptionResult
+from noise_floor import load_noise_profile, save_noise_profile
+from voice_activity_detector import VADMode, create_vad
+from frame_features import FrameFeatureExtractor, FrameFeatures
+from speech_segmenter import SpeechSegment, SpeechSegmenter
+from segment_backlog import SegmentBacklog
+from catchup_transcriber import CatchupTranscriber, DrainStatistics
+from two_pass import REVISION_PROVISIONAL, TwoPassRefiner
+from escalation import (
+    EscalatingSTTEngine,
+    EscalationPolicy,
+    create_escalating_backend,
+)
+from segment_router import SegmentRouter, load_routing_table
+from speech_gate import SpeechGate
+from stt_backend import create_stt_backend
 
 # Konfiguracja loggingu
 logger = logging.getLogger(__name__)
@@ -33,33 +45,6 @@ class PipelineState(Enum):
     ERROR = "error"
 
 
-@dataclass
-class SpeechSegment:
-    """Segment mowy wykryty przez pipeline"""
-
-    audio_data: np.ndarray
-    start_time: float
-    end_time: float
-    confidence: float
-    sample_rate: int
-    transcription: Optional[TranscriptionResult] = None
-
-    @property
-    def duration(self) -> float:
-        """Długość segmentu w sekundach"""
-        return self.end_time - self.start_time
-
-    @property
-    def num_samples(self) -> int:
-        """Liczba próbek audio"""
-        return len(self.audio_data)
-
-    @property
-    def text(self) -> str:
-        """Tekst transkrypcji (jeśli dostępny)"""
-        return self.transcription.text if self.transcription else ""
-
-
 class RealtimeSTTPipeline:
     """
     Główny pipeline Real-time Speech-to-Text
@@ -78,6 +63,31 @@ class RealtimeSTTPipeline:
         enable_stt: bool = True,
         stt_model: str = "medium",
         use_polish_optimization: bool = True,
+        stt_backend: str = "whisper",
+        model_dir: Optional[str] = None,
+        stt_precision: Optional[str] = None,
+        stt_compile: Optional[str] = None,
+        stt_mmap_weights: bool = False,
+        admission_controller=None,
+        priority: int = 0,
+        backlog_memory_limit: int = 32,
+        spill_dir: Optional[str] = None,
+        drain_timeout: float = 30.0,
+        catchup_threshold: int = 8,
+        catchup_windows: int = 4,
+        refine_model: Optional[str] = None,
+        refine_backend: Optional[str] = None,
+        escalation_model: Optional[str] = None,
+        escalation_beam_size: Optional[int] = None,
+        escalation_budget: float = 15.0,
+        routing_table: Optional[Union[str, List[Dict[str, Any]]]] = None,
+        speech_gate: bool = False,
+        gate_audit_dir: Optional[str] = None,
+        device_sample_rate: Optional[Union[int, str]] = None,
+        sample_format: str = "float32",
+        vad_type: Optional[str] = None,
+        vad_calibration: float = 0.0,
+        noise_profile_dir: Optional[str] = None,
     ):
         """
         Inicjalizacja pipeline
@@ -93,6 +103,37 @@ class RealtimeSTTPipeline:
             enable_stt: Czy włączyć transkrypcję STT
             stt_model: Model Whisper do użycia
             use_polish_optimization: Czy używać optymalizacji dla polskiego
+            stt_backend: Backend STT ("whisper" lub "faster-whisper")
+            model_dir: Lokalny katalog modeli (ładowanie offline)
+            stt_precision: Precyzja STT na CPU ("fp32" / "int8", None = domyślna)
+            stt_compile: Kompilacja modelu STT ("torchscript" / "compile", None = brak)
+            stt_mmap_weights: Czy ładować wagi STT przez mmap
+            admission_controller: Wspólny AdmissionController (opcjonalny)
+            priority: Priorytet pipeline przy zrzucaniu obciążenia
+            backlog_memory_limit: Segmenty STT w pamięci przed zapisem do spill logu
+                (bez spill_dir backlog rośnie ponad limit)
+            spill_dir: Katalog spill logu dla nadmiarowych segmentów (None = brak)
+            drain_timeout: Max. czas dokańczania backlogu przy stop() (s)
+            catchup_threshold: Długość backlogu włączająca tryb catch-up (0 = wył.)
+            catchup_windows: Liczba 30 s okien dekodowanych razem w trybie catch-up
+            refine_model: Większy model poprawiający tekst w tle (None = jeden poziom)
+            refine_backend: Backend modelu poprawiającego (domyślnie stt_backend)
+            escalation_model: Model dla niepewnych segmentów (None = bez eskalacji)
+            escalation_beam_size: Beam dla niepewnych segmentów (np. 10)
+            escalation_budget: Budżet eskalacji - sekundy CPU na minutę audio
+            routing_table: Tablica routingu segmentów wg długości i udziału
+                mowy - plik JSON, lista reguł lub "default" (None = bez routingu)
+            speech_gate: Czy odrzucać segmenty bez mowy przed transkrypcją
+            gate_audit_dir: Katalog zapisu audio odrzuconego przez bramkę
+            device_sample_rate: Częstotliwość mikrofonu (np. 48000 lub "native") -
+                resamplowana do sample_rate przed VAD i STT
+            sample_format: Format próbek od mikrofonu do segmentów ("float32"
+                lub "int16" - konwersja do float32 dopiero przy STT)
+            vad_type: Typ VAD ("webrtc", "simple", "adaptive", "spectral",
+                "cascade"; None = wg use_webrtc_vad)
+            vad_calibration: Kalibracja tła na starcie (s, VAD "adaptive") -
+                pomijana, gdy urządzenie ma zapisany profil szumu
+            noise_profile_dir: Katalog profili szumu urządzeń (None = domyślny)
         """
         self.sample_rate = sample_rate
         self.chunk_size = chunk_size
@@ -102,31 +143,37 @@ class RealtimeSTTPipeline:
 
         # Komponenty
         self.audio_capture = AudioCapture(
-            sample_rate=sample_rate, chunk_size=chunk_size, buffer_size=100
+            sample_rate=sample_rate,
+            chunk_size=chunk_size,
+            buffer_size=100,
+            device_sample_rate=device_sample_rate,
+            sample_format=sample_format,
         )
 
         # VAD
-        if use_webrtc_vad:
-            self.vad = WebRTCVAD(sample_rate=sample_rate, mode=vad_mode)
-        else:
-            self.vad = SimpleVAD(sample_rate=sample_rate)
+        if vad_type is None:
+            vad_type = "webrtc" if use_webrtc_vad else "simple"
+        calibration_frames = int(vad_calibration * sample_rate / chunk_size)
+        self.vad = create_vad(vad_type, sample_rate, vad_mode, calibration_frames)
+        self.noise_profile_dir = noise_profile_dir
 
         # STT Engine
         self.enable_stt = enable_stt
         self.stt_engine = None
         if enable_stt:
             try:
-                if use_polish_optimization:
-                    self.stt_engine = PolishOptimizedSTT(
-                        model_name=stt_model, language="pl"
-                    )
-                else:
-                    self.stt_engine = WhisperSTTEngine(
-                        model_name=stt_model, language="pl"
-                    )
-                logger.info(f"🤖 STT Engine inicjalizowany: {stt_model}")
+                self.stt_engine = create_stt_backend(
+                    stt_backend,
+                    model_name=stt_model,
+                    use_polish_optimization=use_polish_optimization,
+                    model_dir=model_dir,
+                    precision=stt_precision,
+                    compile_mode=stt_compile,
+                    mmap_weights=stt_mmap_weights,
+                )
+                logger.info(f"🤖 STT Engine inicjalizowany: {stt_backend}/{stt_model}")
             except ImportError:
-                logger.warning("⚠️ Whisper nie zainstalowany - STT wyłączony")
+                logger.warning(f"⚠️ Backend {stt_backend} niedostępny - STT wyłączony")
                 self.enable_stt = False
                 self.stt_engine = None
             except Exception as e:
@@ -134,6 +181,103 @@ class RealtimeSTTPipeline:
                 self.enable_stt = False
                 self.stt_engine = None
 
+        # Eskalacja niepewnych segmentów do większego modelu / szerszego beamu
+        if self.enable_stt and (escalation_model or escalation_beam_size):
+            try:
+                self.stt_engine = create_escalating_backend(
+                    self.stt_engine,
+                    stt_backend,
+                    model_name=escalation_model,
+                    beam_size=escalation_beam_size,
+                    policy=EscalationPolicy(budget_per_minute=escalation_budget),
+                    use_polish_optimization=use_polish_optimization,
+                    model_dir=model_dir,
+                    precision=stt_precision,
+                    compile_mode=stt_compile,
+                    mmap_weights=stt_mmap_weights,
+                )
+            except Exception as e:
+                logger.error(f"❌ Błąd inicjalizacji eskalacji STT: {e}")
+
+        # Routing segmentów do modeli wg długości i udziału mowy
+        if self.enable_stt and routing_table is not None:
+            try:
+                self.stt_engine = SegmentRouter(
+                    self.stt_engine,
+                    load_routing_table(routing_table),
+                    engine_factory=lambda route: create_stt_backend(
+                        route.backend or stt_backend,
+                        model_name=route.model or stt_model,
+                        use_polish_optimization=use_polish_optimization,
+                        model_dir=model_dir,
+                        precision=stt_precision,
+                        compile_mode=stt_compile,
+                        mmap_weights=stt_mmap_weights,
+                        **route.options,
+                    ),
+                )
+            except Exception as e:
+                logger.error(f"❌ Błąd inicjalizacji routingu STT: {e}")
+
+        # Drugi poziom: większy model poprawia tekst tymczasowy w tle
+        self.refiner = None
+        if self.enable_stt and refine_model:
+            try:
+                refine_engine = create_stt_backend(
+                    refine_backend or stt_backend,
+                    model_name=refine_model,
+                    use_polish_optimization=use_polish_optimization,
+                    model_dir=model_dir,
+                    precision=stt_precision,
+                    compile_mode=stt_compile,
+                    mmap_weights=stt_mmap_weights,
+                )
+                self.refiner = TwoPassRefiner(
+                    refine_engine, live_busy=lambda: self.backlog.is_busy
+                )
+                logger.info(f"🔁 Drugi poziom STT: {refine_model}")
+            except Exception as e:
+                logger.error(f"❌ Błąd inicjalizacji drugiego poziomu STT: {e}")
+
+        # Bramka przed STT: kliknięcia, kaszel i szum nie trafiają do dekodera
+        self.speech_gate = (
+            SpeechGate(self.stt_engine, audit_dir=gate_audit_dir)
+            if self.enable_stt and speech_gate
+            else None
+        )
+
+        # Kontrola przyjmowania (wiele pipeline na jednej maszynie)
+        self.admission_controller = admission_controller
+        self.priority = priority
+        self.session_id = f"pipeline-{id(self):x}"
+        self.shed_segments = 0
+
+        # Backlog segmentów czekających na STT (transkrypcja w osobnym wątku)
+        self.backlog = SegmentBacklog(
+            memory_limit=backlog_memory_limit, spill_dir=spill_dir
+        )
+        self.drain_timeout = drain_timeout
+        self.stt_thread = None
+        self._stt_stop = threading.Event()
+
+        # Podmiana silnika STT w locie: wątek STT trzyma lock na czas
+        # transkrypcji i sam stosuje oczekującą podmianę między segmentami
+        self._engine_lock = threading.RLock()
+        # Zgłoszenie podmiany nie czeka na transkrypcję w toku
+        self._swap_lock = threading.Lock()
+        self._pending_swap: Optional[Dict[str, Any]] = None
+        self.engine_swaps = 0
+
+        # Tryb catch-up: sklejanie zaległych segmentów w długie okna
+        self.catchup_threshold = catchup_threshold
+        self.catchup = (
+            CatchupTranscriber(self.stt_engine, windows_per_batch=catchup_windows)
+            if catchup_threshold > 0 and CatchupTranscriber.supports(self.stt_engine)
+            else None
+        )
+        self.catchup_active = False
+        self.drain_stats = DrainStatistics()
+
         # Stan pipeline
         self.state = PipelineState.STOPPED
         self.processing_thread = None
@@ -141,11 +285,19 @@ class RealtimeSTTPipeline:
 
         # Callback dla segmentów mowy
         self.speech_callback: Optional[Callable[[SpeechSegment], None]] = None
-
-        # Bieżący segment
-        self.current_segment_audio = []
-        self.current_segment_start = None
-        self.last_speech_time = None
+        self.level_callback: Optional[Callable[[FrameFeatures, bool], None]] = None
+
+        # Cechy chunka liczone raz dla VAD, wskaźnika poziomu i segmentera
+        self.frame_features = FrameFeatureExtractor(sample_rate)
+        self.last_features: Optional[FrameFeatures] = None
+
+        # Segmentacja mowy
+        self.segmenter = SpeechSegmenter(
+            sample_rate=sample_rate,
+            min_segment_duration=min_segment_duration,
+            max_segment_duration=max_segment_duration,
+            silence_timeout=silence_timeout,
+        )
 
         # Statystyki
         self.total_segments = 0
@@ -167,6 +319,32 @@ class RealtimeSTTPipeline:
         self.speech_callback = callback
         logger.info("🔗 Speech callback ustawiony")
 
+    def set_level_callback(self, callback: Callable[[FrameFeatures, bool], None]):
+        """
+        Ustaw callback poziomu audio (wywoływany dla każdego chunka)
+
+        Callback dostaje cechy chunka (FrameFeatures.level_db dla wskaźnika
+        poziomu) i decyzję VAD - z wątku przetwarzania, więc powinien
+        tylko przekazać dane dalej (np. do kolejki GUI).
+
+        Args:
+            callback: Funkcja (features, is_speech)
+        """
+        self.level_callback = callback
+
+    def set_revision_callback(self, callback: Callable[[SpeechSegment], None]):
+        """
+        Ustaw callback dla poprawionych segmentów (drugi poziom STT)
+
+        Callback dostaje ten sam obiekt segmentu co speech callback,
+        z nową transkrypcją i segment.revision == 2.
+
+        Args:
+            callback: Funkcja wywoływana po podmianie tekstu segmentu
+        """
+        if self.refiner is not None:
+            self.refiner.revision_callback = callback
+
     def start(self):
         """Uruchom pipeline"""
         if self.state != PipelineState.STOPPED:
@@ -174,9 +352,17 @@ class RealtimeSTTPipeline:
             return
 
         logger.info("🚀 Uruchamianie Real-time STT Pipeline...")
+        if self.admission_controller is not None and not (
+            self.admission_controller.try_admit(self.session_id, self.priority)
+        ):
+            raise RuntimeError("Brak pojemności STT - pipeline odrzucony")
+
         self.state = PipelineState.STARTING
 
         try:
+            # Poziom tła z poprzedniej sesji na tym urządzeniu
+            self._load_noise_profile()
+
             # Uruchom audio capture
             self.audio_capture.start_recording()
 
@@ -186,6 +372,13 @@ class RealtimeSTTPipeline:
             )
             self.processing_thread.start()
 
+            # Uruchom wątek STT (wznawia też segmenty ze spill logu)
+            self._stt_stop.clear()
+            self.stt_thread = threading.Thread(target=self._stt_loop, daemon=True)
+            self.stt_thread.start()
+            if self.refiner is not None:
+                self.refiner.start()
+
             self.state = PipelineState.RUNNING
             self.start_time = time.time()
 
@@ -194,6 +387,8 @@ class RealtimeSTTPipeline:
         except Exception as e:
             logger.error(f"❌ Błąd uruchamiania pipeline: {e}")
             self.state = PipelineState.ERROR
+            if self.admission_controller is not None:
+                self.admission_controller.release(self.session_id)
             raise
 
     def stop(self):
@@ -213,23 +408,68 @@ class RealtimeSTTPipeline:
 
         # Wyślij ostatni segment jeśli istnieje
         self._finalize_current_segment()
+        self._save_noise_profile()
+
+        # Dokończ backlog STT; resztę zachowa spill log
+        if not self.backlog.wait_empty(timeout=self.drain_timeout):
+            logger.warning(f"⚠️ Backlog STT niepusty: {len(self.backlog)} segmentów")
+        self._stt_stop.set()
+        if self.stt_thread and self.stt_thread.is_alive():
+            self.stt_thread.join(timeout=5.0)
+        self.backlog.persist()
+        if self.refiner is not None:
+            self.refiner.stop(drain_timeout=self.drain_timeout)
+
+        if self.admission_controller is not None:
+            self.admission_controller.release(self.session_id)
 
         self.state = PipelineState.STOPPED
         logger.info("✅ Pipeline zatrzymany")
 
+    def _load_noise_profile(self):
+        """Wczytaj profil szumu urządzenia do VAD z progami względem tła"""
+        tracker = getattr(self.vad, "noise_floor", None)
+        if tracker is None:
+            return
+        profile = load_noise_profile(
+            self.audio_capture.get_device_name(),
+            self.noise_profile_dir,
+            self.sample_rate,
+        )
+        if profile is not None:
+            tracker.apply_profile(profile)
+
+    def _save_noise_profile(self):
+        """Zapisz poziom tła wyuczony w sesji (następny start bez kalibracji)"""
+        tracker = getattr(self.vad, "noise_floor", None)
+        if tracker is None:
+            return
+        profile = tracker.to_profile(
+            self.audio_capture.get_device_name(), self.sample_rate
+        )
+        if profile is None:
+            return
+        try:
+            save_noise_profile(profile, self.noise_profile_dir)
+        except OSError as e:
+            logger.warning(f"⚠️ Nie zapisano profilu szumu: {e}")
+
     def _processing_loop(self):
         """Główna pętla przetwarzania audio"""
         logger.info("🔄 Processing loop started")
 
         while self.state == PipelineState.RUNNING:
             try:
-                # Pobierz chunk audio
-                audio_chunk = self.audio_capture.get_audio_chunk(timeout=0.1)
-                if audio_chunk is None:
+                # Pobierz chunk audio - po przestoju wszystkie zaległe naraz
+                audio_chunks = self.audio_capture.get_audio_chunks(timeout=0.1)
+                if not audio_chunks:
                     continue
 
-                # Przetwórz chunk
-                self._process_audio_chunk(audio_chunk)
+                # Przetwórz chunk (lub zaległości jednym wsadem)
+                if len(audio_chunks) == 1:
+                    self._process_audio_chunk(audio_chunks[0])
+                else:
+                    self._process_audio_batch(audio_chunks)
 
             except Exception as e:
                 logger.error(f"❌ Błąd w processing loop: {e}")
@@ -246,96 +486,259 @@ class RealtimeSTTPipeline:
             audio_chunk: Chunk audio do przetworzenia
         """
         current_time = time.time()
+        audio = audio_chunk.reshape(-1)
+
+        # Jeden przebieg po chunku: energia, ZCR i szczyt dla wszystkich etapów
+        features = self.frame_features.compute(audio)
+        self.last_features = features
 
         # Sprawdź czy chunk zawiera mowę
         if hasattr(self.vad, "process_chunk"):
-            # SimpleVAD
-            is_speech, vad_analysis = self.vad.process_chunk(audio_chunk.flatten())
+            # SimpleVAD / SpectralVAD
+            is_speech, vad_analysis = self.vad.process_chunk(audio, features)
         else:
             # WebRTC VAD
-            is_speech = self.vad.is_speech(audio_chunk.flatten())
+            is_speech = self.vad.is_speech(audio, features)
             vad_analysis = {"is_stable_speech": is_speech}
 
-        if is_speech:
-            self._handle_speech_chunk(audio_chunk, current_time)
-        else:
-            self._handle_silence_chunk(current_time)
+        if self.level_callback is not None:
+            self.level_callback(features, is_speech)
 
-    def _handle_speech_chunk(self, audio_chunk: np.ndarray, current_time: float):
+        segment = self.segmenter.process(audio_chunk, is_speech, current_time, features)
+        if segment is not None:
+            self._emit_segment(segment)
+
+    def _process_audio_batch(self, audio_chunks: List[np.ndarray]):
         """
-        Obsłuż chunk z mową
+        Przetwórz zaległe chunki audio jednym wsadem
+
+        Cechy i decyzje VAD są liczone wektorowo dla całego wsadu, a
+        segmenter dostaje chunki po kolei - wynik jak przy wywołaniu
+        _process_audio_chunk dla każdego chunka. Znaczniki czasu są
+        cofane o czas trwania późniejszych chunków, więc timeout ciszy
+        segmentera liczy czas audio, a nie moment nadrobienia zaległości.
 
         Args:
-            audio_chunk: Chunk audio z mową
-            current_time: Aktualny czas
+            audio_chunks: Chunki audio w kolejności nagrania
         """
-        # Rozpocznij nowy segment jeśli potrzeba
-        if self.current_segment_start is None:
-            self.current_segment_start = current_time
-            self.current_segment_audio = []
-            logger.debug("🎤 Rozpoczęcie nowego segmentu mowy")
+        current_time = time.time()
+        audio = [chunk.reshape(-1) for chunk in audio_chunks]
 
-        # Dodaj audio do bieżącego segmentu
-        self.current_segment_audio.append(audio_chunk.flatten())
-        self.last_speech_time = current_time
+        if len({len(chunk) for chunk in audio}) == 1:
+            features = self.frame_features.compute_batch(np.stack(audio))
+        else:
+            features = [self.frame_features.compute(chunk) for chunk in audio]
+        self.last_features = features[-1]
+
+        if hasattr(self.vad, "process_batch"):
+            # SimpleVAD / SpectralVAD
+            decisions = [
+                is_speech for is_speech, _ in self.vad.process_batch(audio, features)
+            ]
+        elif hasattr(self.vad, "process_chunk"):
+            # CascadedVAD - stan zależy od każdej ramki, pętla po chunkach
+            decisions = [
+                self.vad.process_chunk(chunk, chunk_features)[0]
+                for chunk, chunk_features in zip(audio, features)
+            ]
+        else:
+            # WebRTC VAD
+            decisions = [
+                self.vad.is_speech(chunk, chunk_features)
+                for chunk, chunk_features in zip(audio, features)
+            ]
+
+        durations = np.array([len(chunk) for chunk in audio]) / self.sample_rate
+        # Czas końca każdego chunka: ostatni kończy się teraz
+        timestamps = current_time - (durations.sum() - np.cumsum(durations))
 
-        # Sprawdź czy segment nie jest za długi
-        segment_duration = current_time - self.current_segment_start
-        if segment_duration >= self.max_segment_duration:
-            logger.debug(f"⏱️ Segment osiągnął max długość: {segment_duration:.2f}s")
-            self._finalize_current_segment()
+        for audio_chunk, chunk_features, is_speech, timestamp in zip(
+            audio_chunks, features, decisions, timestamps
+        ):
+            if self.level_callback is not None:
+                self.level_callback(chunk_features, is_speech)
+
+            segment = self.segmenter.process(
+                audio_chunk, is_speech, float(timestamp), chunk_features
+            )
+            if segment is not None:
+                self._emit_segment(segment)
 
-    def _handle_silence_chunk(self, current_time: float):
+    def _finalize_current_segment(self):
+        """Finalizuj bieżący segment mowy"""
+        segment = self.segmenter.flush()
+        if segment is not None:
+            self._emit_segment(segment)
+
+    def _emit_segment(self, segment: SpeechSegment):
         """
-        Obsłuż chunk z ciszą
+        Przekaż zakończony segment do backlogu STT
 
         Args:
-            current_time: Aktualny czas
+            segment: Zakończony segment mowy
         """
-        # Sprawdź czy mamy aktywny segment i czy cisza trwa wystarczająco długo
-        if (
-            self.current_segment_start is not None
-            and self.last_speech_time is not None
-            and current_time - self.last_speech_time >= self.silence_timeout
-        ):
+        if self.enable_stt and self.stt_engine:
+            self.backlog.put(segment)
+        else:
+            self._deliver_segment(segment)
+
+    def _stt_loop(self):
+        """Pętla transkrypcji - opróżnia backlog w kolejności FIFO"""
+        logger.info("🔄 STT loop started")
+
+        with self._engine_lock:
+            if self.enable_stt and not self.is_stt_model_loaded:
+                # Start bez czekania na model: audio i VAD działają od razu,
+                # segmenty czekają w backlogu do końca ładowania
+                logger.info("⏳ Ładowanie modelu STT - segmenty buforowane w backlogu")
+                if not self.load_stt_model():
+                    logger.error("❌ Nie można załadować modelu STT")
+
+        while not self._stt_stop.is_set():
+            self._apply_pending_swap()
+            segment = self.backlog.get(timeout=0.1)
+            if segment is None:
+                continue
+
+            batch = [segment]
+            accepted = []
+            started_at = time.time()
+            try:
+                with self._engine_lock:
+                    if self._update_catchup_mode():
+                        batch += self.backlog.get_many(
+                            self.backlog.memory_limit,
+                            max_seconds=self.catchup.batch_audio_seconds
+                            - segment.duration,
+                        )
+                        accepted = [item for item in batch if self._passes_gate(item)]
+                        self._transcribe_catchup(accepted)
+                    elif self._passes_gate(segment):
+                        accepted = batch
+                        self._transcribe_segment(segment)
+                self.drain_stats.record(
+                    "catchup" if self.catchup_active else "realtime",
+                    batch,
+                    started_at,
+                )
+                if self.catchup_active and len(self.backlog) == 0:
+                    self._update_catchup_mode()
+
+                for item in accepted:
+                    if item.transcription is not None:
+                        item.revision = REVISION_PROVISIONAL
+                        if self.speech_gate is not None:
+                            self.speech_gate.record_transcription(
+                                item.duration, item.transcription.processing_time
+                            )
+                    self._deliver_segment(item)
+                    if (
+                        self.refiner is not None
+                        and item.transcription is not None
+                        and self._allow_partials()
+                    ):
+                        self.refiner.submit(item)
+            except Exception as e:
+                logger.error(f"❌ Błąd w STT loop: {e}")
+            finally:
+                for item in batch:
+                    self.backlog.task_done(item)
 
-            segment_duration = self.last_speech_time - self.current_segment_start
+        logger.info("🔄 STT loop stopped")
 
-            # Finalizuj segment jeśli ma minimalną długość
-            if segment_duration >= self.min_segment_duration:
-                logger.debug(f"🔇 Koniec segmentu po ciszy: {segment_duration:.2f}s")
-                self._finalize_current_segment()
-            else:
-                logger.debug(
-                    f"🗑️ Odrzucenie krótkiego segmentu: {segment_duration:.2f}s"
-                )
-                self._discard_current_segment()
+    def _passes_gate(self, segment: SpeechSegment) -> bool:
+        """
+        Czy segment zawiera mowę wg bramki (odrzucony nie jest dekodowany
+        ani przekazywany dalej)
 
-    def _finalize_current_segment(self):
-        """Finalizuj bieżący segment mowy"""
-        if self.current_segment_start is None or not self.current_segment_audio:
+        Args:
+            segment: Segment z backlogu
+        """
+        if self.speech_gate is None:
+            return True
+        try:
+            return self.speech_gate.check_segment(
+                segment, probe=self._allow_partials()
+            ).is_speech
+        except Exception as e:
+            logger.error(f"❌ Błąd bramki mowy: {e}")
+            return True
+
+    def _update_catchup_mode(self) -> bool:
+        """
+        Przełącz tryb catch-up wg długości backlogu
+
+        Catch-up włącza się gdy backlog (z bieżącym segmentem) osiągnie
+        catchup_threshold i trwa aż backlog zostanie opróżniony.
+
+        Returns:
+            True jeśli bieżący segment należy przetworzyć w trybie catch-up
+        """
+        if self.catchup is None:
+            return False
+
+        backlog_size = len(self.backlog) + 1
+        if not self.catchup_active and backlog_size >= self.catchup_threshold:
+            self.catchup_active = True
+            self.drain_stats.catchup_activations += 1
+            logger.warning(f"⏩ Tryb catch-up: backlog {backlog_size} segmentów")
+        elif self.catchup_active and backlog_size <= 1:
+            self.catchup_active = False
+            logger.info("✅ Backlog nadrobiony - powrót do trybu real-time")
+
+        return self.catchup_active
+
+    def _transcribe_catchup(self, batch: List[SpeechSegment]):
+        """
+        Transkrybuj zaległe segmenty oknami 30 s w jednym batchu
+
+        Args:
+            batch: Segmenty z backlogu w kolejności FIFO
+        """
+        if self._should_shed():
+            self.shed_segments += len(batch)
             return
 
-        # Połącz wszystkie chunki audio
-        segment_audio = np.concatenate(self.current_segment_audio)
+        try:
+            self.catchup.transcribe(batch)
+        except Exception as e:
+            logger.error(f"❌ Błąd transkrypcji catch-up: {e}")
+            return
 
-        # Stwórz segment
-        segment = SpeechSegment(
-            audio_data=segment_audio,
-            start_time=self.current_segment_start,
-            end_time=self.last_speech_time or time.time(),
-            confidence=1.0,  # TODO: oblicz confidence
-            sample_rate=self.sample_rate,
-        )
+        if self.admission_controller is not None:
+            processing_time = sum(
+                s.transcription.processing_time for s in batch if s.transcription
+            )
+            self.admission_controller.record_transcription(
+                sum(s.duration for s in batch), processing_time
+            )
 
-        # Transkrypcja STT (jeśli włączona)
-        if self.enable_stt and self.stt_engine:
+    def _transcribe_segment(self, segment: SpeechSegment):
+        """
+        Transkrybuj segment (jeśli STT włączony i bez zrzucania obciążenia)
+
+        Args:
+            segment: Segment mowy
+        """
+        if self._should_shed():
+            self.shed_segments += 1
+            logger.debug("⚖️ Segment bez STT (zrzucanie obciążenia)")
+        elif self.enable_stt and self.stt_engine:
             try:
-                transcription = self.stt_engine.transcribe_audio(
-                    segment_audio, self.sample_rate
-                )
+                if hasattr(self.stt_engine, "transcribe_segment"):
+                    # Router wybiera model z długości i udziału mowy segmentu
+                    transcription = self.stt_engine.transcribe_segment(segment)
+                else:
+                    transcription = self.stt_engine.transcribe_audio(
+                        segment.audio_data, segment.sample_rate
+                    )
                 segment.transcription = transcription
 
+                if transcription and self.admission_controller is not None:
+                    self.admission_controller.record_transcription(
+                        segment.duration, transcription.processing_time
+                    )
+
                 if transcription:
                     logger.info(
                         f"🎯 Transkrypcja: '{transcription.text}' "
@@ -345,13 +748,20 @@ class RealtimeSTTPipeline:
                 logger.error(f"❌ Błąd transkrypcji: {e}")
                 segment.transcription = None
 
+    def _deliver_segment(self, segment: SpeechSegment):
+        """
+        Zaktualizuj statystyki i przekaż segment do callbacku i kolejki
+
+        Args:
+            segment: Segment mowy (z transkrypcją lub bez)
+        """
         # Statystyki
         self.total_segments += 1
         self.total_audio_time += segment.duration
 
         logger.info(
             f"🎯 Segment #{self.total_segments}: {segment.duration:.2f}s, "
-            f"{len(segment_audio)} samples"
+            f"{segment.num_samples} samples"
         )
 
         # Wyślij segment przez callback
@@ -367,8 +777,21 @@ class RealtimeSTTPipeline:
         except queue.Full:
             logger.warning("⚠️ Speech queue full, dropping segment")
 
-        # Reset stanu
-        self._reset_current_segment()
+    def _should_shed(self) -> bool:
+        """Czy pominąć STT dla segmentu (przeciążenie)"""
+        return self.admission_controller is not None and (
+            self.admission_controller.should_shed(self.priority)
+        )
+
+    def _allow_partials(self) -> bool:
+        """
+        Czy wykonywać pracę pomocniczą (poprawki drugiego przebiegu, próba
+        no_speech bramki) - przy SHED_PARTIALS zostaje tylko transkrypcja
+        """
+        return (
+            self.admission_controller is None
+            or self.admission_controller.allow_partials()
+        )
 
     def _discard_current_segment(self):
         """Odrzuć bieżący segment"""
@@ -377,9 +800,7 @@ class RealtimeSTTPipeline:
 
     def _reset_current_segment(self):
         """Reset stanu bieżącego segmentu"""
-        self.current_segment_start = None
-        self.current_segment_audio = []
-        self.last_speech_time = None
+        self.segmenter.reset()
 
     def get_speech_segment(self, timeout: float = 1.0) -> Optional[SpeechSegment]:
         """
@@ -419,9 +840,35 @@ class RealtimeSTTPipeline:
                     (self.total_segments / (runtime / 60)) if runtime > 0 else 0
                 ),
                 "queue_size": self.speech_queue.qsize(),
+                "shed_segments": self.shed_segments,
+                "stt_model": getattr(self.stt_engine, "model_name", None),
+                "engine_swaps": self.engine_swaps,
             },
             "audio_capture": audio_stats,
             "vad": vad_stats,
+            "backlog": {
+                **self.backlog.get_statistics(),
+                "catchup_active": self.catchup_active,
+                "drain": self.drain_stats.get_statistics(),
+            },
+            "refinement": (
+                self.refiner.get_statistics() if self.refiner is not None else None
+            ),
+            "escalation": (
+                self.stt_engine.get_escalation_statistics()
+                if hasattr(self.stt_engine, "get_escalation_statistics")
+                else None
+            ),
+            "routing": (
+                self.stt_engine.get_routing_statistics()
+                if hasattr(self.stt_engine, "get_routing_statistics")
+                else None
+            ),
+            "speech_gate": (
+                self.speech_gate.get_statistics()
+                if self.speech_gate is not None
+                else None
+            ),
         }
 
     def __enter__(self):
@@ -440,14 +887,157 @@ class RealtimeSTTPipeline:
         Args:
             stt_engine: Instancja WhisperSTTEngine lub kompatybilnego silnika
         """
-        self.stt_engine = stt_engine
-        self.enable_stt = stt_engine is not None
+        with self._engine_lock:
+            self.stt_engine = stt_engine
+            self.enable_stt = stt_engine is not None
+            if self.catchup_threshold > 0 and CatchupTranscriber.supports(stt_engine):
+                self.catchup = CatchupTranscriber(
+                    stt_engine,
+                    windows_per_batch=(
+                        self.catchup.windows_per_batch if self.catchup else 4
+                    ),
+                )
+            else:
+                self.catchup = None
+            if self.speech_gate is not None:
+                self.speech_gate.stt_engine = stt_engine
         logger.info(f"🤖 STT Engine ustawiony: {type(stt_engine).__name__}")
 
+    def swap_stt_engine(
+        self,
+        stt_engine,
+        release_old: bool = True,
+        callback: Optional[Callable[[bool], None]] = None,
+    ) -> threading.Thread:
+        """
+        Podmień silnik STT bez zatrzymywania pipeline
+
+        Nowy model ładowany jest w tle; podmiana następuje między
+        segmentami (transkrypcja w toku kończy się na starym silniku),
+        po czym stary model zwalniany jest przez model_cache. Routing
+        i eskalacja zostają - nowy silnik zastępuje silnik bazowy pod
+        nimi. Audio capture i VAD działają bez przerwy, a segmenty z czasu
+        ładowania czekają w backlogu.
+
+        Args:
+            stt_engine: Nowy silnik (niezaładowany lub załadowany)
+            release_old: Czy zwolnić model starego silnika (unload_model)
+            callback: Wywoływany z wątku podmiany z True/False po zakończeniu
+
+        Returns:
+            Wątek podmiany (join() czeka na jej zakończenie)
+        """
+
+        def run():
+            start_time = time.time()
+            if hasattr(stt_engine, "load_model") and not stt_engine.load_model():
+                logger.error("❌ Podmiana STT przerwana - nowy model niedostępny")
+                if callback:
+                    callback(False)
+                return
+
+            request = {"engine": stt_engine, "done": threading.Event()}
+            with self._swap_lock:
+                if self._pending_swap is not None:
+                    # Nowsza podmiana zastępuje niezastosowaną
+                    self._pending_swap["superseded"] = True
+                    self._pending_swap["done"].set()
+                self._pending_swap = request
+
+            # Podmianę stosuje wątek STT przed kolejnym segmentem; bez
+            # działającego wątku STT - bezpośrednio
+            while not request["done"].wait(timeout=0.1):
+                if self.stt_thread is None or not self.stt_thread.is_alive():
+                    self._apply_pending_swap()
+
+            if request.get("superseded"):
+                if release_old and hasattr(stt_engine, "unload_model"):
+                    stt_engine.unload_model()
+                if callback:
+                    callback(False)
+                return
+
+            old_engine = request["old_engine"]
+            if (
+                release_old
+                and old_engine is not None
+                and old_engine is not stt_engine
+                and hasattr(old_engine, "unload_model")
+            ):
+                old_engine.unload_model()
+
+            logger.info(
+                f"🔁 Silnik STT podmieniony: "
+                f"{getattr(old_engine, 'model_name', None)} -> "
+                f"{getattr(stt_engine, 'model_name', None)} "
+                f"({time.time() - start_time:.2f}s)"
+            )
+            if callback:
+                callback(True)
+
+        thread = threading.Thread(target=run, daemon=True, name="STTEngineSwap")
+        thread.start()
+        return thread
+
+    def _apply_pending_swap(self):
+        """Zastosuj oczekującą podmianę silnika STT (między segmentami)"""
+        with self._engine_lock:
+            with self._swap_lock:
+                request, self._pending_swap = self._pending_swap, None
+            if request is None:
+                return
+            new_engine = request["engine"]
+            engine, old_engine = self._wrap_swapped_engine(new_engine)
+            if old_engine is not None and old_engine is not new_engine:
+                # Kontekst tekstowy przechodzi na nowy silnik
+                new_engine.previous_text = getattr(old_engine, "previous_text", "")
+            self.set_stt_engine(engine)
+            self.engine_swaps += 1
+            request["old_engine"] = old_engine
+        request["done"].set()
+
+    def _wrap_swapped_engine(self, new_engine) -> tuple:
+        """
+        Wstaw nowy silnik pod opakowania bieżącego (routing, eskalacja)
+
+        Router i eskalacja zostają z konfiguracją i statystykami - zmienia
+        się tylko silnik bazowy. Trasy z własnym modelem, silnik eskalacji
+        i drugi poziom (refiner) mają modele skonfigurowane osobno i nie
+        są podmieniane.
+
+        Returns:
+            (silnik dla pipeline, zastąpiony silnik bazowy)
+        """
+        parent, base = None, self.stt_engine
+        while isinstance(base, (SegmentRouter, EscalatingSTTEngine)):
+            parent = base
+            if isinstance(base, SegmentRouter):
+                base = base.default_engine
+            else:
+                base = base.primary
+
+        if parent is None:
+            return new_engine, base
+        if isinstance(parent, SegmentRouter):
+            parent.replace_default_engine(new_engine)
+        else:
+            parent.replace_primary(new_engine)
+        return self.stt_engine, base
+
+    @property
+    def is_stt_model_loaded(self) -> bool:
+        """Czy model STT jest gotowy (start() nie wymaga wcześniejszego ładowania)"""
+        return bool(self.stt_engine) and getattr(self.stt_engine, "is_loaded", True)
+
     def load_stt_model(self):
         """Załaduj model STT (jeśli nie jest załadowany)"""
         if self.stt_engine and hasattr(self.stt_engine, "load_model"):
-            return self.stt_engine.load_model()
+            if not self.stt_engine.load_model():
+                return False
+        if self.refiner is not None and hasattr(self.refiner.stt_engine, "load_model"):
+            if not self.refiner.stt_engine.load_model():
+                logger.warning("⚠️ Model drugiego poziomu niedostępny - jeden poziom")
+                self.refiner = None
         return True
 
     def unload_stt_model(self):
@@ -455,3 +1045,7 @@ class RealtimeSTTPipeline:
         if self.stt_engine and hasattr(self.stt_engine, "unload_model"):
             self.stt_engine.unload_model()
             logger.info("🗑️ STT model zwolniony z pamięci")
+        if self.refiner is not None and hasattr(
+            self.refiner.stt_engine, "unload_model"
+        ):
+            self.refiner.stt_engine.unload_model()
@@ -0,0 +1,183 @@
+"""
+Resampler - Strumieniowy resampling polifazowy z cache filtrów
+Streaming polyphase resampler (e.g. 48/44.1 kHz devices -> 16 kHz for VAD/STT)
+
+Autor: AI Assistant
+Data: 2025-01-18
+"""
+
+import logging
+from functools import lru_cache
+from math import gcd
+from typing import Tuple
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+# Konfiguracja loggingu
+logger = logging.getLogger(__name__)
+
+# Domyślne parametry filtra: przejścia przez zero sinc na stronę (względem
+# niższej częstotliwości), pasmo przepustowe jako ułamek Nyquista, okno Kaisera
+DEFAULT_ZERO_CROSSINGS = 24
+DEFAULT_ROLLOFF = 0.92
+DEFAULT_KAISER_BETA = 8.6
+
+# Próbki wyjściowe liczone naraz - okna (blok x taps) mieszczą się w cache
+BLOCK_SIZE = 1024
+
+
+def rate_ratio(orig_sr: int, target_sr: int) -> Tuple[int, int]:
+    """Nieskracalny stosunek (up, down) częstotliwości"""
+    divisor = gcd(int(orig_sr), int(target_sr))
+    return int(target_sr) // divisor, int(orig_sr) // divisor
+
+
+@lru_cache(maxsize=16)
+def design_polyphase_filter(
+    up: int,
+    down: int,
+    zero_crossings: int = DEFAULT_ZERO_CROSSINGS,
+    rolloff: float = DEFAULT_ROLLOFF,
+    beta: float = DEFAULT_KAISER_BETA,
+) -> np.ndarray:
+    """
+    Filtr dolnoprzepustowy (okienkowany sinc) rozłożony na fazy
+
+    Wynik jest cache'owany per para częstotliwości - kolejne strumienie
+    (np. każde start_recording) nie projektują filtra ponownie.
+
+    Args:
+        up: Współczynnik interpolacji L
+        down: Współczynnik decymacji M
+        zero_crossings: Przejścia przez zero sinc na stronę
+        rolloff: Częstotliwość odcięcia jako ułamek niższego Nyquista
+        beta: Parametr okna Kaisera (tłumienie w paśmie zaporowym)
+
+    Returns:
+        Tablica (up, taps) - współczynniki faz w odwróconej kolejności
+        (gotowe do iloczynu skalarnego z oknem próbek wejściowych)
+    """
+    # Filtr działa na sygnale nadpróbkowanym L razy
+    scale = max(up, down)
+    half = zero_crossings * scale
+    taps_per_phase = -(-(2 * half + 1) // up)
+    length = taps_per_phase * up
+
+    n = np.arange(length) - (2 * half) / 2
+    cutoff = rolloff / scale
+    prototype = cutoff * np.sinc(cutoff * n) * np.kaiser(length, beta) * up
+    # Zera dopisane do pełnej liczby faz nie mogą zmieniać wzmocnienia
+    prototype[2 * half + 1 :] = 0.0
+
+    # Faza p: współczynniki h[p + k*L]; odwrócone do splotu z oknem
+    phases = prototype.reshape(taps_per_phase, up).T[:, ::-1]
+    phases = np.ascontiguousarray(phases, dtype=np.float32)
+    phases.setflags(write=False)
+    return phases
+
+
+class StreamingResampler:
+    """
+    Resampler polifazowy zachowujący stan filtra między chunkami
+
+    Wynik dla kolejnych chunków jest identyczny jak dla całego sygnału
+    naraz (bez nieciągłości na granicach chunków). Opóźnienie to połowa
+    długości filtra (delay_samples próbek wyjściowych).
+    """
+
+    def __init__(
+        self,
+        orig_sr: int,
+        target_sr: int,
+        zero_crossings: int = DEFAULT_ZERO_CROSSINGS,
+    ):
+        """
+        Inicjalizacja resamplera
+
+        Args:
+            orig_sr: Częstotliwość wejściowa (np. 48000)
+            target_sr: Częstotliwość wyjściowa (np. 16000)
+            zero_crossings: Długość filtra (przejścia przez zero na stronę)
+        """
+        self.orig_sr = int(orig_sr)
+        self.target_sr = int(target_sr)
+        self.up, self.down = rate_ratio(self.orig_sr, self.target_sr)
+        self.zero_crossings = zero_crossings
+        self._phases = design_polyphase_filter(self.up, self.down, zero_crossings)
+        self.taps = self._phases.shape[1]
+        self.delay_samples = int(
+            round(zero_crossings * max(self.up, self.down) / self.down)
+        )
+        self.reset()
+
+    def reset(self):
+        """Wyczyść stan (nowy strumień)"""
+        self._history = np.zeros(self.taps - 1, dtype=np.float32)
+        # Indeks następnej próbki wyjściowej w sygnale nadpróbkowanym,
+        # względem początku bufora [historia + chunk]
+        self._next_index = (self.taps - 1) * self.up
+
+    def process(self, chunk: np.ndarray) -> np.ndarray:
+        """
+        Przetwórz chunk audio
+
+        Args:
+            chunk: Próbki wejściowe (mono)
+
+        Returns:
+            Próbki wyjściowe (float32, długość ~ len(chunk) * up / down)
+        """
+        chunk = np.asarray(chunk, dtype=np.float32).reshape(-1)
+        buffer = np.concatenate((self._history, chunk))
+
+        last = len(buffer) * self.up - 1
+        n_out = max(0, (last - self._next_index) // self.down + 1)
+        positions = self._next_index + np.arange(n_out) * self.down
+        inputs, phases = np.divmod(positions, self.up)
+
+        # Okno j = próbki buffer[j : j + taps], kończące się na próbce wejściowej
+        all_windows = sliding_window_view(buffer, self.taps)
+        starts = inputs - (self.taps - 1)
+        output = np.empty(n_out, dtype=np.float32)
+        for block in range(0, n_out, BLOCK_SIZE):
+            rows = slice(block, block + BLOCK_SIZE)
+            windows = all_windows[starts[rows]]
+            if self.up == 1:
+                output[rows] = windows @ self._phases[0]
+            else:
+                output[rows] = np.einsum(
+                    "nk,nk->n", windows, self._phases[phases[rows]]
+                )
+
+        consumed = len(buffer) - (self.taps - 1)
+        self._next_index += n_out * self.down - consumed * self.up
+        self._history = buffer[consumed:].copy()
+        return output
+
+    def flush(self) -> np.ndarray:
+        """Wypchnij próbki zatrzymane przez opóźnienie filtra (koniec strumienia)"""
+        pad = -(-self.delay_samples * self.down // self.up) + 1
+        return self.process(np.zeros(pad, dtype=np.float32))
+
+
+def resample_polyphase(audio: np.ndarray, orig_sr: int, target_sr: int) -> np.ndarray:
+    """
+    Resampling całego sygnału filtrem polifazowym (z kompensacją opóźnienia)
+
+    Args:
+        audio: Audio do resample
+        orig_sr: Oryginalna częstotliwość
+        target_sr: Docelowa częstotliwość
+
+    Returns:
+        Resampled audio (float32, długość len(audio) * target / orig)
+    """
+    audio = np.asarray(audio, dtype=np.float32).reshape(-1)
+    if orig_sr == target_sr:
+        return audio
+
+    resampler = StreamingResampler(orig_sr, target_sr)
+    output = np.concatenate((resampler.process(audio), resampler.flush()))
+    length = len(audio) * resampler.up // resampler.down
+    return output[resampler.delay_samples : resampler.delay_samples + length]
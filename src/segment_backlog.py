@@ -0,0 +1,452 @@
+"""
+Segment Backlog - Kolejka segmentów oczekujących na STT z zapisem na dysk
+Segment backlog with an append-only memory-mapped spill log
+
+Autor: AI Assistant
+Data: 2025-01-18
+"""
+
+import os
+import json
+import threading
+import logging
+import numpy as np
+from collections import deque
+from pathlib import Path
+from typing import Any, Deque, Dict, List, Optional, Tuple, Union
+
+from audio_format import to_int16
+from speech_segmenter import SpeechSegment
+
+# Konfiguracja loggingu
+logger = logging.getLogger(__name__)
+
+
+class SpillLog:
+    """
+    Log segmentów na dysku (append-only, int16)
+
+    Pliki w katalogu logu:
+        segments.pcm  - surowe próbki int16 wszystkich segmentów, dopisywane
+        index.jsonl   - jedna linia JSON na segment (seq, offset, metadane)
+        consumed.log  - numery seq segmentów już przetworzonych
+
+    Próbki czytane są przez np.memmap, więc wczytanie segmentu nie
+    ładuje całego logu do pamięci. Po restarcie procesu oczekujące
+    segmenty to wpisy indeksu bez odpowiadającego wpisu w consumed.log.
+    """
+
+    DATA_FILE = "segments.pcm"
+    INDEX_FILE = "index.jsonl"
+    CONSUMED_FILE = "consumed.log"
+
+    def __init__(self, directory: Union[str, Path], fsync: bool = False):
+        """
+        Inicjalizacja logu
+
+        Args:
+            directory: Katalog logu (tworzony jeśli nie istnieje)
+            fsync: Czy wymuszać zapis na dysk po każdym segmencie
+        """
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.fsync = fsync
+
+        self.data_path = self.directory / self.DATA_FILE
+        self.index_path = self.directory / self.INDEX_FILE
+        self.consumed_path = self.directory / self.CONSUMED_FILE
+
+        self._entries: Dict[int, Dict[str, Any]] = {}
+        self._pending: List[int] = []
+        self._taken: set = set()
+        self._load()
+
+        self._data_file = open(self.data_path, "ab")
+        self._index_file = open(self.index_path, "a", encoding="utf-8")
+        self._consumed_file = open(self.consumed_path, "a", encoding="utf-8")
+
+    def _load(self):
+        """Odtwórz stan logu z plików (po restarcie)"""
+        consumed = set()
+        if self.consumed_path.exists():
+            with open(self.consumed_path, encoding="utf-8") as f:
+                consumed = {int(line) for line in f if line.strip()}
+
+        data_size = self.data_path.stat().st_size if self.data_path.exists() else 0
+        if self.index_path.exists():
+            with open(self.index_path, encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        # Niepełna ostatnia linia po awarii
+                        logger.warning("⚠️ Uszkodzony wpis indeksu spill log - pomijam")
+                        continue
+                    if entry["offset"] + entry["num_samples"] * 2 > data_size:
+                        logger.warning(f"⚠️ Niepełne dane segmentu seq={entry['seq']}")
+                        continue
+                    self._entries[entry["seq"]] = entry
+
+        self._pending = sorted(seq for seq in self._entries if seq not in consumed)
+        if self._pending:
+            logger.info(f"💾 Spill log: {len(self._pending)} segmentów do wznowienia")
+
+    @property
+    def pending_count(self) -> int:
+        """Liczba nieprzetworzonych segmentów w logu"""
+        return len(self._pending)
+
+    @property
+    def next_seq(self) -> Optional[int]:
+        """Numer seq najstarszego oczekującego segmentu"""
+        return self._pending[0] if self._pending else None
+
+    @property
+    def max_seq(self) -> int:
+        """Największy numer seq zapisany w logu (-1 gdy pusty)"""
+        return max(self._entries, default=-1)
+
+    def append(self, seq: int, segment: SpeechSegment):
+        """
+        Dopisz segment do logu
+
+        Args:
+            seq: Numer kolejny segmentu (kolejność przetwarzania)
+            segment: Segment mowy (audio float32 w zakresie [-1, 1] lub int16)
+        """
+        pcm = to_int16(segment.audio_data.flatten()).astype("<i2")
+        offset = self._data_file.seek(0, os.SEEK_END)
+        self._data_file.write(pcm.tobytes())
+        self._data_file.flush()
+
+        entry = {
+            "seq": seq,
+            "offset": offset,
+            "num_samples": len(pcm),
+            "start_time": segment.start_time,
+            "end_time": segment.end_time,
+            "confidence": segment.confidence,
+            "sample_rate": segment.sample_rate,
+            # Cechy dla routera i bramki mowy - segment z dysku jak z pamięci
+            "speech_ratio": segment.speech_ratio,
+            "rms": segment.rms,
+            "peak": segment.peak,
+        }
+        self._index_file.write(json.dumps(entry) + "\n")
+        self._index_file.flush()
+        if self.fsync:
+            os.fsync(self._data_file.fileno())
+            os.fsync(self._index_file.fileno())
+
+        self._entries[seq] = entry
+        # Segmenty dopisane przy zamknięciu mogą mieć mniejszy seq
+        if self._pending and seq < self._pending[-1]:
+            self._pending.append(seq)
+            self._pending.sort()
+        else:
+            self._pending.append(seq)
+
+    def take(self) -> Optional[Tuple[int, SpeechSegment]]:
+        """
+        Pobierz najstarszy oczekujący segment
+
+        Segment pozostaje w logu do wywołania mark_consumed(), więc po
+        restarcie w trakcie transkrypcji zostanie przetworzony ponownie.
+
+        Returns:
+            (seq, SpeechSegment) lub None gdy log pusty
+        """
+        if not self._pending:
+            return None
+
+        seq = self._pending.pop(0)
+        self._taken.add(seq)
+        entry = self._entries[seq]
+        samples = np.memmap(
+            self.data_path,
+            dtype="<i2",
+            mode="r",
+            offset=entry["offset"],
+            shape=(entry["num_samples"],),
+        )
+        audio = samples.astype(np.float32) / 32768.0
+        del samples
+
+        segment = SpeechSegment(
+            audio_data=audio,
+            start_time=entry["start_time"],
+            end_time=entry["end_time"],
+            confidence=entry["confidence"],
+            sample_rate=entry["sample_rate"],
+            # Indeksy sprzed zapisu cech - wartości domyślne segmentu
+            speech_ratio=entry.get("speech_ratio", 1.0),
+            rms=entry.get("rms", 0.0),
+            peak=entry.get("peak", 0.0),
+        )
+        return seq, segment
+
+    def mark_consumed(self, seq: int):
+        """
+        Oznacz segment jako przetworzony
+
+        Args:
+            seq: Numer seq segmentu
+        """
+        self._consumed_file.write(f"{seq}\n")
+        self._consumed_file.flush()
+        if self.fsync:
+            os.fsync(self._consumed_file.fileno())
+
+        self._taken.discard(seq)
+        if seq in self._pending:
+            self._pending.remove(seq)
+        if not self._pending and not self._taken:
+            self._truncate()
+
+    def _truncate(self):
+        """Wyczyść log gdy wszystkie segmenty są przetworzone"""
+        for f in (self._data_file, self._index_file, self._consumed_file):
+            f.seek(0)
+            f.truncate()
+        self._entries.clear()
+
+    def close(self):
+        """Zamknij pliki logu"""
+        for f in (self._data_file, self._index_file, self._consumed_file):
+            if not f.closed:
+                f.close()
+
+
+class SegmentBacklog:
+    """
+    Kolejka FIFO segmentów czekających na transkrypcję
+
+    Pierwsze memory_limit segmentów trzymane jest w pamięci. Kolejne
+    (i wszystkie dopóki log na dysku nie zostanie opróżniony) trafiają do
+    SpillLog, dzięki czemu kolejność jest zachowana, a przy wolnym STT
+    nic nie jest gubione. Bez spill_dir backlog rośnie w pamięci ponad
+    limit (jak dawna ścieżka synchroniczna, która nie gubiła segmentów).
+
+    Przy close() segmenty z pamięci są zapisywane do logu, a po
+    restarcie z tym samym spill_dir przetwarzanie jest wznawiane od
+    najstarszego segmentu.
+    """
+
+    def __init__(
+        self,
+        memory_limit: int = 32,
+        spill_dir: Optional[Union[str, Path]] = None,
+        fsync: bool = False,
+    ):
+        """
+        Inicjalizacja backlogu
+
+        Args:
+            memory_limit: Max. liczba segmentów w pamięci
+            spill_dir: Katalog spill logu (None = bez zapisu na dysk)
+            fsync: Czy wymuszać fsync przy zapisie do logu
+        """
+        self.memory_limit = max(1, memory_limit)
+        self.spill_log = SpillLog(spill_dir, fsync=fsync) if spill_dir else None
+
+        self._memory: Deque[Tuple[int, SpeechSegment]] = deque()
+        self._cond = threading.Condition()
+        self._next_seq = (self.spill_log.max_seq + 1) if self.spill_log else 0
+        self._in_flight = 0
+        # Segmenty z dysku w trakcie przetwarzania: id(segment) -> seq
+        self._disk_in_flight: Dict[int, int] = {}
+
+        # Statystyki
+        self.restored_segments = self.spill_log.pending_count if self.spill_log else 0
+        self.total_enqueued = 0
+        self.spilled_segments = 0
+        self.overflow_segments = 0
+        self.max_backlog = self.restored_segments
+
+        logger.info(
+            f"📥 SegmentBacklog: pamięć={self.memory_limit}, "
+            f"spill={'on' if self.spill_log else 'off'}"
+        )
+
+    def __len__(self) -> int:
+        with self._cond:
+            return self._pending_locked()
+
+    def _pending_locked(self) -> int:
+        """Liczba oczekujących segmentów (wywoływane pod lockiem)"""
+        disk = self.spill_log.pending_count if self.spill_log else 0
+        return len(self._memory) + disk
+
+    @property
+    def is_busy(self) -> bool:
+        """Czy są segmenty oczekujące lub w trakcie transkrypcji"""
+        with self._cond:
+            return self._pending_locked() > 0 or self._in_flight > 0
+
+    @property
+    def pending_audio_seconds(self) -> float:
+        """Łączna długość audio w pamięci (bez segmentów na dysku)"""
+        with self._cond:
+            return sum(segment.duration for _, segment in self._memory)
+
+    def put(self, segment: SpeechSegment) -> bool:
+        """
+        Dodaj segment na koniec kolejki
+
+        Args:
+            segment: Segment mowy
+
+        Returns:
+            True (segment zawsze zachowany - w pamięci lub w spill logu)
+        """
+        with self._cond:
+            seq = self._next_seq
+            self._next_seq += 1
+            self.total_enqueued += 1
+
+            spill_pending = self.spill_log is not None and self.spill_log.pending_count
+            if len(self._memory) < self.memory_limit and not spill_pending:
+                self._memory.append((seq, segment))
+            elif self.spill_log is not None:
+                self.spill_log.append(seq, segment)
+                self.spilled_segments += 1
+            else:
+                # Bez spill logu nic nie jest gubione - pamięć ponad limit
+                if len(self._memory) == self.memory_limit:
+                    logger.warning(
+                        f"⚠️ Backlog STT ponad limit ({self.memory_limit}), "
+                        "segmenty zostają w pamięci (brak spill_dir)"
+                    )
+                self._memory.append((seq, segment))
+                self.overflow_segments += 1
+
+            self.max_backlog = max(self.max_backlog, self._pending_locked())
+            self._cond.notify_all()
+            return True
+
+    def get(self, timeout: Optional[float] = None) -> Optional[SpeechSegment]:
+        """
+        Pobierz najstarszy segment (blokuje do timeoutu)
+
+        Segment pobrany z dysku jest oznaczany jako przetworzony dopiero
+        w task_done(), więc przerwanie procesu w trakcie transkrypcji nie
+        gubi segmentu.
+
+        Args:
+            timeout: Max. czas czekania (None = bez limitu)
+
+        Returns:
+            SpeechSegment lub None po timeoucie
+        """
+        with self._cond:
+            if not self._cond.wait_for(lambda: self._pending_locked() > 0, timeout):
+                return None
+            return self._pop_locked()
+
+    def get_many(
+        self, max_items: int, max_seconds: Optional[float] = None
+    ) -> List[SpeechSegment]:
+        """
+        Pobierz do max_items najstarszych segmentów bez czekania
+
+        Args:
+            max_items: Max. liczba segmentów
+            max_seconds: Przestań po zebraniu tylu sekund audio (None = bez limitu)
+
+        Returns:
+            Lista segmentów w kolejności FIFO (może być pusta)
+        """
+        with self._cond:
+            batch = []
+            seconds = 0.0
+            while len(batch) < max_items and self._pending_locked() > 0:
+                if max_seconds is not None and seconds >= max_seconds:
+                    break
+                segment = self._pop_locked()
+                batch.append(segment)
+                seconds += segment.duration
+            return batch
+
+    def _pop_locked(self) -> SpeechSegment:
+        """Zdejmij najstarszy segment (wywoływane pod lockiem)"""
+        # Segmenty w pamięci są starsze od tych w logu, z wyjątkiem
+        # segmentów odtworzonych po restarcie (mniejszy seq na dysku)
+        disk_seq = self.spill_log.next_seq if self.spill_log else None
+        if self._memory and (disk_seq is None or self._memory[0][0] < disk_seq):
+            _, segment = self._memory.popleft()
+            self._in_flight += 1
+            return segment
+
+        seq, segment = self.spill_log.take()
+        self._disk_in_flight[id(segment)] = seq
+        self._in_flight += 1
+        return segment
+
+    def task_done(self, segment: SpeechSegment):
+        """
+        Potwierdź przetworzenie segmentu
+
+        Args:
+            segment: Segment zwrócony przez get()/get_many()
+        """
+        with self._cond:
+            seq = self._disk_in_flight.pop(id(segment), None)
+            if seq is not None:
+                self.spill_log.mark_consumed(seq)
+            self._in_flight = max(0, self._in_flight - 1)
+            self._cond.notify_all()
+
+    def wait_empty(self, timeout: Optional[float] = None) -> bool:
+        """
+        Poczekaj aż wszystkie segmenty zostaną przetworzone
+
+        Args:
+            timeout: Max. czas czekania (None = bez limitu)
+
+        Returns:
+            True jeśli backlog pusty
+        """
+        with self._cond:
+            return self._cond.wait_for(
+                lambda: self._pending_locked() == 0 and self._in_flight == 0, timeout
+            )
+
+    def persist(self):
+        """Zapisz segmenty z pamięci do spill logu (np. przy zatrzymaniu)"""
+        with self._cond:
+            if not self._memory:
+                return
+
+            if self.spill_log is None:
+                logger.warning(
+                    f"⚠️ {len(self._memory)} segmentów bez transkrypcji "
+                    f"(spill wyłączony)"
+                )
+            else:
+                for seq, segment in self._memory:
+                    self.spill_log.append(seq, segment)
+                logger.info(f"💾 Zapisano {len(self._memory)} segmentów do spill logu")
+
+            self._memory.clear()
+            self._cond.notify_all()
+
+    def close(self):
+        """Zapisz segmenty z pamięci i zamknij spill log"""
+        self.persist()
+        if self.spill_log is not None:
+            self.spill_log.close()
+
+    def get_statistics(self) -> Dict[str, Any]:
+        """Pobierz statystyki backlogu"""
+        with self._cond:
+            return {
+                "pending": self._pending_locked(),
+                "pending_memory": len(self._memory),
+                "pending_disk": self.spill_log.pending_count if self.spill_log else 0,
+                "in_flight": self._in_flight,
+                "total_enqueued": self.total_enqueued,
+                "spilled_segments": self.spilled_segments,
+                "restored_segments": self.restored_segments,
+                "overflow_segments": self.overflow_segments,
+                "max_backlog": self.max_backlog,
+            }
@@ -0,0 +1,351 @@
+"""
+Segment Router - Wybór modelu STT wg długości segmentu i udziału mowy
+Duration-aware routing of speech segments to model sizes / decode settings
+
+Autor: AI Assistant
+Data: 2025-01-18
+"""
+
+import json
+import time
+import logging
+import threading
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Union
+
+import numpy as np
+
+from speech_segmenter import SpeechSegment
+from stt_backend import TranscriptionResult
+
+# Konfiguracja loggingu
+logger = logging.getLogger(__name__)
+
+# Domyślna tablica: krótkie potwierdzenia ("tak", "nie") i segmenty
+# z przewagą ciszy nie potrzebują pełnego przebiegu dużego modelu
+DEFAULT_ROUTING_TABLE = [
+    {"name": "short", "max_duration": 1.0, "model": "base", "beam_size": 1},
+    {"name": "sparse", "max_speech_ratio": 0.4, "model": "base", "beam_size": 1},
+    {"name": "default"},
+]
+
+
+@dataclass
+class Route:
+    """Reguła tablicy routingu (pierwsza pasująca wygrywa)"""
+
+    name: str
+    # Model i backend (None = silnik domyślny pipeline)
+    model: Optional[str] = None
+    backend: Optional[str] = None
+    # Warunki: min <= wartość < max (None = bez ograniczenia)
+    min_duration: Optional[float] = None
+    max_duration: Optional[float] = None
+    min_speech_ratio: Optional[float] = None
+    max_speech_ratio: Optional[float] = None
+    # Parametry dekodowania silnika trasy (np. beam_size, best_of)
+    options: Dict[str, Any] = field(default_factory=dict)
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "Route":
+        """Utwórz regułę ze słownika (nieznane klucze to parametry dekodowania)"""
+        data = dict(data)
+        known = {
+            key: data.pop(key)
+            for key in list(data)
+            if key in cls.__dataclass_fields__ and key != "options"
+        }
+        options = {**data.pop("options", {}), **data}
+        return cls(options=options, **known)
+
+    @property
+    def uses_default_engine(self) -> bool:
+        """Czy trasa używa silnika domyślnego bez zmian"""
+        return self.model is None and self.backend is None and not self.options
+
+    @property
+    def is_catch_all(self) -> bool:
+        """Czy reguła pasuje do każdego segmentu"""
+        return all(
+            limit is None
+            for limit in (
+                self.min_duration,
+                self.max_duration,
+                self.min_speech_ratio,
+                self.max_speech_ratio,
+            )
+        )
+
+    def matches(self, duration: float, speech_ratio: float) -> bool:
+        """Czy segment spełnia warunki reguły"""
+        return (
+            (self.min_duration is None or duration >= self.min_duration)
+            and (self.max_duration is None or duration < self.max_duration)
+            and (self.min_speech_ratio is None or speech_ratio >= self.min_speech_ratio)
+            and (self.max_speech_ratio is None or speech_ratio < self.max_speech_ratio)
+        )
+
+
+def load_routing_table(
+    source: Union[str, Path, List[Dict[str, Any]], None] = None,
+) -> List[Route]:
+    """
+    Wczytaj tablicę routingu
+
+    Args:
+        source: Ścieżka pliku JSON, lista słowników lub None / "default"
+            (DEFAULT_ROUTING_TABLE)
+
+    Returns:
+        Lista reguł zakończona regułą domyślną
+    """
+    if source is None or source == "default":
+        entries = DEFAULT_ROUTING_TABLE
+    elif isinstance(source, (str, Path)):
+        with open(source, encoding="utf-8") as f:
+            entries = json.load(f)
+    else:
+        entries = source
+
+    routes = [Route.from_dict(entry) for entry in entries]
+    if not routes or not routes[-1].is_catch_all:
+        # Segment niepasujący do żadnej reguły idzie do silnika domyślnego
+        routes.append(Route(name="default"))
+    return routes
+
+
+@dataclass
+class RouteStatistics:
+    """Koszt trasy"""
+
+    segments: int = 0
+    audio_seconds: float = 0.0
+    wall_seconds: float = 0.0
+    cpu_seconds: float = 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        audio_minutes = self.audio_seconds / 60.0
+        return {
+            "segments": self.segments,
+            "audio_seconds": self.audio_seconds,
+            "wall_seconds": self.wall_seconds,
+            "cpu_seconds": self.cpu_seconds,
+            "cpu_seconds_per_audio_minute": (
+                self.cpu_seconds / audio_minutes if audio_minutes > 0 else 0.0
+            ),
+            "real_time_factor": (
+                self.wall_seconds / self.audio_seconds
+                if self.audio_seconds > 0
+                else 0.0
+            ),
+        }
+
+
+class SegmentRouter:
+    """
+    Silnik STT kierujący segmenty do silników wg tablicy routingu
+
+    Trasa wybierana jest z długości segmentu i udziału mowy z VAD
+    (SpeechSegment.speech_ratio; transcribe_audio zna tylko długość).
+    Silniki tras tworzone są przez engine_factory - silniki z tym samym
+    modelem dzielą wagi przez model_cache, więc trasa różniąca się
+    tylko parametrami dekodowania nie kosztuje pamięci.
+
+    Koszt CPU trasy to przyrost time.process_time() procesu (wątki
+    intra-op torch są liczone) - przy równoległych transkrypcjach
+    w innych wątkach zawiera też ich pracę.
+    """
+
+    def __init__(
+        self,
+        default_engine,
+        routes: List[Route],
+        engine_factory: Optional[Callable[[Route], Any]] = None,
+    ):
+        """
+        Inicjalizacja routera
+
+        Args:
+            default_engine: Silnik tras bez własnego modelu / parametrów
+            routes: Tablica routingu (load_routing_table)
+            engine_factory: Funkcja tworząca silnik dla trasy z modelem
+                lub parametrami dekodowania
+        """
+        self.default_engine = default_engine
+        self.routes = routes
+        self.engines: Dict[str, Any] = {}
+        for route in routes:
+            if route.uses_default_engine or engine_factory is None:
+                self.engines[route.name] = default_engine
+            else:
+                self.engines[route.name] = engine_factory(route)
+
+        self._stats_lock = threading.Lock()
+        self.route_stats: Dict[str, RouteStatistics] = {
+            route.name: RouteStatistics() for route in routes
+        }
+
+        logger.info(
+            "🔀 SegmentRouter: "
+            + ", ".join(
+                f"{r.name}={getattr(self.engines[r.name], 'model_name', '?')}"
+                for r in routes
+            )
+        )
+
+    def __getattr__(self, name: str) -> Any:
+        # Atrybuty spoza routera (is_loaded, model_name...) z silnika domyślnego
+        if name == "default_engine":
+            raise AttributeError(name)
+        return getattr(self.default_engine, name)
+
+    @property
+    def previous_text(self) -> str:
+        return self.default_engine.previous_text
+
+    @previous_text.setter
+    def previous_text(self, value: str):
+        for engine in self._unique_engines():
+            engine.previous_text = value
+
+    def _unique_engines(self) -> List[Any]:
+        unique = []
+        for engine in self.engines.values():
+            if all(engine is not other for other in unique):
+                unique.append(engine)
+        return unique
+
+    def replace_default_engine(self, engine) -> Any:
+        """
+        Podmień silnik domyślny (podmiana modelu w trakcie nagrywania)
+
+        Trasy korzystające z silnika domyślnego przechodzą na nowy silnik,
+        trasy z własnym modelem lub parametrami zostają bez zmian.
+
+        Returns:
+            Poprzedni silnik domyślny
+        """
+        old_engine = self.default_engine
+        for name, route_engine in self.engines.items():
+            if route_engine is old_engine:
+                self.engines[name] = engine
+        self.default_engine = engine
+        return old_engine
+
+    def route(self, duration: float, speech_ratio: float = 1.0) -> Route:
+        """Wybierz trasę dla segmentu"""
+        for route in self.routes:
+            if route.matches(duration, speech_ratio):
+                return route
+        return self.routes[-1]
+
+    def load_model(self) -> bool:
+        """Załaduj modele wszystkich tras"""
+        return all(engine.load_model() for engine in self._unique_engines())
+
+    def unload_model(self):
+        """Zwolnij modele wszystkich tras"""
+        for engine in self._unique_engines():
+            engine.unload_model()
+
+    def transcribe_segment(
+        self, segment: SpeechSegment
+    ) -> Optional[TranscriptionResult]:
+        """Transkrybuj segment trasą wybraną z długości i speech_ratio"""
+        return self._transcribe(
+            segment.audio_data,
+            segment.sample_rate,
+            segment.duration,
+            getattr(segment, "speech_ratio", 1.0),
+        )
+
+    def transcribe_audio(
+        self, audio_data: np.ndarray, sample_rate: int = 16000
+    ) -> Optional[TranscriptionResult]:
+        """Transkrybuj audio trasą wybraną z długości"""
+        duration = len(audio_data) / max(sample_rate, 1)
+        return self._transcribe(audio_data, sample_rate, duration, 1.0)
+
+    def _transcribe(self, audio_data, sample_rate, duration, speech_ratio):
+        route = self.route(duration, speech_ratio)
+        engine = self.engines[route.name]
+        if engine is not self.default_engine:
+            # Kontekst tekstowy wspólny dla wszystkich tras
+            engine.previous_text = self.default_engine.previous_text
+
+        wall_start, cpu_start = time.time(), time.process_time()
+        result = engine.transcribe_audio(audio_data, sample_rate)
+        self._record(
+            route, len(audio_data) / max(sample_rate, 1), wall_start, cpu_start
+        )
+
+        if result is not None and result.text and engine is not self.default_engine:
+            self.default_engine.previous_text = result.text
+        return result
+
+    def transcribe_batch(
+        self,
+        audio_batch: List[np.ndarray],
+        sample_rate: int = 16000,
+        with_timestamps: bool = False,
+    ) -> List[Optional[TranscriptionResult]]:
+        """Transkrybuj batch - jeden batch na trasę, wyniki w kolejności wejścia"""
+        groups: Dict[str, List[int]] = {}
+        for index, audio in enumerate(audio_batch):
+            route = self.route(len(audio) / max(sample_rate, 1))
+            groups.setdefault(route.name, []).append(index)
+
+        results: List[Optional[TranscriptionResult]] = [None] * len(audio_batch)
+        for route in self.routes:
+            indices = groups.get(route.name)
+            if not indices:
+                continue
+            engine = self.engines[route.name]
+            batch = [audio_batch[i] for i in indices]
+
+            wall_start, cpu_start = time.time(), time.process_time()
+            if hasattr(engine, "transcribe_batch"):
+                batch_results = engine.transcribe_batch(
+                    batch, sample_rate, with_timestamps=with_timestamps
+                )
+            else:
+                batch_results = [engine.transcribe_audio(a, sample_rate) for a in batch]
+            audio_seconds = sum(len(a) for a in batch) / max(sample_rate, 1)
+            self._record(route, audio_seconds, wall_start, cpu_start, len(batch))
+
+            for index, result in zip(indices, batch_results):
+                results[index] = result
+        return results
+
+    def _record(
+        self,
+        route: Route,
+        audio_seconds: float,
+        wall_start: float,
+        cpu_start: float,
+        segments: int = 1,
+    ):
+        with self._stats_lock:
+            stats = self.route_stats[route.name]
+            stats.segments += segments
+            stats.audio_seconds += audio_seconds
+            stats.wall_seconds += time.time() - wall_start
+            stats.cpu_seconds += time.process_time() - cpu_start
+
+    def get_routing_statistics(self) -> Dict[str, Dict[str, Any]]:
+        """Koszt każdej trasy (m.in. sekundy CPU na minutę audio)"""
+        with self._stats_lock:
+            return {
+                route.name: {
+                    "model": getattr(self.engines[route.name], "model_name", None),
+                    **self.route_stats[route.name].to_dict(),
+                }
+                for route in self.routes
+            }
+
+    def get_model_info(self) -> Dict[str, Any]:
+        """Informacje o modelu domyślnym + trasy"""
+        info = dict(self.default_engine.get_model_info())
+        info["routing"] = self.get_routing_statistics()
+        return info
@@ -0,0 +1,267 @@
+"""
+Speech Gate - Tanie odrzucanie segmentów bez mowy przed transkrypcją
+Pre-STT gate rejecting clicks, coughs and noise before full Whisper decoding
+
+Autor: AI Assistant
+Data: 2025-01-18
+"""
+
+import json
+import time
+import wave
+import logging
+import threading
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple, Union
+
+import numpy as np
+
+from audio_format import to_float32, to_int16
+
+# Konfiguracja loggingu
+logger = logging.getLogger(__name__)
+
+# Pasmo mowy dla płaskości widma (Hz)
+SPEECH_BAND = (100.0, 4000.0)
+
+
+@dataclass
+class GateDecision:
+    """Decyzja bramki dla segmentu"""
+
+    is_speech: bool
+    # "speech", "low_speech_ratio", "spectral_flatness", "no_speech_prob"
+    reason: str
+    speech_ratio: float
+    flatness: float
+    no_speech_prob: Optional[float] = None
+    gate_seconds: float = 0.0
+
+
+def frame_features(
+    audio: np.ndarray, sample_rate: int = 16000, frame_ms: int = 30
+) -> Tuple[float, float]:
+    """
+    Udział ramek z mową i płaskość widma segmentu
+
+    Ramka jest aktywna, gdy jej RMS przekracza 1/4 RMS głośnych ramek
+    segmentu (95. percentyl) i bezwzględny próg szumu. Płaskość widma
+    (średnia geometryczna / arytmetyczna mocy w paśmie mowy) liczona
+    jest dla ramek aktywnych: ~0.5 dla szumu i trzasków, << 0.3 dla
+    dźwięcznej mowy.
+
+    Args:
+        audio: Audio segmentu (float32 lub int16)
+        sample_rate: Częstotliwość próbkowania
+        frame_ms: Długość ramki w ms
+
+    Returns:
+        (speech_ratio, flatness)
+    """
+    audio = to_float32(audio).flatten()
+    frame_size = max(int(sample_rate * frame_ms / 1000), 16)
+    n_frames = len(audio) // frame_size
+    if n_frames == 0:
+        return 0.0, 1.0
+
+    frames = audio[: n_frames * frame_size].reshape(n_frames, frame_size)
+    rms = np.sqrt(np.mean(frames**2, axis=1))
+    loud = np.percentile(rms, 95)
+    active = rms > max(0.25 * loud, 1e-3)
+    speech_ratio = float(np.mean(active))
+    if not active.any():
+        return 0.0, 1.0
+
+    window = np.hanning(frame_size).astype(np.float32)
+    power = np.abs(np.fft.rfft(frames[active] * window, axis=1)) ** 2
+    freqs = np.fft.rfftfreq(frame_size, 1.0 / sample_rate)
+    band = (freqs >= SPEECH_BAND[0]) & (freqs <= SPEECH_BAND[1])
+    power = power[:, band] + 1e-12
+    flatness = np.exp(np.mean(np.log(power), axis=1)) / np.mean(power, axis=1)
+    return speech_ratio, float(np.mean(flatness))
+
+
+class SpeechGate:
+    """
+    Bramka przed STT odrzucająca segmenty bez mowy
+
+    Kaskada: cechy ramek (udział mowy, płaskość widma) rozstrzygają
+    przypadki oczywiste; segmenty niejednoznaczne sprawdzane są
+    no_speech_prob z pierwszego kroku dekodera Whisper (jeśli silnik
+    udostępnia no_speech_probability). Odrzucone segmenty nie są
+    dekodowane - oszczędność szacowana jest z RTF transkrybowanych.
+    """
+
+    def __init__(
+        self,
+        stt_engine=None,
+        min_speech_ratio: float = 0.2,
+        accept_speech_ratio: float = 0.5,
+        max_flatness: float = 0.45,
+        accept_flatness: float = 0.25,
+        no_speech_threshold: float = 0.6,
+        audit_dir: Optional[Union[str, Path]] = None,
+    ):
+        """
+        Inicjalizacja bramki
+
+        Args:
+            stt_engine: Silnik z no_speech_probability (opcjonalny)
+            min_speech_ratio: Udział mowy poniżej którego segment jest odrzucany
+            accept_speech_ratio: Udział mowy, od którego segment przechodzi bez próby
+            max_flatness: Płaskość widma powyżej której segment jest odrzucany
+            accept_flatness: Płaskość, poniżej której segment przechodzi bez próby
+            no_speech_threshold: Próg no_speech_prob odrzucający segment
+            audit_dir: Katalog zapisu odrzuconego audio (WAV + rejected.jsonl)
+        """
+        self.stt_engine = stt_engine
+        self.min_speech_ratio = min_speech_ratio
+        self.accept_speech_ratio = accept_speech_ratio
+        self.max_flatness = max_flatness
+        self.accept_flatness = accept_flatness
+        self.no_speech_threshold = no_speech_threshold
+        self.audit_dir = Path(audit_dir) if audit_dir else None
+        if self.audit_dir:
+            self.audit_dir.mkdir(parents=True, exist_ok=True)
+
+        # Statystyki
+        self._lock = threading.Lock()
+        self.checked = 0
+        self.rejected = 0
+        self.probed = 0
+        self.reasons: Dict[str, int] = {}
+        self.gate_seconds = 0.0
+        self.rejected_audio_seconds = 0.0
+        self.transcribed_audio_seconds = 0.0
+        self.transcription_seconds = 0.0
+
+    def _probe(self, audio: np.ndarray, sample_rate: int) -> Optional[float]:
+        """no_speech_prob z pierwszego kroku dekodera (None gdy niedostępne)"""
+        probe = getattr(self.stt_engine, "no_speech_probability", None)
+        if probe is None:
+            return None
+        self.probed += 1
+        return probe(audio, sample_rate)
+
+    def check(
+        self,
+        audio: np.ndarray,
+        sample_rate: int = 16000,
+        vad_speech_ratio: Optional[float] = None,
+        probe: bool = True,
+    ) -> GateDecision:
+        """
+        Oceń segment
+
+        Args:
+            audio: Audio segmentu
+            sample_rate: Częstotliwość próbkowania
+            vad_speech_ratio: Udział mowy z VAD segmentera (opcjonalny)
+            probe: Czy sprawdzać segmenty niejednoznaczne dekoderem (False =
+                przepuść je bez próby, np. przy przeciążeniu)
+
+        Returns:
+            GateDecision
+        """
+        started_at = time.time()
+        speech_ratio, flatness = frame_features(audio, sample_rate)
+        if vad_speech_ratio is not None:
+            speech_ratio = min(speech_ratio, vad_speech_ratio)
+
+        no_speech_prob = None
+        if speech_ratio < self.min_speech_ratio:
+            reason = "low_speech_ratio"
+        elif flatness > self.max_flatness:
+            reason = "spectral_flatness"
+        elif (
+            speech_ratio >= self.accept_speech_ratio
+            and flatness <= self.accept_flatness
+        ):
+            reason = "speech"
+        elif probe:
+            no_speech_prob = self._probe(audio, sample_rate)
+            reason = (
+                "no_speech_prob"
+                if no_speech_prob is not None
+                and no_speech_prob > self.no_speech_threshold
+                else "speech"
+            )
+        else:
+            reason = "speech"
+
+        decision = GateDecision(
+            is_speech=reason == "speech",
+            reason=reason,
+            speech_ratio=speech_ratio,
+            flatness=flatness,
+            no_speech_prob=no_speech_prob,
+            gate_seconds=time.time() - started_at,
+        )
+
+        duration = len(audio) / max(sample_rate, 1)
+        with self._lock:
+            self.checked += 1
+            self.gate_seconds += decision.gate_seconds
+            if not decision.is_speech:
+                self.rejected += 1
+                self.rejected_audio_seconds += duration
+                self.reasons[reason] = self.reasons.get(reason, 0) + 1
+
+        if not decision.is_speech:
+            logger.debug(
+                f"🚫 Segment bez mowy ({reason}): ratio={speech_ratio:.2f}, "
+                f"flatness={flatness:.2f}, no_speech={no_speech_prob}"
+            )
+            if self.audit_dir:
+                self._audit(audio, sample_rate, decision)
+        return decision
+
+    def check_segment(self, segment, probe: bool = True) -> GateDecision:
+        """Oceń SpeechSegment (z udziałem mowy z segmentera)"""
+        return self.check(
+            segment.audio_data,
+            segment.sample_rate,
+            getattr(segment, "speech_ratio", None),
+            probe=probe,
+        )
+
+    def record_transcription(self, audio_seconds: float, processing_seconds: float):
+        """Zapisz koszt transkrypcji przepuszczonego segmentu (do szacowania oszczędności)"""
+        with self._lock:
+            self.transcribed_audio_seconds += audio_seconds
+            self.transcription_seconds += processing_seconds
+
+    def _audit(self, audio: np.ndarray, sample_rate: int, decision: GateDecision):
+        """Zapisz odrzucone audio (WAV int16) i decyzję (rejected.jsonl)"""
+        try:
+            name = f"rejected-{time.strftime('%Y%m%d-%H%M%S')}-{self.rejected:05d}.wav"
+            pcm = to_int16(np.asarray(audio).flatten())
+            with wave.open(str(self.audit_dir / name), "wb") as f:
+                f.setnchannels(1)
+                f.setsampwidth(2)
+                f.setframerate(sample_rate)
+                f.writeframes(pcm.astype("<i2").tobytes())
+            with open(self.audit_dir / "rejected.jsonl", "a", encoding="utf-8") as f:
+                f.write(json.dumps({"file": name, **asdict(decision)}) + "\n")
+        except OSError as e:
+            logger.warning(f"⚠️ Nie można zapisać audytu bramki: {e}")
+
+    def get_statistics(self) -> Dict[str, Any]:
+        """Statystyki bramki (oszczędność CPU szacowana z RTF transkrypcji)"""
+        with self._lock:
+            rtf = (
+                self.transcription_seconds / self.transcribed_audio_seconds
+                if self.transcribed_audio_seconds > 0
+                else 0.0
+            )
+            return {
+                "checked": self.checked,
+                "rejected": self.rejected,
+                "rejection_rate": self.rejected / max(self.checked, 1),
+                "reasons": dict(self.reasons),
+                "probed": self.probed,
+                "gate_seconds": self.gate_seconds,
+                "rejected_audio_seconds": self.rejected_audio_seconds,
+                "estimated_saved_seconds": self.rejected_audio_seconds * rtf,
+            }
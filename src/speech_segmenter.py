@@ -0,0 +1,222 @@
+"""
+Speech Segmenter - Segmentacja mowy na podstawie decyzji VAD
+Speech segmentation driven by per-chunk VAD decisions
+
+Autor: AI Assistant
+Data: 2025-01-18
+"""
+
+import time
+import logging
+import numpy as np
+from typing import Optional, List, Any
+from dataclasses import dataclass
+
+from frame_features import FrameFeatures
+
+# Konfiguracja loggingu
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class SpeechSegment:
+    """Segment mowy wykryty przez pipeline"""
+
+    audio_data: np.ndarray
+    start_time: float
+    end_time: float
+    confidence: float
+    sample_rate: int
+    transcription: Optional[Any] = None
+    # 0 = brak tekstu, 1 = tekst tymczasowy, 2 = tekst z drugiego poziomu
+    revision: int = 0
+    # Udział chunków mowy (decyzje VAD) w czasie trwania segmentu
+    speech_ratio: float = 1.0
+    # Poziom chunków mowy z cech liczonych przez pipeline (0 = nieznany)
+    rms: float = 0.0
+    peak: float = 0.0
+
+    @property
+    def duration(self) -> float:
+        """Długość segmentu w sekundach"""
+        return self.end_time - self.start_time
+
+    @property
+    def num_samples(self) -> int:
+        """Liczba próbek audio"""
+        return len(self.audio_data)
+
+    @property
+    def text(self) -> str:
+        """Tekst transkrypcji (jeśli dostępny)"""
+        return self.transcription.text if self.transcription else ""
+
+
+class SpeechSegmenter:
+    """
+    Segmenter mowy niezależny od źródła czasu
+
+    Czas przekazuje wywołujący: pipeline mikrofonowy używa zegara
+    (time.time()), serwer strumieniowy używa czasu strumienia
+    (liczba próbek / sample_rate).
+    """
+
+    def __init__(
+        self,
+        sample_rate: int = 16000,
+        min_segment_duration: float = 0.5,
+        max_segment_duration: float = 30.0,
+        silence_timeout: float = 2.0,
+    ):
+        """
+        Inicjalizacja segmentera
+
+        Args:
+            sample_rate: Częstotliwość próbkowania
+            min_segment_duration: Min. długość segmentu mowy (s)
+            max_segment_duration: Max. długość segmentu mowy (s)
+            silence_timeout: Timeout ciszy dla zakończenia segmentu (s)
+        """
+        self.sample_rate = sample_rate
+        self.min_segment_duration = min_segment_duration
+        self.max_segment_duration = max_segment_duration
+        self.silence_timeout = silence_timeout
+
+        # Bieżący segment
+        self.current_segment_audio: List[np.ndarray] = []
+        self.current_segment_start: Optional[float] = None
+        self.last_speech_time: Optional[float] = None
+        self.speech_chunks = 0
+        self.gap_chunks = 0
+        self._pending_gap_chunks = 0
+        self._energy = 0.0
+        self._energy_samples = 0
+        self._peak = 0.0
+
+        # Statystyki
+        self.finalized_segments = 0
+        self.discarded_segments = 0
+
+    @property
+    def is_active(self) -> bool:
+        """Czy segment jest w trakcie zbierania"""
+        return self.current_segment_start is not None
+
+    def process(
+        self,
+        audio_chunk: np.ndarray,
+        is_speech: bool,
+        current_time: float,
+        features: Optional[FrameFeatures] = None,
+    ) -> Optional[SpeechSegment]:
+        """
+        Przetwórz chunk z decyzją VAD
+
+        Args:
+            audio_chunk: Chunk audio
+            is_speech: Decyzja VAD dla chunka
+            current_time: Czas chunka (zegar lub czas strumienia)
+            features: Cechy chunka (poziom segmentu bez ponownego skanowania)
+
+        Returns:
+            Zakończony SpeechSegment lub None
+        """
+        if is_speech:
+            if features is not None:
+                self._energy += features.rms**2 * features.num_samples
+                self._energy_samples += features.num_samples
+                self._peak = max(self._peak, features.peak)
+            return self._handle_speech_chunk(audio_chunk, current_time)
+        return self._handle_silence_chunk(current_time)
+
+    def _handle_speech_chunk(
+        self, audio_chunk: np.ndarray, current_time: float
+    ) -> Optional[SpeechSegment]:
+        """Obsłuż chunk z mową"""
+        # Rozpocznij nowy segment jeśli potrzeba
+        if self.current_segment_start is None:
+            self.current_segment_start = current_time
+            self.current_segment_audio = []
+            logger.debug("🎤 Rozpoczęcie nowego segmentu mowy")
+
+        # Dodaj audio do bieżącego segmentu
+        self.current_segment_audio.append(audio_chunk.flatten())
+        self.last_speech_time = current_time
+        self.speech_chunks += 1
+        # Cisza wewnątrz segmentu (przed kolejną mową) obniża speech_ratio
+        self.gap_chunks += self._pending_gap_chunks
+        self._pending_gap_chunks = 0
+
+        # Sprawdź czy segment nie jest za długi
+        segment_duration = current_time - self.current_segment_start
+        if segment_duration >= self.max_segment_duration:
+            logger.debug(f"⏱️ Segment osiągnął max długość: {segment_duration:.2f}s")
+            return self.flush()
+
+        return None
+
+    def _handle_silence_chunk(self, current_time: float) -> Optional[SpeechSegment]:
+        """Obsłuż chunk z ciszą"""
+        if self.current_segment_start is not None:
+            self._pending_gap_chunks += 1
+
+        # Sprawdź czy mamy aktywny segment i czy cisza trwa wystarczająco długo
+        if (
+            self.current_segment_start is not None
+            and self.last_speech_time is not None
+            and current_time - self.last_speech_time >= self.silence_timeout
+        ):
+
+            segment_duration = self.last_speech_time - self.current_segment_start
+
+            # Finalizuj segment jeśli ma minimalną długość
+            if segment_duration >= self.min_segment_duration:
+                logger.debug(f"🔇 Koniec segmentu po ciszy: {segment_duration:.2f}s")
+                return self.flush()
+
+            logger.debug(f"🗑️ Odrzucenie krótkiego segmentu: {segment_duration:.2f}s")
+            self.discarded_segments += 1
+            self.reset()
+
+        return None
+
+    def flush(self, current_time: Optional[float] = None) -> Optional[SpeechSegment]:
+        """
+        Zakończ bieżący segment niezależnie od jego długości
+
+        Args:
+            current_time: Czas końca, gdy brak ostatniej ramki mowy
+
+        Returns:
+            SpeechSegment lub None jeśli brak aktywnego segmentu
+        """
+        if self.current_segment_start is None or not self.current_segment_audio:
+            return None
+
+        segment = SpeechSegment(
+            audio_data=np.concatenate(self.current_segment_audio),
+            start_time=self.current_segment_start,
+            end_time=self.last_speech_time or current_time or time.time(),
+            confidence=1.0,  # TODO: oblicz confidence
+            sample_rate=self.sample_rate,
+            speech_ratio=self.speech_chunks
+            / max(self.speech_chunks + self.gap_chunks, 1),
+            rms=float(np.sqrt(self._energy / max(self._energy_samples, 1))),
+            peak=self._peak,
+        )
+
+        self.finalized_segments += 1
+        self.reset()
+        return segment
+
+    def reset(self):
+        """Reset stanu bieżącego segmentu"""
+        self.current_segment_start = None
+        self.current_segment_audio = []
+        self.last_speech_time = None
+        self.speech_chunks = 0
+        self.gap_chunks = 0
+        self._pending_gap_chunks = 0
+        self._energy = 0.0
+        self._energy_samples = 0
+        self._peak = 0.0
@@ -0,0 +1,358 @@
+"""
+STT Backend - Wspólny interfejs silników Speech-to-Text
+Pluggable STT backend protocol and backend factory
+
+Autor: AI Assistant
+Data: 2025-01-18
+"""
+
+import importlib.util
+import logging
+import numpy as np
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Protocol, runtime_checkable
+
+from audio_format import to_float32
+from resampler import resample_polyphase
+
+# Konfiguracja loggingu
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class TranscriptionResult:
+    """Wynik transkrypcji"""
+
+    text: str
+    language: str
+    confidence: float
+    processing_time: float
+    segments: List[Dict[str, Any]]
+    model_used: str
+
+    @property
+    def words_per_minute(self) -> float:
+        """Oblicz słowa na minutę"""
+        if self.processing_time <= 0:
+            return 0
+        word_count = len(self.text.split())
+        return (word_count / self.processing_time) * 60
+
+
+@runtime_checkable
+class STTBackend(Protocol):
+    """
+    Interfejs silnika STT używanego przez pipeline, serwer i GUI
+
+    Wszystkie implementacje zwracają TranscriptionResult z segmentami
+    w formacie Whisper (start, end, text, avg_logprob, no_speech_prob).
+    """
+
+    model_name: str
+    is_loaded: bool
+    previous_text: str
+
+    def load_model(self) -> bool:
+        """Załaduj model (True jeśli się powiodło)"""
+        ...
+
+    def transcribe_audio(
+        self, audio_data: np.ndarray, sample_rate: int = 16000
+    ) -> Optional[TranscriptionResult]:
+        """Transkrybuj jeden segment audio"""
+        ...
+
+    def transcribe_batch(
+        self,
+        audio_batch: List[np.ndarray],
+        sample_rate: int = 16000,
+        with_timestamps: bool = False,
+    ) -> List[Optional[TranscriptionResult]]:
+        """Transkrybuj wiele segmentów (wyniki w kolejności wejścia)"""
+        ...
+
+    def unload_model(self):
+        """Zwolnij model"""
+        ...
+
+    def get_model_info(self) -> Dict[str, Any]:
+        """Informacje o modelu i statystyki"""
+        ...
+
+
+# Backend -> moduł wymagany do jego działania
+BACKEND_REQUIREMENTS = {
+    "whisper": "whisper",
+    "faster-whisper": "faster_whisper",
+    "onnx": "onnxruntime",
+}
+
+# Rozdzielczość tokenów czasu Whisper (HOP_LENGTH * 2 / SAMPLE_RATE)
+TIMESTAMP_PRECISION = 0.02
+
+# Ustawienia silników dla języka polskiego
+POLISH_DEFAULTS = {
+    "language": "pl",
+    "initial_prompt": "To jest nagranie w języku polskim. ",
+    "beam_size": 5,
+    "best_of": 5,
+    "temperature": 0.0,
+    "patience": 1.0,
+    "no_speech_threshold": 0.5,  # Niższy próg dla polskiego
+}
+
+
+def available_backends() -> List[str]:
+    """Lista backendów, których zależności są zainstalowane"""
+    return [
+        name
+        for name, module in BACKEND_REQUIREMENTS.items()
+        if importlib.util.find_spec(module) is not None
+    ]
+
+
+def create_stt_backend(
+    backend: str = "whisper",
+    model_name: str = "base",
+    use_polish_optimization: bool = True,
+    model_dir: Optional[str] = None,
+    precision: Optional[str] = None,
+    compile_mode: Optional[str] = None,
+    mmap_weights: bool = False,
+    **kwargs,
+) -> STTBackend:
+    """
+    Utwórz silnik STT wybranego backendu
+
+    Args:
+        backend: "whisper" (openai-whisper, PyTorch), "faster-whisper"
+            (CTranslate2, int8 na CPU) lub "onnx" (ONNX Runtime)
+        model_name: Nazwa modelu (tiny, base, small, medium, large...)
+        use_polish_optimization: Czy używać ustawień i post-processingu PL
+        model_dir: Lokalny katalog modeli (ładowanie bez dostępu do sieci)
+        precision: Precyzja na CPU: "fp32" lub "int8" (None = domyślna backendu)
+        compile_mode: Kompilacja modelu PyTorch: "torchscript" lub "compile"
+            (tylko backend "whisper")
+        mmap_weights: Wagi mapowane w pamięci, współdzielone między
+            procesami (tylko backend "whisper")
+        **kwargs: Dodatkowe parametry konstruktora silnika
+
+    Returns:
+        Silnik zgodny z STTBackend
+
+    Raises:
+        ValueError: Nieznany backend
+        ImportError: Brak zależności backendu
+    """
+    if backend not in BACKEND_REQUIREMENTS:
+        raise ValueError(
+            f"Nieznany backend STT: {backend} "
+            f"(dostępne: {', '.join(BACKEND_REQUIREMENTS)})"
+        )
+
+    module = BACKEND_REQUIREMENTS[backend]
+    if importlib.util.find_spec(module) is None:
+        raise ImportError(f"Backend '{backend}' wymaga pakietu {module}")
+
+    if compile_mode and backend != "whisper":
+        logger.warning("⚠️ Kompilacja dotyczy tylko backendu whisper - pomijam")
+    if mmap_weights and backend != "whisper":
+        logger.warning("⚠️ Wagi mmap dotyczą tylko backendu whisper - pomijam")
+
+    if backend == "faster-whisper":
+        from faster_whisper_backend import FasterWhisperBackend
+
+        if use_polish_optimization:
+            for key, value in POLISH_DEFAULTS.items():
+                kwargs.setdefault(key, value)
+            kwargs.setdefault("post_processor", polish_post_process)
+        if precision is not None:
+            kwargs.setdefault(
+                "compute_type", "int8" if precision == "int8" else "float32"
+            )
+        return FasterWhisperBackend(
+            model_name=model_name, model_dir=model_dir, **kwargs
+        )
+
+    if backend == "onnx":
+        from onnx_backend import OnnxWhisperBackend
+
+        if use_polish_optimization:
+            for key, value in POLISH_DEFAULTS.items():
+                kwargs.setdefault(key, value)
+            kwargs.setdefault("post_processor", polish_post_process)
+        if precision == "int8":
+            logger.warning("⚠️ Backend ONNX używa grafów fp32 - ignoruję int8")
+        return OnnxWhisperBackend(model_name=model_name, model_dir=model_dir, **kwargs)
+
+    from stt_engine import PolishOptimizedSTT, WhisperSTTEngine
+
+    engine_class = PolishOptimizedSTT if use_polish_optimization else WhisperSTTEngine
+    kwargs.setdefault("language", "pl")
+    if precision is not None:
+        kwargs.setdefault("cpu_precision", precision)
+    if compile_mode:
+        kwargs.setdefault("compile_mode", compile_mode)
+    if mmap_weights:
+        kwargs.setdefault("mmap_weights", True)
+    return engine_class(model_name=model_name, model_dir=model_dir, **kwargs)
+
+
+def prepare_audio(audio_data: np.ndarray, sample_rate: int) -> np.ndarray:
+    """
+    Przygotuj audio dla modeli Whisper (16 kHz mono float32)
+
+    Args:
+        audio_data: Surowe dane audio (float32 lub PCM int16)
+        sample_rate: Częstotliwość próbkowania
+
+    Returns:
+        Przygotowane audio
+    """
+    # Jedyna konwersja int16 -> float32 na drodze audio (granica STT)
+    audio = to_float32(audio_data)
+
+    # Flatten jeśli stereo
+    if len(audio.shape) > 1:
+        audio = audio.flatten()
+
+    # Resample jeśli potrzeba (Whisper używa 16kHz)
+    if sample_rate != 16000:
+        # Filtr polifazowy (antyaliasing) - patrz resampler.py
+        audio = resample_polyphase(audio, sample_rate, 16000)
+
+    # Normalizacja
+    if audio.max() > 1.0 or audio.min() < -1.0:
+        audio = audio / max(abs(audio.max()), abs(audio.min()))
+
+    # Whisper wymaga minimum 0.1s audio
+    min_samples = int(0.1 * 16000)
+    if len(audio) < min_samples:
+        audio = np.pad(audio, (0, min_samples - len(audio)))
+
+    return audio
+
+
+def resample_linear(audio: np.ndarray, orig_sr: int, target_sr: int) -> np.ndarray:
+    """
+    Prosty resampling audio (interpolacja liniowa, bez filtra antyaliasingowego)
+
+    Zachowany jako punkt odniesienia dla benchmarks/bench_resampling.py
+
+    Args:
+        audio: Audio do resample
+        orig_sr: Oryginalna częstotliwość
+        target_sr: Docelowa częstotliwość
+
+    Returns:
+        Resampled audio
+    """
+    if orig_sr == target_sr:
+        return audio
+
+    ratio = target_sr / orig_sr
+    new_length = int(len(audio) * ratio)
+
+    old_indices = np.linspace(0, len(audio) - 1, new_length)
+    new_audio = np.interp(old_indices, np.arange(len(audio)), audio)
+
+    return new_audio.astype(np.float32)
+
+
+def confidence_from_segments(segments: List[Dict[str, Any]]) -> float:
+    """
+    Wskaźnik pewności 0-1 ze średniego avg_logprob segmentów
+
+    Args:
+        segments: Segmenty w formacie Whisper
+
+    Returns:
+        Confidence score 0-1 (0.5 gdy brak danych)
+    """
+    logprobs = []
+    for segment in segments:
+        if "avg_logprob" in segment:
+            logprobs.append(segment["avg_logprob"])
+        elif "tokens" in segment:
+            # Fallback - użyj liczby tokenów jako proxy
+            logprobs.append(-0.1 * len(segment["tokens"]))
+
+    if not logprobs:
+        return 0.5
+
+    # Konwertuj logprob na confidence (0-1)
+    return max(0.0, min(1.0, (float(np.mean(logprobs)) + 2.0) / 2.0))
+
+
+def split_timestamped(segment: Dict[str, Any], tokenizer) -> List[Dict[str, Any]]:
+    """
+    Podziel zdekodowany segment na segmenty wg tokenów czasu
+
+    Args:
+        segment: Segment z pełną listą tokenów (z tokenami czasu)
+        tokenizer: Tokenizer Whisper (timestamp_begin, eot, decode)
+
+    Returns:
+        Lista segmentów ze start/end względem początku okna
+    """
+    parts = []
+    start = 0.0
+    text_tokens: List[int] = []
+    for token in segment["tokens"]:
+        if token >= tokenizer.timestamp_begin:
+            timestamp = (token - tokenizer.timestamp_begin) * TIMESTAMP_PRECISION
+            if text_tokens:
+                parts.append((start, timestamp, text_tokens))
+                text_tokens = []
+            start = timestamp
+        elif token < tokenizer.eot:
+            text_tokens.append(token)
+    if text_tokens:
+        parts.append((start, segment["end"], text_tokens))
+
+    return [
+        {
+            **segment,
+            "start": part_start,
+            "end": part_end,
+            "text": tokenizer.decode(tokens).strip(),
+            "tokens": tokens,
+        }
+        for part_start, part_end, tokens in parts
+    ] or [segment]
+
+
+def polish_post_process(text: str) -> str:
+    """
+    Post-processing specyficzny dla polskiego języka
+
+    Args:
+        text: Surowy tekst z silnika STT
+
+    Returns:
+        Przetworzony tekst
+    """
+    if not text:
+        return text
+
+    # Podstawowe poprawki dla polskiego
+    corrections = {
+        # Częste błędy Whisper dla polskiego (brak polskich znaków)
+        " sie ": " się ",  # się
+        " ze ": " że ",  # że (tylko jeśli poprzedzone spacją)
+        "ze ": "że ",  # że na początku
+    }
+
+    processed_text = text
+
+    # Zastosuj podstawowe korekty
+    for wrong, correct in corrections.items():
+        if wrong in processed_text.lower():
+            # Zachowaj oryginalne wielkości liter
+            processed_text = processed_text.replace(wrong, correct)
+
+    # Kapitalizacja pierwszej litery
+    if processed_text:
+        processed_text = processed_text[0].upper() + processed_text[1:]
+
+    return processed_text.strip()
@@ -0,0 +1,312 @@
+"""
+STT Client - Klient i generator obciążenia dla STTServer
+Streaming client and local load generator for STTServer
+
+Użycie:
+    python src/stt_client.py --port 8765 --sessions 8 --duration 20
+
+Autor: AI Assistant
+Data: 2025-01-18
+"""
+
+import argparse
+import json
+import queue
+import socket
+import threading
+import time
+import logging
+import numpy as np
+from typing import Optional, Dict, Any, List
+
+from stt_server import send_frame, MSG_START, MSG_AUDIO, MSG_END
+
+# Konfiguracja loggingu
+logger = logging.getLogger(__name__)
+
+
+def generate_test_signal(
+    duration: float,
+    sample_rate: int = 16000,
+    speech_duration: float = 2.0,
+    pause_duration: float = 1.5,
+    seed: Optional[int] = None,
+) -> np.ndarray:
+    """
+    Wygeneruj syntetyczny sygnał: fragmenty "mowy" przedzielone ciszą
+
+    Args:
+        duration: Długość sygnału (s)
+        sample_rate: Częstotliwość próbkowania
+        speech_duration: Długość fragmentu mowy (s)
+        pause_duration: Długość pauzy (s)
+        seed: Ziarno generatora losowego
+
+    Returns:
+        Sygnał float32 w zakresie [-1, 1]
+    """
+    rng = np.random.default_rng(seed)
+    total = int(duration * sample_rate)
+    signal = rng.normal(0, 1e-4, total).astype(np.float32)
+
+    period = speech_duration + pause_duration
+    t = np.arange(total) / sample_rate
+    in_speech = (t % period) < speech_duration
+
+    # Harmoniczne z modulacją amplitudy ~4 Hz (rytm sylab)
+    f0 = 120 + 40 * rng.random()
+    voiced = sum(np.sin(2 * np.pi * f0 * k * t) / k for k in range(1, 6))
+    envelope = 0.5 + 0.5 * np.sin(2 * np.pi * 4 * t) ** 2
+    signal[in_speech] += (0.2 * voiced * envelope)[in_speech].astype(np.float32)
+
+    return np.clip(signal, -1.0, 1.0)
+
+
+class STTStreamClient:
+    """Klient pojedynczej sesji strumieniowej"""
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 8765,
+        session_id: Optional[str] = None,
+        sample_rate: int = 16000,
+        priority: int = 0,
+    ):
+        """
+        Inicjalizacja klienta
+
+        Args:
+            host: Adres serwera
+            port: Port serwera
+            session_id: Identyfikator sesji (None = nadany przez serwer)
+            sample_rate: Częstotliwość próbkowania wysyłanego audio
+            priority: Priorytet sesji
+        """
+        self.host = host
+        self.port = port
+        self.session_id = session_id
+        self.sample_rate = sample_rate
+        self.priority = priority
+
+        self.sock: Optional[socket.socket] = None
+        self.events: "queue.Queue[Dict[str, Any]]" = queue.Queue()
+        self._reader_thread: Optional[threading.Thread] = None
+
+    def connect(self):
+        """Połącz z serwerem i rozpocznij sesję"""
+        self.sock = socket.create_connection((self.host, self.port))
+        self._reader_thread = threading.Thread(target=self._read_events, daemon=True)
+        self._reader_thread.start()
+
+        options = {
+            "session_id": self.session_id,
+            "sample_rate": self.sample_rate,
+            "priority": self.priority,
+        }
+        send_frame(self.sock, MSG_START, json.dumps(options).encode("utf-8"))
+
+    def send_audio(self, audio: np.ndarray):
+        """
+        Wyślij porcję audio
+
+        Args:
+            audio: Audio float32 [-1, 1] lub int16
+        """
+        if audio.dtype != np.int16:
+            audio = (np.clip(audio, -1.0, 1.0) * 32767).astype(np.int16)
+        send_frame(self.sock, MSG_AUDIO, audio.astype("<i2").tobytes())
+
+    def end_stream(self):
+        """Zasygnalizuj koniec strumienia"""
+        send_frame(self.sock, MSG_END)
+
+    def _read_events(self):
+        """Czytaj zdarzenia JSON (linie) z serwera"""
+        buffer = b""
+        try:
+            while True:
+                data = self.sock.recv(65536)
+                if not data:
+                    break
+                buffer += data
+                while b"\n" in buffer:
+                    line, buffer = buffer.split(b"\n", 1)
+                    if line.strip():
+                        self.events.put(json.loads(line.decode("utf-8")))
+        except OSError:
+            pass
+        finally:
+            self.events.put({"event": "closed"})
+
+    def wait_for_end(self, timeout: float = 60.0) -> List[Dict[str, Any]]:
+        """
+        Zbierz zdarzenia aż do końca sesji
+
+        Returns:
+            Lista odebranych zdarzeń
+        """
+        collected = []
+        deadline = time.time() + timeout
+        while time.time() < deadline:
+            try:
+                event = self.events.get(timeout=max(deadline - time.time(), 0.01))
+            except queue.Empty:
+                break
+            collected.append(event)
+            if event["event"] in ("session_ended", "rejected", "error", "closed"):
+                break
+        return collected
+
+    def close(self):
+        """Zamknij połączenie"""
+        if self.sock:
+            try:
+                self.sock.close()
+            finally:
+                self.sock = None
+
+    def __enter__(self):
+        """Context manager entry"""
+        self.connect()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        """Context manager exit"""
+        self.close()
+
+
+def stream_signal(
+    client: STTStreamClient,
+    signal: np.ndarray,
+    chunk_ms: int = 64,
+    realtime: bool = True,
+):
+    """Wyślij sygnał w porcjach, opcjonalnie w tempie czasu rzeczywistego"""
+    chunk = int(client.sample_rate * chunk_ms / 1000)
+    start = time.time()
+    for offset in range(0, len(signal), chunk):
+        client.send_audio(signal[offset : offset + chunk])
+        if realtime:
+            target = start + (offset + chunk) / client.sample_rate
+            delay = target - time.time()
+            if delay > 0:
+                time.sleep(delay)
+    client.end_stream()
+
+
+def run_load_generator(
+    host: str = "127.0.0.1",
+    port: int = 8765,
+    num_sessions: int = 4,
+    duration: float = 20.0,
+    realtime: bool = True,
+    chunk_ms: int = 64,
+) -> Dict[str, Any]:
+    """
+    Uruchom równoległe sesje syntetycznego audio przeciwko serwerowi
+
+    Args:
+        host: Adres serwera
+        port: Port serwera
+        num_sessions: Liczba równoległych sesji
+        duration: Długość audio na sesję (s)
+        realtime: Czy wysyłać w tempie czasu rzeczywistego
+        chunk_ms: Rozmiar porcji audio (ms)
+
+    Returns:
+        Podsumowanie: opóźnienia per sesja i przepustowość globalna
+    """
+    results: Dict[str, Dict[str, Any]] = {}
+    results_lock = threading.Lock()
+
+    def run_session(index: int):
+        session_id = f"load-{index}"
+        signal = generate_test_signal(duration, seed=index)
+        with STTStreamClient(host, port, session_id=session_id) as client:
+            try:
+                stream_signal(client, signal, chunk_ms=chunk_ms, realtime=realtime)
+            except OSError:
+                # Serwer zamknął połączenie (np. sesja odrzucona)
+                pass
+            events = client.wait_for_end(timeout=duration + 120.0)
+
+        transcriptions = [e for e in events if e["event"] == "transcription"]
+        ended = [e for e in events if e["event"] == "session_ended"]
+        with results_lock:
+            results[session_id] = {
+                "segments": len(transcriptions),
+                "latencies": [e["latency"] for e in transcriptions],
+                "server_stats": ended[0]["stats"] if ended else None,
+                "rejected": any(e["event"] == "rejected" for e in events),
+            }
+
+    start = time.time()
+    threads = [
+        threading.Thread(target=run_session, args=(i,), daemon=True)
+        for i in range(num_sessions)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    wall_time = time.time() - start
+
+    all_latencies = [lat for r in results.values() for lat in r["latencies"]]
+    total_segments = sum(r["segments"] for r in results.values())
+
+    return {
+        "sessions": num_sessions,
+        "wall_time": wall_time,
+        "total_audio_seconds": num_sessions * duration,
+        "total_segments": total_segments,
+        "rejected_sessions": sum(1 for r in results.values() if r["rejected"]),
+        "segments_per_second": total_segments / wall_time if wall_time > 0 else 0,
+        "audio_seconds_per_second": (
+            num_sessions * duration / wall_time if wall_time > 0 else 0
+        ),
+        "avg_latency": float(np.mean(all_latencies)) if all_latencies else 0.0,
+        "p95_latency": (
+            float(np.percentile(all_latencies, 95)) if all_latencies else 0.0
+        ),
+        "per_session": results,
+    }
+
+
+def main():
+    """Generator obciążenia z linii poleceń"""
+    parser = argparse.ArgumentParser(description="Generator obciążenia dla STTServer")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--sessions", type=int, default=4)
+    parser.add_argument("--duration", type=float, default=20.0)
+    parser.add_argument(
+        "--fast", action="store_true", help="Wysyłaj audio bez czekania (nie real-time)"
+    )
+    args = parser.parse_args()
+
+    summary = run_load_generator(
+        host=args.host,
+        port=args.port,
+        num_sessions=args.sessions,
+        duration=args.duration,
+        realtime=not args.fast,
+    )
+
+    print(f"📊 Sesje: {summary['sessions']}, segmenty: {summary['total_segments']}")
+    print(f"⏱️ Czas: {summary['wall_time']:.1f}s")
+    print(f"🚀 Przepustowość: {summary['audio_seconds_per_second']:.2f}s audio/s")
+    print(
+        f"⌛ Opóźnienie: avg={summary['avg_latency']:.2f}s, "
+        f"p95={summary['p95_latency']:.2f}s"
+    )
+    for session_id, result in sorted(summary["per_session"].items()):
+        stats = result["server_stats"] or {}
+        print(
+            f"   {session_id}: {result['segments']} segmentów, "
+            f"avg={stats.get('avg_latency', 0.0):.2f}s"
+        )
+
+
+if __name__ == "__main__":
+    main()
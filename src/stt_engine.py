@@ -6,17 +6,29 @@ Autor: AI Assistant
 Data: 2025-01-18
 """
 
-import whisper
 import numpy as np
-import torch
 import logging
 import time
-from typing import Optional, Dict, Any, List, Union
-from dataclasses import dataclass
+from typing import TYPE_CHECKING, Optional, Dict, Any, List, Union
 from enum import Enum
 import threading
 import queue
 
+from model_cache import model_cache
+from model_weights import artifact_name, process_memory
+from resampler import resample_polyphase
+from stt_backend import (
+    POLISH_DEFAULTS,
+    TranscriptionResult,
+    confidence_from_segments,
+    polish_post_process,
+    prepare_audio,
+    split_timestamped,
+)
+
+if TYPE_CHECKING:
+    import whisper
+
 # Konfiguracja loggingu
 logger = logging.getLogger(__name__)
 
@@ -33,32 +45,16 @@ class WhisperModel(Enum):
     LARGE_V3 = "large-v3"
 
 
-@dataclass
-class TranscriptionResult:
-    """Wynik transkrypcji"""
-
-    text: str
-    language: str
-    confidence: float
-    processing_time: float
-    segments: List[Dict[str, Any]]
-    model_used: str
-
-    @property
-    def words_per_minute(self) -> float:
-        """Oblicz słowa na minutę"""
-        if self.processing_time <= 0:
-            return 0
-        word_count = len(self.text.split())
-        return (word_count / self.processing_time) * 60
-
-
 class WhisperSTTEngine:
     """
     Silnik Speech-to-Text oparty na OpenAI Whisper
     Zoptymalizowany dla języka polskiego
+
+    Implementacja STTBackend dla backendu "whisper" (PyTorch).
     """
 
+    backend_name = "whisper"
+
     def __init__(
         self,
         model_name: Union[WhisperModel, str] = WhisperModel.MEDIUM,
@@ -76,13 +72,22 @@ class WhisperSTTEngine:
         compression_ratio_threshold: float = 2.4,
         logprob_threshold: float = -1.0,
         no_speech_threshold: float = 0.6,
+        model_dir: Optional[str] = None,
+        cpu_precision: str = "fp32",
+        quantized_cache_dir: Optional[str] = None,
+        compile_mode: Optional[str] = None,
+        compiled_cache_dir: Optional[str] = None,
+        warmup: bool = True,
+        mmap_weights: bool = False,
+        mmap_dir: Optional[str] = None,
     ):
         """
         Inicjalizacja Whisper STT Engine
 
         Args:
             model_name: Nazwa modelu Whisper (tiny, base, small, medium, large)
-            device: Device do używania ('cpu', 'cuda', None=auto)
+            device: Device do używania ('cpu', 'cuda', None=auto - wybierany
+                przy ładowaniu modelu, bez importu torch w konstruktorze)
             language: Kod języka (domyślnie 'pl' dla polskiego)
             beam_size: Rozmiar beam search
             best_of: Liczba kandydatów do wyboru
@@ -96,12 +101,30 @@ class WhisperSTTEngine:
             compression_ratio_threshold: Próg dla wykrywania powtórzeń
             logprob_threshold: Próg prawdopodobieństwa
             no_speech_threshold: Próg dla wykrywania braku mowy
+            model_dir: Lokalny katalog z plikami <model>.pt (bez pobierania)
+            cpu_precision: "fp32" lub "int8" (dynamiczna kwantyzacja Linear na CPU)
+            quantized_cache_dir: Katalog cache modeli int8
+            compile_mode: None, "torchscript" lub "compile" (torch.compile)
+            compiled_cache_dir: Katalog cache artefaktów kompilacji
+            warmup: Czy rozgrzać model transkrypcją ciszy w load_model
+            mmap_weights: Czy ładować wagi fp32 przez mmap (współdzielone
+                między procesami przez page cache; tylko CPU)
+            mmap_dir: Katalog przekonwertowanych checkpointów mmap
         """
         self.model_name = (
             model_name.value if isinstance(model_name, WhisperModel) else model_name
         )
         self.language = language
-        self.device = device or ("cuda" if torch.cuda.is_available() else "cpu")
+        self.device = device or "auto"
+        self.model_dir = model_dir
+        self.cpu_precision = cpu_precision
+        self.quantized_cache_dir = quantized_cache_dir
+        self.compile_mode = compile_mode
+        self.compiled_cache_dir = compiled_cache_dir
+        self.warmup = warmup
+        self.mmap_weights = mmap_weights
+        self.mmap_dir = mmap_dir
+        self._fp16 = fp16
 
         # Parametry dekodowania
         self.decode_options = {
@@ -114,7 +137,8 @@ class WhisperSTTEngine:
             "suppress_tokens": suppress_tokens,
             "initial_prompt": initial_prompt,
             "condition_on_previous_text": condition_on_previous_text,
-            "fp16": fp16,
+            # fp16 na CPU nie działa (ustalane w _resolve_device)
+            "fp16": fp16 and self.device not in ("cpu", "auto"),
             "compression_ratio_threshold": compression_ratio_threshold,
             "logprob_threshold": logprob_threshold,
             "no_speech_threshold": no_speech_threshold,
@@ -124,11 +148,14 @@ class WhisperSTTEngine:
         self.model = None
         self.is_loaded = False
         self.previous_text = ""
+        self._inference_lock = threading.RLock()
 
         # Statystyki
         self.total_transcriptions = 0
         self.total_processing_time = 0
         self.model_load_time = 0
+        self.warmup_time = 0
+        self.load_memory: Dict[str, Any] = {}
 
         logger.info(
             f"🤖 WhisperSTTEngine inicjalizowany: model={self.model_name}, "
@@ -149,15 +176,25 @@ class WhisperSTTEngine:
         try:
             start_time = time.time()
             logger.info(f"📥 Ładowanie modelu Whisper: {self.model_name}")
+            self._resolve_device()
 
-            # Załaduj model z konfiguracją
-            self.model = whisper.load_model(self.model_name, device=self.device)
+            # Załaduj model (współdzielony między silnikami przez cache)
+            self.model = model_cache.acquire(
+                self._cache_key(), self._load_whisper_model
+            )
+            self._inference_lock = model_cache.get_lock(self._cache_key())
 
             self.model_load_time = time.time() - start_time
             self.is_loaded = True
+            self.load_memory = process_memory()
 
             logger.info(f"✅ Model załadowany w {self.model_load_time:.2f}s")
             logger.info(f"📊 Model info: {self.model_name} na {self.device}")
+            if self.load_memory:
+                logger.info(
+                    f"📊 Pamięć procesu: RSS {self.load_memory['rss_mb']:.0f} MB, "
+                    f"prywatna {self.load_memory.get('uss_mb', 0):.0f} MB"
+                )
 
             return True
 
@@ -166,6 +203,121 @@ class WhisperSTTEngine:
             self.is_loaded = False
             return False
 
+    def _resolve_device(self):
+        """
+        Wybierz urządzenie przy pierwszym ładowaniu modelu
+
+        Import torch trwa kilka sekund - konstruktor go nie wykonuje,
+        więc pipeline bez modelu (np. --no-stt) startuje bez tego kosztu.
+        """
+        if self.device == "auto":
+            import torch
+
+            self.device = "cuda" if torch.cuda.is_available() else "cpu"
+
+        self.decode_options["fp16"] = self._fp16 and self.device != "cpu"
+        if self.cpu_precision == "int8" and self.device != "cpu":
+            logger.warning("⚠️ Kwantyzacja int8 tylko na CPU - używam fp32")
+            self.cpu_precision = "fp32"
+        if self.mmap_weights and self.device != "cpu":
+            logger.warning("⚠️ Wagi mmap tylko na CPU - ładuję standardowo")
+            self.mmap_weights = False
+        if self.mmap_weights and self.cpu_precision == "int8":
+            # Model int8 ładowany jest z własnego cache (torch.load bez mmap) -
+            # mmap dotyczyłby tylko jednorazowej kwantyzacji przy braku cache
+            logger.warning("⚠️ int8 nie używa wag mmap - ładuję standardowo")
+            self.mmap_weights = False
+
+    def _load_whisper_model(self):
+        """
+        Załaduj model Whisper (opcjonalnie int8 i skompilowany) i rozgrzej go
+
+        Wywoływane raz na model współdzielony w model_cache - kolejne
+        silniki dostają model już skompilowany i rozgrzany.
+        """
+
+        import whisper
+
+        def load_checkpoint():
+            return whisper.load_model(
+                self.model_name, device=self.device, download_root=self.model_dir
+            )
+
+        def load_fp32():
+            if self.mmap_weights:
+                from model_weights import load_mmap_whisper
+
+                return load_mmap_whisper(
+                    self.model_name, load_checkpoint, self.mmap_dir, self.model_dir
+                )
+            return load_checkpoint()
+
+        if self.cpu_precision == "int8":
+            from model_quantization import load_quantized_whisper
+
+            model = load_quantized_whisper(
+                self.model_name, load_fp32, self.quantized_cache_dir, self.model_dir
+            )
+        else:
+            model = load_fp32()
+
+        # Dekodowanie fp16 (GPU) podaje enkoderowi mel w half - osobny ślad
+        fp16 = self.decode_options["fp16"]
+        precision = "fp16" if fp16 else self.cpu_precision
+        model_key = f"{artifact_name(self.model_name, self.model_dir)}-{precision}"
+        if self.compile_mode:
+            import torch
+            from model_compilation import compile_whisper
+
+            model = compile_whisper(
+                model,
+                model_key,
+                self.compile_mode,
+                self.compiled_cache_dir,
+                dtype=torch.float16 if fp16 else None,
+            )
+
+        if self.warmup:
+            self._warm_up(model)
+            if self.compile_mode == "compile":
+                from model_compilation import save_compile_artifacts
+
+                save_compile_artifacts(model_key, self.compiled_cache_dir, self.device)
+
+        return model
+
+    def _warm_up(self, model):
+        """
+        Rozgrzewka: transkrypcja 1 s szumu tą samą ścieżką co transcribe_audio
+
+        Pierwsze wywołanie modelu płaci za leniwą inicjalizację (alokator,
+        kernele, kompilacja grafów) - bez rozgrzewki koszt ten trafia
+        do pierwszego prawdziwego segmentu.
+        """
+        import torch
+
+        start_time = time.time()
+        dummy = np.random.default_rng(0).normal(0, 1e-3, 16000).astype(np.float32)
+        try:
+            with torch.no_grad():
+                model.transcribe(dummy, **self.decode_options)
+            self.warmup_time = time.time() - start_time
+            logger.info(f"🔥 Rozgrzewka modelu: {self.warmup_time:.2f}s")
+        except Exception as e:
+            logger.warning(f"⚠️ Rozgrzewka modelu nieudana: {e}")
+
+    def _cache_key(self) -> tuple:
+        """Klucz modelu w współdzielonym cache"""
+        return (
+            "whisper",
+            self.model_name,
+            self.model_dir,
+            self.device,
+            self.cpu_precision,
+            self.compile_mode,
+            self.mmap_weights,
+        )
+
     def transcribe_audio(
         self, audio_data: np.ndarray, sample_rate: int = 16000
     ) -> Optional[TranscriptionResult]:
@@ -198,8 +350,9 @@ class WhisperSTTEngine:
                     -200:
                 ]  # Ostatnie 200 znaków
 
-            # Transkrypcja
-            result = self.model.transcribe(audio, **decode_options)
+            # Transkrypcja (model może być współdzielony z innymi silnikami)
+            with self._inference_lock:
+                result = self.model.transcribe(audio, **decode_options)
 
             processing_time = time.time() - start_time
 
@@ -232,45 +385,232 @@ class WhisperSTTEngine:
             logger.error(f"❌ Błąd transkrypcji: {e}")
             return None
 
-    def _prepare_audio(self, audio_data: np.ndarray, sample_rate: int) -> np.ndarray:
+    def transcribe_batch(
+        self,
+        audio_batch: List[np.ndarray],
+        sample_rate: int = 16000,
+        with_timestamps: bool = False,
+    ) -> List[Optional[TranscriptionResult]]:
         """
-        Przygotuj audio dla Whisper
+        Transkrybuj wiele segmentów jednym przebiegiem enkodera/dekodera
+
+        Segmenty do 30 s są dekodowane razem przez whisper.decode na
+        batchu spektrogramów. Dłuższe segmenty idą ścieżką transcribe_audio.
+        Batch nie używa kontekstu poprzedniego tekstu (segmenty mogą
+        pochodzić z różnych sesji) - tylko stałego initial_prompt.
 
         Args:
-            audio_data: Surowe dane audio
+            audio_batch: Lista segmentów audio
             sample_rate: Częstotliwość próbkowania
+            with_timestamps: Czy dekodować tokeny czasu (segments z start/end
+                w obrębie okna, np. dla długich okien w trybie catch-up)
 
         Returns:
-            Przygotowane audio dla Whisper
+            Lista wyników (None dla segmentów z błędem) w kolejności wejścia
         """
-        # Whisper oczekuje 16kHz mono float32
-        audio = audio_data.astype(np.float32)
+        if not self.is_loaded:
+            if not self.load_model():
+                return [None] * len(audio_batch)
+
+        import torch
+        import whisper
 
-        # Flatten jeśli stereo
-        if len(audio.shape) > 1:
-            audio = audio.flatten()
+        results: List[Optional[TranscriptionResult]] = [None] * len(audio_batch)
+        prepared = [self._prepare_audio(audio, sample_rate) for audio in audio_batch]
 
-        # Resample jeśli potrzeba (Whisper używa 16kHz)
-        if sample_rate != 16000:
-            # Prosty resampling - w produkcji użyj librosa.resample
-            audio = self._simple_resample(audio, sample_rate, 16000)
+        short = []
+        for i, audio in enumerate(prepared):
+            if len(audio) <= whisper.audio.N_SAMPLES:
+                short.append(i)
+            else:
+                results[i] = WhisperSTTEngine.transcribe_audio(
+                    self, audio_batch[i], sample_rate
+                )
 
-        # Normalizacja
-        if audio.max() > 1.0 or audio.min() < -1.0:
-            audio = audio / max(abs(audio.max()), abs(audio.min()))
+        if not short:
+            return results
 
-        # Whisper wymaga minimum 0.1s audio
-        min_samples = int(0.1 * 16000)
-        if len(audio) < min_samples:
-            audio = np.pad(audio, (0, min_samples - len(audio)))
+        try:
+            start_time = time.time()
 
-        return audio
+            n_mels = getattr(self.model.dims, "n_mels", 80)
+            mels = torch.stack(
+                [
+                    whisper.log_mel_spectrogram(
+                        whisper.pad_or_trim(prepared[i]), n_mels
+                    )
+                    for i in short
+                ]
+            ).to(self.model.device)
+
+            with self._inference_lock:
+                decoded = whisper.decode(
+                    self.model, mels, self._batch_decoding_options(with_timestamps)
+                )
+
+            processing_time = (time.time() - start_time) / len(short)
+
+            for i, item in zip(short, decoded):
+                text = item.text.strip()
+                # Ta sama reguła ciszy co w model.transcribe
+                if (
+                    item.no_speech_prob > self.decode_options["no_speech_threshold"]
+                    and item.avg_logprob < self.decode_options["logprob_threshold"]
+                ):
+                    text = ""
+
+                segment = {
+                    "start": 0.0,
+                    "end": len(prepared[i]) / 16000,
+                    "text": text,
+                    "tokens": item.tokens,
+                    "avg_logprob": item.avg_logprob,
+                    "compression_ratio": item.compression_ratio,
+                    "no_speech_prob": item.no_speech_prob,
+                }
+                segments = (
+                    self._split_timestamped(segment)
+                    if with_timestamps and text
+                    else [segment]
+                )
+                results[i] = TranscriptionResult(
+                    text=text,
+                    language=item.language,
+                    confidence=self._calculate_confidence({"segments": [segment]}),
+                    processing_time=processing_time,
+                    segments=segments,
+                    model_used=self.model_name,
+                )
+
+            self.total_transcriptions += len(short)
+            self.total_processing_time += processing_time * len(short)
+
+            logger.debug(
+                f"📦 Batch transkrypcja: {len(short)} segmentów "
+                f"({processing_time * len(short):.2f}s)"
+            )
+
+        except Exception as e:
+            logger.error(f"❌ Błąd transkrypcji batch: {e}")
+
+        return results
+
+    def no_speech_probability(
+        self, audio_data: np.ndarray, sample_rate: int = 16000
+    ) -> Optional[float]:
+        """
+        Prawdopodobieństwo braku mowy z pierwszego kroku dekodera
+
+        Jeden przebieg enkodera i jeden krok dekodera na sekwencji SOT -
+        ta sama wartość, którą model.transcribe porównuje z
+        no_speech_threshold, ale bez pełnego dekodowania (beam search,
+        fallback temperatury).
+
+        Args:
+            audio_data: Dane audio
+            sample_rate: Częstotliwość próbkowania
+
+        Returns:
+            Prawdopodobieństwo 0-1 lub None w przypadku błędu
+        """
+        if not self.is_loaded:
+            if not self.load_model():
+                return None
+
+        import torch
+        import whisper
+
+        try:
+            audio = self._prepare_audio(audio_data, sample_rate)
+            n_mels = getattr(self.model.dims, "n_mels", 80)
+            dtype = torch.float16 if self.decode_options["fp16"] else torch.float32
+            mel = whisper.log_mel_spectrogram(whisper.pad_or_trim(audio), n_mels)
+            mel = mel[None].to(self.model.device, dtype)
+
+            tokenizer = whisper.tokenizer.get_tokenizer(
+                self.model.is_multilingual,
+                num_languages=self.model.num_languages,
+                language=self.decode_options["language"],
+                task="transcribe",
+            )
+            tokens = torch.tensor([list(tokenizer.sot_sequence)]).to(self.model.device)
+
+            with self._inference_lock, torch.no_grad():
+                logits = self.model.logits(tokens, self.model.embed_audio(mel))
+
+            sot_index = tokenizer.sot_sequence.index(tokenizer.sot)
+            probs = logits[0, sot_index].float().softmax(dim=-1)
+            return float(probs[tokenizer.no_speech])
+
+        except Exception as e:
+            logger.warning(f"⚠️ Błąd obliczania no_speech_prob: {e}")
+            return None
+
+    def _batch_decoding_options(
+        self, with_timestamps: bool = False
+    ) -> "whisper.DecodingOptions":
+        """
+        Opcje whisper.decode odpowiadające decode_options silnika
+
+        Beam search w whisper.decode nie działa dla batcha > 1
+        (niezgodne wymiary KV-cache), więc ścieżka batch dekoduje
+        zachłannie (temperature=0) albo samplingiem (best_of).
+        """
+        import whisper
+
+        options = self.decode_options
+        temperature = options["temperature"]
+
+        return whisper.DecodingOptions(
+            task="transcribe",
+            language=options["language"],
+            temperature=temperature,
+            best_of=options["best_of"] if temperature > 0 else None,
+            length_penalty=options["length_penalty"],
+            prompt=options["initial_prompt"],
+            suppress_tokens=options["suppress_tokens"],
+            fp16=options["fp16"],
+            without_timestamps=not with_timestamps,
+        )
+
+    def _split_timestamped(self, segment: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """
+        Podziel wynik whisper.decode na segmenty wg tokenów czasu
+
+        Args:
+            segment: Segment z pełną listą tokenów (z tokenami czasu)
+
+        Returns:
+            Lista segmentów ze start/end względem początku okna
+        """
+        import whisper
+
+        tokenizer = whisper.tokenizer.get_tokenizer(
+            self.model.is_multilingual,
+            num_languages=self.model.num_languages,
+            language=self.decode_options["language"],
+            task="transcribe",
+        )
+        return split_timestamped(segment, tokenizer)
+
+    def _prepare_audio(self, audio_data: np.ndarray, sample_rate: int) -> np.ndarray:
+        """
+        Przygotuj audio dla Whisper
+
+        Args:
+            audio_data: Surowe dane audio
+            sample_rate: Częstotliwość próbkowania
+
+        Returns:
+            Przygotowane audio dla Whisper
+        """
+        return prepare_audio(audio_data, sample_rate)
 
     def _simple_resample(
         self, audio: np.ndarray, orig_sr: int, target_sr: int
     ) -> np.ndarray:
         """
-        Prosty resampling audio
+        Resampling audio (filtr polifazowy z antyaliasingiem)
 
         Args:
             audio: Audio do resample
@@ -280,18 +620,7 @@ class WhisperSTTEngine:
         Returns:
             Resampled audio
         """
-        if orig_sr == target_sr:
-            return audio
-
-        # Prosty linear interpolation resampling
-        ratio = target_sr / orig_sr
-        new_length = int(len(audio) * ratio)
-
-        # Linear interpolation
-        old_indices = np.linspace(0, len(audio) - 1, new_length)
-        new_audio = np.interp(old_indices, np.arange(len(audio)), audio)
-
-        return new_audio.astype(np.float32)
+        return resample_polyphase(audio, orig_sr, target_sr)
 
     def _calculate_confidence(self, result: Dict[str, Any]) -> float:
         """
@@ -304,27 +633,7 @@ class WhisperSTTEngine:
             Confidence score 0-1
         """
         try:
-            # Użyj średniego logprob z segmentów
-            segments = result.get("segments", [])
-            if not segments:
-                return 0.5  # Domyślna wartość
-
-            logprobs = []
-            for segment in segments:
-                if "avg_logprob" in segment:
-                    logprobs.append(segment["avg_logprob"])
-                elif "tokens" in segment:
-                    # Fallback - użyj liczby tokenów jako proxy
-                    logprobs.append(-0.1 * len(segment["tokens"]))
-
-            if logprobs:
-                avg_logprob = np.mean(logprobs)
-                # Konwertuj logprob na confidence (0-1)
-                confidence = max(0.0, min(1.0, (avg_logprob + 2.0) / 2.0))
-                return confidence
-
-            return 0.5
-
+            return confidence_from_segments(result.get("segments", []))
         except Exception as e:
             logger.warning(f"⚠️ Błąd obliczania confidence: {e}")
             return 0.5
@@ -332,11 +641,18 @@ class WhisperSTTEngine:
     def get_model_info(self) -> Dict[str, Any]:
         """Pobierz informacje o modelu"""
         return {
+            "backend": self.backend_name,
             "model_name": self.model_name,
             "device": self.device,
+            "precision": self.cpu_precision,
+            "compile_mode": self.compile_mode,
             "language": self.language,
             "is_loaded": self.is_loaded,
             "load_time": self.model_load_time,
+            "warmup_time": self.warmup_time,
+            "mmap_weights": self.mmap_weights,
+            "load_memory": self.load_memory,
+            "memory": process_memory(),
             "total_transcriptions": self.total_transcriptions,
             "avg_processing_time": (
                 self.total_processing_time / max(self.total_transcriptions, 1)
@@ -350,6 +666,8 @@ class WhisperSTTEngine:
             self.load_model()
 
         if self.model:
+            import whisper
+
             return list(whisper.tokenizer.LANGUAGES.values())
         return []
 
@@ -372,12 +690,14 @@ class WhisperSTTEngine:
     def unload_model(self):
         """Zwolnij model z pamięci"""
         if self.model is not None:
-            del self.model
             self.model = None
             self.is_loaded = False
+            model_cache.release(self._cache_key())
 
             # Wyczyść cache GPU jeśli używane
-            if torch.cuda.is_available():
+            if self.device.startswith("cuda"):
+                import torch
+
                 torch.cuda.empty_cache()
 
             logger.info("🗑️ Model Whisper zwolniony z pamięci")
@@ -401,19 +721,8 @@ class PolishOptimizedSTT(WhisperSTTEngine):
         """
         Inicjalizacja z optymalizacjami dla polskiego
         """
-        # Optymalne ustawienia dla polskiego
-        polish_defaults = {
-            "language": "pl",
-            "initial_prompt": "To jest nagranie w języku polskim. ",
-            "beam_size": 5,
-            "best_of": 5,
-            "temperature": 0.0,
-            "patience": 1.0,
-            "no_speech_threshold": 0.5,  # Niższy próg dla polskiego
-        }
-
-        # Merge z user settings
-        for key, value in polish_defaults.items():
+        # Optymalne ustawienia dla polskiego (merge z user settings)
+        for key, value in POLISH_DEFAULTS.items():
             kwargs.setdefault(key, value)
 
         super().__init__(**kwargs)
@@ -468,30 +777,7 @@ class PolishOptimizedSTT(WhisperSTTEngine):
         Returns:
             Przetworzony tekst
         """
-        if not text:
-            return text
-
-        # Podstawowe poprawki dla polskiego
-        corrections = {
-            # Częste błędy Whisper dla polskiego (brak polskich znaków)
-            " sie ": " się ",  # się
-            " ze ": " że ",  # że (tylko jeśli poprzedzone spacją)
-            "ze ": "że ",  # że na początku
-        }
-
-        processed_text = text
-
-        # Zastosuj podstawowe korekty
-        for wrong, correct in corrections.items():
-            if wrong in processed_text.lower():
-                # Zachowaj oryginalne wielkości liter
-                processed_text = processed_text.replace(wrong, correct)
-
-        # Kapitalizacja pierwszej litery
-        if processed_text:
-            processed_text = processed_text[0].upper() + processed_text[1:]
-
-        return processed_text.strip()
+        return polish_post_process(text)
 
     def transcribe_audio(
         self, audio_data: np.ndarray, sample_rate: int = 16000
@@ -522,3 +808,34 @@ class PolishOptimizedSTT(WhisperSTTEngine):
                 )
 
         return result
+
+    def transcribe_batch(
+        self,
+        audio_batch: List[np.ndarray],
+        sample_rate: int = 16000,
+        with_timestamps: bool = False,
+    ) -> List[Optional[TranscriptionResult]]:
+        """
+        Transkrypcja batch z post-processingiem dla polskiego
+        """
+        results = super().transcribe_batch(audio_batch, sample_rate, with_timestamps)
+
+        for i, result in enumerate(results):
+            if result and result.text:
+                segments = result.segments
+                if with_timestamps:
+                    # Tekst segmentów trafia do wyników catch-up
+                    segments = [
+                        {**seg, "text": self.post_process_polish_text(seg["text"])}
+                        for seg in segments
+                    ]
+                results[i] = TranscriptionResult(
+                    text=self.post_process_polish_text(result.text),
+                    language=result.language,
+                    confidence=result.confidence,
+                    processing_time=result.processing_time,
+                    segments=segments,
+                    model_used=result.model_used,
+                )
+
+        return results
@@ -0,0 +1,935 @@
+"""
+STT Server - Serwer strumieniowy dla wielu sesji
+Multi-session streaming STT server sharing one pool of STT workers
+
+Protokół (TCP):
+    klient -> serwer: ramki [typ: 1 bajt][długość: uint32 BE][payload]
+        S - start sesji, payload JSON {"session_id", "sample_rate", "priority"}
+        A - audio, payload PCM int16 little-endian mono
+        E - koniec strumienia
+    serwer -> klient: zdarzenia JSON, jedno na linię (UTF-8)
+
+Autor: AI Assistant
+Data: 2025-01-18
+"""
+
+import os
+import json
+import socket
+import socketserver
+import struct
+import threading
+import time
+import uuid
+import logging
+import numpy as np
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Optional, Callable, Deque, Dict, Any, List, Set, Tuple
+
+from voice_activity_detector import SimpleVAD
+from frame_features import FrameFeatureExtractor
+from speech_segmenter import SpeechSegment, SpeechSegmenter
+from batch_scheduler import MicroBatchScheduler
+
+# Konfiguracja loggingu
+logger = logging.getLogger(__name__)
+
+# Ramki protokołu
+FRAME_HEADER = struct.Struct(">cI")
+MSG_START = b"S"
+MSG_AUDIO = b"A"
+MSG_END = b"E"
+MAX_FRAME_SIZE = 4 * 1024 * 1024
+
+# Limity statystyk długo działającego serwera
+LATENCY_WINDOW = 1000  # ostatnie opóźnienia sesji (p95)
+FINISHED_SESSIONS_LIMIT = 100  # statystyki ostatnich zakończonych sesji
+
+
+def send_frame(sock: socket.socket, msg_type: bytes, payload: bytes = b""):
+    """Wyślij ramkę protokołu"""
+    sock.sendall(FRAME_HEADER.pack(msg_type, len(payload)) + payload)
+
+
+def recv_exact(sock: socket.socket, size: int) -> Optional[bytes]:
+    """Odbierz dokładnie `size` bajtów (None gdy połączenie zamknięte)"""
+    buffer = bytearray()
+    while len(buffer) < size:
+        chunk = sock.recv(size - len(buffer))
+        if not chunk:
+            return None
+        buffer.extend(chunk)
+    return bytes(buffer)
+
+
+def recv_frame(sock: socket.socket) -> Optional[Tuple[bytes, bytes]]:
+    """
+    Odbierz ramkę protokołu
+
+    Returns:
+        Tuple (typ, payload) lub None gdy połączenie zamknięte
+    """
+    header = recv_exact(sock, FRAME_HEADER.size)
+    if header is None:
+        return None
+
+    msg_type, length = FRAME_HEADER.unpack(header)
+    if length > MAX_FRAME_SIZE:
+        raise ValueError(f"Ramka za duża: {length} bajtów")
+
+    payload = recv_exact(sock, length) if length else b""
+    if payload is None:
+        return None
+    return msg_type, payload
+
+
+def _default_engine_factory(
+    model_name: str = "base",
+    backend: str = "whisper",
+    model_dir: Optional[str] = None,
+    precision: Optional[str] = None,
+    compile_mode: Optional[str] = None,
+    mmap_weights: bool = False,
+) -> Callable[[], Any]:
+    """Fabryka domyślnego silnika STT (import backendu dopiero przy użyciu)"""
+
+    def factory():
+        from stt_backend import create_stt_backend
+
+        return create_stt_backend(
+            backend,
+            model_name=model_name,
+            model_dir=model_dir,
+            precision=precision,
+            compile_mode=compile_mode,
+            mmap_weights=mmap_weights,
+        )
+
+    return factory
+
+
+@dataclass
+class TranscriptionJob:
+    """Segment sesji oczekujący na transkrypcję"""
+
+    session: "StreamSession"
+    segment: SpeechSegment
+    segment_index: int
+    submitted_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+
+
+class StreamSession:
+    """
+    Pojedynczy strumień PCM z własnym stanem VAD i segmentacji
+
+    Czas segmentów to czas strumienia (próbki / sample_rate), więc
+    wynik nie zależy od tempa, w jakim klient wysyła audio.
+    """
+
+    def __init__(
+        self,
+        session_id: str,
+        send_event: Callable[[Dict[str, Any]], None],
+        sample_rate: int = 16000,
+        chunk_size: int = 1024,
+        priority: int = 0,
+        vad=None,
+        min_segment_duration: float = 0.5,
+        max_segment_duration: float = 30.0,
+        silence_timeout: float = 2.0,
+    ):
+        """
+        Inicjalizacja sesji
+
+        Args:
+            session_id: Identyfikator sesji
+            send_event: Funkcja wysyłająca zdarzenie JSON do klienta
+            sample_rate: Częstotliwość próbkowania strumienia
+            chunk_size: Rozmiar chunka dla VAD
+            priority: Priorytet sesji (wyższy = ważniejszy)
+            vad: Instancja VAD (domyślnie SimpleVAD)
+            min_segment_duration: Min. długość segmentu mowy (s)
+            max_segment_duration: Max. długość segmentu mowy (s)
+            silence_timeout: Timeout ciszy dla zakończenia segmentu (s)
+        """
+        self.session_id = session_id
+        self.sample_rate = sample_rate
+        self.chunk_size = chunk_size
+        self.priority = priority
+        self._send_event = send_event
+
+        self.vad = vad or SimpleVAD(sample_rate=sample_rate)
+        self.segmenter = SpeechSegmenter(
+            sample_rate=sample_rate,
+            min_segment_duration=min_segment_duration,
+            max_segment_duration=max_segment_duration,
+            silence_timeout=silence_timeout,
+        )
+        self.frame_features = FrameFeatureExtractor(sample_rate)
+
+        # Audio oczekujące na pełny chunk
+        self._pending_audio = np.zeros(0, dtype=np.float32)
+        self.samples_received = 0
+
+        # Kontekst tekstowy sesji (prompt dla kolejnych segmentów)
+        self.previous_text = ""
+
+        # Zadania w toku
+        self._pending_jobs = 0
+        self._jobs_done = threading.Condition()
+
+        # Statystyki
+        self.created_at = time.time()
+        self.segments_submitted = 0
+        self.segments_transcribed = 0
+        self.segments_shed = 0
+        # Okno do p95; średnia i maksimum z liczników całej sesji
+        self.latencies: Deque[float] = deque(maxlen=LATENCY_WINDOW)
+        self.total_latency = 0.0
+        self.max_latency = 0.0
+
+    @property
+    def stream_time(self) -> float:
+        """Czas strumienia w sekundach"""
+        return self.samples_received / self.sample_rate
+
+    def feed_audio(self, pcm: np.ndarray) -> List[SpeechSegment]:
+        """
+        Przetwórz kolejną porcję audio
+
+        Args:
+            pcm: Audio int16 lub float32
+
+        Returns:
+            Lista zakończonych segmentów mowy
+        """
+        if pcm.dtype == np.int16:
+            pcm = pcm.astype(np.float32) / 32768.0
+        self._pending_audio = np.concatenate([self._pending_audio, pcm])
+
+        segments = []
+        while len(self._pending_audio) >= self.chunk_size:
+            chunk = self._pending_audio[: self.chunk_size]
+            self._pending_audio = self._pending_audio[self.chunk_size :]
+            segment = self._process_chunk(chunk)
+            if segment is not None:
+                segments.append(segment)
+        return segments
+
+    def _process_chunk(self, chunk: np.ndarray) -> Optional[SpeechSegment]:
+        """Przepuść chunk przez VAD i segmenter"""
+        self.samples_received += len(chunk)
+        features = self.frame_features.compute(chunk)
+        is_speech, _ = self.vad.process_chunk(chunk, features)
+        return self.segmenter.process(chunk, is_speech, self.stream_time, features)
+
+    def finish(self) -> Optional[SpeechSegment]:
+        """Zakończ strumień i zwróć ostatni segment"""
+        if len(self._pending_audio):
+            self.samples_received += len(self._pending_audio)
+            self._pending_audio = np.zeros(0, dtype=np.float32)
+        return self.segmenter.flush(self.stream_time)
+
+    def create_job(self, segment: SpeechSegment) -> TranscriptionJob:
+        """Utwórz zadanie transkrypcji dla segmentu"""
+        with self._jobs_done:
+            self._pending_jobs += 1
+            self.segments_submitted += 1
+            return TranscriptionJob(
+                session=self, segment=segment, segment_index=self.segments_submitted
+            )
+
+    def cancel_job(self, job: TranscriptionJob):
+        """Wycofaj zadanie nieprzyjęte przez pulę workerów"""
+        with self._jobs_done:
+            self._pending_jobs -= 1
+            self._jobs_done.notify_all()
+
+    def on_transcription(self, job: TranscriptionJob, result: Any):
+        """
+        Obsłuż wynik transkrypcji (wywoływane z wątku workera)
+
+        Args:
+            job: Zakończone zadanie
+            result: TranscriptionResult lub None
+        """
+        latency = time.time() - job.submitted_at
+        job.segment.transcription = result
+
+        if result is not None and result.text:
+            self.previous_text = result.text
+
+        event = {
+            "event": "transcription",
+            "session_id": self.session_id,
+            "segment_index": job.segment_index,
+            "start": job.segment.start_time,
+            "end": job.segment.end_time,
+            "text": result.text if result else "",
+            "confidence": result.confidence if result else 0.0,
+            "processing_time": result.processing_time if result else 0.0,
+            "latency": latency,
+        }
+
+        try:
+            self._send_event(event)
+        finally:
+            with self._jobs_done:
+                self.latencies.append(latency)
+                self.total_latency += latency
+                self.max_latency = max(self.max_latency, latency)
+                self.segments_transcribed += 1
+                self._pending_jobs -= 1
+                self._jobs_done.notify_all()
+
+    def on_shed(self, segment: SpeechSegment):
+        """Powiadom klienta o segmencie pominiętym przez zrzucanie obciążenia"""
+        self.segments_shed += 1
+        self._send_event(
+            {
+                "event": "segment_shed",
+                "session_id": self.session_id,
+                "start": segment.start_time,
+                "end": segment.end_time,
+            }
+        )
+
+    def wait_for_pending(self, timeout: Optional[float] = None) -> bool:
+        """Poczekaj aż wszystkie segmenty sesji zostaną przetranskrybowane"""
+        with self._jobs_done:
+            return self._jobs_done.wait_for(lambda: self._pending_jobs == 0, timeout)
+
+    def get_statistics(self) -> Dict[str, Any]:
+        """Pobierz statystyki sesji"""
+        with self._jobs_done:
+            latencies = list(self.latencies)
+            pending = self._pending_jobs
+            transcribed = self.segments_transcribed
+            total_latency, max_latency = self.total_latency, self.max_latency
+
+        return {
+            "session_id": self.session_id,
+            "priority": self.priority,
+            "audio_seconds": self.stream_time,
+            "segments_submitted": self.segments_submitted,
+            "segments_transcribed": transcribed,
+            "segments_shed": self.segments_shed,
+            "pending_jobs": pending,
+            "avg_latency": total_latency / transcribed if transcribed else 0.0,
+            "p95_latency": float(np.percentile(latencies, 95)) if latencies else 0.0,
+            "max_latency": max_latency,
+        }
+
+
+class STTWorkerPool:
+    """
+    Pula workerów STT współdzielona przez wszystkie sesje
+
+    Każdy worker ma własny silnik, ale silniki z tym samym modelem
+    dzielą jedną instancję modelu przez model_cache. Segmenty trafiają
+    do workerów przez MicroBatchScheduler - batch z kilku sesji idzie
+    do transcribe_batch silnika (jeśli silnik go udostępnia).
+    """
+
+    def __init__(
+        self,
+        engine_factory: Callable[[], Any],
+        num_workers: int = 2,
+        max_queue_size: int = 256,
+        max_batch_size: int = 8,
+        max_batch_wait: float = 0.05,
+    ):
+        """
+        Inicjalizacja puli
+
+        Args:
+            engine_factory: Funkcja tworząca silnik STT dla workera
+            num_workers: Liczba wątków workerów
+            max_queue_size: Max. liczba oczekujących segmentów
+            max_batch_size: Max. liczba segmentów w batchu
+            max_batch_wait: Max. czas zbierania batcha (s)
+        """
+        self.engine_factory = engine_factory
+        self.num_workers = num_workers
+        self.scheduler = MicroBatchScheduler(
+            max_batch_size=max_batch_size,
+            max_wait=max_batch_wait,
+            max_pending=max_queue_size,
+        )
+
+        self.engines: List[Any] = []
+        self.workers: List[threading.Thread] = []
+        self.is_running = False
+
+        # Callback po każdym batchu: (audio_seconds, processing_seconds)
+        self.on_batch_complete: Optional[Callable[[float, float], None]] = None
+
+        # Statystyki
+        self._stats_lock = threading.Lock()
+        self.total_jobs = 0
+        self.total_audio_seconds = 0.0
+        self.total_processing_seconds = 0.0
+        self.total_queue_delay = 0.0
+
+    def start(self) -> bool:
+        """Utwórz silniki, załaduj modele i uruchom workery"""
+        if self.is_running:
+            return True
+
+        for i in range(self.num_workers):
+            engine = self.engine_factory()
+            if hasattr(engine, "load_model") and not engine.load_model():
+                logger.error("❌ Worker STT nie mógł załadować modelu")
+                return False
+            self.engines.append(engine)
+
+        self.is_running = True
+        for i, engine in enumerate(self.engines):
+            worker = threading.Thread(
+                target=self._worker_loop,
+                args=(engine,),
+                daemon=True,
+                name=f"STTWorker-{i}",
+            )
+            worker.start()
+            self.workers.append(worker)
+
+        logger.info(f"🧵 STTWorkerPool uruchomiony: {self.num_workers} workerów")
+        return True
+
+    def stop(self):
+        """Zatrzymaj workery i zwolnij silniki"""
+        if not self.is_running:
+            return
+
+        self.is_running = False
+        for worker in self.workers:
+            worker.join(timeout=5.0)
+        self.workers.clear()
+
+        for engine in self.engines:
+            if hasattr(engine, "unload_model"):
+                engine.unload_model()
+        self.engines.clear()
+
+        logger.info("🧵 STTWorkerPool zatrzymany")
+
+    def submit(self, job: TranscriptionJob, timeout: Optional[float] = None) -> bool:
+        """
+        Dodaj zadanie do schedulera (blokuje przy pełnej kolejce - backpressure)
+
+        Returns:
+            True jeśli zadanie przyjęte
+        """
+        job.submitted_at = time.time()
+        return self.scheduler.submit(job.session.session_id, job, timeout=timeout)
+
+    def _worker_loop(self, engine):
+        """Pętla workera STT"""
+        while self.is_running:
+            batch = self.scheduler.next_batch(timeout=0.1)
+            if batch:
+                self._run_batch(engine, batch)
+
+    def _run_batch(self, engine, batch: List[TranscriptionJob]):
+        """Wykonaj batch zadań transkrypcji"""
+        started_at = time.time()
+        for job in batch:
+            job.started_at = started_at
+
+        if len(batch) > 1 and hasattr(engine, "transcribe_batch"):
+            # Sesje mają własne sample_rate (handshake) - batch per częstotliwość
+            groups: Dict[int, List[int]] = {}
+            for i, job in enumerate(batch):
+                groups.setdefault(job.segment.sample_rate, []).append(i)
+
+            results = [None] * len(batch)
+            for sample_rate, indices in groups.items():
+                if len(indices) == 1:
+                    results[indices[0]] = self._transcribe_single(
+                        engine, batch[indices[0]]
+                    )
+                    continue
+                try:
+                    group_results = engine.transcribe_batch(
+                        [batch[i].segment.audio_data for i in indices], sample_rate
+                    )
+                except Exception as e:
+                    logger.error(f"❌ Błąd transkrypcji batch w workerze: {e}")
+                    continue
+                for i, result in zip(indices, group_results):
+                    results[i] = result
+        else:
+            results = [self._transcribe_single(engine, job) for job in batch]
+
+        processing_time = time.time() - started_at
+        audio_seconds = sum(
+            job.segment.num_samples / max(job.segment.sample_rate, 1) for job in batch
+        )
+        with self._stats_lock:
+            self.total_jobs += len(batch)
+            self.total_processing_seconds += processing_time
+            self.total_audio_seconds += audio_seconds
+            for job in batch:
+                self.total_queue_delay += started_at - job.submitted_at
+
+        if self.on_batch_complete is not None:
+            try:
+                self.on_batch_complete(audio_seconds, processing_time)
+            except Exception as e:
+                logger.error(f"❌ Błąd callbacku batcha: {e}")
+
+        for job, result in zip(batch, results):
+            try:
+                job.session.on_transcription(job, result)
+            except Exception as e:
+                logger.error(f"❌ Błąd wysyłania wyniku: {e}")
+
+    def _transcribe_single(self, engine, job: TranscriptionJob):
+        """Transkrybuj pojedynczy segment z kontekstem sesji"""
+        try:
+            # Kontekst tekstowy należy do sesji, nie do silnika
+            if hasattr(engine, "previous_text"):
+                engine.previous_text = job.session.previous_text
+
+            return engine.transcribe_audio(
+                job.segment.audio_data, job.segment.sample_rate
+            )
+        except Exception as e:
+            logger.error(f"❌ Błąd transkrypcji w workerze: {e}")
+            return None
+
+    def get_statistics(self) -> Dict[str, Any]:
+        """Pobierz statystyki puli"""
+        batching = self.scheduler.get_statistics()
+        with self._stats_lock:
+            total_jobs = self.total_jobs
+            return {
+                "num_workers": self.num_workers,
+                "queue_size": batching["pending"],
+                "total_jobs": total_jobs,
+                "total_audio_seconds": self.total_audio_seconds,
+                "total_processing_seconds": self.total_processing_seconds,
+                "avg_queue_delay": self.total_queue_delay / max(total_jobs, 1),
+                "real_time_factor": (
+                    self.total_processing_seconds / self.total_audio_seconds
+                    if self.total_audio_seconds > 0
+                    else 0.0
+                ),
+                "batching": batching,
+            }
+
+
+class _ThreadingTCPServer(socketserver.ThreadingTCPServer):
+    """TCP server z wątkiem na połączenie"""
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+class _SessionHandler(socketserver.BaseRequestHandler):
+    """Handler połączenia - deleguje do STTServer"""
+
+    def handle(self):
+        self.server.stt_server.handle_connection(self.request, self.client_address)
+
+
+class STTServer:
+    """
+    Serwer strumieniowy STT obsługujący wiele sesji równocześnie
+
+    Każde połączenie TCP to jedna sesja z własnym VAD i segmenterem.
+    Wszystkie sesje współdzielą jedną pulę workerów STT.
+    """
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 8765,
+        engine_factory: Optional[Callable[[], Any]] = None,
+        stt_model: str = "base",
+        stt_backend: str = "whisper",
+        model_dir: Optional[str] = None,
+        stt_precision: Optional[str] = None,
+        stt_compile: Optional[str] = None,
+        stt_mmap_weights: bool = False,
+        num_workers: int = 2,
+        worker_mode: str = "thread",
+        max_batch_size: int = 8,
+        max_batch_wait: float = 0.05,
+        chunk_size: int = 1024,
+        vad_factory: Optional[Callable[[int], Any]] = None,
+        min_segment_duration: float = 0.5,
+        max_segment_duration: float = 30.0,
+        silence_timeout: float = 2.0,
+        admission_controller=None,
+        performance_monitor=None,
+    ):
+        """
+        Inicjalizacja serwera
+
+        Args:
+            host: Adres nasłuchiwania
+            port: Port nasłuchiwania (0 = losowy wolny port)
+            engine_factory: Funkcja tworząca silnik STT (domyślnie create_stt_backend)
+            stt_model: Model Whisper dla domyślnej fabryki
+            stt_backend: Backend STT dla domyślnej fabryki
+            model_dir: Lokalny katalog modeli dla domyślnej fabryki
+            stt_precision: Precyzja na CPU dla domyślnej fabryki ("fp32" / "int8")
+            stt_compile: Kompilacja modelu dla domyślnej fabryki
+                ("torchscript" / "compile")
+            stt_mmap_weights: Wagi mmap dla domyślnej fabryki
+            num_workers: Liczba workerów STT
+            worker_mode: "thread" (wątki, model współdzielony przez model_cache)
+                lub "fork" (procesy z fork-servera, model dziedziczony przez fork)
+            max_batch_size: Max. liczba segmentów w batchu (1 = bez batchowania)
+            max_batch_wait: Max. czas zbierania batcha (s)
+            chunk_size: Rozmiar chunka dla VAD
+            vad_factory: Funkcja tworząca VAD dla sesji (argument: sample_rate;
+                process_chunk(chunk, features) jak SimpleVAD)
+            min_segment_duration: Min. długość segmentu mowy (s)
+            max_segment_duration: Max. długość segmentu mowy (s)
+            silence_timeout: Timeout ciszy dla zakończenia segmentu (s)
+            admission_controller: AdmissionController dla nowych sesji (opcjonalny)
+            performance_monitor: PerformanceOptimizer zasilający kontroler metrykami
+        """
+        self.host = host
+        self.port = port
+        self.chunk_size = chunk_size
+        self.vad_factory = vad_factory or (lambda sr: SimpleVAD(sample_rate=sr))
+        self.segment_options = {
+            "min_segment_duration": min_segment_duration,
+            "max_segment_duration": max_segment_duration,
+            "silence_timeout": silence_timeout,
+        }
+
+        pool_class = STTWorkerPool
+        if worker_mode == "fork":
+            if hasattr(os, "fork"):
+                from fork_server import ForkServerPool
+
+                pool_class = ForkServerPool
+            else:
+                logger.warning("⚠️ Brak os.fork - workery STT jako wątki")
+        elif worker_mode != "thread":
+            raise ValueError(f"Nieznany tryb workerów: {worker_mode}")
+
+        self.worker_mode = "fork" if pool_class is not STTWorkerPool else "thread"
+        self.pool = pool_class(
+            engine_factory
+            or _default_engine_factory(
+                stt_model,
+                stt_backend,
+                model_dir,
+                stt_precision,
+                stt_compile,
+                stt_mmap_weights,
+            ),
+            num_workers=num_workers,
+            max_batch_size=max_batch_size,
+            max_batch_wait=max_batch_wait,
+        )
+
+        # Kontrola przyjmowania i zrzucanie obciążenia
+        self.admission_controller = admission_controller
+        self.performance_monitor = performance_monitor
+        if admission_controller is not None:
+            self.pool.on_batch_complete = self._on_batch_complete
+
+        # Stan serwera
+        self.sessions: Dict[str, StreamSession] = {}
+        # Identyfikatory zajęte od handshake (także w kolejce przyjmowania)
+        self._session_ids: Set[str] = set()
+        self._sessions_lock = threading.Lock()
+        self._tcp_server: Optional[_ThreadingTCPServer] = None
+        self._server_thread: Optional[threading.Thread] = None
+        self.is_running = False
+
+        # Statystyki
+        self.start_time = None
+        self.total_sessions = 0
+        self.finished_sessions: Deque[Dict[str, Any]] = deque(
+            maxlen=FINISHED_SESSIONS_LIMIT
+        )
+
+        logger.info(
+            f"🌐 STTServer zainicjalizowany: {host}:{port}, workers={num_workers}"
+        )
+
+    def start(self) -> bool:
+        """Załaduj modele i zacznij przyjmować połączenia"""
+        if self.is_running:
+            return True
+
+        if not self.pool.start():
+            return False
+
+        if self.performance_monitor is not None:
+            scheduler = self.pool.scheduler
+            self.performance_monitor.register_queue_source(
+                "stt_backlog", lambda: scheduler.pending_count
+            )
+            self.performance_monitor.register_timing_source(
+                "stt_queue_delay",
+                lambda: scheduler.get_statistics()["avg_queue_delay"],
+            )
+            if self.admission_controller is not None:
+                self.performance_monitor.add_performance_callback(
+                    self.admission_controller.on_metrics
+                )
+
+        self._tcp_server = _ThreadingTCPServer((self.host, self.port), _SessionHandler)
+        self._tcp_server.stt_server = self
+        self.port = self._tcp_server.server_address[1]
+
+        self._server_thread = threading.Thread(
+            target=self._tcp_server.serve_forever, daemon=True, name="STTServer"
+        )
+        self._server_thread.start()
+
+        self.is_running = True
+        self.start_time = time.time()
+        logger.info(f"✅ STTServer nasłuchuje na {self.host}:{self.port}")
+        return True
+
+    def stop(self):
+        """Zatrzymaj serwer i pulę workerów"""
+        if not self.is_running:
+            return
+
+        self.is_running = False
+        if self._tcp_server:
+            self._tcp_server.shutdown()
+            self._tcp_server.server_close()
+            self._tcp_server = None
+
+        if self.performance_monitor is not None:
+            self.performance_monitor.unregister_source("stt_backlog")
+            self.performance_monitor.unregister_source("stt_queue_delay")
+            if self.admission_controller is not None:
+                self.performance_monitor.remove_performance_callback(
+                    self.admission_controller.on_metrics
+                )
+
+        self.pool.stop()
+        logger.info("✅ STTServer zatrzymany")
+
+    def handle_connection(self, sock: socket.socket, address):
+        """
+        Obsłuż jedno połączenie (jedną sesję)
+
+        Args:
+            sock: Gniazdo klienta
+            address: Adres klienta
+        """
+        send_lock = threading.Lock()
+
+        def send_event(event: Dict[str, Any]):
+            data = (json.dumps(event, ensure_ascii=False) + "\n").encode("utf-8")
+            with send_lock:
+                sock.sendall(data)
+
+        session = None
+        reserved_id = None
+        try:
+            frame = recv_frame(sock)
+            if frame is None or frame[0] != MSG_START:
+                send_event({"event": "error", "message": "expected start frame"})
+                return
+
+            options = json.loads(frame[1].decode("utf-8") or "{}")
+            session_id = str(options.get("session_id") or uuid.uuid4().hex[:8])
+            priority = int(options.get("priority", 0))
+
+            if not self._reserve_session_id(session_id):
+                send_event(
+                    {
+                        "event": "rejected",
+                        "session_id": session_id,
+                        "reason": "duplicate_session_id",
+                    }
+                )
+                return
+            reserved_id = session_id
+
+            if not self._admit(session_id, priority, send_event):
+                send_event(
+                    {
+                        "event": "rejected",
+                        "session_id": session_id,
+                        "reason": "capacity",
+                    }
+                )
+                return
+
+            session = self._create_session(session_id, priority, options, send_event)
+            send_event(
+                {
+                    "event": "session_started",
+                    "session_id": session.session_id,
+                    "sample_rate": session.sample_rate,
+                }
+            )
+
+            while True:
+                frame = recv_frame(sock)
+                if frame is None:
+                    break
+
+                msg_type, payload = frame
+                if msg_type == MSG_AUDIO:
+                    pcm = np.frombuffer(payload, dtype="<i2")
+                    for segment in session.feed_audio(pcm):
+                        self._submit(session, segment)
+                elif msg_type == MSG_END:
+                    break
+
+            # Ostatni segment i oczekiwanie na wyniki
+            segment = session.finish()
+            if segment is not None:
+                self._submit(session, segment)
+            session.wait_for_pending(timeout=60.0)
+
+            send_event(
+                {
+                    "event": "session_ended",
+                    "session_id": session.session_id,
+                    "stats": session.get_statistics(),
+                }
+            )
+
+        except (ConnectionError, OSError) as e:
+            logger.warning(f"⚠️ Połączenie {address} przerwane: {e}")
+        except Exception as e:
+            logger.error(f"❌ Błąd sesji {address}: {e}")
+            try:
+                send_event({"event": "error", "message": str(e)})
+            except OSError:
+                pass
+        finally:
+            if session is not None:
+                self._close_session(session)
+            if reserved_id is not None:
+                with self._sessions_lock:
+                    self._session_ids.discard(reserved_id)
+
+    def _reserve_session_id(self, session_id: str) -> bool:
+        """Zajmij identyfikator sesji (False gdy sesja o tym id już trwa)"""
+        with self._sessions_lock:
+            if session_id in self._session_ids:
+                return False
+            self._session_ids.add(session_id)
+            return True
+
+    def _admit(self, session_id: str, priority: int, send_event: Callable) -> bool:
+        """Przepuść sesję przez kontrolę przyjmowania (jeśli włączona)"""
+        if self.admission_controller is None:
+            return True
+
+        return self.admission_controller.try_admit(
+            session_id,
+            priority,
+            on_queued=lambda: send_event({"event": "queued", "session_id": session_id}),
+        )
+
+    def _create_session(
+        self,
+        session_id: str,
+        priority: int,
+        options: Dict[str, Any],
+        send_event: Callable,
+    ) -> StreamSession:
+        """Utwórz i zarejestruj sesję"""
+        sample_rate = int(options.get("sample_rate", 16000))
+
+        session = StreamSession(
+            session_id=session_id,
+            send_event=send_event,
+            sample_rate=sample_rate,
+            chunk_size=self.chunk_size,
+            priority=priority,
+            vad=self.vad_factory(sample_rate),
+            **self.segment_options,
+        )
+
+        with self._sessions_lock:
+            self.sessions[session_id] = session
+            self.total_sessions += 1
+
+        logger.info(f"🔗 Sesja {session_id} rozpoczęta ({sample_rate}Hz)")
+        return session
+
+    def _close_session(self, session: StreamSession):
+        """Wyrejestruj sesję i zachowaj jej statystyki"""
+        with self._sessions_lock:
+            self.sessions.pop(session.session_id, None)
+            self.finished_sessions.append(session.get_statistics())
+        if self.admission_controller is not None:
+            self.admission_controller.release(session.session_id)
+        logger.info(f"🔌 Sesja {session.session_id} zakończona")
+
+    def _submit(self, session: StreamSession, segment: SpeechSegment):
+        """Wyślij segment sesji do puli workerów"""
+        if self.admission_controller is not None and (
+            self.admission_controller.should_shed(session.priority)
+        ):
+            session.on_shed(segment)
+            return
+
+        job = session.create_job(segment)
+        if not self.pool.submit(job):
+            # Pula nie przyjęła zadania - klient dostaje segment_shed
+            # zamiast czekać na transkrypcję, która nie nadejdzie
+            session.cancel_job(job)
+            session.on_shed(segment)
+
+    def _on_batch_complete(self, audio_seconds: float, processing_seconds: float):
+        """Przekaż pomiar batcha do kontrolera przyjmowania"""
+        controller = self.admission_controller
+        controller.record_transcription(audio_seconds, processing_seconds)
+        batching = self.pool.scheduler.get_statistics()
+        controller.update_backlog(batching["pending"], batching["avg_queue_delay"])
+
+    def get_statistics(self) -> Dict[str, Any]:
+        """Pobierz statystyki serwera"""
+        uptime = time.time() - self.start_time if self.start_time else 0
+        pool_stats = self.pool.get_statistics()
+
+        with self._sessions_lock:
+            active = [s.get_statistics() for s in self.sessions.values()]
+            finished = list(self.finished_sessions)
+
+        return {
+            "server": {
+                "is_running": self.is_running,
+                "worker_mode": self.worker_mode,
+                "uptime_seconds": uptime,
+                "active_sessions": len(active),
+                "total_sessions": self.total_sessions,
+                "segments_per_second": (
+                    pool_stats["total_jobs"] / uptime if uptime > 0 else 0
+                ),
+                "audio_seconds_per_second": (
+                    pool_stats["total_audio_seconds"] / uptime if uptime > 0 else 0
+                ),
+            },
+            "pool": pool_stats,
+            "admission": (
+                self.admission_controller.get_statistics()
+                if self.admission_controller is not None
+                else None
+            ),
+            "sessions": active,
+            "finished_sessions": finished,
+        }
+
+    def __enter__(self):
+        """Context manager entry"""
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        """Context manager exit"""
+        self.stop()
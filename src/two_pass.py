@@ -0,0 +1,283 @@
+"""
+Two-Pass Refiner - Druga, dokładniejsza transkrypcja segmentów w tle
+Two-tier transcription: a small model gives live text, a large model refines it
+
+Autor: AI Assistant
+Data: 2025-01-18
+"""
+
+import os
+import time
+import logging
+import threading
+from collections import deque
+from typing import Any, Callable, Deque, Dict, Optional
+
+from speech_segmenter import SpeechSegment
+
+# Konfiguracja loggingu
+logger = logging.getLogger(__name__)
+
+# Rewizje transkrypcji segmentu
+REVISION_NONE = 0
+REVISION_PROVISIONAL = 1
+REVISION_FINAL = 2
+
+# Okno opóźnień poprawek w statystykach (średnia, p95)
+REFINE_DELAY_WINDOW = 1000
+
+
+def lower_thread_priority(nice: int) -> bool:
+    """
+    Obniż priorytet bieżącego wątku (Linux: nice per wątek)
+
+    Wątki tworzone później przez ten wątek (np. pula OpenMP torch)
+    dziedziczą priorytet, więc cała praca drugiego modelu ustępuje
+    wątkom pierwszego.
+
+    Args:
+        nice: Przyrost wartości nice (0-19)
+
+    Returns:
+        True jeśli priorytet obniżono
+    """
+    if nice <= 0 or not hasattr(os, "setpriority"):
+        return False
+    try:
+        tid = threading.get_native_id()
+        current = os.getpriority(os.PRIO_PROCESS, tid)
+        os.setpriority(os.PRIO_PROCESS, tid, min(current + nice, 19))
+        return True
+    except OSError as e:
+        logger.debug(f"Nie można obniżyć priorytetu wątku: {e}")
+        return False
+
+
+class TwoPassRefiner:
+    """
+    Drugi poziom transkrypcji: większy model poprawia tekst segmentów
+
+    Segmenty z tekstem tymczasowym (rewizja 1, mały model) trafiają do
+    kolejki. Wątek o obniżonym priorytecie transkrybuje je ponownie
+    większym modelem i podmienia segment.transcription (rewizja 2) -
+    eksporty operujące na segmentach widzą najlepszą dostępną rewizję.
+
+    Drugi poziom ustępuje pierwszemu: nowe zadanie zaczyna się dopiero
+    gdy live_busy() zwraca False (brak zaległości i transkrypcji na żywo)
+    i nie wcześniej niż resume_delay po ostatnim zajętym sprawdzeniu.
+    Trwającej transkrypcji nie da się przerwać - pracuje ona wtedy
+    z niższym priorytetem systemowym (nice).
+    """
+
+    def __init__(
+        self,
+        stt_engine,
+        live_busy: Optional[Callable[[], bool]] = None,
+        max_pending: int = 64,
+        nice: int = 10,
+        resume_delay: float = 0.5,
+    ):
+        """
+        Inicjalizacja refinera
+
+        Args:
+            stt_engine: Silnik STT drugiego poziomu (większy model)
+            live_busy: Funkcja zwracająca True gdy pierwszy poziom jest zajęty
+            max_pending: Max. segmentów w kolejce (najstarsze są porzucane)
+            nice: Obniżenie priorytetu wątku drugiego poziomu
+            resume_delay: Czas bez zajętości pierwszego poziomu przed zadaniem (s)
+        """
+        self.stt_engine = stt_engine
+        self.live_busy = live_busy or (lambda: False)
+        self.max_pending = max_pending
+        self.nice = nice
+        self.resume_delay = resume_delay
+
+        # Callback po podmianie tekstu (segment z nową rewizją)
+        self.revision_callback: Optional[Callable[[SpeechSegment], None]] = None
+
+        self._pending: Deque[SpeechSegment] = deque()
+        self._condition = threading.Condition()
+        self._in_progress = 0
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+        # Statystyki
+        self.submitted = 0
+        self.refined = 0
+        self.changed = 0
+        self.dropped = 0
+        self.failed = 0
+        self.yields = 0
+        self.processing_time = 0.0
+        self.refine_delays: Deque[float] = deque(maxlen=REFINE_DELAY_WINDOW)
+
+    def start(self):
+        """Uruchom wątek drugiego poziomu"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._refine_loop, daemon=True, name="TwoPassRefiner"
+        )
+        self._thread.start()
+        logger.info("🔁 Two-pass refiner uruchomiony")
+
+    def stop(self, drain_timeout: float = 0.0):
+        """
+        Zatrzymaj wątek
+
+        Args:
+            drain_timeout: Max. czas dokańczania kolejki przed zatrzymaniem (s)
+        """
+        if drain_timeout > 0:
+            self.wait_idle(drain_timeout)
+        self._stop.set()
+        with self._condition:
+            self._condition.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout=5.0)
+            self._thread = None
+
+        with self._condition:
+            if self._pending:
+                logger.warning(f"⚠️ {len(self._pending)} segmentów bez drugiej rewizji")
+            self._pending.clear()
+
+    def submit(self, segment: SpeechSegment) -> bool:
+        """
+        Dodaj segment z tekstem tymczasowym do poprawy
+
+        Args:
+            segment: Segment po pierwszej transkrypcji
+
+        Returns:
+            True jeśli segment przyjęty
+        """
+        with self._condition:
+            if len(self._pending) >= self.max_pending:
+                self._pending.popleft()
+                self.dropped += 1
+            self._pending.append(segment)
+            self.submitted += 1
+            self._condition.notify()
+        return True
+
+    def wait_idle(self, timeout: Optional[float] = None) -> bool:
+        """
+        Poczekaj na opróżnienie kolejki
+
+        Returns:
+            True jeśli wszystkie segmenty poprawiono przed timeoutem
+        """
+        deadline = None if timeout is None else time.time() + timeout
+        with self._condition:
+            while self._pending or self._in_progress:
+                remaining = None if deadline is None else deadline - time.time()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._condition.wait(timeout=remaining)
+            return True
+
+    def _wait_for_live_idle(self) -> bool:
+        """Czekaj aż pierwszy poziom będzie wolny przez resume_delay"""
+        idle_since = None
+        busy = False
+        while not self._stop.is_set():
+            if self.live_busy():
+                if not busy:
+                    self.yields += 1
+                busy = True
+                idle_since = None
+            else:
+                busy = False
+                now = time.time()
+                if idle_since is None:
+                    idle_since = now
+                if now - idle_since >= self.resume_delay:
+                    return True
+            self._stop.wait(0.02)
+        return False
+
+    def _refine_loop(self):
+        """Pętla drugiego poziomu"""
+        lower_thread_priority(self.nice)
+
+        while not self._stop.is_set():
+            with self._condition:
+                while not self._pending and not self._stop.is_set():
+                    self._condition.wait(timeout=0.1)
+                if self._stop.is_set():
+                    break
+
+            if not self._wait_for_live_idle():
+                break
+
+            with self._condition:
+                if not self._pending:
+                    continue
+                # Najnowszy segment najpierw - to on jest na ekranie
+                segment = self._pending.pop()
+                self._in_progress += 1
+
+            try:
+                self._refine(segment)
+            finally:
+                with self._condition:
+                    self._in_progress -= 1
+                    self._condition.notify_all()
+
+    def _refine(self, segment: SpeechSegment):
+        """Transkrybuj segment większym modelem i podmień tekst"""
+        started_at = time.time()
+        # Segmenty idą od najnowszego - kontekst poprzedniej poprawki byłby
+        # tekstem późniejszej wypowiedzi, więc każdy segment bez promptu
+        if hasattr(self.stt_engine, "previous_text"):
+            self.stt_engine.previous_text = ""
+        try:
+            result = self.stt_engine.transcribe_audio(
+                segment.audio_data, segment.sample_rate
+            )
+        except Exception as e:
+            logger.error(f"❌ Błąd drugiej transkrypcji: {e}")
+            result = None
+
+        self.processing_time += time.time() - started_at
+        if result is None:
+            self.failed += 1
+            return
+
+        previous = segment.text
+        segment.transcription = result
+        segment.revision = REVISION_FINAL
+        self.refined += 1
+        self.refine_delays.append(time.time() - segment.end_time)
+        if result.text != previous:
+            self.changed += 1
+            logger.info(f"🔁 Rewizja: '{previous}' -> '{result.text}'")
+
+        if self.revision_callback is not None:
+            try:
+                self.revision_callback(segment)
+            except Exception as e:
+                logger.error(f"❌ Błąd w revision callback: {e}")
+
+    def get_statistics(self) -> Dict[str, Any]:
+        """Pobierz statystyki drugiego poziomu"""
+        delays = sorted(self.refine_delays)
+        with self._condition:
+            pending = len(self._pending)
+        return {
+            "pending": pending,
+            "submitted": self.submitted,
+            "refined": self.refined,
+            "changed": self.changed,
+            "dropped": self.dropped,
+            "failed": self.failed,
+            "yields": self.yields,
+            "processing_time": self.processing_time,
+            "avg_refine_delay": sum(delays) / len(delays) if delays else 0.0,
+            "p95_refine_delay": (
+                delays[int(0.95 * (len(delays) - 1))] if delays else 0.0
+            ),
+        }
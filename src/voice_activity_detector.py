@@ -8,9 +8,13 @@ Data: 2025-01-18
 
 import numpy as np
 import logging
-from typing import Optional, List, Tuple
+from typing import Optional, List, Sequence, Tuple
 from enum import Enum
 
+from audio_format import INT16_SCALE
+from frame_features import FrameFeatureExtractor, FrameFeatures
+from noise_floor import NoiseFloorTracker
+
 # Konfiguracja loggingu
 logger = logging.getLogger(__name__)
 
@@ -28,6 +32,10 @@ class SimpleVAD:
     """
     Prosta implementacja Voice Activity Detection
     Oparta na analizie energii i crossing rate
+
+    W trybie adaptacyjnym próg energii liczony jest względem poziomu tła
+    (NoiseFloorTracker), a nie jako wartość bezwzględna - ten sam VAD
+    działa na cichym i na zaszumionym mikrofonie.
     """
 
     def __init__(
@@ -38,6 +46,9 @@ class SimpleVAD:
         zcr_threshold: float = 0.1,
         min_speech_frames: int = 3,
         min_silence_frames: int = 5,
+        adaptive: bool = False,
+        floor_margin_db: float = 6.0,
+        calibration_frames: int = 0,
     ):
         """
         Inicjalizacja SimpleVAD
@@ -49,6 +60,10 @@ class SimpleVAD:
             zcr_threshold: Próg zero crossing rate
             min_speech_frames: Min. ramek dla potwierdzenia mowy
             min_silence_frames: Min. ramek dla potwierdzenia ciszy
+            adaptive: Progi względem śledzonego poziomu tła
+            floor_margin_db: Próg energii ponad tłem (tryb adaptacyjny)
+            calibration_frames: Ramki kalibracji na starcie - zawsze cisza,
+                pomijane gdy wczytano profil szumu urządzenia
         """
         self.sample_rate = sample_rate
         self.frame_duration_ms = frame_duration_ms
@@ -70,6 +85,14 @@ class SimpleVAD:
         self.decision_history = []
         self.history_size = 10
 
+        # Cechy chunka, gdy wywołujący nie przekazał już policzonych
+        self.feature_extractor = FrameFeatureExtractor(sample_rate)
+
+        # Tryb adaptacyjny: poziom tła z niskiego percentyla poziomów ramek
+        self.floor_margin_db = floor_margin_db
+        self.calibration_frames = calibration_frames
+        self.noise_floor = NoiseFloorTracker() if adaptive else None
+
         logger.info(
             f"🎙️ SimpleVAD zainicjalizowany: frame={frame_duration_ms}ms, "
             f"energy_thr={energy_threshold}, zcr_thr={zcr_threshold}"
@@ -80,7 +103,7 @@ class SimpleVAD:
         Oblicz energię ramki audio
 
         Args:
-            audio_frame: Ramka audio
+            audio_frame: Ramka audio (float32 lub int16)
 
         Returns:
             Energia znormalizowana (0-1)
@@ -88,8 +111,13 @@ class SimpleVAD:
         if len(audio_frame) == 0:
             return 0.0
 
-        # RMS energy
-        rms = np.sqrt(np.mean(audio_frame**2))
+        # RMS energy (int16: kwadraty w float32 bez przepełnienia i bez
+        # konwersji całej ramki do [-1, 1])
+        if audio_frame.dtype == np.int16:
+            squares = np.square(audio_frame, dtype=np.float32)
+            rms = np.sqrt(np.mean(squares)) / INT16_SCALE
+        else:
+            rms = np.sqrt(np.mean(audio_frame**2))
 
         # Normalizacja logarytmiczna
         if rms > 0:
@@ -120,18 +148,27 @@ class SimpleVAD:
 
         return zcr
 
-    def analyze_frame(self, audio_frame: np.ndarray) -> dict:
+    def analyze_frame(
+        self, audio_frame: np.ndarray, features: Optional[FrameFeatures] = None
+    ) -> dict:
         """
         Analizuj pojedynczą ramkę audio
 
         Args:
             audio_frame: Ramka audio
+            features: Cechy ramki policzone wcześniej (None = policz tutaj)
 
         Returns:
             Słownik z wynikami analizy
         """
-        energy = self.calculate_energy(audio_frame)
-        zcr = self.calculate_zero_crossing_rate(audio_frame)
+        if features is None:
+            features = self.feature_extractor.compute(audio_frame)
+        # Ta sama normalizacja co calculate_energy / calculate_zero_crossing_rate
+        energy = min(1.0, features.rms * 10)
+        zcr = features.zcr
+
+        if self.noise_floor is not None:
+            self.noise_floor.update(features.level_db)
 
         # Dodaj do historii
         self.energy_history.append(energy)
@@ -151,6 +188,7 @@ class SimpleVAD:
             "zcr": zcr,
             "avg_energy": avg_energy,
             "avg_zcr": avg_zcr,
+            "level_db": features.level_db,
             "frame_size": len(audio_frame),
         }
 
@@ -167,6 +205,9 @@ class SimpleVAD:
         energy = analysis["avg_energy"]
         zcr = analysis["avg_zcr"]
 
+        if self.noise_floor is not None:
+            return self._is_speech_frame_adaptive(analysis["level_db"])
+
         # Logika decyzyjna
         speech_indicators = 0
 
@@ -181,6 +222,35 @@ class SimpleVAD:
         # Decyzja: przynajmniej jeden wskaźnik musi być pozytywny
         return speech_indicators >= 1
 
+    @property
+    def is_calibrating(self) -> bool:
+        """Czy trwa kalibracja poziomu tła (bez profilu urządzenia)"""
+        tracker = self.noise_floor
+        return (
+            tracker is not None
+            and tracker.prior is None
+            and tracker.frames_seen <= self.calibration_frames
+        )
+
+    def _is_speech_frame_adaptive(self, level_db: float) -> bool:
+        """
+        Decyzja z progiem poziomu względem tła
+
+        Poziom w dB, nie energia min(1, rms * 10) - ta nasyca się przy
+        -20 dBFS i na głośnym mikrofonie próg byłby nieosiągalny. Stały
+        zakres ZCR nie jest tu używany: na korpusie z benchmarks/ nie
+        odrzucał fałszywych segmentów (kliknięcia, drzwi), a gubił
+        wypowiedzi w szumie białym, który przesuwa ZCR mowy poza zakres.
+        """
+        floor_db = self.noise_floor.floor_db
+        if floor_db is None or self.is_calibrating:
+            return False
+
+        threshold_db = floor_db + self.floor_margin_db
+        # Próg w skali calculate_energy (statystyki)
+        self.energy_threshold = min(1.0, 10 ** (threshold_db / 20) * 10)
+        return level_db > threshold_db
+
     def update_state(self, is_current_speech: bool) -> bool:
         """
         Aktualizuj stan VAD z hysterezą
@@ -210,12 +280,15 @@ class SimpleVAD:
 
         return self.is_speech
 
-    def process_chunk(self, audio_chunk: np.ndarray) -> Tuple[bool, dict]:
+    def process_chunk(
+        self, audio_chunk: np.ndarray, features: Optional[FrameFeatures] = None
+    ) -> Tuple[bool, dict]:
         """
         Przetwórz chunk audio i zwróć decyzję VAD
 
         Args:
             audio_chunk: Chunk audio do analizy
+            features: Cechy chunka współdzielone z pipeline (opcjonalne)
 
         Returns:
             Tuple (is_speech, analysis_details)
@@ -225,7 +298,7 @@ class SimpleVAD:
             audio_chunk = audio_chunk.flatten()
 
         # Analizuj ramkę
-        analysis = self.analyze_frame(audio_chunk)
+        analysis = self.analyze_frame(audio_chunk, features)
 
         # Sprawdź czy to mowa
         is_current_speech = self.is_speech_frame(analysis)
@@ -245,6 +318,80 @@ class SimpleVAD:
 
         return stable_speech, analysis
 
+    def process_batch(
+        self,
+        audio_chunks: Sequence[np.ndarray],
+        features: Optional[Sequence[FrameFeatures]] = None,
+    ) -> List[Tuple[bool, dict]]:
+        """
+        Przetwórz kolejne chunki naraz - wynik jak process_chunk dla każdego
+
+        Cechy i średnie kroczące historii liczone są wektorowo dla całej
+        partii; w pętli po chunkach zostaje tylko histereza (i poziom tła
+        w trybie adaptacyjnym) na skalarach.
+
+        Args:
+            audio_chunks: Chunki audio w kolejności nagrania
+            features: Cechy chunków z pipeline (None = policz tutaj)
+
+        Returns:
+            Lista (is_speech, analysis_details) - po jednej na chunk
+        """
+        chunks = [np.asarray(chunk).reshape(-1) for chunk in audio_chunks]
+        if not chunks:
+            return []
+        if features is None:
+            if len({len(chunk) for chunk in chunks}) == 1:
+                features = self.feature_extractor.compute_batch(np.stack(chunks))
+            else:
+                features = [self.feature_extractor.compute(c) for c in chunks]
+
+        energies = np.minimum(1.0, np.array([f.rms for f in features]) * 10)
+        zcrs = np.array([f.zcr for f in features])
+        avg_energies = self._rolling_mean(self.energy_history, energies)
+        avg_zcrs = self._rolling_mean(self.zcr_history, zcrs)
+        self.energy_history[:] = (self.energy_history + energies.tolist())[
+            -self.history_size :
+        ]
+        self.zcr_history[:] = (self.zcr_history + zcrs.tolist())[-self.history_size :]
+
+        # Ta sama logika co is_speech_frame (co najmniej jeden wskaźnik)
+        decisions = (avg_energies > self.energy_threshold) | (
+            (avg_zcrs > 0.02) & (avg_zcrs < 0.4)
+        )
+
+        results = []
+        for i, (chunk, chunk_features) in enumerate(zip(chunks, features)):
+            level_db = chunk_features.level_db
+            if self.noise_floor is not None:
+                self.noise_floor.update(level_db)
+                is_current_speech = self._is_speech_frame_adaptive(level_db)
+            else:
+                is_current_speech = bool(decisions[i])
+            stable_speech = self.update_state(is_current_speech)
+            analysis = {
+                "energy": float(energies[i]),
+                "zcr": chunk_features.zcr,
+                "avg_energy": float(avg_energies[i]),
+                "avg_zcr": float(avg_zcrs[i]),
+                "level_db": level_db,
+                "frame_size": len(chunk),
+                "is_current_speech": is_current_speech,
+                "is_stable_speech": stable_speech,
+                "speech_frames": self.speech_frame_count,
+                "silence_frames": self.silence_frame_count,
+            }
+            results.append((stable_speech, analysis))
+        return results
+
+    def _rolling_mean(self, history: List[float], values: np.ndarray) -> np.ndarray:
+        """Średnia z ostatnich history_size wartości po każdej nowej wartości"""
+        combined = np.concatenate((np.asarray(history, dtype=np.float64), values))
+        sums = np.concatenate(([0.0], np.cumsum(combined)))
+        ends = len(history) + 1 + np.arange(len(values))
+        starts = np.maximum(ends - self.history_size, 0)
+        return (sums[ends] - sums[starts]) / (ends - starts)
+
     def get_statistics(self) -> dict:
         """Pobierz statystyki VAD"""
         return {
@@ -255,6 +402,9 @@ class SimpleVAD:
             "zcr_threshold": self.zcr_threshold,
             "avg_energy": np.mean(self.energy_history) if self.energy_history else 0,
             "avg_zcr": np.mean(self.zcr_history) if self.zcr_history else 0,
+            "noise_floor_db": (
+                self.noise_floor.floor_db if self.noise_floor is not None else None
+            ),
         }
 
     def reset(self):
@@ -298,12 +448,15 @@ class WebRTCVAD:
             logger.warning("⚠️ WebRTC VAD niedostępny, używam SimpleVAD")
             self.fallback_vad = SimpleVAD(sample_rate=sample_rate)
 
-    def is_speech(self, audio_frame: np.ndarray) -> bool:
+    def is_speech(
+        self, audio_frame: np.ndarray, features: Optional[FrameFeatures] = None
+    ) -> bool:
         """
         Sprawdź czy ramka zawiera mowę
 
         Args:
-            audio_frame: Ramka audio (16-bit PCM)
+            audio_frame: Ramka audio (float32 lub 16-bit PCM - bez konwersji)
+            features: Cechy ramki dla SimpleVAD (fallback), jeśli już policzone
 
         Returns:
             True jeśli mowa
@@ -322,7 +475,7 @@ class WebRTCVAD:
                 # Użyj fallback
                 if self.fallback_vad is None:
                     self.fallback_vad = SimpleVAD(sample_rate=self.sample_rate)
-                is_speech, _ = self.fallback_vad.process_chunk(audio_frame)
+                is_speech, _ = self.fallback_vad.process_chunk(audio_frame, features)
                 return is_speech
 
             try:
@@ -333,9 +486,663 @@ class WebRTCVAD:
                 logger.warning(f"WebRTC VAD error: {e}, using fallback")
                 if self.fallback_vad is None:
                     self.fallback_vad = SimpleVAD(sample_rate=self.sample_rate)
-                is_speech, _ = self.fallback_vad.process_chunk(audio_frame)
+                is_speech, _ = self.fallback_vad.process_chunk(audio_frame, features)
                 return is_speech
         else:
             # Użyj SimpleVAD
-            is_speech, _ = self.fallback_vad.process_chunk(audio_frame)
+            is_speech, _ = self.fallback_vad.process_chunk(audio_frame, features)
             return is_speech
+
+
+def split_frames(
+    pending: np.ndarray, audio_chunk: np.ndarray, frame_size: int
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Podziel chunk (poprzedzony resztą z poprzedniego) na ramki float32
+
+    Returns:
+        (frames, pending) - ramki (n_frames x frame_size) i nowa reszta
+    """
+    audio = np.asarray(audio_chunk).reshape(-1)
+    if audio.dtype == np.int16:
+        audio = audio.astype(np.float32) * np.float32(1.0 / INT16_SCALE)
+    samples = np.concatenate((pending, audio.astype(np.float32, copy=False)))
+    n_frames = len(samples) // frame_size
+    used = n_frames * frame_size
+    return samples[:used].reshape(n_frames, frame_size), samples[used:]
+
+
+class SpectralVAD:
+    """
+    VAD widmowy: energie pasm rFFT względem adaptacyjnego widma szumu
+
+    Chunk jest dzielony na ramki (reszta czeka na kolejny chunk), a widmo
+    wszystkich ramek liczone jest jednym wywołaniem rFFT z gotowym oknem.
+    Ramka jest mową, gdy SNR w paśmie mowy przekracza próg, a energia
+    ponad szumem leży głównie w paśmie mowy (wentylator, buczenie i
+    kliknięcia klawiatury mają ją gdzie indziej lub są za krótkie dla
+    histerezy). Widmo szumu aktualizowane jest ramkami ciszy raz na chunk.
+    """
+
+    def __init__(
+        self,
+        sample_rate: int = 16000,
+        frame_duration_ms: int = 20,
+        n_bands: int = 32,
+        speech_band: Tuple[float, float] = (250.0, 3500.0),
+        snr_threshold_db: float = 5.0,
+        min_band_ratio: float = 0.5,
+        noise_adapt_rate: float = 0.05,
+        init_frames: int = 10,
+        min_speech_frames: int = 3,
+        min_silence_frames: int = 10,
+    ):
+        """
+        Inicjalizacja SpectralVAD
+
+        Args:
+            sample_rate: Częstotliwość próbkowania
+            frame_duration_ms: Długość ramki w ms
+            n_bands: Liczba pasm (równej szerokości do Nyquista)
+            speech_band: Pasmo mowy (Hz)
+            snr_threshold_db: Próg SNR w paśmie mowy (dB)
+            min_band_ratio: Min. udział energii ponad szumem w paśmie mowy
+            noise_adapt_rate: Szybkość adaptacji szumu na ramkę ciszy
+            init_frames: Ramki początkowe traktowane jako szum (kalibracja)
+            min_speech_frames: Min. ramek dla potwierdzenia mowy
+            min_silence_frames: Min. ramek dla potwierdzenia ciszy
+        """
+        self.sample_rate = sample_rate
+        self.frame_duration_ms = frame_duration_ms
+        self.frame_size = int(sample_rate * frame_duration_ms / 1000)
+        self.speech_band = speech_band
+        self.snr_threshold_db = snr_threshold_db
+        self.min_band_ratio = min_band_ratio
+        self.noise_adapt_rate = noise_adapt_rate
+        self.init_frames = max(1, init_frames)
+        self.min_speech_frames = min_speech_frames
+        self.min_silence_frames = min_silence_frames
+
+        # Okno i macierz binów -> pasm liczone raz
+        self.window = np.hanning(self.frame_size).astype(np.float32)
+        freqs = np.fft.rfftfreq(self.frame_size, 1.0 / sample_rate)
+        edges = np.linspace(0, sample_rate / 2, n_bands + 1)
+        band_index = np.minimum(
+            np.searchsorted(edges, freqs, side="right") - 1, n_bands - 1
+        )
+        self.band_matrix = np.zeros((len(freqs), n_bands), dtype=np.float32)
+        self.band_matrix[np.arange(len(freqs)), band_index] = 1.0
+        centers = (edges[:-1] + edges[1:]) / 2
+        self.speech_bands = (centers >= speech_band[0]) & (centers <= speech_band[1])
+
+        # Stan
+        self.noise_spectrum: Optional[np.ndarray] = None
+        self._pending = np.zeros(0, dtype=np.float32)
+        self.is_speech = False
+        self.speech_frame_count = 0
+        self.silence_frame_count = 0
+        self.frames_processed = 0
+        self.speech_frames_detected = 0
+
+        logger.info(
+            f"🎙️ SpectralVAD zainicjalizowany: frame={frame_duration_ms}ms, "
+            f"bands={n_bands}, snr_thr={snr_threshold_db}dB"
+        )
+
+    def band_energies(self, frames: np.ndarray) -> np.ndarray:
+        """
+        Energie pasm dla wszystkich ramek (jedno wywołanie rFFT)
+
+        Args:
+            frames: Ramki (n_frames x frame_size), float32
+
+        Returns:
+            Energie (n_frames x n_bands)
+        """
+        spectrum = np.fft.rfft(frames * self.window, axis=1)
+        power = (spectrum.real**2 + spectrum.imag**2).astype(np.float32)
+        return power @ self.band_matrix
+
+    def score_frames(self, energies: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        SNR pasm mowy i udział energii ponad szumem w paśmie mowy
+
+        Args:
+            energies: Energie pasm (n_frames x n_bands)
+
+        Returns:
+            (snr_db, band_ratio) - po jednej wartości na ramkę
+        """
+        eps = 1e-10
+        noise = self.noise_spectrum
+        speech_energy = energies[:, self.speech_bands].sum(axis=1)
+        speech_noise = noise[self.speech_bands].sum()
+        snr_db = 10 * np.log10((speech_energy + eps) / (speech_noise + eps))
+
+        excess = np.maximum(energies - noise, 0.0)
+        band_ratio = excess[:, self.speech_bands].sum(axis=1) / (
+            excess.sum(axis=1) + eps
+        )
+        return snr_db, band_ratio
+
+    def _update_noise(
+        self,
+        energies: np.ndarray,
+        decisions: np.ndarray,
+        weights: Optional[np.ndarray] = None,
+    ):
+        """Adaptacja widma szumu (raz na chunk, ramkami ciszy)"""
+        noise_frames = energies[~decisions]
+        if len(noise_frames):
+            if weights is None:
+                count = len(noise_frames)
+                mean = noise_frames.mean(axis=0)
+            else:
+                noise_weights = weights[~decisions]
+                count = float(noise_weights.sum())
+                mean = noise_weights @ noise_frames / count
+            rate = 1 - (1 - self.noise_adapt_rate) ** count
+            self.noise_spectrum += rate * (mean - self.noise_spectrum)
+        if decisions.any():
+            # Bardzo wolno także w mowie - po skoku szumu próg dogania nowe tło
+            floor = energies[decisions].min(axis=0)
+            self.noise_spectrum += (
+                0.002 * decisions.sum() * (floor - self.noise_spectrum)
+            )
+
+    def _frames(self, audio_chunk: np.ndarray) -> np.ndarray:
+        """Podziel chunk na ramki (reszta czeka na kolejny chunk)"""
+        frames, self._pending = split_frames(
+            self._pending, audio_chunk, self.frame_size
+        )
+        return frames
+
+    def classify_frames(
+        self, frames: np.ndarray, noise_weights: Optional[np.ndarray] = None
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Decyzje per ramka bez histerezy (kalibracja i adaptacja szumu)
+
+        Args:
+            frames: Ramki (n_frames x frame_size), float32
+            noise_weights: Waga ramek w adaptacji szumu (None = 1) - ramka
+                reprezentująca kilka pominiętych ramek ciszy liczy się za nie
+
+        Returns:
+            (decisions, snr_db, band_ratio) - po jednej wartości na ramkę
+        """
+        if len(frames) == 0:
+            empty = np.zeros(0, dtype=np.float32)
+            return np.zeros(0, dtype=bool), empty, empty
+        return self.classify_energies(self.band_energies(frames), noise_weights)
+
+    def classify_energies(
+        self, energies: np.ndarray, noise_weights: Optional[np.ndarray] = None
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Jak classify_frames, dla energii pasm policzonych wcześniej
+
+        Args:
+            energies: Energie pasm (n_frames x n_bands, band_energies)
+            noise_weights: Waga ramek w adaptacji szumu (None = 1)
+
+        Returns:
+            (decisions, snr_db, band_ratio) - po jednej wartości na ramkę
+        """
+        n_frames = len(energies)
+        if n_frames == 0:
+            empty = np.zeros(0, dtype=np.float32)
+            return np.zeros(0, dtype=bool), empty, empty
+
+        # Kalibracja: pierwsze ramki wyznaczają widmo szumu
+        calibrating = max(0, min(self.init_frames - self.frames_processed, n_frames))
+        if calibrating:
+            calibration = energies[:calibrating].mean(axis=0)
+            if self.noise_spectrum is None:
+                self.noise_spectrum = calibration
+            else:
+                weight = calibrating / (self.frames_processed + calibrating)
+                self.noise_spectrum += weight * (calibration - self.noise_spectrum)
+
+        snr_db, band_ratio = self.score_frames(energies)
+        decisions = (snr_db > self.snr_threshold_db) & (
+            band_ratio > self.min_band_ratio
+        )
+        decisions[:calibrating] = False
+        self._update_noise(
+            energies[calibrating:],
+            decisions[calibrating:],
+            None if noise_weights is None else noise_weights[calibrating:],
+        )
+        self.frames_processed += n_frames
+        self.speech_frames_detected += int(decisions.sum())
+        return decisions, snr_db, band_ratio
+
+    def update_state(self, is_current_speech: bool) -> bool:
+        """Histereza na poziomie ramki (jak SimpleVAD.update_state)"""
+        if is_current_speech:
+            self.speech_frame_count += 1
+            self.silence_frame_count = 0
+            if not self.is_speech and self.speech_frame_count >= self.min_speech_frames:
+                self.is_speech = True
+                logger.debug("🎤 SpectralVAD: Start mowy")
+        else:
+            self.silence_frame_count += 1
+            self.speech_frame_count = 0
+            if self.is_speech and self.silence_frame_count >= self.min_silence_frames:
+                self.is_speech = False
+                logger.debug("🔇 SpectralVAD: Koniec mowy")
+        return self.is_speech
+
+    def process_chunk(
+        self, audio_chunk: np.ndarray, features: Optional[FrameFeatures] = None
+    ) -> Tuple[bool, dict]:
+        """
+        Przetwórz chunk audio i zwróć decyzję VAD
+
+        Args:
+            audio_chunk: Chunk audio do analizy (float32 lub int16)
+            features: Cechy chunka z pipeline (energia w analizie)
+
+        Returns:
+            Tuple (is_speech, analysis_details) - stan po ostatniej ramce,
+            decyzje per ramka w analysis["frame_decisions"]
+        """
+        frames = self._frames(audio_chunk)
+        energies = self.band_energies(frames) if len(frames) else frames[:, :0]
+        return self._chunk_result(frames, energies, features)
+
+    def process_batch(
+        self,
+        audio_chunks: Sequence[np.ndarray],
+        features: Optional[Sequence[FrameFeatures]] = None,
+    ) -> List[Tuple[bool, dict]]:
+        """
+        Przetwórz kolejne chunki naraz - wynik jak process_chunk dla każdego
+
+        Ramki całej partii i ich widma liczone są jednym wywołaniem rFFT;
+        decyzje, adaptacja szumu i histereza idą dalej chunk po chunku, więc
+        stan po każdym chunku jest taki sam jak przy osobnych wywołaniach.
+
+        Args:
+            audio_chunks: Chunki audio w kolejności nagrania
+            features: Cechy chunków z pipeline (opcjonalne)
+
+        Returns:
+            Lista (is_speech, analysis_details) - po jednej na chunk
+        """
+        chunks = [np.asarray(chunk).reshape(-1) for chunk in audio_chunks]
+        if not chunks:
+            return []
+        pending = len(self._pending)
+        frames = self._frames(np.concatenate(chunks))
+        energies = self.band_energies(frames) if len(frames) else frames[:, :0]
+
+        # Ramka należy do chunka, w którym się kończy
+        ends = pending + np.cumsum([len(chunk) for chunk in chunks])
+        bounds = np.concatenate(([0], ends // self.frame_size))
+        return [
+            self._chunk_result(
+                frames[start:end],
+                energies[start:end],
+                features[i] if features is not None else None,
+            )
+            for i, (start, end) in enumerate(zip(bounds[:-1], bounds[1:]))
+        ]
+
+    def _chunk_result(
+        self,
+        frames: np.ndarray,
+        energies: np.ndarray,
+        features: Optional[FrameFeatures],
+    ) -> Tuple[bool, dict]:
+        """Decyzje, histereza i analiza dla ramek jednego chunka"""
+        n_frames = len(frames)
+        decisions, snr_db, band_ratio = self.classify_energies(energies)
+        stable_states = [self.update_state(bool(d)) for d in decisions]
+
+        if features is not None:
+            energy = min(1.0, features.rms * 10)
+        elif n_frames:
+            energy = min(1.0, float(np.sqrt(np.mean(frames**2))) * 10)
+        else:
+            energy = 0.0
+
+        analysis = {
+            "energy": energy,
+            "snr_db": float(snr_db.mean()) if n_frames else 0.0,
+            "band_ratio": float(band_ratio.mean()) if n_frames else 0.0,
+            "frame_decisions": decisions.tolist(),
+            "frame_states": stable_states,
+            "is_current_speech": bool(decisions.any()),
+            "is_stable_speech": self.is_speech,
+            "speech_frames": self.speech_frame_count,
+            "silence_frames": self.silence_frame_count,
+        }
+        return self.is_speech, analysis
+
+    def get_statistics(self) -> dict:
+        """Pobierz statystyki VAD"""
+        return {
+            "current_state": "speech" if self.is_speech else "silence",
+            "frames_processed": self.frames_processed,
+            "speech_frame_ratio": self.speech_frames_detected
+            / max(self.frames_processed, 1),
+            "snr_threshold_db": self.snr_threshold_db,
+            "noise_level_db": (
+                float(10 * np.log10(self.noise_spectrum.sum() + 1e-10))
+                if self.noise_spectrum is not None
+                else None
+            ),
+        }
+
+    def reset(self):
+        """Reset stanu VAD (widmo szumu zostaje - to samo otoczenie)"""
+        self.is_speech = False
+        self.speech_frame_count = 0
+        self.silence_frame_count = 0
+        self._pending = np.zeros(0, dtype=np.float32)
+
+        logger.info("🔄 SpectralVAD zresetowany")
+
+
+class CascadedVAD:
+    """
+    Kaskada VAD: tania bramka energii, klasyfikator tylko dla ramek niepewnych
+
+    Bramka liczy energię wszystkich ramek chunka naraz i porównuje ją
+    z poziomem tła. Ramki wyraźnie ciche są ciszą bez dalszej analizy,
+    ramki wyraźnie głośne w ciągłym biegu mowy są mową. Do klasyfikatora
+    (SpectralVAD lub WebRTCVAD) trafiają ramki niepewne, ramki kalibracji,
+    głośne ramki po ciszy (głośny nie znaczy mowa: klawiatura, drzwi) oraz
+    co n-ta pewna cisza dla modelu szumu klasyfikatora.
+    """
+
+    def __init__(
+        self,
+        sample_rate: int = 16000,
+        classifier=None,
+        frame_duration_ms: int = 20,
+        silence_margin_db: float = 3.0,
+        speech_margin_db: float = 15.0,
+        floor_adapt_rate: float = 0.05,
+        noise_probe_interval: int = 16,
+        init_frames: int = 10,
+        min_speech_frames: int = 3,
+        min_silence_frames: int = 10,
+    ):
+        """
+        Inicjalizacja CascadedVAD
+
+        Args:
+            sample_rate: Częstotliwość próbkowania
+            classifier: SpectralVAD lub WebRTCVAD (None = SpectralVAD)
+            frame_duration_ms: Długość ramki w ms (SpectralVAD: jego ramka)
+            silence_margin_db: Poniżej tła + margines - pewna cisza
+            speech_margin_db: Powyżej tła + margines - pewna mowa (w mowie)
+            floor_adapt_rate: Szybkość adaptacji poziomu tła (na ramkę ciszy)
+            noise_probe_interval: Co która pewna cisza idzie do klasyfikatora
+                (adaptacja jego modelu szumu; 0 = nigdy)
+            init_frames: Ramki kalibracji (wszystkie idą do klasyfikatora)
+            min_speech_frames: Min. ramek dla potwierdzenia mowy
+            min_silence_frames: Min. ramek dla potwierdzenia ciszy
+        """
+        if classifier is None:
+            classifier = SpectralVAD(
+                sample_rate=sample_rate,
+                frame_duration_ms=frame_duration_ms,
+                init_frames=init_frames,
+            )
+        self.classifier = classifier
+        self.sample_rate = sample_rate
+        if isinstance(classifier, SpectralVAD):
+            frame_duration_ms = classifier.frame_duration_ms
+        self.frame_duration_ms = frame_duration_ms
+        self.frame_size = int(sample_rate * frame_duration_ms / 1000)
+
+        self.silence_margin_db = silence_margin_db
+        self.speech_margin_db = speech_margin_db
+        self.floor_adapt_rate = floor_adapt_rate
+        self.noise_probe_interval = noise_probe_interval
+        self.init_frames = max(1, init_frames)
+        self.min_speech_frames = min_speech_frames
+        self.min_silence_frames = min_silence_frames
+
+        # Stan wewnętrzny
+        self.is_speech = False
+        self.speech_frame_count = 0
+        self.silence_frame_count = 0
+        self.noise_floor_db: Optional[float] = None
+        self._pending = np.zeros(0, dtype=np.float32)
+
+        # Statystyki kaskady
+        self.frames_processed = 0
+        self.escalated_frames = 0
+
+        logger.info(
+            f"🎙️ CascadedVAD zainicjalizowany: frame={frame_duration_ms}ms, "
+            f"klasyfikator={type(classifier).__name__}, "
+            f"marginesy={silence_margin_db}/{speech_margin_db}dB"
+        )
+
+    def frame_power(self, frames: np.ndarray) -> np.ndarray:
+        """Średnia moc wszystkich ramek jednym przebiegiem"""
+        return np.einsum("ij,ij->i", frames, frames) / self.frame_size
+
+    def _classify(self, frames: np.ndarray, noise_weights: np.ndarray) -> np.ndarray:
+        """Decyzje klasyfikatora dla ramek eskalowanych"""
+        if isinstance(self.classifier, SpectralVAD):
+            decisions, _, _ = self.classifier.classify_frames(frames, noise_weights)
+            return decisions
+        return np.array([bool(self.classifier.is_speech(f)) for f in frames], bool)
+
+    def _update_floor(self, levels: np.ndarray, decisions: np.ndarray):
+        """Adaptacja poziomu tła ramkami ciszy"""
+        silence = levels[~decisions]
+        if len(silence):
+            # Krótkie głośne zdarzenia (drzwi) podnoszą tło tylko o margines
+            silence = np.minimum(silence, self.noise_floor_db + self.silence_margin_db)
+            rate = 1 - (1 - self.floor_adapt_rate) ** len(silence)
+            mean = float(silence.sum()) / len(silence)
+            self.noise_floor_db += rate * (mean - self.noise_floor_db)
+
+    def _escalate(
+        self,
+        frames: np.ndarray,
+        above: np.ndarray,
+        clear_silence: np.ndarray,
+        calibrating: int,
+        decisions: np.ndarray,
+    ) -> int:
+        """
+        Decyzje bramki i klasyfikatora dla chunka z ramkami niepewnymi
+
+        Args:
+            frames: Ramki chunka
+            above: Poziom ramek ponad tłem (dB)
+            clear_silence: Ramki pewnej ciszy
+            calibrating: Liczba ramek kalibracji na początku chunka
+            decisions: Decyzje per ramka (wypełniane w miejscu)
+
+        Returns:
+            Liczba ramek eskalowanych do klasyfikatora
+        """
+        n_frames = len(frames)
+        # Bramka przyjmuje mowę tylko w ciągłym biegu od ramki mowy -
+        # głośna ramka po ciszy (też w trakcie mowy) może być kliknięciem
+        if self.is_speech and self.speech_frame_count > 0:
+            accepted = np.cumprod(above > self.speech_margin_db).astype(bool)
+        else:
+            accepted = np.zeros(n_frames, dtype=bool)
+        escalate = ~clear_silence & ~accepted
+        escalate[:calibrating] = True
+
+        # Co n-ta pewna cisza też trafia do klasyfikatora - inaczej jego
+        # model szumu widziałby tylko ramki głośniejsze od tła; taka
+        # próbka liczy się w adaptacji szumu za n pominiętych ramek
+        weights = np.ones(n_frames, dtype=np.float32)
+        if self.noise_probe_interval:
+            index = self.frames_processed + np.arange(n_frames)
+            probes = clear_silence & (index % self.noise_probe_interval == 0)
+            probes[:calibrating] = False
+            escalate |= probes
+            weights[probes] = self.noise_probe_interval
+
+        decisions[:] = accepted & ~escalate
+        if escalate.any():
+            decisions[escalate] = self._classify(frames[escalate], weights[escalate])
+        return int(escalate.sum())
+
+    def update_state(self, is_current_speech: bool) -> bool:
+        """Histereza na poziomie ramki (jak SpectralVAD.update_state)"""
+        if is_current_speech:
+            self.speech_frame_count += 1
+            self.silence_frame_count = 0
+            if not self.is_speech and self.speech_frame_count >= self.min_speech_frames:
+                self.is_speech = True
+                logger.debug("🎤 CascadedVAD: Start mowy")
+        else:
+            self.silence_frame_count += 1
+            self.speech_frame_count = 0
+            if self.is_speech and self.silence_frame_count >= self.min_silence_frames:
+                self.is_speech = False
+                logger.debug("🔇 CascadedVAD: Koniec mowy")
+        return self.is_speech
+
+    def process_chunk(
+        self, audio_chunk: np.ndarray, features: Optional[FrameFeatures] = None
+    ) -> Tuple[bool, dict]:
+        """
+        Przetwórz chunk audio i zwróć decyzję VAD
+
+        Args:
+            audio_chunk: Chunk audio do analizy (float32 lub int16)
+            features: Cechy chunka z pipeline (energia w analizie)
+
+        Returns:
+            Tuple (is_speech, analysis_details) - jak SpectralVAD, plus
+            liczba ramek eskalowanych do klasyfikatora
+        """
+        frames, self._pending = split_frames(
+            self._pending, audio_chunk, self.frame_size
+        )
+        n_frames = len(frames)
+        decisions = np.zeros(n_frames, dtype=bool)
+        escalated = 0
+
+        if n_frames:
+            power = self.frame_power(frames)
+            levels = 10 * np.log10(power + 1e-12)
+
+            # Kalibracja: poziom tła z pierwszych ramek, klasyfikator widzi je też
+            calibrating = max(
+                0, min(self.init_frames - self.frames_processed, n_frames)
+            )
+            if calibrating:
+                calibration = float(levels[:calibrating].mean())
+                if self.noise_floor_db is None:
+                    self.noise_floor_db = calibration
+                else:
+                    weight = calibrating / (self.frames_processed + calibrating)
+                    self.noise_floor_db += weight * (calibration - self.noise_floor_db)
+
+            above = levels - self.noise_floor_db
+            clear_silence = above < self.silence_margin_db
+            interval = self.noise_probe_interval
+            probe_due = (
+                bool(interval) and (-self.frames_processed) % interval < n_frames
+            )
+
+            if calibrating or probe_due or not clear_silence.all():
+                escalated = self._escalate(
+                    frames, above, clear_silence, calibrating, decisions
+                )
+            self._update_floor(levels[calibrating:], decisions[calibrating:])
+            self.frames_processed += n_frames
+            self.escalated_frames += escalated
+
+        stable_states = [self.update_state(bool(d)) for d in decisions]
+
+        if features is not None:
+            energy = min(1.0, features.rms * 10)
+        elif n_frames:
+            energy = min(1.0, float(np.sqrt(power.sum() / n_frames)) * 10)
+        else:
+            energy = 0.0
+
+        analysis = {
+            "energy": energy,
+            "noise_floor_db": self.noise_floor_db,
+            "escalated_frames": escalated,
+            "frame_decisions": decisions.tolist(),
+            "frame_states": stable_states,
+            "is_current_speech": bool(decisions.any()),
+            "is_stable_speech": self.is_speech,
+            "speech_frames": self.speech_frame_count,
+            "silence_frames": self.silence_frame_count,
+        }
+        return self.is_speech, analysis
+
+    def get_statistics(self) -> dict:
+        """Pobierz statystyki VAD (w tym odsetek ramek eskalowanych)"""
+        stats = {
+            "current_state": "speech" if self.is_speech else "silence",
+            "frames_processed": self.frames_processed,
+            "escalated_frames": self.escalated_frames,
+            "escalation_ratio": self.escalated_frames / max(self.frames_processed, 1),
+            "noise_floor_db": self.noise_floor_db,
+        }
+        if hasattr(self.classifier, "get_statistics"):
+            stats["classifier"] = self.classifier.get_statistics()
+        return stats
+
+    def reset(self):
+        """Reset stanu VAD (poziom tła zostaje - to samo otoczenie)"""
+        self.is_speech = False
+        self.speech_frame_count = 0
+        self.silence_frame_count = 0
+        self._pending = np.zeros(0, dtype=np.float32)
+        if hasattr(self.classifier, "reset"):
+            self.classifier.reset()
+
+        logger.info("🔄 CascadedVAD zresetowany")
+
+
+# Typy VAD dostępne w pipeline i serwerze
+VAD_TYPES = ("webrtc", "simple", "adaptive", "spectral", "cascade")
+
+
+def create_vad(
+    vad_type: str = "webrtc",
+    sample_rate: int = 16000,
+    mode: VADMode = VADMode.NORMAL,
+    calibration_frames: int = 0,
+):
+    """
+    Utwórz VAD wg nazwy
+
+    Args:
+        vad_type: "webrtc", "simple", "adaptive" (SimpleVAD z progami
+            względem tła), "spectral" lub "cascade"
+        sample_rate: Częstotliwość próbkowania
+        mode: Agresywność (WebRTC VAD)
+        calibration_frames: Ramki kalibracji tła (adaptive)
+
+    Returns:
+        Instancja VAD
+    """
+    if vad_type == "webrtc":
+        return WebRTCVAD(sample_rate=sample_rate, mode=mode)
+    if vad_type == "simple":
+        return SimpleVAD(sample_rate=sample_rate)
+    if vad_type == "adaptive":
+        return SimpleVAD(
+            sample_rate=sample_rate,
+            adaptive=True,
+            calibration_frames=calibration_frames,
+        )
+    if vad_type == "spectral":
+        return SpectralVAD(sample_rate=sample_rate)
+    if vad_type == "cascade":
+        return CascadedVAD(sample_rate=sample_rate)
+    raise ValueError(f"Nieznany typ VAD: {vad_type} (dostępne: {', '.join(VAD_TYPES)})")
@@ -0,0 +1,94 @@
+"""
+Tests for AdmissionController module
+"""
+
+import pytest
+import threading
+import sys
+from pathlib import Path
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from admission_controller import AdmissionController, AdmissionPolicy, LoadLevel
+
+
+def test_capacity_from_measured_rtf():
+    """Test capacity estimate follows measured real-time factor"""
+    controller = AdmissionController(
+        parallelism=2, headroom=0.2, speech_ratio=0.5, initial_rtf=0.5
+    )
+    assert controller.estimated_capacity() == 6
+
+    controller.record_transcription(audio_seconds=10.0, processing_seconds=1.0)
+    assert controller.rtf == pytest.approx(0.1)
+    assert controller.estimated_capacity() == 32
+
+
+def test_reject_policy_when_full():
+    """Test sessions over capacity are rejected"""
+    controller = AdmissionController(parallelism=1, headroom=0.0, initial_rtf=1.0)
+    assert controller.estimated_capacity() == 2
+
+    assert controller.try_admit("a")
+    assert controller.try_admit("b")
+    assert not controller.try_admit("c")
+
+    controller.release("a")
+    assert controller.try_admit("c")
+    assert controller.get_statistics()["rejected"] == 1
+
+
+def test_queue_policy_admits_after_release():
+    """Test queued session is admitted when a slot frees up"""
+    controller = AdmissionController(
+        parallelism=1,
+        headroom=0.0,
+        speech_ratio=1.0,
+        initial_rtf=1.0,
+        policy=AdmissionPolicy.QUEUE,
+        max_queue_wait=2.0,
+    )
+    assert controller.try_admit("a")
+
+    queued = threading.Event()
+    timer = threading.Timer(0.05, controller.release, args=("a",))
+    timer.start()
+    assert controller.try_admit("b", on_queued=queued.set)
+    assert queued.is_set()
+    assert controller.get_statistics()["queued"] == 1
+
+
+def test_load_level_escalation_and_recovery():
+    """Test shedding escalates on sustained overload and recovers gradually"""
+    controller = AdmissionController(
+        parallelism=1,
+        max_queue_delay=1.0,
+        sustain_seconds=5.0,
+        recovery_seconds=10.0,
+    )
+    controller.queue_delay = 3.0
+
+    assert controller.evaluate(now=100.0) == LoadLevel.NORMAL
+    assert controller.evaluate(now=105.0) == LoadLevel.SHED_PARTIALS
+    assert not controller.allow_partials()
+    assert controller.evaluate(now=110.0) == LoadLevel.SHED_LOW_PRIORITY
+
+    controller.queue_delay = 0.0
+    assert controller.evaluate(now=111.0) == LoadLevel.SHED_LOW_PRIORITY
+    assert controller.evaluate(now=121.0) == LoadLevel.SHED_PARTIALS
+    assert controller.evaluate(now=131.0) == LoadLevel.NORMAL
+
+
+def test_should_shed_low_priority_only():
+    """Test only lower-priority sessions are shed"""
+    controller = AdmissionController(parallelism=4)
+    controller.try_admit("vip", priority=1)
+    controller.try_admit("bulk", priority=0)
+
+    assert not controller.should_shed(0)
+
+    controller.load_level = LoadLevel.SHED_LOW_PRIORITY
+    assert controller.should_shed(0)
+    assert not controller.should_shed(1)
+    assert controller.get_statistics()["shed_segments"] == 1
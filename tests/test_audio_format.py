@@ -0,0 +1,67 @@
+"""
+Tests for the int16 / float32 sample format path
+"""
+
+import numpy as np
+import pytest
+import sys
+from pathlib import Path
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from audio_format import sample_dtype, to_float32, to_int16
+from catchup_transcriber import build_windows
+from speech_segmenter import SpeechSegment
+from stt_backend import prepare_audio
+from voice_activity_detector import SimpleVAD
+
+
+def speech_like(seconds=1.0, sample_rate=16000):
+    rng = np.random.default_rng(0)
+    t = np.arange(int(seconds * sample_rate)) / sample_rate
+    audio = 0.3 * np.sin(2 * np.pi * 220 * t) + rng.normal(0, 0.02, len(t))
+    return audio.astype(np.float32)
+
+
+def test_conversions_round_trip():
+    """Test int16 <-> float32 conversion and format validation"""
+    audio = speech_like()
+    pcm = to_int16(audio)
+
+    assert pcm.dtype == np.int16
+    assert to_int16(pcm) is pcm
+    np.testing.assert_allclose(to_float32(pcm), audio, atol=1e-4)
+    assert sample_dtype("int16") is np.int16
+    with pytest.raises(ValueError):
+        sample_dtype("float64")
+
+
+def test_int16_matches_float32_at_vad_and_stt_boundary():
+    """Test VAD decisions and prepared STT audio do not depend on the format"""
+    audio = speech_like()
+    pcm = to_int16(audio)
+
+    float_vad, int_vad = SimpleVAD(), SimpleVAD()
+    for start in range(0, len(audio), 1024):
+        float_speech, float_info = float_vad.process_chunk(audio[start : start + 1024])
+        int_speech, int_info = int_vad.process_chunk(pcm[start : start + 1024])
+        assert float_speech == int_speech
+        assert abs(float_info["energy"] - int_info["energy"]) < 1e-3
+
+    prepared = prepare_audio(pcm, 16000)
+    assert prepared.dtype == np.float32
+    np.testing.assert_allclose(prepared, prepare_audio(audio, 16000), atol=1e-4)
+
+
+def test_catchup_window_mixes_formats():
+    """Test int16 and float32 segments share one float32 catch-up window"""
+    audio = speech_like(0.5)
+    segments = [
+        SpeechSegment(to_int16(audio), 0.0, 0.5, 1.0, 16000),
+        SpeechSegment(audio, 1.0, 1.5, 1.0, 16000),
+    ]
+
+    (window,) = build_windows(segments)
+    assert window.audio.dtype == np.float32
+    assert np.max(np.abs(window.audio)) <= 1.0
@@ -0,0 +1,60 @@
+"""
+Tests for MicroBatchScheduler module
+"""
+
+import pytest
+import time
+import sys
+from pathlib import Path
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from batch_scheduler import MicroBatchScheduler
+
+
+def test_batch_closes_at_max_size():
+    """Test batch is dispatched as soon as it is full"""
+    scheduler = MicroBatchScheduler(max_batch_size=3, max_wait=10.0)
+    for i in range(3):
+        scheduler.submit(f"s{i}", i)
+
+    assert scheduler.next_batch(timeout=1.0) == [0, 1, 2]
+    assert scheduler.pending_count == 0
+
+
+def test_batch_closes_after_max_wait():
+    """Test partial batch is dispatched after max wait"""
+    scheduler = MicroBatchScheduler(max_batch_size=8, max_wait=0.05)
+    scheduler.submit("s1", "a")
+
+    start = time.time()
+    assert scheduler.next_batch(timeout=1.0) == ["a"]
+    assert time.time() - start >= 0.04
+    assert scheduler.next_batch(timeout=0.05) == []
+
+
+def test_round_robin_fairness():
+    """Test a busy session cannot starve the others"""
+    scheduler = MicroBatchScheduler(max_batch_size=4, max_wait=0.0)
+    for i in range(10):
+        scheduler.submit("busy", f"busy-{i}")
+    scheduler.submit("quiet", "quiet-0")
+
+    batch = scheduler.next_batch(timeout=1.0)
+    assert "quiet-0" in batch
+    assert batch[:2] == ["busy-0", "quiet-0"]
+
+
+def test_batch_statistics():
+    """Test batch size histogram and queueing delay export"""
+    scheduler = MicroBatchScheduler(max_batch_size=2, max_wait=0.0)
+    for i in range(3):
+        scheduler.submit("s", i)
+    scheduler.next_batch(timeout=1.0)
+    scheduler.next_batch(timeout=1.0)
+
+    stats = scheduler.get_statistics()
+    assert stats["batch_size_histogram"] == {1: 1, 2: 1}
+    assert stats["batches_dispatched"] == 2
+    assert stats["max_queue_delay"] >= 0.0
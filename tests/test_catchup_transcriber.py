@@ -0,0 +1,116 @@
+"""
+Tests for catch-up transcription module
+"""
+
+import pytest
+import numpy as np
+import sys
+from pathlib import Path
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from catchup_transcriber import (
+    CatchupTranscriber,
+    DrainStatistics,
+    assign_transcription,
+    build_windows,
+)
+from speech_segmenter import SpeechSegment
+from stt_backend import TranscriptionResult
+
+
+def make_segment(index: int, duration: float) -> SpeechSegment:
+    """Create a segment of the given duration"""
+    return SpeechSegment(
+        audio_data=np.full(int(duration * 16000), 0.1, dtype=np.float32),
+        start_time=float(index * 100),
+        end_time=index * 100 + duration,
+        confidence=0.9,
+        sample_rate=16000,
+    )
+
+
+class WindowEngine:
+    """Engine stub emitting one timed segment per audible region of a window"""
+
+    def __init__(self):
+        self.batches = []
+
+    def transcribe_batch(self, audio_batch, sample_rate=16000, with_timestamps=False):
+        self.batches.append(len(audio_batch))
+        results = []
+        for audio in audio_batch:
+            voiced = np.flatnonzero(np.diff(np.r_[0, audio != 0, 0].astype(int)))
+            parts = [
+                {"start": a / sample_rate, "end": b / sample_rate, "text": f"t{a}"}
+                for a, b in zip(voiced[::2], voiced[1::2])
+            ]
+            results.append(
+                TranscriptionResult(
+                    text=" ".join(p["text"] for p in parts),
+                    language="pl",
+                    confidence=0.8,
+                    processing_time=1.0,
+                    segments=parts,
+                    model_used="stub",
+                )
+            )
+        return results
+
+
+def test_build_windows_respects_limit():
+    """Test contiguous segments are packed into windows up to 30 s"""
+    segments = [make_segment(i, 8.0) for i in range(5)]
+    windows = build_windows(segments, window_seconds=30.0, gap_seconds=0.5)
+
+    assert [len(w.segments) for w in windows] == [3, 2]
+    assert all(w.duration <= 30.0 for w in windows)
+    assert windows[0].offsets[1] == pytest.approx((8.5, 16.5))
+
+
+def test_assign_transcription_by_timestamp():
+    """Test decoded text is mapped back to source segments by time"""
+    segments = [make_segment(i, 2.0) for i in range(3)]
+    window = build_windows(segments, gap_seconds=0.5)[0]
+    result = TranscriptionResult(
+        text="a b c",
+        language="pl",
+        confidence=0.7,
+        processing_time=0.7,
+        segments=[
+            {"start": 0.1, "end": 1.9, "text": "a"},
+            {"start": 2.4, "end": 4.6, "text": "b"},
+            {"start": 5.0, "end": 6.5, "text": "c"},
+        ],
+        model_used="stub",
+    )
+
+    mapped = assign_transcription(window, result)
+    assert [r.text for r in mapped] == ["a", "b", "c"]
+    assert mapped[1].segments[0]["start"] == pytest.approx(-0.1)
+    assert sum(r.processing_time for r in mapped) == pytest.approx(0.6)
+
+
+def test_catchup_transcriber_batches_windows():
+    """Test backlog segments are decoded as windows in one batch"""
+    engine = WindowEngine()
+    catchup = CatchupTranscriber(engine, window_seconds=30.0, windows_per_batch=4)
+    segments = [make_segment(i, 5.0) for i in range(10)]
+
+    catchup.transcribe(segments)
+
+    assert engine.batches == [2]
+    assert all(s.transcription and s.transcription.text for s in segments)
+    assert catchup.total_windows == 2
+
+
+def test_drain_statistics_per_mode():
+    """Test drain rate is reported separately for each mode"""
+    stats = DrainStatistics()
+    stats.modes["catchup"].update(segments=4, audio_seconds=20.0)
+    stats.modes["catchup"]["processing_seconds"] = 2.0
+
+    report = stats.get_statistics()
+    assert report["catchup"]["audio_seconds_per_second"] == pytest.approx(10.0)
+    assert report["realtime"]["audio_seconds_per_second"] == 0.0
@@ -0,0 +1,115 @@
+"""
+Tests for confidence-triggered escalation module
+"""
+
+import time
+import pytest
+import numpy as np
+import sys
+from pathlib import Path
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from escalation import EscalatingSTTEngine, EscalationPolicy, escalation_reason
+from stt_backend import TranscriptionResult
+
+
+def make_result(text, confidence=0.9, compression_ratio=1.2, no_speech_prob=0.1):
+    """Create a transcription result with one Whisper-style segment"""
+    return TranscriptionResult(
+        text=text,
+        language="pl",
+        confidence=confidence,
+        processing_time=0.01,
+        segments=[
+            {
+                "text": text,
+                "compression_ratio": compression_ratio,
+                "no_speech_prob": no_speech_prob,
+            }
+        ],
+        model_used="stub",
+    )
+
+
+class StubEngine:
+    """Engine stub returning queued results"""
+
+    def __init__(self, results, model_name="small", delay=0.0):
+        self.results = list(results)
+        self.model_name = model_name
+        self.delay = delay
+        self.previous_text = ""
+        self.is_loaded = True
+        self.calls = 0
+
+    def load_model(self):
+        return True
+
+    def transcribe_audio(self, audio_data, sample_rate=16000):
+        self.calls += 1
+        time.sleep(self.delay)
+        return self.results.pop(0)
+
+    def transcribe_batch(self, audio_batch, sample_rate=16000, with_timestamps=False):
+        return [self.transcribe_audio(audio, sample_rate) for audio in audio_batch]
+
+    def get_model_info(self):
+        return {"model_name": self.model_name}
+
+
+def test_escalation_reason():
+    """Test escalation triggers"""
+    policy = EscalationPolicy()
+    assert escalation_reason(make_result("dobrze"), policy) is None
+    assert escalation_reason(None, policy) == "failed"
+    assert escalation_reason(make_result(""), policy) is None
+    assert escalation_reason(make_result("a", confidence=0.3), policy) == (
+        "low_confidence"
+    )
+    assert escalation_reason(make_result("a a a", compression_ratio=3.0), policy) == (
+        "compression_ratio"
+    )
+    assert escalation_reason(make_result("a", no_speech_prob=0.9), policy) == (
+        "no_speech"
+    )
+
+
+def test_only_doubtful_segments_are_escalated():
+    """Test confident results keep the primary text"""
+    primary = StubEngine([make_result("pewne"), make_result("niepewne", 0.2)])
+    large = StubEngine([make_result("poprawione")], model_name="large")
+    engine = EscalatingSTTEngine(primary, large)
+
+    audio = [np.zeros(16000, dtype=np.float32)] * 2
+    results = engine.transcribe_batch(audio)
+
+    assert [r.text for r in results] == ["pewne", "poprawione"]
+    assert large.calls == 1
+    stats = engine.get_escalation_statistics()
+    assert stats["escalations"] == 1
+    assert stats["escalation_rate"] == pytest.approx(0.5)
+    assert stats["reasons"] == {"low_confidence": 1}
+    assert stats["text_changed"] == 1
+    assert engine.previous_text == "poprawione"
+    assert engine.get_model_info()["escalation"]["model_name"] == "large"
+
+
+def test_escalation_respects_compute_budget():
+    """Test escalation stops once the per-minute CPU budget is spent"""
+    doubtful = [make_result("niepewne", 0.2) for _ in range(4)]
+    primary = StubEngine(doubtful)
+    large = StubEngine([make_result("duży")] * 4, model_name="large", delay=0.05)
+    engine = EscalatingSTTEngine(
+        primary, large, EscalationPolicy(budget_per_minute=0.06)
+    )
+
+    audio = np.zeros(16000, dtype=np.float32)
+    texts = [engine.transcribe_audio(audio).text for _ in range(4)]
+
+    assert texts[0] == "duży"
+    assert large.calls < 4
+    stats = engine.get_escalation_statistics()
+    assert stats["skipped_budget"] == 4 - large.calls
+    assert stats["cost_per_audio_minute"] > 0
@@ -0,0 +1,92 @@
+"""
+Tests for fork-server STT worker pool
+"""
+
+import os
+import signal
+import time
+import pytest
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from stt_server import STTServer
+from stt_client import STTStreamClient, generate_test_signal, stream_signal
+
+pytestmark = pytest.mark.skipif(not hasattr(os, "fork"), reason="requires os.fork")
+
+
+class FakeEngine:
+    """Engine stub reporting the process it runs in"""
+
+    def __init__(self):
+        self.previous_text = ""
+
+    def load_model(self):
+        return True
+
+    def transcribe_audio(self, audio_data, sample_rate=16000):
+        return SimpleNamespace(
+            text=f"pid {os.getpid()}",
+            confidence=0.9,
+            processing_time=0.001,
+            language="pl",
+        )
+
+
+def _transcribe(server, session_id):
+    """Stream one test signal and return transcription texts"""
+    client = STTStreamClient(port=server.port, session_id=session_id)
+    client.connect()
+    signal_data = generate_test_signal(6.0, speech_duration=2.0, pause_duration=2.5)
+    stream_signal(client, signal_data, realtime=False)
+    events = client.wait_for_end(timeout=10.0)
+    client.close()
+    return [e["text"] for e in events if e["event"] == "transcription"]
+
+
+def test_fork_workers_transcribe_in_child_processes():
+    """Test transcription runs in forked worker processes"""
+    server = STTServer(
+        port=0, engine_factory=FakeEngine, num_workers=2, worker_mode="fork"
+    )
+    assert server.start()
+    try:
+        texts = _transcribe(server, "c0")
+        assert texts
+
+        stats = server.get_statistics()
+        fork_stats = stats["pool"]["fork_server"]
+        worker_pids = {w["pid"] for w in fork_stats["workers"]}
+        assert stats["server"]["worker_mode"] == "fork"
+        assert len(worker_pids) == 2
+        assert os.getpid() not in worker_pids
+        assert {int(t.split()[1]) for t in texts} <= worker_pids
+        assert fork_stats["avg_spawn_ms"] > 0
+    finally:
+        server.stop()
+
+
+def test_fork_server_respawns_killed_worker():
+    """Test a killed worker is replaced by a fresh fork"""
+    server = STTServer(
+        port=0, engine_factory=FakeEngine, num_workers=1, worker_mode="fork"
+    )
+    assert server.start()
+    try:
+        old_pid = server.pool.engines[0].pid
+        os.kill(old_pid, signal.SIGKILL)
+
+        deadline = time.time() + 5.0
+        while server.pool.restarts == 0 and time.time() < deadline:
+            time.sleep(0.05)
+
+        assert server.pool.restarts == 1
+        new_pid = server.pool.engines[0].pid
+        assert new_pid != old_pid
+        assert _transcribe(server, "c1")[0] == f"pid {new_pid}"
+    finally:
+        server.stop()
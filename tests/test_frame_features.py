@@ -0,0 +1,77 @@
+"""
+Tests for shared per-chunk frame features
+"""
+
+import numpy as np
+import sys
+from pathlib import Path
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from audio_format import to_int16
+from frame_features import FrameFeatureExtractor
+from speech_segmenter import SpeechSegmenter
+from voice_activity_detector import SimpleVAD
+
+
+def chunk(freq=440.0, amplitude=0.3, n=1024, sample_rate=16000):
+    rng = np.random.default_rng(1)
+    t = np.arange(n) / sample_rate
+    audio = amplitude * np.sin(2 * np.pi * freq * t) + rng.normal(0, 0.01, n)
+    return audio.astype(np.float32)
+
+
+def test_features_match_vad_measures():
+    """Test energy and ZCR equal SimpleVAD's own computation, for both formats"""
+    audio = chunk()
+    vad = SimpleVAD()
+    extractor = FrameFeatureExtractor()
+
+    for samples in (audio, to_int16(audio)):
+        features = extractor.compute(samples)
+        assert abs(min(1.0, features.rms * 10) - vad.calculate_energy(audio)) < 1e-3
+        assert abs(features.zcr - vad.calculate_zero_crossing_rate(audio)) < 1e-3
+        assert abs(features.peak - np.max(np.abs(audio))) < 1e-3
+
+    assert abs(features.level_db - 20 * np.log10(features.rms)) < 1e-9
+    assert extractor.compute(np.zeros(0, dtype=np.float32)).level_db == -np.inf
+
+
+def test_band_energies_locate_tone():
+    """Test optional band energies put a 2 kHz tone in the right band"""
+    extractor = FrameFeatureExtractor(bands=[(100, 1000), (1000, 4000), (4000, 8000)])
+    features = extractor.compute(chunk(freq=2000))
+
+    assert features.band_energies.shape == (3,)
+    assert np.argmax(features.band_energies) == 1
+    assert FrameFeatureExtractor().compute(chunk()).band_energies is None
+
+
+def test_segmenter_keeps_level_from_shared_features():
+    """Test segments carry RMS and peak without rescanning their audio"""
+    extractor = FrameFeatureExtractor()
+    segmenter = SpeechSegmenter(min_segment_duration=0.0)
+    loud, quiet = chunk(amplitude=0.5), chunk(amplitude=0.1)
+
+    for i, audio in enumerate([loud, quiet]):
+        segmenter.process(audio, True, float(i), extractor.compute(audio))
+    segment = segmenter.flush()
+
+    full = np.concatenate([loud, quiet])
+    assert abs(segment.rms - np.sqrt(np.mean(full**2))) < 1e-4
+    assert abs(segment.peak - np.max(np.abs(full))) < 1e-4
+
+
+def test_compute_batch_matches_compute():
+    """Test batched features equal per-chunk features, with bands and int16"""
+    extractor = FrameFeatureExtractor(bands=[(100, 1000), (1000, 4000)])
+    audio = np.stack([chunk(freq=f, amplitude=a) for f, a in ((300, 0.1), (2500, 0.6))])
+
+    for samples in (audio, to_int16(audio)):
+        for got, want in zip(
+            extractor.compute_batch(samples), [extractor.compute(c) for c in samples]
+        ):
+            assert got.zcr == want.zcr and got.num_samples == want.num_samples
+            assert abs(got.rms - want.rms) < 1e-6 and abs(got.peak - want.peak) < 1e-6
+            assert np.allclose(got.band_energies, want.band_energies, rtol=1e-4)
@@ -0,0 +1,92 @@
+"""
+Tests for ModelCache module
+"""
+
+import pytest
+import sys
+import threading
+from pathlib import Path
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from model_cache import ModelCache
+
+
+def test_model_cache_shares_instance():
+    """Test a model is loaded once and shared"""
+    cache = ModelCache()
+    loads = []
+
+    def loader():
+        loads.append(1)
+        return object()
+
+    first = cache.acquire("tiny", loader)
+    second = cache.acquire("tiny", loader)
+
+    assert first is second
+    assert len(loads) == 1
+    assert cache.refcount("tiny") == 2
+    assert cache.get_lock("tiny") is cache.get_lock("tiny")
+
+
+def test_model_cache_release():
+    """Test model is dropped after last release"""
+    cache = ModelCache()
+    cache.acquire("tiny", object)
+    cache.acquire("tiny", object)
+
+    assert not cache.release("tiny")
+    assert cache.release("tiny")
+    assert cache.keys() == []
+    assert not cache.release("tiny")
+
+
+def test_model_cache_loads_outside_global_lock():
+    """Test a slow load blocks only callers of the same key"""
+    cache = ModelCache()
+    started, finish = threading.Event(), threading.Event()
+    loads = []
+
+    def slow_loader():
+        loads.append(1)
+        started.set()
+        finish.wait(5.0)
+        return "large"
+
+    results = []
+    threads = [
+        threading.Thread(
+            target=lambda: results.append(cache.acquire("large", slow_loader))
+        )
+        for _ in range(2)
+    ]
+    threads[0].start()
+    assert started.wait(5.0)
+    threads[1].start()
+
+    # Inny klucz nie czeka na ładowanie modelu "large"
+    assert cache.acquire("tiny", lambda: "tiny") == "tiny"
+    assert cache.release("tiny")
+    assert cache.keys() == []
+
+    finish.set()
+    for thread in threads:
+        thread.join(5.0)
+    assert results == ["large", "large"]
+    assert len(loads) == 1
+    assert cache.refcount("large") == 2
+
+
+def test_model_cache_failed_load_is_retried():
+    """Test a failed load leaves no entry and the next acquire loads again"""
+    cache = ModelCache()
+
+    def broken():
+        raise RuntimeError("no weights")
+
+    with pytest.raises(RuntimeError):
+        cache.acquire("tiny", broken)
+    assert cache.keys() == [] and cache.refcount("tiny") == 0
+    assert cache.acquire("tiny", lambda: "ok") == "ok"
@@ -0,0 +1,99 @@
+"""
+Tests for model compilation module and engine warm-up
+"""
+
+import pytest
+import sys
+from pathlib import Path
+
+import torch
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+whisper = pytest.importorskip("whisper")
+
+from model_compilation import (
+    compile_whisper,
+    compiled_cache_path,
+    cpu_features,
+    device_features,
+)
+from model_cache import model_cache
+import stt_engine
+from tests.tiny_whisper import make_tiny_whisper
+
+
+def make_model(*args, **kwargs):
+    return make_tiny_whisper()
+
+
+def test_cache_path_keyed_by_torch_and_cpu(tmp_path):
+    """Test the artifact directory name includes torch version and CPU features"""
+    path = compiled_cache_path("base-fp32", "torchscript", tmp_path)
+    assert path.parent == tmp_path
+    assert path.name.startswith("base-fp32-torchscript-torch")
+    assert path.name.endswith(cpu_features())
+    # Enkoder GPU ma własny katalog
+    cuda_path = compiled_cache_path("base-fp32", "torchscript", tmp_path, "cuda")
+    assert cuda_path != path and device_features("cuda") in cuda_path.name
+
+
+def test_torchscript_encoder_cached(tmp_path):
+    """Test the traced encoder is saved, reloaded and matches eager output"""
+    mel = torch.randn(2, 80, 3000)
+    expected = make_model().encoder(mel)
+
+    compile_whisper(make_model(), "random-fp32", "torchscript", tmp_path)
+    saved = compiled_cache_path("random-fp32", "torchscript", tmp_path) / "encoder.pt"
+    assert saved.exists()
+
+    model = compile_whisper(make_model(), "random-fp32", "torchscript", tmp_path)
+    assert isinstance(model.encoder, torch.jit.ScriptModule)
+    assert torch.allclose(model.encoder(mel), expected, atol=1e-5)
+
+    with pytest.raises(ValueError):
+        compile_whisper(make_model(), "random-fp32", "unknown", tmp_path)
+
+
+def test_torchscript_encoder_traced_with_input_dtype(tmp_path):
+    """Test the trace uses the mel dtype of decoding and is cached per dtype"""
+    mel = torch.randn(1, 80, 3000, dtype=torch.float64)
+    expected = make_model().encoder(mel)
+
+    for _ in range(2):
+        model = compile_whisper(
+            make_model(), "random-fp32", "torchscript", tmp_path, dtype=torch.float64
+        )
+        output = model.encoder(mel)
+        assert output.dtype == torch.float64
+        assert torch.allclose(output, expected, atol=1e-6)
+
+    path = compiled_cache_path("random-fp32", "torchscript", tmp_path)
+    assert (path / "encoder-float64.pt").exists()
+    assert not (path / "encoder.pt").exists()
+
+
+def test_load_model_warms_up(tmp_path, monkeypatch):
+    """Test load_model runs the warm-up transcription once per shared model"""
+    monkeypatch.setattr(whisper, "load_model", make_model)
+    engine = stt_engine.WhisperSTTEngine(
+        model_name="random",
+        device="cpu",
+        compile_mode="torchscript",
+        compiled_cache_dir=str(tmp_path),
+    )
+    calls = []
+    original = engine._warm_up
+    monkeypatch.setattr(
+        engine, "_warm_up", lambda model: (calls.append(1), original(model))
+    )
+
+    try:
+        assert engine.load_model()
+        assert calls == [1]
+        assert engine.warmup_time > 0
+        assert engine.get_model_info()["compile_mode"] == "torchscript"
+    finally:
+        engine.unload_model()
+    assert model_cache.refcount(engine._cache_key()) == 0
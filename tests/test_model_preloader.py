@@ -0,0 +1,95 @@
+"""
+Tests for background model preloading
+"""
+
+import threading
+import time
+import sys
+from pathlib import Path
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from model_preloader import ModelPreloader
+
+
+class SlowEngine:
+    """Engine stub whose load blocks until released"""
+
+    def __init__(self, key, gate):
+        self.key = key
+        self.gate = gate
+        self.is_loaded = False
+        self.unloaded = False
+
+    def load_model(self):
+        self.gate.wait(timeout=5)
+        self.is_loaded = True
+        return True
+
+    def unload_model(self):
+        self.unloaded = True
+
+
+def wait_for(predicate, timeout=5.0):
+    deadline = time.time() + timeout
+    while not predicate() and time.time() < deadline:
+        time.sleep(0.01)
+    return predicate()
+
+
+def test_preload_runs_in_background_and_reports_completion():
+    """Test preload returns immediately and calls on_done when loaded"""
+    gate = threading.Event()
+    done = []
+    preloader = ModelPreloader(
+        lambda key: SlowEngine(key, gate), on_done=lambda *args: done.append(args)
+    )
+
+    preloader.preload(("whisper", "base", None))
+    assert preloader.is_loading
+    preloader.preload(("whisper", "base", None))  # no second load
+
+    gate.set()
+    assert wait_for(lambda: preloader.is_ready)
+    assert preloader.engine.is_loaded
+    assert wait_for(lambda: done)
+    assert len(done) == 1 and done[0][:2] == (("whisper", "base", None), True)
+
+
+def test_changing_model_discards_stale_load():
+    """Test a load finishing after the selection changed is released"""
+    gates = {"base": threading.Event(), "small": threading.Event()}
+    engines = []
+
+    def factory(key):
+        engines.append(SlowEngine(key, gates[key]))
+        return engines[-1]
+
+    preloader = ModelPreloader(factory)
+    preloader.preload("base")
+    preloader.preload("small")
+
+    gates["small"].set()
+    assert wait_for(lambda: preloader.is_ready)
+    gates["base"].set()
+    assert wait_for(lambda: len(engines) == 2 and engines[0].unloaded)
+
+    assert preloader.engine.key == "small"
+    preloader.release()
+    assert engines[1].unloaded and preloader.state == "idle"
+
+
+def test_failed_load_sets_failed_state():
+    """Test factory errors are reported instead of raised"""
+    done = []
+
+    def factory(key):
+        raise ImportError("no backend")
+
+    preloader = ModelPreloader(factory, on_done=lambda *args: done.append(args))
+    preloader.preload("base")
+
+    assert wait_for(lambda: done)
+    assert preloader.state == "failed"
+    assert done[0][1] is False
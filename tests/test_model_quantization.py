@@ -0,0 +1,79 @@
+"""
+Tests for model quantization module
+"""
+
+import pytest
+import sys
+from pathlib import Path
+
+import torch
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from model_quantization import (
+    load_quantized_whisper,
+    quantize_whisper_int8,
+    quantized_cache_path,
+)
+
+
+class CastingLinear(torch.nn.Linear):
+    """Linear subclass like whisper.model.Linear"""
+
+    def forward(self, x):
+        return super().forward(x)
+
+
+def make_model():
+    torch.manual_seed(0)
+    return torch.nn.Sequential(
+        CastingLinear(16, 32), torch.nn.ReLU(), CastingLinear(32, 4)
+    )
+
+
+def test_quantize_linear_subclasses():
+    """Test Linear subclasses are converted to dynamic int8 layers"""
+    model = make_model()
+    x = torch.randn(2, 16)
+    expected = model(x)
+
+    quantized = quantize_whisper_int8(model)
+    assert isinstance(quantized[0], torch.ao.nn.quantized.dynamic.Linear)
+    assert torch.allclose(quantized(x), expected, atol=0.05)
+
+
+def test_quantized_model_cached_on_disk(tmp_path):
+    """Test the second load skips quantization and reads the cache"""
+    calls = []
+
+    def loader():
+        calls.append(1)
+        return make_model()
+
+    first = load_quantized_whisper("tiny", loader, tmp_path)
+    assert quantized_cache_path("tiny", tmp_path).exists()
+
+    second = load_quantized_whisper("tiny", loader, tmp_path)
+    assert len(calls) == 1
+    x = torch.randn(1, 16)
+    assert torch.equal(first(x), second(x))
+
+
+def test_quantized_cache_keyed_by_model_dir(tmp_path):
+    """Test the same model name from another model_dir gets its own cache"""
+    calls = []
+
+    def loader():
+        calls.append(1)
+        return make_model()
+
+    for model_dir in ("models-a", "models-b", "models-a"):
+        load_quantized_whisper("tiny", loader, tmp_path, tmp_path / model_dir)
+    assert len(calls) == 2
+
+    default = quantized_cache_path("tiny", tmp_path)
+    local = quantized_cache_path("tiny", tmp_path, tmp_path / "models-a")
+    assert default != local and local.name.startswith("tiny-")
+    checkpoint = quantized_cache_path(str(tmp_path / "a" / "tiny.pt"), tmp_path)
+    assert checkpoint != quantized_cache_path(str(tmp_path / "b" / "tiny.pt"), tmp_path)
@@ -0,0 +1,75 @@
+"""
+Tests for memory-mapped model weight loading
+"""
+
+import pytest
+import sys
+from pathlib import Path
+
+import torch
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+whisper = pytest.importorskip("whisper")
+
+from model_weights import (
+    convert_whisper_checkpoint,
+    load_mmap_whisper,
+    load_whisper_mmap,
+    mmap_checkpoint_path,
+    process_memory,
+)
+from tests.tiny_whisper import make_tiny_whisper
+
+
+def make_model():
+    return make_tiny_whisper(n_text_layer=2)
+
+
+def test_mmap_model_matches_source(tmp_path):
+    """Test the mmap-loaded model has the same weights, buffers and output"""
+    model = make_model()
+    path = convert_whisper_checkpoint(model, tmp_path / "random-fp32.pt")
+
+    loaded = load_whisper_mmap(path)
+    expected = model.state_dict()
+    for name, tensor in loaded.state_dict().items():
+        assert torch.equal(tensor, expected[name]), name
+    assert torch.equal(loaded.decoder.mask, model.decoder.mask)
+    assert torch.equal(
+        loaded.alignment_heads.to_dense(), model.alignment_heads.to_dense()
+    )
+
+    mel = torch.randn(80, 3000)
+    options = whisper.DecodingOptions(language="pl", fp16=False)
+    assert (
+        whisper.decode(loaded, mel, options).tokens
+        == whisper.decode(model, mel, options).tokens
+    )
+
+
+@pytest.mark.skipif(not Path("/proc/self/maps").exists(), reason="Linux only")
+def test_weights_are_file_backed(tmp_path):
+    """Test the checkpoint file is mapped into the process (page cache)"""
+    calls = []
+
+    def loader():
+        calls.append(1)
+        return make_model()
+
+    model = load_mmap_whisper("random", loader, tmp_path)
+    model = load_mmap_whisper("random", loader, tmp_path)
+    assert calls == [1]
+
+    path = mmap_checkpoint_path("random", tmp_path)
+    assert str(path) in Path("/proc/self/maps").read_text()
+    assert model.encoder.conv1.weight.dtype == torch.float32
+
+
+def test_process_memory_reports_rss():
+    """Test process memory report contains RSS"""
+    memory = process_memory()
+    if not memory:
+        pytest.skip("psutil not installed")
+    assert memory["rss_mb"] > 0
@@ -0,0 +1,66 @@
+"""
+Tests for noise-floor tracking and per-device noise profiles
+"""
+
+import numpy as np
+import sys
+from pathlib import Path
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from noise_floor import (
+    NoiseFloorTracker,
+    NoiseProfile,
+    load_noise_profile,
+    noise_profile_path,
+    save_noise_profile,
+)
+
+
+def test_tracker_follows_running_percentile():
+    """Test incremental percentile equals np.percentile over the ring window"""
+    rng = np.random.default_rng(0)
+    # Tło -60 dB, potem mowa i głośniejsze tło (-45 dB)
+    levels = np.concatenate(
+        [rng.normal(-60, 2, 300), rng.uniform(-30, -10, 100), rng.normal(-45, 2, 300)]
+    )
+    tracker = NoiseFloorTracker(window_frames=128, percentile=10.0)
+
+    for i, level in enumerate(levels):
+        floor_db = tracker.update(level)
+        window = levels[max(0, i - 127) : i + 1]
+        expected = np.sort(window)[int(0.1 * (len(window) - 1))]
+        assert abs(floor_db - expected) <= tracker.bin_db
+
+    assert abs(tracker.floor_db - (-45 - 2.6)) < 1.5
+
+
+def test_profile_seeds_floor_until_enough_frames():
+    """Test a loaded profile is used before the tracker has its own estimate"""
+    tracker = NoiseFloorTracker(min_frames=16)
+    assert tracker.floor_db is None
+
+    tracker.apply_profile(NoiseProfile(device="mic", floor_db=-52.0))
+    assert tracker.floor_db == -52.0
+    for _ in range(16):
+        tracker.update(-70.0)
+    assert abs(tracker.floor_db - (-70.0)) <= tracker.bin_db
+
+    profile = tracker.to_profile("mic")
+    assert profile.device == "mic" and abs(profile.floor_db + 70.0) <= 0.5
+
+
+def test_profile_round_trip(tmp_path):
+    """Test per-device profile files: save, load, sample-rate mismatch, corruption"""
+    profile = NoiseProfile(device="USB Mic (hw:1,0)", floor_db=-48.5, frames=900)
+    path = save_noise_profile(profile, tmp_path)
+
+    assert path == noise_profile_path("USB Mic (hw:1,0)", tmp_path)
+    assert path.name == "USB_Mic_hw_1_0.json"
+    assert load_noise_profile("USB Mic (hw:1,0)", tmp_path, 16000) == profile
+    assert load_noise_profile("USB Mic (hw:1,0)", tmp_path, 48000) is None
+    assert load_noise_profile("Other", tmp_path) is None
+
+    path.write_text("{not json")
+    assert load_noise_profile("USB Mic (hw:1,0)", tmp_path) is None
@@ -0,0 +1,159 @@
+"""
+Tests for ONNX export and the ONNX Runtime backend (parity with PyTorch)
+"""
+
+import pytest
+import numpy as np
+import sys
+from pathlib import Path
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+whisper = pytest.importorskip("whisper")
+pytest.importorskip("onnx")
+pytest.importorskip("onnxruntime")
+
+import torch
+
+from onnx_export import ensure_onnx_export, export_whisper_onnx, onnx_export_dir
+from onnx_backend import OnnxWhisperBackend, optimized_graph_path
+from stt_backend import STTBackend, TranscriptionResult
+from tests.tiny_whisper import make_tiny_whisper
+
+
+def make_model():
+    """Random weights - parity does not need a downloaded checkpoint"""
+    return make_tiny_whisper(n_state=64, n_audio_layer=2, n_text_layer=2)
+
+
+@pytest.fixture(scope="module")
+def exported(tmp_path_factory):
+    """Export a random-weight model once for the module"""
+    cache_dir = tmp_path_factory.mktemp("onnx")
+    model = make_model()
+    export_whisper_onnx(model, onnx_export_dir("random", cache_dir), "random")
+    return model, cache_dir
+
+
+@pytest.fixture
+def mels():
+    rng = np.random.default_rng(0)
+    audio = [
+        (rng.standard_normal(16000 * seconds) * 0.1).astype(np.float32)
+        for seconds in (2, 5)
+    ]
+    return torch.stack(
+        [whisper.log_mel_spectrogram(whisper.pad_or_trim(a), 80) for a in audio]
+    )
+
+
+def make_backend(cache_dir, beam_size):
+    backend = OnnxWhisperBackend(
+        model_name="random",
+        beam_size=beam_size,
+        initial_prompt=None,
+        onnx_cache_dir=str(cache_dir),
+    )
+    assert backend.load_model()
+    return backend
+
+
+def test_export_is_cached(exported):
+    """Second call reuses the exported graphs without loading the model"""
+    _, cache_dir = exported
+    calls = []
+
+    def loader():
+        calls.append(1)
+        return make_model()
+
+    export_dir = ensure_onnx_export("random", loader, cache_dir)
+    assert calls == []
+    assert (export_dir / "encoder.onnx").is_file()
+    assert (export_dir / "decoder.onnx").is_file()
+
+
+def test_greedy_parity_with_pytorch(exported, mels):
+    """Greedy ORT decoding reproduces whisper.decode tokens for a batch"""
+    model, cache_dir = exported
+    expected = whisper.decode(
+        model,
+        mels,
+        whisper.DecodingOptions(language="pl", fp16=False, without_timestamps=True),
+    )
+
+    backend = make_backend(cache_dir, beam_size=1)
+    try:
+        decoded = backend.decode(mels.numpy())
+    finally:
+        backend.unload_model()
+
+    for item, reference in zip(decoded, expected):
+        assert item["tokens"] == reference.tokens
+        assert item["avg_logprob"] == pytest.approx(reference.avg_logprob, abs=1e-3)
+        assert item["no_speech_prob"] == pytest.approx(
+            reference.no_speech_prob, abs=1e-4
+        )
+
+
+def test_beam_parity_with_pytorch(exported, mels):
+    """Beam search over ORT matches whisper.decode beam search"""
+    model, cache_dir = exported
+    expected = whisper.decode(
+        model,
+        mels[0],
+        whisper.DecodingOptions(
+            language="pl", fp16=False, without_timestamps=True, beam_size=3
+        ),
+    )
+
+    backend = make_backend(cache_dir, beam_size=3)
+    try:
+        decoded = backend.decode(mels[:1].numpy())
+    finally:
+        backend.unload_model()
+
+    assert decoded[0]["tokens"] == expected.tokens
+
+
+def test_backend_returns_transcription_result(exported):
+    """The ORT backend satisfies STTBackend and returns TranscriptionResult"""
+    _, cache_dir = exported
+    backend = make_backend(cache_dir, beam_size=1)
+    try:
+        assert isinstance(backend, STTBackend)
+        audio = np.zeros(16000, dtype=np.float32)
+        result = backend.transcribe_audio(audio)
+        batch = backend.transcribe_batch([audio, audio], with_timestamps=True)
+    finally:
+        backend.unload_model()
+
+    assert isinstance(result, TranscriptionResult)
+    assert result.model_used == "random"
+    assert len(batch) == 2 and all(isinstance(r, TranscriptionResult) for r in batch)
+
+
+def test_optimized_graph_keyed_and_rebuilt(exported, mels):
+    """Test the optimized graph is keyed by ORT version/CPU and rebuilt if broken"""
+    import onnxruntime
+
+    _, cache_dir = exported
+    encoder = onnx_export_dir("random", cache_dir) / "encoder.onnx"
+    optimized = optimized_graph_path(encoder, onnxruntime.__version__)
+    assert onnxruntime.__version__ in optimized.name
+
+    backend = make_backend(cache_dir, beam_size=1)
+    expected = backend.decode(mels.numpy())
+    backend.unload_model()
+    assert optimized.is_file()
+
+    # Graf z innej wersji ORT / innego CPU - nieczytelny
+    optimized.write_bytes(b"not an onnx graph")
+    backend = make_backend(cache_dir, beam_size=1)
+    try:
+        decoded = backend.decode(mels.numpy())
+    finally:
+        backend.unload_model()
+    assert [d["tokens"] for d in decoded] == [d["tokens"] for d in expected]
+    assert optimized.stat().st_size > 100
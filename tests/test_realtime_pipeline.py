@@ -0,0 +1,210 @@
+"""
+Tests for STT engine hot-swap in the realtime pipeline
+"""
+
+import threading
+import time
+import numpy as np
+import sys
+from pathlib import Path
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from admission_controller import AdmissionController, LoadLevel
+from escalation import EscalatingSTTEngine
+from realtime_pipeline import RealtimeSTTPipeline
+from segment_router import Route, SegmentRouter
+from speech_segmenter import SpeechSegment
+from stt_backend import TranscriptionResult
+
+
+class FakeEngine:
+    """Engine stub recording transcriptions; optionally blocks until released"""
+
+    def __init__(self, name, loads=True, block=False):
+        self.model_name = name
+        self.previous_text = ""
+        self.is_loaded = False
+        self.loads = loads
+        self.started = threading.Event()
+        self.release = threading.Event()
+        if not block:
+            self.release.set()
+        self.transcribed = []
+        self.contexts = []
+
+    def load_model(self):
+        self.is_loaded = self.loads
+        return self.loads
+
+    def unload_model(self):
+        self.is_loaded = False
+
+    def transcribe_audio(self, audio_data, sample_rate=16000):
+        self.started.set()
+        self.release.wait(5.0)
+        self.transcribed.append(len(audio_data))
+        self.contexts.append(self.previous_text)
+        self.previous_text = self.model_name
+        return TranscriptionResult(
+            text=self.model_name,
+            language="pl",
+            confidence=0.9,
+            processing_time=0.0,
+            segments=[],
+            model_used=self.model_name,
+        )
+
+
+def make_segment(index: int) -> SpeechSegment:
+    return SpeechSegment(
+        audio_data=np.full(1600 * (index + 1), 0.1, dtype=np.float32),
+        start_time=float(index),
+        end_time=index + 0.1 * (index + 1),
+        confidence=0.9,
+        sample_rate=16000,
+    )
+
+
+def make_pipeline(engine):
+    """Pipeline without audio or model loading, STT loop running"""
+    pipeline = RealtimeSTTPipeline(
+        enable_stt=False, use_webrtc_vad=False, catchup_threshold=0
+    )
+    engine.load_model()
+    pipeline.set_stt_engine(engine)
+    pipeline.stt_thread = threading.Thread(target=pipeline._stt_loop, daemon=True)
+    pipeline.stt_thread.start()
+    return pipeline
+
+
+def stop_pipeline(pipeline):
+    pipeline.backlog.wait_empty(timeout=5.0)
+    pipeline._stt_stop.set()
+    pipeline.stt_thread.join(5.0)
+
+
+def test_swap_between_segments_keeps_wrappers():
+    """Test the in-flight segment finishes on the old model and routing survives"""
+    old = FakeEngine("small", block=True)
+    router = SegmentRouter(old, [Route(name="all")])
+    pipeline = make_pipeline(router)
+    try:
+        pipeline.backlog.put(make_segment(0))
+        assert old.started.wait(5.0)
+
+        new = FakeEngine("medium")
+        results = []
+        swap = pipeline.swap_stt_engine(new, callback=results.append)
+        swap_applied = threading.Event()
+        threading.Thread(
+            target=lambda: (swap.join(), swap_applied.set()), daemon=True
+        ).start()
+        assert not swap_applied.wait(0.3)
+        assert router.default_engine is old
+
+        old.release.set()
+        swap.join(5.0)
+        pipeline.backlog.put(make_segment(1))
+        stop_pipeline(pipeline)
+
+        assert results == [True]
+        assert pipeline.stt_engine is router
+        assert router.default_engine is new and router.engines["all"] is new
+        assert old.transcribed == [1600] and new.transcribed == [3200]
+        assert not old.is_loaded and new.contexts == ["small"]
+        assert pipeline.engine_swaps == 1
+    finally:
+        old.release.set()
+        pipeline._stt_stop.set()
+
+
+def test_superseded_swap_and_escalation_wrapper():
+    """Test a newer swap replaces an unapplied one under the escalation wrapper"""
+    old = FakeEngine("small", block=True)
+    escalating = EscalatingSTTEngine(old, FakeEngine("large"))
+    pipeline = make_pipeline(escalating)
+    try:
+        pipeline.backlog.put(make_segment(0))
+        assert old.started.wait(5.0)
+
+        first, second = FakeEngine("base"), FakeEngine("medium")
+        results = {}
+
+        def swap(engine):
+            return pipeline.swap_stt_engine(
+                engine, callback=lambda ok: results.update({engine.model_name: ok})
+            )
+
+        swaps = [swap(first)]
+        while pipeline._pending_swap is None:
+            time.sleep(0.01)
+        swaps.append(swap(second))
+        swaps[0].join(5.0)
+        assert results == {"base": False} and not first.is_loaded
+
+        old.release.set()
+        swaps[1].join(5.0)
+        stop_pipeline(pipeline)
+
+        assert results == {"base": False, "medium": True}
+        assert pipeline.stt_engine is escalating
+        assert escalating.primary is second
+        assert escalating.escalation.model_name == "large"
+        assert pipeline.engine_swaps == 1
+    finally:
+        old.release.set()
+        pipeline._stt_stop.set()
+
+
+def test_failed_load_keeps_current_engine():
+    """Test a model that fails to load leaves the running engine in place"""
+    old = FakeEngine("small")
+    pipeline = make_pipeline(old)
+    try:
+        results = []
+        broken = FakeEngine("large", loads=False)
+        pipeline.swap_stt_engine(broken, callback=results.append).join(5.0)
+
+        pipeline.backlog.put(make_segment(0))
+        stop_pipeline(pipeline)
+        assert results == [False]
+        assert pipeline.stt_engine is old and old.is_loaded
+        assert old.transcribed == [1600] and broken.transcribed == []
+        assert pipeline.engine_swaps == 0
+    finally:
+        old.release.set()
+        pipeline._stt_stop.set()
+
+
+class FakeRefiner:
+    """Refinement tier stub recording submitted segments"""
+
+    def __init__(self):
+        self.submitted = []
+
+    def submit(self, segment):
+        self.submitted.append(segment)
+
+
+def test_shed_partials_stops_refinement_only():
+    """Test SHED_PARTIALS skips the refinement tier but keeps live transcription"""
+    engine = FakeEngine("small")
+    pipeline = make_pipeline(engine)
+    try:
+        pipeline.refiner = FakeRefiner()
+        pipeline.admission_controller = AdmissionController()
+        pipeline.backlog.put(make_segment(0))
+        pipeline.backlog.wait_empty(timeout=5.0)
+        assert len(pipeline.refiner.submitted) == 1
+
+        pipeline.admission_controller.load_level = LoadLevel.SHED_PARTIALS
+        pipeline.backlog.put(make_segment(1))
+        stop_pipeline(pipeline)
+
+        assert engine.transcribed == [1600, 3200]
+        assert len(pipeline.refiner.submitted) == 1
+        assert pipeline.admission_controller.shed_segments == 0
+    finally:
+        pipeline._stt_stop.set()
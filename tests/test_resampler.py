@@ -0,0 +1,58 @@
+"""
+Tests for the streaming polyphase resampler
+"""
+
+import numpy as np
+import sys
+from pathlib import Path
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from resampler import StreamingResampler, design_polyphase_filter, resample_polyphase
+
+
+def tone(freq, sample_rate, seconds=1.0):
+    t = np.arange(int(sample_rate * seconds)) / sample_rate
+    return (0.5 * np.sin(2 * np.pi * freq * t)).astype(np.float32)
+
+
+def test_streaming_matches_whole_signal():
+    """Test chunked processing has no seams at chunk boundaries"""
+    audio = np.random.default_rng(0).normal(0, 0.1, 44100).astype(np.float32)
+
+    whole = StreamingResampler(44100, 16000)
+    expected = np.concatenate([whole.process(audio), whole.flush()])
+
+    streaming = StreamingResampler(44100, 16000)
+    chunks = [streaming.process(c) for c in np.array_split(audio, 37)]
+    result = np.concatenate(chunks + [streaming.flush()])
+
+    assert len(result) == len(expected)
+    np.testing.assert_allclose(result, expected, atol=1e-5)
+
+
+def test_passband_tone_preserved():
+    """Test a 1 kHz tone survives 48 kHz -> 16 kHz with correct length and phase"""
+    output = resample_polyphase(tone(1000, 48000), 48000, 16000)
+    reference = tone(1000, 16000)
+
+    assert len(output) == len(reference)
+    assert np.max(np.abs(output - reference)[100:-100]) < 1e-3
+
+
+def test_tone_above_nyquist_is_suppressed():
+    """Test an 11 kHz tone does not alias into the 16 kHz output"""
+    output = resample_polyphase(tone(11000, 48000), 48000, 16000)
+    rms = np.sqrt(np.mean(output[100:-100] ** 2))
+
+    assert 20 * np.log10(rms / (0.5 / np.sqrt(2))) < -60
+
+
+def test_filter_design_is_cached_per_rate_pair():
+    """Test new streams reuse the filter designed for the same rates"""
+    first = StreamingResampler(48000, 16000)
+    second = StreamingResampler(48000, 16000)
+
+    assert first._phases is second._phases
+    assert design_polyphase_filter.cache_info().hits > 0
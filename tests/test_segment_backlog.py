@@ -0,0 +1,117 @@
+"""
+Tests for SegmentBacklog module
+"""
+
+import pytest
+import numpy as np
+import sys
+from pathlib import Path
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from segment_backlog import SegmentBacklog, SpillLog
+from speech_segmenter import SpeechSegment
+
+
+def make_segment(index: int, num_samples: int = 1600) -> SpeechSegment:
+    """Create a segment with a recognizable constant level"""
+    audio = np.full(num_samples, 0.01 * (index + 1), dtype=np.float32)
+    return SpeechSegment(
+        audio_data=audio,
+        start_time=float(index),
+        end_time=index + num_samples / 16000,
+        confidence=0.9,
+        sample_rate=16000,
+    )
+
+
+def test_spill_preserves_fifo_order(tmp_path):
+    """Test segments beyond the memory limit spill to disk in order"""
+    backlog = SegmentBacklog(memory_limit=2, spill_dir=tmp_path)
+    for i in range(5):
+        assert backlog.put(make_segment(i))
+
+    stats = backlog.get_statistics()
+    assert stats["pending_memory"] == 2
+    assert stats["pending_disk"] == 3
+
+    # Nowy segment po zwolnieniu pamięci nie może wyprzedzić logu
+    first = backlog.get(timeout=0.1)
+    backlog.task_done(first)
+    backlog.put(make_segment(5))
+
+    starts = [first.start_time]
+    while len(backlog):
+        segment = backlog.get(timeout=0.1)
+        starts.append(segment.start_time)
+        backlog.task_done(segment)
+
+    assert starts == [0.0, 1.0, 2.0, 3.0, 4.0, 5.0]
+    assert backlog.wait_empty(timeout=0.1)
+    assert (tmp_path / SpillLog.DATA_FILE).stat().st_size == 0
+
+
+def test_int16_roundtrip(tmp_path):
+    """Test spilled audio is stored as int16 and restored as float32"""
+    log = SpillLog(tmp_path)
+    segment = make_segment(0)
+    segment.audio_data = np.linspace(-1.0, 1.0, 1600, dtype=np.float32)
+    log.append(0, segment)
+
+    assert (tmp_path / SpillLog.DATA_FILE).stat().st_size == 1600 * 2
+    seq, restored = log.take()
+    assert seq == 0
+    assert restored.audio_data.dtype == np.float32
+    np.testing.assert_allclose(restored.audio_data, segment.audio_data, atol=1e-4)
+    log.close()
+
+
+def test_spill_keeps_segment_features(tmp_path):
+    """Test speech ratio and level survive the spill log and a restart"""
+    log = SpillLog(tmp_path)
+    segment = make_segment(0)
+    segment.speech_ratio, segment.rms, segment.peak = 0.35, 0.02, 0.4
+    log.append(0, segment)
+    log.close()
+
+    _, restored = SpillLog(tmp_path).take()
+    assert restored.speech_ratio == 0.35
+    assert (restored.rms, restored.peak) == (0.02, 0.4)
+
+
+def test_backlog_survives_restart(tmp_path):
+    """Test unfinished segments resume after reopening the spill directory"""
+    backlog = SegmentBacklog(memory_limit=1, spill_dir=tmp_path)
+    for i in range(4):
+        backlog.put(make_segment(i))
+
+    done = backlog.get(timeout=0.1)
+    backlog.task_done(done)
+    # Segment z dysku pobrany, ale nie potwierdzony przed "awarią"
+    backlog.get(timeout=0.1)
+    backlog.close()
+
+    resumed = SegmentBacklog(memory_limit=2, spill_dir=tmp_path)
+    assert resumed.get_statistics()["restored_segments"] == 3
+    resumed.put(make_segment(4))
+
+    starts = []
+    while len(resumed):
+        segment = resumed.get(timeout=0.1)
+        starts.append(segment.start_time)
+        resumed.task_done(segment)
+    assert starts == [1.0, 2.0, 3.0, 4.0]
+    resumed.close()
+
+
+def test_keeps_segments_without_spill_dir():
+    """Test memory-only backlog grows over the limit instead of dropping"""
+    backlog = SegmentBacklog(memory_limit=1)
+    assert backlog.put(make_segment(0))
+    assert backlog.put(make_segment(1))
+    assert len(backlog) == 2
+
+    stats = backlog.get_statistics()
+    assert stats["overflow_segments"] == 1
+    assert [backlog.get(timeout=0).start_time for _ in range(2)] == [0.0, 1.0]
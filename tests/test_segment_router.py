@@ -0,0 +1,108 @@
+"""
+Tests for duration-aware segment routing
+"""
+
+import json
+import pytest
+import numpy as np
+import sys
+from pathlib import Path
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from segment_router import SegmentRouter, load_routing_table
+from speech_segmenter import SpeechSegment
+from stt_backend import TranscriptionResult
+
+
+class StubEngine:
+    """Engine stub tagging results with its model name"""
+
+    def __init__(self, model_name, options=None):
+        self.model_name = model_name
+        self.options = options or {}
+        self.previous_text = ""
+        self.is_loaded = True
+        self.batches = []
+
+    def load_model(self):
+        return True
+
+    def transcribe_audio(self, audio_data, sample_rate=16000):
+        return TranscriptionResult(
+            text=f"{self.model_name}:{len(audio_data)}",
+            language="pl",
+            confidence=0.9,
+            processing_time=0.01,
+            segments=[],
+            model_used=self.model_name,
+        )
+
+    def transcribe_batch(self, audio_batch, sample_rate=16000, with_timestamps=False):
+        self.batches.append(len(audio_batch))
+        return [self.transcribe_audio(audio, sample_rate) for audio in audio_batch]
+
+
+def make_router(table=None):
+    return SegmentRouter(
+        StubEngine("medium"),
+        load_routing_table(table),
+        engine_factory=lambda route: StubEngine(route.model, route.options),
+    )
+
+
+def make_segment(duration, speech_ratio=1.0):
+    return SpeechSegment(
+        audio_data=np.zeros(int(duration * 16000), dtype=np.float32),
+        start_time=0.0,
+        end_time=duration,
+        confidence=1.0,
+        sample_rate=16000,
+        speech_ratio=speech_ratio,
+    )
+
+
+def test_load_routing_table_from_json(tmp_path):
+    """Test table parsing, decode options and implicit default route"""
+    path = tmp_path / "routes.json"
+    path.write_text(
+        json.dumps(
+            [{"name": "short", "max_duration": 1.5, "model": "tiny", "beam_size": 1}]
+        )
+    )
+
+    routes = load_routing_table(str(path))
+
+    assert [r.name for r in routes] == ["short", "default"]
+    assert routes[0].options == {"beam_size": 1}
+    assert routes[1].is_catch_all
+
+
+def test_router_routes_by_duration_and_speech_ratio():
+    """Test segments go to the first matching route"""
+    router = make_router()
+
+    assert router.transcribe_segment(make_segment(0.6)).model_used == "base"
+    assert router.transcribe_segment(make_segment(3.0, 0.2)).model_used == "base"
+    assert router.transcribe_segment(make_segment(3.0)).model_used == "medium"
+    assert router.engines["short"].options == {"beam_size": 1}
+
+    stats = router.get_routing_statistics()
+    assert stats["short"]["segments"] == 1
+    assert stats["sparse"]["segments"] == 1
+    assert stats["default"]["segments"] == 1
+    assert stats["default"]["audio_seconds"] == pytest.approx(3.0)
+    assert stats["default"]["cpu_seconds_per_audio_minute"] >= 0
+
+
+def test_router_batch_groups_routes_and_keeps_order():
+    """Test batch is split per route and results keep input order"""
+    router = make_router([{"name": "short", "max_duration": 1.0, "model": "tiny"}])
+    audio = [np.zeros(n, dtype=np.float32) for n in (8000, 48000, 4000)]
+
+    results = router.transcribe_batch(audio)
+
+    assert [r.model_used for r in results] == ["tiny", "medium", "tiny"]
+    assert router.engines["short"].batches == [2]
+    assert router.get_routing_statistics()["short"]["segments"] == 2
@@ -0,0 +1,96 @@
+"""
+Tests for the pre-STT speech gate
+"""
+
+import json
+import numpy as np
+import sys
+from pathlib import Path
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from speech_gate import SpeechGate, frame_features
+
+SAMPLE_RATE = 16000
+rng = np.random.default_rng(0)
+t = np.arange(SAMPLE_RATE) / SAMPLE_RATE
+
+NOISE = (0.1 * rng.standard_normal(SAMPLE_RATE)).astype(np.float32)
+VOICED = (0.1 * sum(np.sin(2 * np.pi * 150 * k * t) / k for k in range(1, 20))).astype(
+    np.float32
+)
+
+
+class ProbeEngine:
+    """Engine stub exposing the first-decoder-step no-speech probe"""
+
+    def __init__(self, no_speech_prob):
+        self.no_speech_prob = no_speech_prob
+        self.probes = 0
+
+    def no_speech_probability(self, audio_data, sample_rate=16000):
+        self.probes += 1
+        return self.no_speech_prob
+
+
+def test_frame_features_separate_noise_from_voiced_audio():
+    """Test speech ratio and spectral flatness on synthetic signals"""
+    click = (1e-4 * rng.standard_normal(SAMPLE_RATE)).astype(np.float32)
+    click[8000:8320] += 0.5
+
+    noise_ratio, noise_flatness = frame_features(NOISE, SAMPLE_RATE)
+    voiced_ratio, voiced_flatness = frame_features(VOICED, SAMPLE_RATE)
+    click_ratio, _ = frame_features(click, SAMPLE_RATE)
+
+    assert noise_flatness > 0.45
+    assert voiced_ratio == 1.0 and voiced_flatness < 0.05
+    assert click_ratio < 0.1
+
+
+def test_gate_rejects_noise_without_probe_and_audits(tmp_path):
+    """Test obvious cases skip the decoder probe; rejected audio is logged"""
+    engine = ProbeEngine(0.0)
+    gate = SpeechGate(engine, audit_dir=tmp_path)
+
+    assert gate.check(VOICED, SAMPLE_RATE).is_speech
+    decision = gate.check(NOISE, SAMPLE_RATE)
+    assert not decision.is_speech
+    assert decision.reason == "spectral_flatness"
+    assert gate.check(VOICED, SAMPLE_RATE, vad_speech_ratio=0.1).reason == (
+        "low_speech_ratio"
+    )
+    assert engine.probes == 0
+
+    gate.record_transcription(audio_seconds=1.0, processing_seconds=0.5)
+    stats = gate.get_statistics()
+    assert stats["checked"] == 3 and stats["rejected"] == 2
+    assert stats["estimated_saved_seconds"] == 1.0
+
+    entries = [
+        json.loads(line)
+        for line in (tmp_path / "rejected.jsonl").read_text().splitlines()
+    ]
+    assert len(entries) == 2
+    assert (tmp_path / entries[0]["file"]).exists()
+
+
+def test_gate_probes_ambiguous_segments():
+    """Test ambiguous segments are decided by Whisper's no-speech probability"""
+    mixed = 0.3 * VOICED + 0.5 * NOISE
+
+    rejecting = SpeechGate(ProbeEngine(0.9))
+    decision = rejecting.check(mixed, SAMPLE_RATE)
+    assert decision.reason == "no_speech_prob"
+    assert decision.no_speech_prob == 0.9
+
+    accepting = SpeechGate(ProbeEngine(0.1))
+    assert accepting.check(mixed, SAMPLE_RATE).is_speech
+    assert accepting.get_statistics()["probed"] == 1
+
+    # Engines without the probe let ambiguous segments through
+    assert SpeechGate(object()).check(mixed, SAMPLE_RATE).is_speech
+
+    # Under load the probe is skipped and ambiguous segments pass
+    assert rejecting.check(mixed, SAMPLE_RATE, probe=False).is_speech
+    assert rejecting.stt_engine.probes == 1
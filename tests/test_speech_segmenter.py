@@ -0,0 +1,73 @@
+"""
+Tests for SpeechSegmenter module
+"""
+
+import pytest
+import numpy as np
+import sys
+from pathlib import Path
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from speech_segmenter import SpeechSegmenter, SpeechSegment
+
+
+def test_segmenter_finalizes_after_silence():
+    """Test segment finalization after silence timeout"""
+    segmenter = SpeechSegmenter(
+        sample_rate=16000, min_segment_duration=0.5, silence_timeout=1.0
+    )
+    chunk = np.ones(1600, dtype=np.float32) * 0.1
+
+    for i in range(10):
+        assert segmenter.process(chunk, True, i * 0.1) is None
+
+    assert segmenter.process(chunk, False, 1.5) is None
+    segment = segmenter.process(chunk, False, 2.0)
+
+    assert isinstance(segment, SpeechSegment)
+    assert segment.start_time == 0.0
+    assert segment.end_time == pytest.approx(0.9)
+    assert segment.num_samples == 16000
+    assert not segmenter.is_active
+
+
+def test_segmenter_discards_short_segment():
+    """Test short segments are discarded"""
+    segmenter = SpeechSegmenter(min_segment_duration=1.0, silence_timeout=0.5)
+    chunk = np.ones(160, dtype=np.float32)
+
+    segmenter.process(chunk, True, 0.0)
+    segmenter.process(chunk, True, 0.2)
+
+    assert segmenter.process(chunk, False, 1.0) is None
+    assert segmenter.discarded_segments == 1
+    assert not segmenter.is_active
+
+
+def test_segmenter_max_duration_and_flush():
+    """Test max duration split and flush"""
+    segmenter = SpeechSegmenter(max_segment_duration=1.0)
+    chunk = np.ones(160, dtype=np.float32)
+
+    segmenter.process(chunk, True, 0.0)
+    segment = segmenter.process(chunk, True, 1.0)
+    assert segment is not None
+    assert segment.duration == pytest.approx(1.0)
+
+    assert segmenter.flush() is None
+    segmenter.process(chunk, True, 2.0)
+    assert segmenter.flush() is not None
+
+
+def test_segmenter_speech_ratio_counts_inner_silence():
+    """Test speech ratio reflects silence gaps inside the segment"""
+    segmenter = SpeechSegmenter(min_segment_duration=0.1, silence_timeout=1.0)
+    chunk = np.ones(1600, dtype=np.float32) * 0.1
+
+    for i, is_speech in enumerate([True, False, False, True, False, True]):
+        segmenter.process(chunk, is_speech, i * 0.1)
+    segment = segmenter.flush()
+
+    assert segment.speech_ratio == pytest.approx(3 / 6)
@@ -0,0 +1,127 @@
+"""
+Tests for STT backend protocol and faster-whisper backend
+"""
+
+import pytest
+import numpy as np
+import sys
+from pathlib import Path
+from types import ModuleType, SimpleNamespace
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+import stt_backend
+from stt_backend import (
+    STTBackend,
+    TranscriptionResult,
+    confidence_from_segments,
+    create_stt_backend,
+)
+from faster_whisper_backend import FasterWhisperBackend
+
+
+class FakeWhisperModel:
+    """Stand-in for faster_whisper.WhisperModel"""
+
+    instances = []
+
+    def __init__(self, model_size_or_path, **kwargs):
+        self.source = model_size_or_path
+        self.kwargs = kwargs
+        FakeWhisperModel.instances.append(self)
+
+    def transcribe(self, audio, **options):
+        segments = iter(
+            [
+                SimpleNamespace(
+                    id=0,
+                    start=0.0,
+                    end=len(audio) / 16000,
+                    text=" to jest sie test",
+                    tokens=[1, 2, 3],
+                    temperature=0.0,
+                    avg_logprob=-0.2,
+                    compression_ratio=1.1,
+                    no_speech_prob=0.01,
+                )
+            ]
+        )
+        return segments, SimpleNamespace(language="pl")
+
+
+@pytest.fixture
+def fake_faster_whisper(monkeypatch):
+    """Register a fake faster_whisper module"""
+    module = ModuleType("faster_whisper")
+    module.WhisperModel = FakeWhisperModel
+    monkeypatch.setitem(sys.modules, "faster_whisper", module)
+    monkeypatch.setattr(
+        stt_backend.importlib.util, "find_spec", lambda name: SimpleNamespace()
+    )
+    FakeWhisperModel.instances.clear()
+    return module
+
+
+def test_unknown_backend_rejected():
+    """Test factory rejects unknown backend names"""
+    with pytest.raises(ValueError):
+        create_stt_backend("nonexistent")
+
+
+def test_confidence_from_segments():
+    """Test confidence mapping from average logprob"""
+    assert confidence_from_segments([]) == 0.5
+    assert confidence_from_segments([{"avg_logprob": 0.0}]) == 1.0
+    assert confidence_from_segments([{"avg_logprob": -1.0}]) == pytest.approx(0.5)
+
+
+def test_faster_whisper_backend_result(fake_faster_whisper):
+    """Test faster-whisper backend returns a TranscriptionResult"""
+    engine = create_stt_backend("faster-whisper", model_name="tiny")
+    assert isinstance(engine, FasterWhisperBackend)
+    assert isinstance(engine, STTBackend)
+
+    result = engine.transcribe_audio(np.zeros(16000, dtype=np.float32))
+    assert isinstance(result, TranscriptionResult)
+    assert result.text == "To jest się test"
+    assert result.segments[0]["avg_logprob"] == -0.2
+    assert engine.get_model_info()["compute_type"] == "int8"
+
+    batch = engine.transcribe_batch([np.zeros(8000), np.zeros(16000)])
+    assert len(batch) == 2 and all(r.text for r in batch)
+    engine.unload_model()
+
+
+def test_faster_whisper_local_model_dir(fake_faster_whisper, tmp_path):
+    """Test local model directories load without network access"""
+    converted = tmp_path / "base"
+    converted.mkdir()
+    (converted / "model.bin").write_bytes(b"")
+
+    engine = FasterWhisperBackend(model_name="base", model_dir=str(tmp_path))
+    assert engine.load_model()
+    assert FakeWhisperModel.instances[-1].source == str(converted)
+    engine.unload_model()
+
+    cached = FasterWhisperBackend(model_name="small", model_dir=str(tmp_path))
+    assert cached.load_model()
+    assert FakeWhisperModel.instances[-1].kwargs["local_files_only"]
+    assert FakeWhisperModel.instances[-1].kwargs["download_root"] == str(tmp_path)
+    cached.unload_model()
+
+
+def test_faster_whisper_cache_keyed_by_model_dir(fake_faster_whisper, tmp_path):
+    """Test backends with different model directories do not share a model"""
+    engines = [
+        FasterWhisperBackend(model_name="base", model_dir=str(tmp_path / name))
+        for name in ("a", "b")
+    ]
+    try:
+        for engine in engines:
+            assert engine.load_model()
+        assert engines[0].model is not engines[1].model
+        assert engines[0]._cache_key() != engines[1]._cache_key()
+    finally:
+        for engine in engines:
+            engine.unload_model()
@@ -59,3 +59,14 @@ def test_stt_engine_info():
     assert "device" in info
     assert "language" in info
     assert info["model_name"] == "tiny"
+
+
+def test_int8_disables_mmap_weights():
+    """Test mmap loading is turned off for int8, which loads its own cache"""
+    engine = WhisperSTTEngine(
+        model_name="tiny", device="cpu", cpu_precision="int8", mmap_weights=True
+    )
+    engine._resolve_device()
+
+    assert engine.cpu_precision == "int8"
+    assert not engine.mmap_weights
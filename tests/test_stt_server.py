@@ -0,0 +1,254 @@
+"""
+Tests for STT streaming server module
+"""
+
+import pytest
+import socket
+import time
+import numpy as np
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from stt_server import (
+    FINISHED_SESSIONS_LIMIT,
+    LATENCY_WINDOW,
+    MSG_AUDIO,
+    STTServer,
+    STTWorkerPool,
+    StreamSession,
+    TranscriptionJob,
+    recv_frame,
+    send_frame,
+)
+from stt_client import STTStreamClient, generate_test_signal, stream_signal
+from admission_controller import AdmissionController
+
+
+class FakeEngine:
+    """Engine stub returning a fixed transcription"""
+
+    def __init__(self):
+        self.previous_text = ""
+
+    def load_model(self):
+        return True
+
+    def transcribe_audio(self, audio_data, sample_rate=16000):
+        return SimpleNamespace(
+            text=f"segment {len(audio_data)}",
+            confidence=0.9,
+            processing_time=0.001,
+            language="pl",
+        )
+
+
+class FakeBatchEngine(FakeEngine):
+    """Engine stub recording batch calls with their sample rate"""
+
+    def __init__(self):
+        super().__init__()
+        self.batch_calls = []
+
+    def transcribe_batch(self, audio_batch, sample_rate=16000):
+        self.batch_calls.append((len(audio_batch), sample_rate))
+        return [
+            SimpleNamespace(text=f"{sample_rate} {len(audio)}") for audio in audio_batch
+        ]
+
+
+def test_frame_roundtrip():
+    """Test protocol framing"""
+    left, right = socket.socketpair()
+    try:
+        send_frame(left, MSG_AUDIO, b"\x01\x02")
+        assert recv_frame(right) == (MSG_AUDIO, b"\x01\x02")
+    finally:
+        left.close()
+        right.close()
+
+
+def test_stream_session_segments_by_stream_time():
+    """Test per-session VAD and segmentation on stream time"""
+    session = StreamSession("s1", send_event=lambda e: None, silence_timeout=1.0)
+    signal = generate_test_signal(8.0, speech_duration=2.0, pause_duration=2.0, seed=1)
+
+    segments = session.feed_audio((signal * 32767).astype(np.int16))
+    last = session.finish()
+    if last is not None:
+        segments.append(last)
+
+    assert len(segments) >= 2
+    assert session.stream_time == pytest.approx(8.0, abs=0.01)
+    assert all(s.end_time <= 8.0 for s in segments)
+
+
+def test_server_multiple_sessions():
+    """Test concurrent sessions share the worker pool"""
+    server = STTServer(port=0, engine_factory=FakeEngine, num_workers=2)
+    assert server.start()
+    try:
+        clients = [
+            STTStreamClient(port=server.port, session_id=f"c{i}") for i in range(3)
+        ]
+        signal = generate_test_signal(6.0, speech_duration=2.0, pause_duration=2.5)
+        for client in clients:
+            client.connect()
+            stream_signal(client, signal, realtime=False)
+
+        for client in clients:
+            events = client.wait_for_end(timeout=10.0)
+            client.close()
+            kinds = [e["event"] for e in events]
+            assert kinds[0] == "session_started"
+            assert "transcription" in kinds
+            assert kinds[-1] == "session_ended"
+
+        stats = server.get_statistics()
+        assert stats["server"]["total_sessions"] == 3
+        assert stats["pool"]["total_jobs"] >= 3
+        assert all(s["avg_latency"] >= 0 for s in stats["finished_sessions"])
+    finally:
+        server.stop()
+
+
+def test_server_rejects_sessions_over_capacity():
+    """Test admission control rejects sessions beyond estimated capacity"""
+    controller = AdmissionController(parallelism=1, headroom=0.0, initial_rtf=1.0)
+    server = STTServer(
+        port=0,
+        engine_factory=FakeEngine,
+        num_workers=1,
+        admission_controller=controller,
+    )
+    assert server.start()
+    try:
+        clients = [
+            STTStreamClient(port=server.port, session_id=f"c{i}") for i in range(3)
+        ]
+        for client in clients[:2]:
+            client.connect()
+            assert client.events.get(timeout=5.0)["event"] == "session_started"
+
+        clients[2].connect()
+        events = clients[2].wait_for_end(timeout=5.0)
+        assert events[0]["event"] == "rejected"
+
+        for client in clients[:2]:
+            client.end_stream()
+            assert client.wait_for_end(timeout=5.0)[-1]["event"] == "session_ended"
+
+        deadline = time.time() + 5.0
+        while controller.get_statistics()["active_sessions"] and time.time() < deadline:
+            time.sleep(0.01)
+        assert controller.get_statistics()["active_sessions"] == 0
+        assert server.get_statistics()["admission"]["rejected"] == 1
+    finally:
+        for client in clients:
+            client.close()
+        server.stop()
+
+
+def test_worker_pool_batches_per_sample_rate():
+    """Test cross-session batches never mix sessions with different sample rates"""
+    results = {}
+    jobs = []
+    for i, sample_rate in enumerate([16000, 48000, 16000, 48000, 8000]):
+        session = SimpleNamespace(
+            session_id=f"s{i}",
+            previous_text="",
+            on_transcription=lambda job, result: results.update(
+                {job.segment_index: result.text}
+            ),
+        )
+        audio = np.zeros(sample_rate, dtype=np.float32)
+        segment = SimpleNamespace(
+            audio_data=audio, sample_rate=sample_rate, num_samples=len(audio)
+        )
+        jobs.append(TranscriptionJob(session, segment, i))
+
+    engine = FakeBatchEngine()
+    STTWorkerPool(FakeBatchEngine)._run_batch(engine, jobs)
+
+    assert sorted(engine.batch_calls) == [(2, 16000), (2, 48000)]
+    assert results == {
+        0: "16000 16000",
+        1: "48000 48000",
+        2: "16000 16000",
+        3: "48000 48000",
+        4: "segment 8000",
+    }
+
+
+def test_statistics_bounded_on_long_running_server():
+    """Test per-session latencies and finished sessions do not grow without bound"""
+    session = StreamSession("s1", send_event=lambda e: None)
+    segment = SimpleNamespace(start_time=0.0, end_time=1.0, transcription=None)
+    for i in range(LATENCY_WINDOW + 50):
+        job = TranscriptionJob(session, segment, i, submitted_at=time.time() - i)
+        session.on_transcription(job, None)
+
+    stats = session.get_statistics()
+    assert len(session.latencies) == LATENCY_WINDOW
+    assert stats["segments_transcribed"] == LATENCY_WINDOW + 50
+    assert stats["max_latency"] >= LATENCY_WINDOW + 49
+    assert stats["avg_latency"] >= (LATENCY_WINDOW + 49) / 2
+
+    server = STTServer(port=0, engine_factory=FakeEngine)
+    for i in range(FINISHED_SESSIONS_LIMIT + 5):
+        server._close_session(StreamSession(f"c{i}", send_event=lambda e: None))
+    finished = server.get_statistics()["finished_sessions"]
+    assert len(finished) == FINISHED_SESSIONS_LIMIT
+    assert finished[-1]["session_id"] == f"c{FINISHED_SESSIONS_LIMIT + 4}"
+
+
+def test_server_rejects_duplicate_session_id():
+    """Test a second connection cannot take over an active session id"""
+    controller = AdmissionController(parallelism=4)
+    server = STTServer(
+        port=0, engine_factory=FakeEngine, admission_controller=controller
+    )
+    assert server.start()
+    clients = [STTStreamClient(port=server.port, session_id="c0") for _ in range(3)]
+    try:
+        clients[0].connect()
+        assert clients[0].events.get(timeout=5.0)["event"] == "session_started"
+
+        clients[1].connect()
+        events = clients[1].wait_for_end(timeout=5.0)
+        assert events[0]["event"] == "rejected"
+        assert events[0]["reason"] == "duplicate_session_id"
+        assert controller.get_statistics()["active_sessions"] == 1
+
+        clients[0].end_stream()
+        assert clients[0].wait_for_end(timeout=5.0)[-1]["event"] == "session_ended"
+
+        # The id is free again once the session has ended
+        deadline = time.time() + 5.0
+        while server._session_ids and time.time() < deadline:
+            time.sleep(0.01)
+        clients[2].connect()
+        assert clients[2].events.get(timeout=5.0)["event"] == "session_started"
+        assert server.get_statistics()["server"]["total_sessions"] == 2
+    finally:
+        for client in clients:
+            client.close()
+        server.stop()
+
+
+def test_rejected_submit_reports_segment_shed():
+    """Test a job the pool does not accept is reported instead of awaited"""
+    events = []
+    server = STTServer(port=0, engine_factory=FakeEngine)
+    server.pool.submit = lambda job, timeout=None: False
+    session = StreamSession("s1", send_event=events.append)
+    segment = SimpleNamespace(start_time=0.0, end_time=1.0, transcription=None)
+
+    server._submit(session, segment)
+
+    assert [e["event"] for e in events] == ["segment_shed"]
+    assert session.wait_for_pending(timeout=0.1)
+    assert session.get_statistics()["pending_jobs"] == 0
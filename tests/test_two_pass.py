@@ -0,0 +1,152 @@
+"""
+Tests for two-pass transcription refiner
+"""
+
+import threading
+import time
+import pytest
+import numpy as np
+import sys
+from pathlib import Path
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from speech_segmenter import SpeechSegment
+from stt_backend import TranscriptionResult
+from two_pass import (
+    REFINE_DELAY_WINDOW,
+    REVISION_FINAL,
+    REVISION_PROVISIONAL,
+    TwoPassRefiner,
+)
+
+
+def make_result(text: str) -> TranscriptionResult:
+    """Create a transcription result"""
+    return TranscriptionResult(
+        text=text,
+        language="pl",
+        confidence=0.9,
+        processing_time=0.01,
+        segments=[],
+        model_used="stub",
+    )
+
+
+def make_segment(text: str) -> SpeechSegment:
+    """Create a segment with provisional text"""
+    now = time.time()
+    return SpeechSegment(
+        audio_data=np.zeros(16000, dtype=np.float32),
+        start_time=now - 1.0,
+        end_time=now,
+        confidence=1.0,
+        sample_rate=16000,
+        transcription=make_result(text),
+        revision=REVISION_PROVISIONAL,
+    )
+
+
+class LargeEngine:
+    """Engine stub producing refined text"""
+
+    def __init__(self):
+        self.calls = 0
+        self.previous_text = ""
+        self.contexts = []
+
+    def transcribe_audio(self, audio_data, sample_rate=16000):
+        self.calls += 1
+        self.contexts.append(self.previous_text)
+        self.previous_text = f"final {self.calls}"
+        return make_result(f"final {self.calls}")
+
+
+def test_refiner_replaces_text_with_final_revision():
+    """Test the second tier updates segments in place and notifies"""
+    refiner = TwoPassRefiner(LargeEngine(), resume_delay=0.0)
+    revised = []
+    refiner.revision_callback = revised.append
+    segment = make_segment("tiny")
+
+    refiner.start()
+    try:
+        refiner.submit(segment)
+        assert refiner.wait_idle(timeout=5.0)
+    finally:
+        refiner.stop()
+
+    assert revised == [segment]
+    assert segment.revision == REVISION_FINAL
+    assert segment.text == "final 1"
+    stats = refiner.get_statistics()
+    assert stats["refined"] == 1
+    assert stats["changed"] == 1
+
+
+def test_refiner_yields_while_live_tier_busy():
+    """Test refinement waits while the live tier has work"""
+    busy = threading.Event()
+    busy.set()
+    engine = LargeEngine()
+    refiner = TwoPassRefiner(engine, live_busy=busy.is_set, resume_delay=0.05)
+    segment = make_segment("tiny")
+
+    refiner.start()
+    try:
+        refiner.submit(segment)
+        time.sleep(0.3)
+        assert engine.calls == 0
+        assert segment.revision == REVISION_PROVISIONAL
+
+        busy.clear()
+        assert refiner.wait_idle(timeout=5.0)
+    finally:
+        refiner.stop()
+
+    assert segment.revision == REVISION_FINAL
+    assert refiner.get_statistics()["yields"] >= 1
+
+
+def test_refiner_drops_oldest_when_full():
+    """Test the pending queue keeps the newest segments"""
+    refiner = TwoPassRefiner(LargeEngine(), max_pending=2)
+    segments = [make_segment(f"tiny {i}") for i in range(3)]
+    for segment in segments:
+        refiner.submit(segment)
+
+    stats = refiner.get_statistics()
+    assert stats["dropped"] == 1
+    assert stats["pending"] == 2
+    assert segments[0].revision == REVISION_PROVISIONAL
+
+
+def test_refine_delays_bounded():
+    """Test refinement delay statistics keep only a recent window"""
+    refiner = TwoPassRefiner(LargeEngine())
+    for i in range(REFINE_DELAY_WINDOW + 10):
+        refiner._refine(make_segment(f"tiny {i}"))
+
+    stats = refiner.get_statistics()
+    assert len(refiner.refine_delays) == REFINE_DELAY_WINDOW
+    assert stats["refined"] == REFINE_DELAY_WINDOW + 10
+
+
+def test_refiner_does_not_prompt_with_later_text():
+    """Test newest-first refinement never conditions on a later segment"""
+    engine = LargeEngine()
+    refiner = TwoPassRefiner(engine, resume_delay=0.0)
+    segments = [make_segment(f"tiny {i}") for i in range(3)]
+    for segment in segments:
+        refiner.submit(segment)
+
+    refiner.start()
+    try:
+        assert refiner.wait_idle(timeout=5.0)
+    finally:
+        refiner.stop()
+
+    assert engine.calls == 3
+    assert engine.contexts == ["", "", ""]
+    assert segments[2].text == "final 1"
@@ -10,7 +10,13 @@ from pathlib import Path
 # Add src to path
 sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
 
-from voice_activity_detector import SimpleVAD, VADMode
+from voice_activity_detector import (
+    CascadedVAD,
+    SimpleVAD,
+    SpectralVAD,
+    VADMode,
+    create_vad,
+)
 
 
 def test_simple_vad_init():
@@ -56,3 +62,130 @@ def test_simple_vad_statistics():
     assert "current_state" in stats
     assert "energy_threshold" in stats
     assert "zcr_threshold" in stats
+
+
+def office_noise(seconds, seed=0):
+    """Stationary fan noise with keyboard clicks"""
+    rng = np.random.default_rng(seed)
+    n = int(seconds * 16000)
+    noise = rng.normal(0, 0.01, n)
+    for start in rng.integers(0, n - 128, int(seconds * 6)):
+        noise[start : start + 128] += rng.normal(0, 0.2, 128) * np.exp(
+            -np.arange(128) / 24
+        )
+    return noise.astype(np.float32)
+
+
+def voiced(seconds, f0=140.0):
+    """Harmonic speech-like signal with syllable-rate envelope"""
+    t = np.arange(int(seconds * 16000)) / 16000
+    audio = sum(np.sin(2 * np.pi * f0 * k * t) / np.sqrt(k) for k in range(2, 20))
+    envelope = np.clip(np.sin(2 * np.pi * 4 * t), 0, None) ** 0.7
+    return (0.05 * audio * envelope).astype(np.float32)
+
+
+def run_vad(vad, audio, chunk_size=1024):
+    return [
+        vad.process_chunk(audio[i : i + chunk_size])
+        for i in range(0, len(audio) - chunk_size + 1, chunk_size)
+    ]
+
+
+def test_spectral_vad_ignores_office_noise_and_detects_speech():
+    """Test SpectralVAD stays silent on noise and clicks but detects voiced audio"""
+    vad = SpectralVAD()
+    noise = office_noise(4.0)
+
+    results = run_vad(vad, noise)
+    assert not any(is_speech for is_speech, _ in results)
+
+    speech = office_noise(2.0, seed=1) + voiced(2.0)
+    results = run_vad(vad, speech)
+    assert any(is_speech for is_speech, _ in results)
+
+
+def test_spectral_vad_frame_decisions_and_int16():
+    """Test per-frame decisions cover every frame across chunk boundaries"""
+    vad = SpectralVAD(frame_duration_ms=20)
+    audio = (office_noise(1.0) * 32767).astype(np.int16)
+
+    frames = sum(
+        len(analysis["frame_decisions"]) for _, analysis in run_vad(vad, audio, 1000)
+    )
+    assert frames == len(audio) // vad.frame_size
+    assert vad.get_statistics()["frames_processed"] == frames
+    assert vad.get_statistics()["noise_level_db"] is not None
+
+
+def test_create_vad_by_name():
+    """Test VAD factory"""
+    assert isinstance(create_vad("spectral"), SpectralVAD)
+    assert isinstance(create_vad("cascade"), CascadedVAD)
+    assert isinstance(create_vad("simple"), SimpleVAD)
+    with pytest.raises(ValueError):
+        create_vad("unknown")
+
+
+def test_cascaded_vad_matches_spectral_and_skips_silence():
+    """Test cascade follows the full classifier while escalating few quiet frames"""
+    audio = np.concatenate([office_noise(4.0), office_noise(2.0, seed=1) + voiced(2.0)])
+    audio = np.concatenate([audio, office_noise(3.0, seed=2)])
+    cascade, spectral = CascadedVAD(), SpectralVAD()
+
+    agree = frames = 0
+    for (_, fast), (_, full) in zip(run_vad(cascade, audio), run_vad(spectral, audio)):
+        agree += sum(a == b for a, b in zip(fast["frame_states"], full["frame_states"]))
+        frames += len(full["frame_states"])
+    assert agree / frames > 0.98
+
+    stats = cascade.get_statistics()
+    assert stats["frames_processed"] == frames
+    assert 0 < stats["escalation_ratio"] < 0.6
+
+    # Silence only: just noise-model probes and ambiguous frames
+    quiet = CascadedVAD()
+    run_vad(
+        quiet, np.random.default_rng(3).normal(0, 0.01, 16000 * 5).astype(np.float32)
+    )
+    assert quiet.get_statistics()["escalation_ratio"] < 0.15
+
+
+def test_adaptive_vad_thresholds_follow_noise_floor():
+    """Test adaptive SimpleVAD works on quiet and loud microphones alike"""
+    for gain in (0.05, 1.0, 8.0):
+        audio = np.concatenate(
+            [office_noise(3.0), office_noise(2.0, seed=1) + voiced(2.0)]
+        )
+        audio = np.clip(audio * gain, -1, 1).astype(np.float32)
+        vad = create_vad("adaptive", calibration_frames=10)
+
+        results = run_vad(vad, audio)
+        split = int(3.0 * 16000) // 1024
+        assert not any(is_speech for is_speech, _ in results[:split])
+        assert any(is_speech for is_speech, _ in results[split:])
+        assert vad.get_statistics()["noise_floor_db"] is not None
+
+    # Calibration frames are always silence
+    vad = create_vad("adaptive", calibration_frames=5)
+    loud = voiced(1.0)
+    assert not any(is_speech for is_speech, _ in run_vad(vad, loud)[:5])
+
+
+def test_process_batch_matches_per_chunk():
+    """Test vectorized backlog processing gives the same decisions as process_chunk"""
+    audio = np.concatenate([office_noise(2.0), office_noise(2.0, seed=1) + voiced(2.0)])
+    chunks = [audio[i : i + 1000] for i in range(0, len(audio) - 999, 1000)]
+
+    for vad_type in ("simple", "adaptive", "spectral"):
+        single = create_vad(vad_type, calibration_frames=5)
+        batched = create_vad(vad_type, calibration_frames=5)
+        expected = [single.process_chunk(chunk) for chunk in chunks]
+        # Nierówne wsady: pojedynczy chunk, krótka i długa zaległość
+        results = []
+        for start, stop in ((0, 1), (1, 4), (4, 40), (40, len(chunks))):
+            results += batched.process_batch(chunks[start:stop])
+
+        assert [s for s, _ in results] == [s for s, _ in expected]
+        for (_, got), (_, want) in zip(results, expected):
+            assert got.get("frame_states") == want.get("frame_states")
+            assert abs(got["energy"] - want["energy"]) < 1e-5
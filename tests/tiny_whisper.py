@@ -0,0 +1,29 @@
+"""
+Tiny random-weight Whisper model shared by the model loading tests
+"""
+
+import torch
+from whisper.model import ModelDimensions, Whisper
+
+
+def make_tiny_whisper(
+    n_state: int = 32, n_audio_layer: int = 1, n_text_layer: int = 1
+) -> Whisper:
+    """Build a deterministic Whisper with real vocabulary and context sizes"""
+    dims = ModelDimensions(
+        n_mels=80,
+        n_audio_ctx=1500,
+        n_audio_state=n_state,
+        n_audio_head=2,
+        n_audio_layer=n_audio_layer,
+        n_vocab=51865,
+        n_text_ctx=448,
+        n_text_state=n_state,
+        n_text_head=2,
+        n_text_layer=n_text_layer,
+    )
+    torch.manual_seed(0)
+    model = Whisper(dims).eval()
+    # positional_embedding dekodera to torch.empty - ustal wartości
+    torch.nn.init.normal_(model.decoder.positional_embedding)
+    return model